@@ -0,0 +1,61 @@
+"""
+Dashboard activity log store: append cost on a fresh log versus one that has already spilled
+a large history to disk, and the cost of paging a window of old entries back in.
+
+    python benchmarks/bench_activity_log.py [--quick] [--save] [--compare]
+"""
+
+import functools
+import sys
+
+from harness import Scenario, main
+
+from activity_log import ActivityLog
+
+SUITE = "activity_log"
+MESSAGE = "[ALERT] Movement Anomaly (High): Erratic mouse pattern (z=4.2)"
+
+
+def _filled(n):
+    log = ActivityLog()
+    for i in range(n):
+        log.append(MESSAGE, ts=float(i))
+    return log
+
+
+def append_scenario(prefill, n):
+    def setup():
+        log = _filled(prefill)
+        try:
+            for _ in range(n):
+                yield functools.partial(log.append, MESSAGE)
+        finally:
+            log.close()
+    return setup
+
+
+def page_scenario(prefill, n, lines=100):
+    def setup():
+        log = _filled(prefill)
+        try:
+            step = max(1, log.spilled // n)
+            for i in range(n):
+                start = (i * step) % max(1, log.spilled - lines)
+                yield functools.partial(log.get, start, start + lines)
+        finally:
+            log.close()
+    return setup
+
+
+def scenarios(quick=False):
+    n = 5000 if quick else 50000
+    history = 20000 if quick else 500000
+    return [
+        Scenario("activity_log.append@empty", append_scenario(0, n)),
+        Scenario(f"activity_log.append@{history}", append_scenario(history, n)),
+        Scenario(f"activity_log.get[100]@{history}", page_scenario(history, n // 50)),
+    ]
+
+
+if __name__ == "__main__":
+    sys.exit(main(SUITE, scenarios))
@@ -0,0 +1,227 @@
+"""
+Agent process host: what crossing the process boundary costs, and what it buys.
+
+Latency rows time the transport: one event pushed to and popped from a SharedRing (private
+and shared memory), and one anomaly dict encoded to a ring record and decoded back.
+
+The extra numbers put a UI-like thread and agent-like work on either side of the GIL, with the
+agent side on a thread of this process ("thread") or in a spawned child ("process"):
+  - lateness_ms: a listener callback that asks to run every millisecond records how late it
+    woke up, while the UI thread is idle or draws back-to-back 16 ms frames of pure Python
+  - frame_ms: the time the UI thread needs for one such frame while the agents are idle or a
+    detector computes without pause
+  - event_ms: end to end through GuardioEngine(agent_process=True), from an agent's put() in
+    the child to on_anomaly in the parent, with the engine loop otherwise idle
+On one core the process still shares the CPU with the UI, so frame times cannot stay flat
+under a busy detector; what goes away is waiting for the GIL (switch interval 5 ms).
+
+    python benchmarks/bench_agent_host.py [--quick] [--save] [--compare]
+"""
+
+import functools
+import multiprocessing
+import os
+import sys
+import threading
+import time
+
+from harness import Scenario, main, percentile
+
+from agent_host import decode_record, encode_event
+from agents.ring_buffer import SharedRing
+
+SUITE = "agent_host"
+FRAME_MS = 16.0
+EVENT = {"source": "Typing", "severity": "Medium", "message": "Keystroke delay 412ms (z=3.4)"}
+
+
+def push_pop(ring, payload):
+    ring.push(payload)
+    ring.pop()
+
+
+def ring_scenario(shared, n):
+    def setup():
+        ring = SharedRing(1 << 16, shared=shared)
+        payload = encode_event(EVENT)
+        try:
+            for _ in range(n):
+                yield functools.partial(push_pop, ring, payload)
+        finally:
+            ring.close(unlink=True)
+    return setup
+
+
+def roundtrip(event):
+    return decode_record(encode_event(event))
+
+
+def codec_scenario(n):
+    def setup():
+        for _ in range(n):
+            yield functools.partial(roundtrip, EVENT)
+    return setup
+
+
+# GIL isolation
+def spin(iterations):
+    """Pure Python work: holds the GIL throughout"""
+    x = 0
+    for i in range(iterations):
+        x += i
+    return x
+
+
+def calibrate(ms):
+    """Iterations of spin() taking about ms milliseconds uncontended"""
+    n = 100000
+    t0 = time.perf_counter()
+    spin(n)
+    return max(1, int(n * ms / 1000.0 / (time.perf_counter() - t0)))
+
+
+def listener(duration, conn=None):
+    """A callback every millisecond; lateness of each wakeup in ms"""
+    if conn is not None:
+        conn.send("ready")
+    perf = time.perf_counter
+    work = calibrate(0.05)
+    late = []
+    end = perf() + duration
+    due = perf() + 0.001
+    while due < end:
+        delay = due - perf()
+        if delay > 0:
+            time.sleep(delay)
+        late.append((perf() - due) * 1000.0)
+        spin(work)
+        due = perf() + 0.001
+    if conn is not None:
+        conn.send(late)
+    return late
+
+
+def detector(duration, conn=None):
+    """Detection math without pause"""
+    if conn is not None:
+        conn.send("ready")
+    end = time.perf_counter() + duration
+    work = calibrate(1.0)
+    while time.perf_counter() < end:
+        spin(work)
+    if conn is not None:
+        conn.send([])
+    return []
+
+
+def ui(duration, frames, iterations):
+    """Back-to-back frames of `iterations` when frames, else idle; frame times in ms"""
+    perf = time.perf_counter
+    end = perf() + duration
+    times = []
+    while perf() < end:
+        if not frames:
+            time.sleep(0.01)
+            continue
+        t0 = perf()
+        spin(iterations)
+        times.append((perf() - t0) * 1000.0)
+    return times
+
+
+def run_pair(mode, agent, ui_frames, duration, iterations):
+    """Run agent (listener or detector) on a thread or in a child next to the UI loop.
+    Returns (agent results, frame times)"""
+    if mode == "thread":
+        out = []
+        thread = threading.Thread(target=lambda: out.extend(agent(duration)))
+        thread.start()
+        frames = ui(duration, ui_frames, iterations)
+        thread.join()
+        return out, frames
+    ctx = multiprocessing.get_context("spawn")
+    conn, child_conn = ctx.Pipe()
+    process = ctx.Process(target=agent, args=(duration, child_conn))
+    process.start()
+    conn.recv()  # the child has started
+    frames = ui(duration, ui_frames, iterations)
+    result = conn.recv()
+    process.join()
+    return result, frames
+
+
+def summary(values):
+    values = sorted(values)
+    return {"p50": round(percentile(values, 50), 2), "p99": round(percentile(values, 99), 2)}
+
+
+class ProbeAgent:
+    """Puts an anomaly carrying its time.monotonic() every 5 ms"""
+    metrics_name = "probe"
+    stats_source = None  # publishes no stats
+
+    def __init__(self, anomaly_queue, stats_queue, sigma=3.0, cooldown=3.0):
+        self.anomaly_queue = anomaly_queue
+
+    async def run_async(self, runtime):
+        while not await runtime.wait_stopped(0.005):
+            self.anomaly_queue.put({"source": "Typing", "severity": "Low",
+                                    "message": repr(time.monotonic())})
+
+
+class _Latency:
+    def __init__(self):
+        self.ms = []
+
+    def on_anomaly(self, event, risk_score):
+        self.ms.append((time.monotonic() - float(event["message"])) * 1000.0)
+
+
+def event_latency(duration):
+    """put() in the child to on_anomaly() in this process, in ms"""
+    from engine import GuardioEngine
+    engine = GuardioEngine(agent_factories=[ProbeAgent], agent_process=True)
+    probe = _Latency()
+    engine.subscribe(probe)
+    engine.start()
+    end = time.time() + duration
+    while time.time() < end:
+        engine.wakeup.clear()
+        if not engine.process_pending():
+            engine.wakeup.wait(0.1)
+    engine.stop()
+    return probe.ms[5:]  # skip the child's first wakeups
+
+
+def isolation(quick=False):
+    duration = 1.0 if quick else 3.0
+    iterations = calibrate(FRAME_MS)
+    results = {"cpus": os.cpu_count()}
+    for mode in ("thread", "process"):
+        for ui_frames, label in ((False, "ui idle"), (True, "ui busy")):
+            late, _ = run_pair(mode, listener, ui_frames, duration, iterations)
+            for key, value in summary(late).items():
+                results[f"{mode}.lateness_ms[{label}].{key}"] = value
+        for agent, label in ((None, "agents idle"), (detector, "detector busy")):
+            if agent is None:
+                frames = ui(duration, True, iterations)
+            else:
+                _, frames = run_pair(mode, agent, True, duration, iterations)
+            for key, value in summary(frames).items():
+                results[f"{mode}.frame_ms[{label}].{key}"] = value
+    for key, value in summary(event_latency(duration)).items():
+        results[f"process.event_ms.{key}"] = value
+    return results
+
+
+def scenarios(quick=False):
+    n = 20000 if quick else 200000
+    return [
+        Scenario("ring.push+pop", ring_scenario(False, n)),
+        Scenario("ring[shared].push+pop", ring_scenario(True, n)),
+        Scenario("event.encode+decode", codec_scenario(n)),
+    ]
+
+
+if __name__ == "__main__":
+    sys.exit(main(SUITE, scenarios, extra=isolation))
@@ -0,0 +1,266 @@
+"""
+Micro-benchmarks for the agent hot paths that run once per OS input event.
+
+Synthetic drivers feed the listener callbacks (MovementAgent._on_move, TypingAgent._on_press), the
+detection run per drained sample (MovementAgent._ingest/_step, TypingAgent._process_key/_calculate_wpm)
+and AppUsageAgent._detect directly, with a virtual clock standing in for time.time() and a
+FakeFocusSource for the active window, so no display, pynput listener or X server is needed.
+
+    python benchmarks/bench_agents.py                # full run
+    python benchmarks/bench_agents.py --quick        # fewer events
+    python benchmarks/bench_agents.py --compare      # exit 1 on p99 regressions vs. baseline
+    python benchmarks/bench_agents.py --save         # refresh benchmarks/baselines/agents.json
+"""
+
+import functools
+import math
+import queue
+import random
+import sys
+
+from harness import Scenario, VirtualClock, main
+
+from agents.app_usage_agent import AppUsageAgent
+from agents.focus_sources import FakeFocusSource
+from agents.movement_agent import MovementAgent
+from agents.digraph_matrix import key_code
+from agents.typing_agent import TypingAgent
+
+SUITE = "agents"
+UI_DRAIN_INTERVAL = 0.1  # the dashboard drains agent queues every 100 ms
+
+
+class SyntheticKey:
+    """Stand-in for pynput's KeyCode/Key: printable keys have a char, special keys don't"""
+    __slots__ = ("char",)
+
+    def __init__(self, char):
+        self.char = char
+
+
+def _drain(*queues):
+    for q in queues:
+        while True:
+            try:
+                q.get_nowait()
+            except queue.Empty:
+                break
+
+
+def _with_clock(agent):
+    clock = VirtualClock()
+    agent._now = clock
+    return clock
+
+
+# Synthetic streams
+
+def mouse_stream(rate_hz, n, seed=1):
+    """Mouse positions sampled at rate_hz: smooth strokes with occasional fast flicks and pauses"""
+    rng = random.Random(seed)
+    x, y = 960.0, 540.0
+    heading = 0.0
+    speed = 600.0  # px/s
+    for i in range(n):
+        dt = (1.0 / rate_hz) * rng.uniform(0.9, 1.1)
+        if i % 500 == 0:
+            speed = rng.choice((200.0, 600.0, 1200.0, 4000.0))
+        if rng.random() < 0.002:
+            dt += rng.uniform(0.2, 1.5)  # user paused
+        heading += rng.gauss(0.0, 0.05)
+        x = min(max(x + math.cos(heading) * speed * dt, 0.0), 3840.0)
+        y = min(max(y + math.sin(heading) * speed * dt, 0.0), 2160.0)
+        yield int(x), int(y), dt
+
+
+def key_stream(wpm, n, burst=None, seed=2):
+    """Keystrokes at a target WPM (5 chars per word) with ~15% special keys.
+    burst=(length, pause) types `length` keys then pauses for `pause` seconds."""
+    rng = random.Random(seed)
+    mean_delay = 60.0 / (wpm * 5.0)
+    letters = "etaoinshrdlucmfwypvbgkqjxz"
+    for i in range(n):
+        dt = max(0.001, rng.gauss(mean_delay, mean_delay * 0.25))
+        if burst and i and i % burst[0] == 0:
+            dt += burst[1]
+        char = None if rng.random() < 0.15 else rng.choice(letters)
+        yield SyntheticKey(char), dt
+
+
+def focus_stream(n, apps=8, switch_every=3, new_title_rate=0.05, poll_interval=2.0, seed=3):
+    """Active-window identities polled every poll_interval seconds"""
+    rng = random.Random(seed)
+    usual = [f"app{i}:Document {i}" for i in range(apps)]
+    current = usual[0]
+    novel = 0
+    for i in range(n):
+        if i % switch_every == 0:
+            if rng.random() < new_title_rate:
+                novel += 1
+                current = f"browser:Tab {novel}"
+            else:
+                current = rng.choice(usual)
+        yield current, poll_interval
+
+
+# Scenarios
+
+def movement_ingest(rate_hz, n):
+    """Detection cost per mouse sample (what the agent thread runs per drained sample)"""
+    def setup():
+        aq, sq = queue.Queue(), queue.Queue()
+        agent = MovementAgent(aq, sq)
+        clock = _with_clock(agent)
+        since_drain = 0.0
+        for x, y, dt in mouse_stream(rate_hz, n):
+            clock.advance(dt)
+            since_drain += dt
+            if since_drain >= UI_DRAIN_INTERVAL:
+                _drain(aq, sq)
+                since_drain = 0.0
+            yield functools.partial(agent._ingest, x, y, clock())
+    return setup
+
+
+def movement_on_move(n):
+    """Listener callback cost: ingest only, drained outside the timed region"""
+    def setup():
+        agent = MovementAgent(queue.Queue(), queue.Queue())
+        clock = _with_clock(agent)
+        for i, (x, y, dt) in enumerate(mouse_stream(1000, n)):
+            clock.advance(dt)
+            if i % agent.max_batch == 0:
+                agent.samples.pop_batch(agent.samples.capacity)
+            yield functools.partial(agent._on_move, x, y)
+    return setup
+
+
+def movement_ingest_batch(size, n):
+    """Vectorized detection on a drained micro-batch (one timed call per batch)"""
+    def setup():
+        aq, sq = queue.Queue(), queue.Queue()
+        agent = MovementAgent(aq, sq)
+        clock = _with_clock(agent)
+        batch = []
+        for x, y, dt in mouse_stream(1000, n):
+            clock.advance(dt)
+            batch.append((x, y, clock()))
+            if len(batch) == size:
+                _drain(aq, sq)
+                yield functools.partial(agent._ingest_batch, batch)
+                batch = []
+    return setup
+
+
+def movement_step(n):
+    def setup():
+        aq, sq = queue.Queue(), queue.Queue()
+        agent = MovementAgent(aq, sq)
+        clock = _with_clock(agent)
+        # Warm the profiles once, then time _step alone
+        for x, y, dt in mouse_stream(1000, 200):
+            clock.advance(dt)
+            agent._ingest(x, y, clock())
+        since_drain = 0.0
+        for x, y, dt in mouse_stream(1000, n, seed=7):
+            clock.advance(dt)
+            since_drain += dt
+            if since_drain >= UI_DRAIN_INTERVAL:
+                _drain(aq, sq)
+                since_drain = 0.0
+            yield functools.partial(agent._step, x, y, clock())
+    return setup
+
+
+def typing_process_key(wpm, n, burst=None):
+    """Detection cost per keystroke (what the agent thread runs per drained sample)"""
+    def setup():
+        aq, sq = queue.Queue(), queue.Queue()
+        agent = TypingAgent(aq, sq)
+        clock = _with_clock(agent)
+        agent.last_ts = clock()
+        since_drain = 0.0
+        for key, dt in key_stream(wpm, n, burst=burst):
+            clock.advance(dt)
+            since_drain += dt
+            if since_drain >= UI_DRAIN_INTERVAL:
+                _drain(aq, sq)
+                since_drain = 0.0
+            yield functools.partial(agent._process_key, clock(), key.char is not None, key_code(key))
+    return setup
+
+
+def typing_on_press(n):
+    """Listener callback cost: ingest only, drained outside the timed region"""
+    def setup():
+        agent = TypingAgent(queue.Queue(), queue.Queue())
+        clock = _with_clock(agent)
+        for i, (key, dt) in enumerate(key_stream(150, n)):
+            clock.advance(dt)
+            if i % agent.max_batch == 0:
+                agent.samples.pop_batch(agent.samples.capacity)
+            yield functools.partial(agent._on_press, key)
+    return setup
+
+
+def typing_calculate_wpm(wpm, n):
+    def setup():
+        aq, sq = queue.Queue(), queue.Queue()
+        agent = TypingAgent(aq, sq)
+        clock = _with_clock(agent)
+        agent.last_ts = clock()
+        # Fill a full 60 s window, then time _calculate_wpm as the window slides
+        for key, dt in key_stream(wpm, int(wpm * 5)):
+            clock.advance(dt)
+            agent._process_key(clock(), True)
+        _drain(aq, sq)
+        step = 60.0 / (wpm * 5.0)
+        for _ in range(n):
+            clock.advance(step)
+            agent.wpm_window.add(clock())
+            yield agent._calculate_wpm
+    return setup
+
+
+def appusage_detect(n, **stream_kwargs):
+    def setup():
+        aq, sq = queue.Queue(), queue.Queue()
+        source = FakeFocusSource()
+        agent = AppUsageAgent(aq, sq, focus_source=source)
+        clock = _with_clock(agent)
+        for app, dt in focus_stream(n, poll_interval=agent.poll_interval, **stream_kwargs):
+            clock.advance(dt)
+            source.focus(app)
+            _drain(aq, sq)
+            yield agent._detect
+    return setup
+
+
+def scenarios(quick=False):
+    scale = 0.1 if quick else 1.0
+
+    def n(count):
+        return max(100, int(count * scale))
+
+    return [
+        Scenario("movement._on_move", movement_on_move(n(50000)), "listener callback, ingest only"),
+        Scenario("movement._ingest@125Hz", movement_ingest(125, n(20000)), "office mouse"),
+        Scenario("movement._ingest@1000Hz", movement_ingest(1000, n(50000)), "gaming mouse"),
+        Scenario("movement._ingest_batch[256]", movement_ingest_batch(256, n(50000)), "per 256-sample batch"),
+        Scenario("movement._step@1000Hz", movement_step(n(50000)), "warm profiles"),
+        Scenario("typing._on_press", typing_on_press(n(20000)), "listener callback, ingest only"),
+        Scenario("typing._process_key@60wpm", typing_process_key(60, n(10000)), "steady typing"),
+        Scenario("typing._process_key@150wpm-burst", typing_process_key(150, n(20000), burst=(40, 1.5)),
+                 "150 WPM bursts with pauses"),
+        Scenario("typing._process_key@paste", typing_process_key(2400, n(20000)), "paste-like 200 chars/s"),
+        Scenario("typing._calculate_wpm@150wpm", typing_calculate_wpm(150, n(20000)), "full 60 s window"),
+        Scenario("typing._calculate_wpm@paste", typing_calculate_wpm(24000, n(20000)),
+                 "60 s window holding 120k pasted chars"),
+        Scenario("appusage._detect@8apps", appusage_detect(n(5000)), "8 usual apps, few new titles"),
+        Scenario("appusage._detect@tab-churn", appusage_detect(n(5000), switch_every=1, new_title_rate=0.5),
+                 "every poll a switch, half of them new titles"),
+    ]
+
+
+if __name__ == "__main__":
+    sys.exit(main(SUITE, scenarios))
@@ -0,0 +1,82 @@
+"""
+AppUsageAgent over long uptimes: per-poll cost and memory as distinct window identities
+accumulate (browser tabs and document titles are part of the identity, so a long session
+sees thousands).
+
+Each latency row first feeds the agent N distinct titles (a focus switch every 6 s,
+half of them to a new title), then times _detect on more of the same. The extra numbers
+report the agent's memory and its snapshot section size after N titles.
+
+    python benchmarks/bench_app_usage.py [--quick] [--save] [--compare]
+"""
+
+import functools
+import sys
+import tracemalloc
+
+from harness import Scenario, VirtualClock, main
+
+from agents.app_usage_agent import AppUsageAgent
+from agents.focus_sources import FakeFocusSource
+from agents.snapshot import encode_sections
+
+SUITE = "app_usage"
+USUAL = [f"app{i}:Document {i}" for i in range(8)]
+
+
+def churn(start=0):
+    """Endless focus switches every 6 s, every other one to a title never seen before"""
+    i = start
+    while True:
+        yield f"browser:Tab {i} - Example Site With A Long Title" if i % 2 else USUAL[i // 2 % 8]
+        i += 1
+
+
+class _Discard:
+    def put(self, item):
+        pass
+
+
+def agent_after(titles):
+    """AppUsageAgent (and its clock) that has seen `titles` distinct new titles"""
+    agent = AppUsageAgent(_Discard(), _Discard(), focus_source=FakeFocusSource())
+    clock = VirtualClock()
+    agent._now = clock
+    apps = churn()
+    for _ in range(titles * 2):
+        clock.advance(6.0)
+        agent._detect(next(apps), clock())
+    return agent, clock
+
+
+def detect_scenario(titles, n):
+    def setup():
+        agent, clock = agent_after(titles)
+        apps = churn(titles * 2)
+        for _ in range(n):
+            clock.advance(6.0)
+            yield functools.partial(agent._detect, next(apps), clock())
+    return setup
+
+
+def footprint(quick=False):
+    results = {}
+    for titles in ((1000, 10000) if quick else (1000, 10000, 50000)):
+        tracemalloc.start()
+        before = tracemalloc.get_traced_memory()[0]
+        agent, _ = agent_after(titles)
+        used = tracemalloc.get_traced_memory()[0] - before
+        tracemalloc.stop()
+        results[f"titles={titles}.agent_kb"] = round(used / 1024, 1)
+        results[f"titles={titles}.snapshot_kb"] = round(len(encode_sections([agent], details=True)[b"APPS"][1]) / 1024, 1)
+    return results
+
+
+def scenarios(quick=False):
+    n = 1000 if quick else 5000
+    return [Scenario(f"appusage._detect[after {titles} titles]", detect_scenario(titles, n))
+            for titles in ((0, 10000) if quick else (0, 10000, 50000))]
+
+
+if __name__ == "__main__":
+    sys.exit(main(SUITE, scenarios, extra=footprint))
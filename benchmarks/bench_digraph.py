@@ -0,0 +1,131 @@
+"""
+Per-digraph keystroke timing: DigraphMatrix cost per keystroke and what it detects that the
+single overall delay profile cannot.
+
+Latency rows time one observe() on a matrix cell, on the sparse fallback (keys outside the
+matrix) and on a plain AdaptiveProfile for reference, and one TypingAgent._process_key with
+and without key codes. The extra numbers give the matrix memory and snapshot size after
+training, and, at sigma=3, the share of keystrokes flagged for the trained typist and for an
+impostor whose delays have the same overall distribution but belong to different key pairs.
+
+    python benchmarks/bench_digraph.py [--quick] [--save] [--compare]
+"""
+
+import functools
+import queue
+import random
+import sys
+
+from harness import Scenario, VirtualClock, main
+
+from agents.adaptive_profile import AdaptiveProfile
+from agents.digraph_matrix import SPECIAL, DigraphMatrix
+from agents.snapshot import encode_sections
+from agents.typing_agent import TypingAgent
+
+SUITE = "digraph"
+SIGMA = 3.0
+KEYS = [ord(c) for c in "etaoinshrdlucmfwypvbgkqjxz "]
+
+
+def typist(seed):
+    """Mean flight time (s) per digraph, 80-300 ms"""
+    rng = random.Random(seed)
+    return {(a, b): rng.uniform(0.08, 0.3) for a in KEYS for b in KEYS}
+
+
+def keystrokes(means, n, seed=1):
+    """(previous code, code, delay) of n keystrokes, delays ~15% around the digraph mean"""
+    rng = random.Random(seed)
+    prev = rng.choice(KEYS)
+    for _ in range(n):
+        code = rng.choice(KEYS)
+        mean = means[prev, code]
+        yield prev, code, max(0.011, rng.gauss(mean, mean * 0.15))
+        prev = code
+
+
+def trained(n):
+    matrix = DigraphMatrix()
+    profile = AdaptiveProfile()
+    for prev, code, delay in keystrokes(typist(1), n):
+        matrix.observe(prev, code, delay)
+        profile.observe(delay)
+    return matrix, profile
+
+
+def matrix_scenario(n, offset=0):
+    def setup():
+        matrix = DigraphMatrix()
+        for prev, code, delay in keystrokes(typist(1), n):
+            yield functools.partial(matrix.observe, prev + offset, code + offset, delay)
+    return setup
+
+
+def profile_scenario(n):
+    def setup():
+        profile = AdaptiveProfile()
+        for _, _, delay in keystrokes(typist(1), n):
+            yield functools.partial(profile.observe, delay)
+    return setup
+
+
+def process_key_scenario(n, codes):
+    def setup():
+        agent = TypingAgent(queue.Queue(), queue.Queue())
+        clock = VirtualClock()
+        agent._now = clock
+        agent.last_ts = clock()
+        for i, (_, code, delay) in enumerate(keystrokes(typist(1), n)):
+            clock.advance(delay)
+            if i % 1000 == 0:
+                agent.anomaly_queue.queue.clear()
+                agent.stats_queue.queue.clear()
+            yield functools.partial(agent._process_key, clock(), True, code if codes else -1)
+    return setup
+
+
+def flagged_pct(matrix, profile, means, n, seed):
+    """Share of keystrokes over sigma, scored the way TypingAgent does (digraph z once that
+    digraph is ready, else the overall profile), and with the overall profile alone"""
+    by_digraph = overall = 0
+    for prev, code, delay in keystrokes(means, n, seed=seed):
+        z = profile.observe(delay)
+        zd = matrix.observe(prev, code, delay)
+        overall += z is not None and z > SIGMA
+        z = zd if zd is not None else z
+        by_digraph += z is not None and z > SIGMA
+    return round(100 * by_digraph / n, 2), round(100 * overall / n, 2)
+
+
+def detection(quick=False):
+    n = 50000 if quick else 200000
+    matrix, profile = trained(n)
+    results = {
+        "matrix_kb": round(3 * matrix.mean.nbytes / 1024, 1),
+        "digraphs": len(matrix),
+    }
+    agent = TypingAgent(queue.Queue(), queue.Queue())
+    agent.digraphs = matrix
+    results["snapshot_kb"] = round(len(encode_sections([agent], details=True)[agent.state_tag][1]) / 1024, 1)
+    for name, means, seed in (("typist", typist(1), 2), ("impostor", typist(99), 3)):
+        m, p = trained(n)
+        digraph, overall = flagged_pct(m, p, means, 5000, seed)
+        results[f"{name}.digraph.flagged_pct"] = digraph
+        results[f"{name}.overall.flagged_pct"] = overall
+    return results
+
+
+def scenarios(quick=False):
+    n = 20000 if quick else 200000
+    return [
+        Scenario("digraph.observe[matrix]", matrix_scenario(n)),
+        Scenario("digraph.observe[sparse]", matrix_scenario(n, offset=SPECIAL)),
+        Scenario("adaptive_profile.observe", profile_scenario(n)),
+        Scenario("typing._process_key[no codes]", process_key_scenario(n, codes=False)),
+        Scenario("typing._process_key[codes]", process_key_scenario(n, codes=True)),
+    ]
+
+
+if __name__ == "__main__":
+    sys.exit(main(SUITE, scenarios, extra=detection))
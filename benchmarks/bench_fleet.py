@@ -0,0 +1,144 @@
+"""
+Fleet ingest server: per-frame detection cost in process, and end-to-end throughput for
+1k-10k concurrent sessions.
+
+The latency rows feed one second of a synthetic user (100 Hz mouse, 3 keys/s) to
+FleetServer.handle_frame, rotating over 1000 user profiles. The extra numbers start
+`main.py --serve` on a Unix socket in a subprocess, drive it with fleet_loadgen for each
+session count and report:
+  - offered and processed events/s, and how long the server took to drain after the last
+    frame was sent (near zero when it keeps up)
+  - server CPU (as % of one core) and events per CPU-second (its capacity)
+  - the server's peak RSS, and the memory one user profile adds (tracemalloc, in process)
+The load generator runs on the same machine, so on few cores the two compete for CPU.
+
+    python benchmarks/bench_fleet.py [--quick] [--save] [--compare]
+"""
+
+import asyncio
+import functools
+import json
+import os
+import signal
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+import tracemalloc
+
+from harness import Scenario, main, ROOT
+
+from fleet import FleetServer, _Session, encode_hello
+from fleet_loadgen import encode_trace, generate
+
+SUITE = "fleet"
+MOUSE_HZ = 20.0   # average over a working day: the mouse moves part of the time
+KEYS_HZ = 2.0
+
+
+def frame_scenario(n, profiles=1000):
+    def setup():
+        t0 = time.time()
+        bodies = [data[4:] for data, _ in encode_trace(max(n // profiles, 1) + 1, 1.0, 100.0, 3.0, t0, 1)]
+        server = FleetServer()
+        sessions = []
+        for i in range(profiles):
+            session = _Session()
+            server.handle_frame(session, encode_hello(f"user-{i}", t=t0)[0])
+            sessions.append(session)
+        for i in range(n):
+            yield functools.partial(server.handle_frame, sessions[i % profiles],
+                                    bodies[i // profiles])
+    return setup
+
+
+def _cpu_seconds(pid):
+    with open(f"/proc/{pid}/stat") as f:
+        fields = f.read().rsplit(")", 1)[1].split()
+    return (int(fields[11]) + int(fields[12])) / os.sysconf("SC_CLK_TCK")
+
+
+def _wait_idle(pid, settle=0.5, timeout=120.0):
+    """Wait until the server stops using CPU; returns when it went idle"""
+    deadline = time.perf_counter() + timeout
+    last = _cpu_seconds(pid)
+    while time.perf_counter() < deadline:
+        time.sleep(settle)
+        now = _cpu_seconds(pid)
+        if now - last < settle * 0.02:
+            return time.perf_counter() - settle
+        last = now
+    return time.perf_counter()
+
+
+def end_to_end(sessions, duration, directory, args=()):
+    path = os.path.join(directory, f"fleet-{sessions}.sock")
+    address = f"unix:{path}"
+    server = subprocess.Popen(
+        [sys.executable, os.path.join(ROOT, "src", "main.py"), "--serve", address, "--metrics", *args],
+        stdout=subprocess.PIPE, stderr=subprocess.STDOUT, text=True)
+    try:
+        for _ in range(100):
+            if os.path.exists(path):
+                break
+            time.sleep(0.05)
+        # Drain the server's alert output so its pipe never fills
+        output = []
+        reader = threading.Thread(target=lambda: output.extend(server.stdout), daemon=True)
+        reader.start()
+
+        cpu0 = _cpu_seconds(server.pid)
+        start = time.perf_counter()
+        sent = asyncio.run(generate(address, sessions, duration, mouse_hz=MOUSE_HZ, keys_hz=KEYS_HZ))
+        sent_done = time.perf_counter()
+        idle = _wait_idle(server.pid)
+        cpu = _cpu_seconds(server.pid) - cpu0
+    finally:
+        server.send_signal(signal.SIGINT)
+        _, status, usage = os.wait4(server.pid, 0)
+        reader.join(timeout=5)
+
+    text = "".join(output)
+    metrics = json.loads(text[text.index("{\n"):])
+    processed = metrics["fleet.events"]
+    busy = max(idle, sent_done) - start
+    return {
+        f"sessions={sessions}.offered_events_per_s": round(sent["events"] / (sent_done - start)),
+        f"sessions={sessions}.processed_events_per_s": round(processed / busy),
+        f"sessions={sessions}.all_processed": processed == sent["events"],
+        f"sessions={sessions}.drain_after_last_frame_s": round(max(0.0, idle - sent_done), 2),
+        f"sessions={sessions}.late_frames": sent["late_frames"],
+        f"sessions={sessions}.server_cpu_pct": round(cpu / busy * 100, 1),
+        f"sessions={sessions}.events_per_cpu_s": round(processed / cpu) if cpu else None,
+        f"sessions={sessions}.frame_p50_us": metrics["fleet.frame"]["p50_us"],
+        f"sessions={sessions}.peak_rss_mb": round(usage.ru_maxrss / 1024, 1),
+    }
+
+
+def profile_kb(count=1000):
+    server = FleetServer()
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    for i in range(count):
+        server.profile(f"user-{i}")
+    used = tracemalloc.get_traced_memory()[0] - before
+    tracemalloc.stop()
+    return round(used / count / 1024, 1)
+
+
+def throughput(quick=False):
+    results = {"kb_per_profile": profile_kb()}
+    with tempfile.TemporaryDirectory() as directory:
+        for sessions in ((1000,) if quick else (1000, 5000, 10000)):
+            results.update(end_to_end(sessions, 5 if quick else 20, directory))
+    return results
+
+
+def scenarios(quick=False):
+    n = 1000 if quick else 10000
+    return [Scenario("fleet.handle_frame[1s@100Hz]", frame_scenario(n))]
+
+
+if __name__ == "__main__":
+    sys.exit(main(SUITE, scenarios, extra=throughput))
@@ -0,0 +1,102 @@
+"""
+Listener-callback latency with a live detection worker.
+
+MovementAgent runs on its own thread exactly as in production (run() draining its SampleBuffer)
+while this thread plays the pynput listener, calling _on_move at 1000 Hz. The detector is made
+artificially slower (busy-spin per sample) to show that callback latency stays flat no matter
+what detection costs. The "inline" rows run detection inside the callback, as agents did before
+callbacks became ingest-only.
+
+    python benchmarks/bench_ingest.py [--quick] [--save] [--compare]
+"""
+
+import functools
+import math
+import queue
+import sys
+import threading
+import time
+
+from harness import Scenario, main
+
+from agents.movement_agent import MovementAgent
+
+SUITE = "ingest"
+RATE_HZ = 1000
+
+
+class NullListener:
+    def start(self):
+        pass
+
+    def stop(self):
+        pass
+
+
+def _spin(seconds):
+    end = time.perf_counter() + seconds
+    while time.perf_counter() < end:
+        pass
+
+
+class SlowMovementAgent(MovementAgent):
+    """MovementAgent with a configurable extra detection cost and no OS listener"""
+    def __init__(self, *args, detector_cost=0.0, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.detector_cost = detector_cost
+
+    def _make_listener(self):
+        return NullListener()
+
+    def _ingest(self, x, y, t):
+        super()._ingest(x, y, t)
+        if self.detector_cost:
+            _spin(self.detector_cost)
+
+
+def _paced_positions(n):
+    period = 1.0 / RATE_HZ
+    next_tick = time.perf_counter()
+    for i in range(n):
+        next_tick += period
+        delay = next_tick - time.perf_counter()
+        if delay > 0:
+            time.sleep(delay)
+        yield int(960 + 400 * math.cos(i / 50)), int(540 + 300 * math.sin(i / 50))
+
+
+def callback_scenario(n, detector_cost, inline):
+    def setup():
+        agent = SlowMovementAgent(queue.Queue(), queue.Queue(), detector_cost=detector_cost)
+        if inline:
+            def callback(x, y):
+                agent._ingest(x, y, agent._now())
+            for x, y in _paced_positions(n):
+                yield functools.partial(callback, x, y)
+            return
+
+        stop = threading.Event()
+        worker = threading.Thread(target=agent.run, args=(stop,), daemon=True)
+        worker.start()
+        try:
+            for x, y in _paced_positions(n):
+                yield functools.partial(agent._on_move, x, y)
+        finally:
+            stop.set()
+            worker.join(timeout=2.0)
+    return setup
+
+
+def scenarios(quick=False):
+    n = 500 if quick else 3000
+    result = []
+    for cost_us in (0, 50, 500):
+        for inline in (True, False):
+            mode = "inline" if inline else "ingest"
+            result.append(Scenario(f"movement.callback[{mode}]+{cost_us}us",
+                                   callback_scenario(n, cost_us / 1e6, inline)))
+    return result
+
+
+if __name__ == "__main__":
+    sys.exit(main(SUITE, scenarios))
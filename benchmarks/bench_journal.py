@@ -0,0 +1,144 @@
+"""
+Event journal: cost of appending the batches the agents drain, size on disk, and sequential
+read speed.
+
+The mouse stream is a 1000 Hz trace of continuous motion (strokes of 0-3000 px/s with
+timestamp jitter), i.e. the worst case: a real session only records samples while the mouse
+moves. mb_per_hour extrapolates that stream to an hour; encode_cpu_pct is the share of one
+core spent journaling it.
+
+    python benchmarks/bench_journal.py [--quick] [--save] [--compare]
+"""
+
+import functools
+import math
+import os
+import random
+import sys
+import tempfile
+import time
+
+from harness import Scenario, main
+
+from agents.journal import Journal, JournalReader
+
+SUITE = "journal"
+RATE_HZ = 1000
+BATCH = 256
+
+
+def mouse_trace(n, seed=7):
+    """[(x, y, t)] at RATE_HZ with strokes of changing speed and direction"""
+    rng = random.Random(seed)
+    x, y, t = 800.0, 450.0, 1_700_000_000.0
+    heading, speed = 0.0, 0.0
+    samples = []
+    for i in range(n):
+        if i % 300 == 0:
+            heading = rng.uniform(0, 2 * math.pi)
+            speed = rng.uniform(0, 3000)  # px/s
+        heading += rng.gauss(0, 0.05)
+        x += math.cos(heading) * speed / RATE_HZ
+        y += math.sin(heading) * speed / RATE_HZ
+        t += 1 / RATE_HZ + rng.uniform(-1e-4, 1e-4)
+        samples.append((int(x), int(y), t))
+    return samples
+
+
+def key_trace(n, seed=11):
+    rng = random.Random(seed)
+    t = 1_700_000_000.0
+    samples = []
+    for _ in range(n):
+        t += rng.uniform(0.05, 0.3)
+        samples.append((t, rng.random() < 0.85))
+    return samples
+
+
+def _batches(samples):
+    return [samples[i:i + BATCH] for i in range(0, len(samples), BATCH)]
+
+
+def moves_scenario(n):
+    def setup():
+        batches = _batches(mouse_trace(n * BATCH))
+        with tempfile.TemporaryDirectory() as directory:
+            journal = Journal(directory)
+            for batch in batches:
+                yield functools.partial(journal.moves, batch)
+            journal.close()
+    return setup
+
+
+def keys_scenario(n):
+    def setup():
+        batches = [b[:16] for b in _batches(key_trace(n * BATCH))]
+        with tempfile.TemporaryDirectory() as directory:
+            journal = Journal(directory)
+            for batch in batches:
+                yield functools.partial(journal.keys, batch)
+            journal.close()
+    return setup
+
+
+def _drain(reader):
+    n = 0
+    for _ in reader.records():
+        n += 1
+    return n
+
+
+def read_scenario(n, samples):
+    def setup():
+        with tempfile.TemporaryDirectory() as directory:
+            journal = Journal(directory)
+            for batch in _batches(mouse_trace(samples)):
+                journal.moves(batch)
+            journal.close()
+            reader = JournalReader(directory)
+            for _ in range(n):
+                yield functools.partial(_drain, reader)
+    return setup
+
+
+def sizes(quick=False):
+    seconds = 60 if quick else 300
+    samples = mouse_trace(seconds * RATE_HZ)
+    keys = key_trace(seconds * 5)
+    with tempfile.TemporaryDirectory() as directory:
+        journal = Journal(directory, segment_bytes=1 << 20)
+        t0 = time.perf_counter()
+        for batch in _batches(samples):
+            journal.moves(batch)
+        encode_s = time.perf_counter() - t0
+        for batch in _batches(keys):
+            journal.keys(batch)
+        journal.close()
+        size = sum(os.path.getsize(os.path.join(directory, p)) for p in os.listdir(directory))
+
+        t0 = time.perf_counter()
+        read = _drain(JournalReader(directory))
+        read_s = time.perf_counter() - t0
+
+    mouse_bytes = size - len(keys) * 3  # keys are ~3 bytes each
+    return {
+        "mouse.bytes_per_sample": round(mouse_bytes / len(samples), 2),
+        "mouse.mb_per_hour_1000hz": round(mouse_bytes / len(samples) * RATE_HZ * 3600 / 1e6, 1),
+        "mouse.raw_tuple_bytes_per_sample": 24,  # three 8-byte fields, before any encoding
+        "mouse.encode_cpu_pct_1000hz": round(encode_s / seconds * 100, 2),
+        "read.records_per_s": round(read / read_s),
+        "segments_roundtrip_ok": read == len(samples) + len(keys),
+    }
+
+
+def scenarios(quick=False):
+    n = 100 if quick else 1000
+    return [
+        Scenario(f"journal.moves[{BATCH}]", moves_scenario(n)),
+        Scenario("journal.keys[16]", keys_scenario(n)),
+        Scenario("journal.read[10k moves]", read_scenario(max(n // 20, 5), 10_000)),
+    ]
+
+
+if __name__ == "__main__":
+    sys.exit(main(SUITE, scenarios, extra=sizes))
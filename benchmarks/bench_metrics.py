@@ -0,0 +1,64 @@
+"""
+Cost of the metrics registry on the hot paths it instruments, enabled versus disabled.
+
+Rows time one counter inc(), one histogram observe_ns(), and one MovementAgent._on_move call
+through the listener wrapper that metrics.timed() installs (unwrapped when disabled).
+
+    python benchmarks/bench_metrics.py [--quick] [--save] [--compare]
+"""
+
+import functools
+import queue
+import sys
+
+from harness import Scenario, main
+
+from agents.metrics import MetricsRegistry
+from agents.movement_agent import MovementAgent
+
+SUITE = "metrics"
+
+
+def counter_scenario(n, enabled):
+    def setup():
+        counter = MetricsRegistry(enabled=enabled).counter("bench.counter")
+        for _ in range(n):
+            yield counter.inc
+    return setup
+
+
+def histogram_scenario(n, enabled):
+    def setup():
+        histogram = MetricsRegistry(enabled=enabled).histogram("bench.histogram")
+        for i in range(n):
+            yield functools.partial(histogram.observe_ns, 800 + (i % 5000))
+    return setup
+
+
+def callback_scenario(n, enabled):
+    def setup():
+        agent = MovementAgent(queue.Queue(), queue.Queue())
+        agent.metrics = MetricsRegistry(enabled=enabled)
+        callback = agent.metrics.timed("movement.callback", agent._on_move)
+        for i in range(n):
+            if i % 1024 == 0:
+                agent.samples.pop_batch(4096)
+            yield functools.partial(callback, 100 + i % 500, 200 + i % 300)
+    return setup
+
+
+def scenarios(quick=False):
+    n = 20000 if quick else 200000
+    result = []
+    for enabled in (True, False):
+        mode = "on" if enabled else "off"
+        result += [
+            Scenario(f"metrics[{mode}].counter.inc", counter_scenario(n, enabled)),
+            Scenario(f"metrics[{mode}].histogram.observe", histogram_scenario(n, enabled)),
+            Scenario(f"metrics[{mode}].movement._on_move", callback_scenario(n, enabled)),
+        ]
+    return result
+
+
+if __name__ == "__main__":
+    sys.exit(main(SUITE, scenarios))
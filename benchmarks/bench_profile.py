@@ -0,0 +1,85 @@
+"""
+AdaptiveProfile: scalar observe() per sample versus update_batch() on micro-batches.
+
+Latency rows time one call (one sample for observe, one whole batch for update_batch).
+The extra numbers give per-sample throughput for each batch size and the largest relative
+deviation of batch z-scores from the sequential scalar path.
+
+    python benchmarks/bench_profile.py [--quick] [--save] [--compare]
+"""
+
+import functools
+import sys
+import time
+
+import numpy as np
+
+from harness import Scenario, main
+
+from agents.adaptive_profile import AdaptiveProfile
+
+SUITE = "profile"
+BATCH_SIZES = (16, 64, 256, 4096)
+
+
+def _speeds(n, seed=4):
+    rng = np.random.default_rng(seed)
+    return rng.lognormal(6.0, 0.8, n)  # heavy-tailed like mouse speed in px/s
+
+
+def observe_scenario(n):
+    def setup():
+        profile = AdaptiveProfile()
+        for v in _speeds(n).tolist():
+            yield functools.partial(profile.observe, v)
+    return setup
+
+
+def batch_scenario(n, size):
+    def setup():
+        profile = AdaptiveProfile()
+        values = _speeds(n)
+        for i in range(0, n - size + 1, size):
+            yield functools.partial(profile.update_batch, values[i:i + size])
+    return setup
+
+
+def throughput(quick=False):
+    n = 50000 if quick else 500000
+    values = _speeds(n)
+    results = {}
+
+    profile = AdaptiveProfile()
+    scalar_z = np.empty(n)
+    t0 = time.perf_counter()
+    for i, v in enumerate(values.tolist()):
+        z = profile.observe(v)
+        scalar_z[i] = np.nan if z is None else z
+    results["observe.samples_per_sec"] = round(n / (time.perf_counter() - t0))
+
+    for size in BATCH_SIZES:
+        profile = AdaptiveProfile()
+        parts = []
+        t0 = time.perf_counter()
+        for i in range(0, n, size):
+            parts.append(profile.update_batch(values[i:i + size]).z)
+        elapsed = time.perf_counter() - t0
+        batch_z = np.concatenate(parts)
+        with np.errstate(invalid="ignore"):
+            rel = np.nanmax(np.abs(batch_z - scalar_z) / np.maximum(np.abs(scalar_z), 1.0))
+        results[f"update_batch[{size}].samples_per_sec"] = round(n / elapsed)
+        results[f"update_batch[{size}].max_rel_z_error"] = float(f"{rel:.3g}")
+    return results
+
+
+def scenarios(quick=False):
+    n = 20000 if quick else 200000
+    return [
+        Scenario("profile.observe", observe_scenario(n)),
+        Scenario("profile.update_batch[64]", batch_scenario(n, 64)),
+        Scenario("profile.update_batch[256]", batch_scenario(n, 256)),
+    ]
+
+
+if __name__ == "__main__":
+    sys.exit(main(SUITE, scenarios, extra=throughput))
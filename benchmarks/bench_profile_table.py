@@ -0,0 +1,183 @@
+"""
+Columnar profile table (src/agents/profile_table.py) against per-user agent objects.
+
+The latency rows score one second of 1000 users (20 Hz mouse, 2 keys/s on average) per
+call: through FleetServer's MovementAgent/TypingAgent objects, through
+ColumnarFleetServer (collect + one flush), and straight on a ProfileTable. The extra
+numbers report:
+  - memory per user: table bytes per row, and tracemalloc'd bytes a user adds to each server,
+    before and after the user's first focus switches (a columnar user gets its
+    AppUsageAgent then)
+  - events/s for 1k and 10k users, objects vs columnar
+  - ShardedScorer events/s with 0 (in process), 1 and 2 worker processes; scaling needs as
+    many free cores as workers, so compare against cpu_count
+  - end-to-end `main.py --serve --columnar` throughput, as in bench_fleet.py
+
+    python benchmarks/bench_profile_table.py [--quick] [--save] [--compare]
+"""
+
+import os
+import sys
+import tempfile
+import time
+import tracemalloc
+
+import numpy as np
+
+from harness import Scenario, main
+
+from agents.profile_table import ProfileTable, ShardedScorer
+from bench_fleet import KEYS_HZ, MOUSE_HZ, end_to_end
+from fleet import ColumnarFleetServer, FleetServer
+from fleet_loadgen import user_events
+
+SUITE = "profile_table"
+TRACES = 8
+FOCUS_APPS = 8  # distinct windows each user switches between in user_bytes(focus=True)
+
+
+def traces(seconds, t0):
+    """Per-trace list of (moves, keys) for each second"""
+    return [[(moves, keys) for moves, keys, _ in user_events(seconds, 1.0, MOUSE_HZ, KEYS_HZ, t0, seed)]
+            for seed in range(TRACES)]
+
+
+def make_server(columnar, users):
+    server = ColumnarFleetServer(max_users=users) if columnar else FleetServer()
+    profiles = [server.profile(f"user-{i}") for i in range(users)]
+    return server, profiles
+
+
+def feed(server, profiles, second, events):
+    """Hand one second of every user's samples to the server; returns the event count"""
+    count = 0
+    for i, profile in enumerate(profiles):
+        moves, keys = events[i % TRACES][second]
+        if moves:
+            server._moves(profile, moves)
+        if keys:
+            server._keys(profile, keys)
+        count += len(moves) + len(keys)
+    if isinstance(server, ColumnarFleetServer):
+        server.flush()
+    return count
+
+
+def server_scenario(columnar, users, seconds):
+    def setup():
+        t0 = time.time()
+        events = traces(seconds, t0)
+        server, profiles = make_server(columnar, users)
+        for second in range(seconds):
+            yield lambda second=second: feed(server, profiles, second, events)
+    return setup
+
+
+def table_batches(users, seconds, t0):
+    """[(moves, keys)] arrays as ColumnarFleetServer hands them to ProfileTable, per second"""
+    events = traces(seconds, t0)
+    batches = []
+    for second in range(seconds):
+        move_rows, xs, ys, ts, key_rows, key_ts = [], [], [], [], [], []
+        for row in range(users):
+            moves, keys = events[row % TRACES][second]
+            move_rows += [row] * len(moves)
+            for x, y, t in moves:
+                xs.append(x)
+                ys.append(y)
+                ts.append(t)
+            key_rows += [row] * len(keys)
+            key_ts += [t for t, _ in keys]
+        batches.append(((np.array(move_rows), np.array(xs, dtype=np.float64),
+                         np.array(ys, dtype=np.float64), np.array(ts)),
+                        (np.array(key_rows), np.array(key_ts))))
+    return batches
+
+
+def table_scenario(users, seconds):
+    def setup():
+        table = ProfileTable(users)
+        for _ in range(users):
+            table.add_row()
+        for moves, keys in table_batches(users, seconds, time.time()):
+            yield lambda moves=moves, keys=keys: (table.score_moves(*moves), table.score_keys(*keys))
+    return setup
+
+
+def user_bytes(columnar, focus=False, count=1000):
+    server = ColumnarFleetServer(max_users=count) if columnar else FleetServer()
+    t0 = time.time()
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    for i in range(count):
+        profile = server.profile(f"user-{i}")
+        if focus:
+            for k in range(FOCUS_APPS):
+                server._focus(profile, f"app-{k}", t0 + 30.0 * k)
+    used = tracemalloc.get_traced_memory()[0] - before
+    tracemalloc.stop()
+    return round(used / count)
+
+
+def events_per_s(columnar, users, seconds):
+    t0 = time.time()
+    events = traces(seconds, t0)
+    server, profiles = make_server(columnar, users)
+    count = 0
+    start = time.perf_counter()
+    for second in range(seconds):
+        count += feed(server, profiles, second, events)
+    return round(count / (time.perf_counter() - start))
+
+
+def pool_events_per_s(workers, users, seconds):
+    table = ProfileTable(users, shared=workers > 0)
+    for _ in range(users):
+        table.add_row()
+    batches = table_batches(users, seconds + 1, time.time())
+    scorer = ShardedScorer(table, workers=workers)
+    try:
+        scorer.score(*batches[0])  # starts the worker processes
+        count = sum(len(m[0]) + len(k[0]) for m, k in batches[1:])
+        start = time.perf_counter()
+        for moves, keys in batches[1:]:
+            scorer.score(moves, keys)
+        return round(count / (time.perf_counter() - start))
+    finally:
+        scorer.close()
+        table.close(unlink=True)
+
+
+def throughput(quick=False):
+    seconds = 3 if quick else 10
+    results = {
+        "cpu_count": os.cpu_count(),
+        "table_bytes_per_user": ProfileTable(1).nbytes,
+        "objects.bytes_per_user": user_bytes(False),
+        "columnar.bytes_per_user": user_bytes(True),
+        "objects.focus.bytes_per_user": user_bytes(False, focus=True),
+        "columnar.focus.bytes_per_user": user_bytes(True, focus=True),
+    }
+    for users in ((1000,) if quick else (1000, 10000)):
+        results[f"users={users}.objects.events_per_s"] = events_per_s(False, users, seconds)
+        results[f"users={users}.columnar.events_per_s"] = events_per_s(True, users, seconds)
+    for workers in (0, 1, 2):
+        results[f"pool.workers={workers}.events_per_s"] = pool_events_per_s(workers, 10000, seconds)
+    with tempfile.TemporaryDirectory() as directory:
+        for sessions in ((1000,) if quick else (1000, 10000)):
+            e2e = end_to_end(sessions, 5 if quick else 20, directory, args=("--columnar",))
+            results.update({f"serve.columnar.{k}": v for k, v in e2e.items()})
+    return results
+
+
+def scenarios(quick=False):
+    seconds = 5 if quick else 20
+    return [
+        Scenario("objects.score[1k users x 1s]", server_scenario(False, 1000, seconds)),
+        Scenario("columnar.score[1k users x 1s]", server_scenario(True, 1000, seconds)),
+        Scenario("profile_table.score[1k users x 1s]", table_scenario(1000, seconds)),
+    ]
+
+
+if __name__ == "__main__":
+    sys.exit(main(SUITE, scenarios, extra=throughput))
@@ -0,0 +1,98 @@
+"""
+Agent queues: the unbounded NotifyingQueue the engine used versus BoundedQueue with each
+policy, when the consumer keeps up and when it stalls.
+
+Latency rows time one put() followed by one get_nowait(), the steady state of an agent
+publishing while the engine drains. The extra numbers stall the consumer: 100k alerts from
+three sources are put with nothing draining, then the queue depth, the memory it holds
+(tracemalloc), the items discarded (and, for "latest", replaced by a newer one) and the
+total time producers spent inside put() are reported per queue. The block policy waits out
+its 0.1 s timeout once, then discards without waiting.
+
+    python benchmarks/bench_queues.py [--quick] [--save] [--compare]
+"""
+
+import functools
+import sys
+import time
+import tracemalloc
+
+from harness import Scenario, main
+
+from wakeup import BoundedQueue, NotifyingQueue, Wakeup
+
+SUITE = "queues"
+SOURCES = ("Movement", "Typing", "AppUsage")
+
+
+def make_queue(policy, maxsize=1024):
+    if policy is None:
+        return NotifyingQueue(Wakeup())
+    return BoundedQueue(Wakeup(), maxsize, policy=policy)
+
+
+def items(n):
+    for i in range(n):
+        yield {"source": SOURCES[i % 3], "severity": "Medium", "message": f"z={i}"}
+
+
+def put_get(q, item):
+    q.put(item)
+    q.get_nowait()
+
+
+def steady_scenario(policy, n):
+    def setup():
+        q = make_queue(policy)
+        for item in items(n):
+            yield functools.partial(put_get, q, item)
+        q.wakeup.close()
+    return setup
+
+
+def stalled(policy, n):
+    """Depth, KB held, items discarded, items replaced and seconds spent in put() with nothing draining"""
+    q = make_queue(policy)
+    perf = time.perf_counter
+    elapsed = 0.0
+    tracemalloc.start()
+    for item in items(n):
+        t0 = perf()
+        q.put(item)
+        elapsed += perf() - t0
+    del item
+    held = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    drops = getattr(q, "drops", 0)
+    replaced = sum(getattr(q, "replaced", {}).values())
+    q.wakeup.close()
+    return q.qsize(), round(held / 1024, 1), drops, replaced, round(elapsed, 3)
+
+
+def stall(quick=False):
+    n = 20000 if quick else 100000
+    results = {}
+    for policy in (None, "drop_oldest", "latest", "block"):
+        name = policy or "unbounded"
+        depth, kb, drops, replaced, seconds = stalled(policy, n)
+        results[f"{name}.depth"] = depth
+        results[f"{name}.held_kb"] = kb
+        results[f"{name}.dropped"] = drops
+        if policy == "latest":
+            results[f"{name}.replaced"] = replaced
+        results[f"{name}.put_seconds"] = seconds
+    return results
+
+
+def scenarios(quick=False):
+    n = 20000 if quick else 200000
+    return [
+        Scenario("notifying_queue.put+get", steady_scenario(None, n)),
+        Scenario("bounded[drop_oldest].put+get", steady_scenario("drop_oldest", n)),
+        Scenario("bounded[latest].put+get", steady_scenario("latest", n)),
+        Scenario("bounded[block].put+get", steady_scenario("block", n)),
+    ]
+
+
+if __name__ == "__main__":
+    sys.exit(main(SUITE, scenarios, extra=stall))
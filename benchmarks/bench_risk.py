@@ -0,0 +1,144 @@
+"""
+Risk scoring: cost per alert of the decayed, correlation-weighted RiskScore, alone, through
+GuardioEngine.process_pending and through the fleet server's per-user scoring, and how its
+critical reports compare with the old integer score (+1/+2/+3 per alert, reset past 15).
+
+Latency rows time one alert each. The fleet row spreads alerts over 10k users at random.
+The extra numbers give fleet throughput in alerts per second, and the criticals and peak
+score of both schemes on alert patterns an hour long or a few seconds long:
+  trickle          one Medium alert every 20 s from one agent (noise)
+  single_burst     six Medium alerts 3 s apart (the cooldown) from one agent
+  correlated       the same six alerts, 1 s apart, from Movement, Typing and AppUsage in turn
+  sustained        Movement and Typing both alerting Medium every 3 s for a minute
+
+    python benchmarks/bench_risk.py [--quick] [--save] [--compare]
+"""
+
+import functools
+import queue
+import random
+import sys
+import time
+
+from harness import Scenario, VirtualClock, main
+
+from engine import GuardioEngine
+from fleet import ColumnarFleetServer
+from risk import CRITICAL_RISK, SEVERITY_POINTS, RiskScore
+
+SUITE = "risk"
+SOURCES = ("Movement", "Typing", "AppUsage")
+SEVERITIES = ("Medium", "Medium", "High", "Low")
+
+
+def alerts(n, seed=1):
+    rng = random.Random(seed)
+    for _ in range(n):
+        yield rng.choice(SOURCES), rng.choice(SEVERITIES), rng.expovariate(2.0)
+
+
+def add_scenario(n):
+    def setup():
+        risk = RiskScore()
+        clock = VirtualClock()
+        for source, severity, dt in alerts(n):
+            clock.advance(dt)
+            yield functools.partial(risk.add, source, severity, clock())
+    return setup
+
+
+def engine_scenario(n):
+    def setup():
+        engine = GuardioEngine(agent_factories=[])
+        engine.anomaly_queue = queue.Queue()  # no wakeup pipe writes in the timed path
+        for source, severity, _ in alerts(n):
+            event = {"source": source, "severity": severity, "message": "bench"}
+            engine.anomaly_queue.put(event)
+            yield engine.process_pending
+    return setup
+
+
+def fleet_server(users):
+    server = ColumnarFleetServer(max_users=users)
+    return server, [server.profile(f"user{i}") for i in range(users)]
+
+
+def fleet_scenario(n, users=10000):
+    def setup():
+        server, profiles = fleet_server(users)
+        rng = random.Random(2)
+        try:
+            for source, severity, _ in alerts(n):
+                event = {"source": source, "severity": severity, "message": "bench"}
+                yield functools.partial(server._on_anomaly, rng.choice(profiles), event)
+        finally:
+            server.table.close()
+    return setup
+
+
+def fleet_throughput(n, users=10000):
+    server, profiles = fleet_server(users)
+    rng = random.Random(3)
+    events = [(rng.choice(profiles), {"source": s, "severity": v, "message": "bench"})
+              for s, v, _ in alerts(n)]
+    t0 = time.perf_counter()
+    for profile, event in events:
+        server._on_anomaly(profile, event)
+    elapsed = time.perf_counter() - t0
+    server.table.close()
+    return round(n / elapsed)
+
+
+def patterns():
+    """{name: [(t, source, severity)]}"""
+    medium = "Medium"
+    return {
+        "trickle": [(20.0 * i, "Movement", medium) for i in range(180)],
+        "single_burst": [(3.0 * i, "Typing", medium) for i in range(6)],
+        "correlated": [(1.0 * i, SOURCES[i % 3], medium) for i in range(6)],
+        "sustained": [(3.0 * i + dt, source, medium) for i in range(20)
+                      for dt, source in ((0.0, "Movement"), (0.5, "Typing"))],
+    }
+
+
+def integer_scoring(events):
+    """The scoring RiskScore replaced: (criticals, peak)"""
+    score = criticals = peak = 0
+    for _, _, severity in events:
+        score += SEVERITY_POINTS.get(severity, 1)
+        peak = max(peak, score)
+        if score > CRITICAL_RISK:
+            criticals += 1
+            score = 0
+    return criticals, peak
+
+
+def decayed_scoring(events):
+    risk = RiskScore()
+    criticals = peak = 0
+    for t, source, severity in events:
+        score, critical = risk.add(source, severity, t)
+        criticals += critical
+        peak = max(peak, score)
+    return criticals, round(peak, 1)
+
+
+def detection(quick=False):
+    results = {"fleet.alerts_per_s": fleet_throughput(20000 if quick else 200000)}
+    for name, events in patterns().items():
+        results[f"{name}.integer.criticals"], results[f"{name}.integer.peak"] = integer_scoring(events)
+        results[f"{name}.decayed.criticals"], results[f"{name}.decayed.peak"] = decayed_scoring(events)
+    return results
+
+
+def scenarios(quick=False):
+    n = 20000 if quick else 200000
+    return [
+        Scenario("risk.add", add_scenario(n)),
+        Scenario("engine.process_pending[1 alert]", engine_scenario(n)),
+        Scenario("fleet._on_anomaly[10k users]", fleet_scenario(n)),
+    ]
+
+
+if __name__ == "__main__":
+    sys.exit(main(SUITE, scenarios, extra=detection))
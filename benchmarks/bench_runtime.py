@@ -0,0 +1,136 @@
+"""
+Agent hosting: one thread per agent (each agent's thread-style run(), as the engine used to
+start them) versus the shared AgentRuntime asyncio loop (run_async()).
+
+Latency rows push one mouse sample through MovementAgent._on_move and spin until the hosting
+thread has drained it. Extra numbers: threads added, idle context switches and idle CPU per
+second for the three production agents and for a 4x larger fleet of them. Listeners are
+replaced by no-ops and AppUsage uses a FakeFocusSource, so no display is needed.
+
+    python benchmarks/bench_runtime.py [--quick] [--save] [--compare]
+"""
+
+import queue
+import resource
+import sys
+import threading
+import time
+
+from harness import Scenario, main
+
+from agents.app_usage_agent import AppUsageAgent
+from agents.focus_sources import FakeFocusSource
+from agents.movement_agent import MovementAgent
+from agents.runtime import AgentRuntime
+from agents.typing_agent import TypingAgent
+
+SUITE = "runtime"
+
+
+class NullListener:
+    def start(self):
+        pass
+
+    def stop(self):
+        pass
+
+
+class QuietMovementAgent(MovementAgent):
+    def _make_listener(self):
+        return NullListener()
+
+
+class QuietTypingAgent(TypingAgent):
+    def _make_listener(self):
+        return NullListener()
+
+
+def _agents(copies=1):
+    agents = []
+    for _ in range(copies):
+        agents.append(QuietMovementAgent(queue.Queue(), queue.Queue()))
+        agents.append(QuietTypingAgent(queue.Queue(), queue.Queue()))
+        agents.append(AppUsageAgent(queue.Queue(), queue.Queue(), focus_source=FakeFocusSource("term")))
+    return agents
+
+
+class Host:
+    """Runs agents either one thread each (threads=True) or on one AgentRuntime"""
+    def __init__(self, agents, threads):
+        self.agents = agents
+        self.threads = threads
+        self.stop_event = threading.Event()
+        self._threads = []
+        self._runtime = None
+
+    def __enter__(self):
+        if self.threads:
+            for agent in self.agents:
+                thread = threading.Thread(target=agent.run, args=(self.stop_event,), daemon=True)
+                thread.start()
+                self._threads.append(thread)
+        else:
+            self._runtime = AgentRuntime(self.stop_event)
+            self._runtime.start(self.agents)
+        time.sleep(0.1)  # let every agent reach its idle wait
+        return self
+
+    def __exit__(self, *exc):
+        if self._runtime is not None:
+            self._runtime.stop()
+        self.stop_event.set()
+        for thread in self._threads:
+            thread.join(timeout=2.0)
+
+
+def latency_scenario(n, threads):
+    def setup():
+        agents = _agents()
+        movement = agents[0]
+        with Host(agents, threads):
+            for i in range(n):
+                time.sleep(0.002)
+
+                def step(i=i, target=movement.samples.popped + 1):
+                    movement._on_move(100 + i % 500, 200 + i % 300)
+                    while movement.samples.popped < target:
+                        time.sleep(0)  # yield the GIL to the hosting thread
+                yield step
+    return setup
+
+
+def _idle(agents, threads, seconds):
+    before = threading.active_count()
+    with Host(agents, threads):
+        added = threading.active_count() - before
+        r0 = resource.getrusage(resource.RUSAGE_SELF)
+        time.sleep(seconds)
+        r1 = resource.getrusage(resource.RUSAGE_SELF)
+    cpu = (r1.ru_utime + r1.ru_stime) - (r0.ru_utime + r0.ru_stime)
+    return added, (r1.ru_nvcsw - r0.ru_nvcsw) / seconds, cpu * 1000 / seconds
+
+
+def idle_cost(quick=False):
+    seconds = 1.0 if quick else 3.0
+    results = {}
+    for copies in (1, 4):
+        for threads in (True, False):
+            mode = "threads" if threads else "runtime"
+            added, csw, cpu_ms = _idle(_agents(copies), threads, seconds)
+            key = f"{mode}[{3 * copies} agents]"
+            results[f"{key}.threads"] = added
+            results[f"{key}.idle_ctx_switches_per_sec"] = round(csw, 1)
+            results[f"{key}.idle_cpu_ms_per_sec"] = round(cpu_ms, 2)
+    return results
+
+
+def scenarios(quick=False):
+    n = 200 if quick else 2000
+    return [
+        Scenario("movement.sample_to_drain[threads]", latency_scenario(n, threads=True)),
+        Scenario("movement.sample_to_drain[runtime]", latency_scenario(n, threads=False)),
+    ]
+
+
+if __name__ == "__main__":
+    sys.exit(main(SUITE, scenarios, extra=idle_cost))
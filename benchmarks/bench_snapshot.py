@@ -0,0 +1,109 @@
+"""
+Baseline snapshots: cost of serializing the agents' learned state on the runtime loop, of
+writing the file (done in the executor in production), and of a warm start (load_into).
+
+Agents are trained with synthetic streams first. The app count drives the AppUsage section;
+rows and sizes are given for a typical desktop (40 apps) and a heavy one (2000 window
+identities, e.g. many browser titles, of which the AppSketch keeps its 256 slots). Rows
+measure snapshots with details (--baseline-details), which include those titles; the
+aggregate_bytes numbers are the default snapshot, which does not.
+
+    python benchmarks/bench_snapshot.py [--quick] [--save] [--compare]
+"""
+
+import functools
+import os
+import queue
+import sys
+import tempfile
+import time
+
+from harness import Scenario, main
+
+from agents.app_usage_agent import AppUsageAgent
+from agents.focus_sources import FakeFocusSource
+from agents.movement_agent import MovementAgent
+from agents.snapshot import BaselineStore, encode_sections, encode_snapshot
+from agents.typing_agent import TypingAgent
+
+SUITE = "snapshot"
+APP_COUNTS = (40, 2000)
+
+
+def trained_agents(apps):
+    movement = MovementAgent(queue.Queue(), queue.Queue())
+    typing = TypingAgent(queue.Queue(), queue.Queue())
+    app_usage = AppUsageAgent(queue.Queue(), queue.Queue(), focus_source=FakeFocusSource())
+    for v in range(1000):
+        movement.profile.update(300.0 + (v % 97))
+        typing.profile.update(0.12 + (v % 13) / 100)
+    for i in range(apps):
+        app = f"browser:Tab {i} - Example Site With A Fairly Long Title"[:60]
+        seconds = 12.5 * (i % 40) + (301 if i % 10 == 0 else 0)
+        app_usage.apps.add(app, 1_000_000.0 + i, count=1 + i % 50, seconds=seconds)
+        app_usage.gap_profile.update(2.0 + i % 7)
+    return [movement, typing, app_usage]
+
+
+def _store(directory, name):
+    return BaselineStore(os.path.join(directory, name))
+
+
+def encode_scenario(n, apps):
+    def setup():
+        agents = trained_agents(apps)
+        for _ in range(n):
+            yield functools.partial(encode_sections, agents, True)
+    return setup
+
+
+def save_scenario(n, apps):
+    def setup():
+        sections = encode_sections(trained_agents(apps), details=True)
+        with tempfile.TemporaryDirectory() as directory:
+            store = _store(directory, "baseline.snap")
+            for _ in range(n):
+                yield functools.partial(store.save, sections)
+    return setup
+
+
+def load_scenario(n, apps):
+    def setup():
+        with tempfile.TemporaryDirectory() as directory:
+            store = _store(directory, "baseline.snap")
+            store.save(encode_sections(trained_agents(apps), details=True))
+            fresh = trained_agents(0)
+            for _ in range(n):
+                yield functools.partial(store.load_into, fresh)
+    return setup
+
+
+def sizes(quick=False):
+    results = {}
+    for apps in (0,) + APP_COUNTS:
+        data = encode_snapshot(encode_sections(trained_agents(apps), details=True))
+        results[f"apps={apps}.snapshot_bytes"] = len(data)
+        results[f"apps={apps}.aggregate_bytes"] = len(encode_snapshot(encode_sections(trained_agents(apps))))
+        with tempfile.TemporaryDirectory() as directory:
+            store = _store(directory, "baseline.snap")
+            store.save(encode_sections(trained_agents(apps), details=True))
+            t0 = time.perf_counter()
+            store.load_into(trained_agents(0))
+            results[f"apps={apps}.warm_start_ms"] = round((time.perf_counter() - t0) * 1000, 3)
+    return results
+
+
+def scenarios(quick=False):
+    n = 200 if quick else 2000
+    result = []
+    for apps in APP_COUNTS:
+        result += [
+            Scenario(f"snapshot.encode[apps={apps}]", encode_scenario(n, apps)),
+            Scenario(f"snapshot.save[apps={apps}]", save_scenario(n // 4, apps)),
+            Scenario(f"snapshot.load_into[apps={apps}]", load_scenario(n, apps)),
+        ]
+    return result
+
+
+if __name__ == "__main__":
+    sys.exit(main(SUITE, scenarios, extra=sizes))
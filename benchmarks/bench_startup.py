@@ -0,0 +1,81 @@
+"""
+Cold start: how long a fresh process needs before monitoring runs.
+
+Every event launches a new interpreter, so the rows are in milliseconds' worth of
+microseconds. The rows are:
+  - python -c pass: the interpreter floor
+  - import main: what the application imports before it parses its arguments
+  - import main + agents: the same plus the agent modules, AgentRuntime and AgentHost,
+    which main.py used to pull in eagerly (NumPy, asyncio)
+  - headless launch: main.py --headless --duration 0, from launch to exit
+The extra numbers are the median of each --profile-startup phase over the launches, with
+"monitoring.at_ms" the time from launch to running agents, next to the budget. The dashboard
+path is not measured here; it needs customtkinter and a display.
+
+    python benchmarks/bench_startup.py [--quick] [--save] [--compare]
+"""
+
+import functools
+import os
+import re
+import statistics
+import subprocess
+import sys
+
+from harness import SRC, Scenario, main
+
+from startup import STARTUP_BUDGET_MS
+
+SUITE = "startup"
+MAIN = os.path.join(SRC, "main.py")
+HEADLESS = [sys.executable, MAIN, "--headless", "--duration", "0", "--no-baseline"]
+EAGER = ("import main, agents.movement_agent, agents.typing_agent, agents.app_usage_agent, "
+         "agents.runtime, agent_host")
+PHASE = re.compile(r"\[Startup\] (\S.*?)\s+([\d.]+) ms\s+at\s+([\d.]+) ms")
+
+
+def launch(argv):
+    subprocess.run(argv, cwd=SRC, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+                   check=True)
+
+
+def launch_scenario(argv, n):
+    def setup():
+        for _ in range(n):
+            yield functools.partial(launch, argv)
+    return setup
+
+
+def phases(n):
+    """Median ms of each --profile-startup phase over n headless launches"""
+    durations, ends = {}, {}
+    for _ in range(n):
+        out = subprocess.run(HEADLESS + ["--profile-startup"], cwd=SRC, capture_output=True,
+                             text=True, check=True).stdout
+        for name, ms, at in PHASE.findall(out):
+            durations.setdefault(name, []).append(float(ms))
+            ends.setdefault(name, []).append(float(at))
+    results = {f"{name}.ms": round(statistics.median(v), 1) for name, v in durations.items()}
+    if "monitoring" in ends:
+        results["monitoring.at_ms"] = round(statistics.median(ends["monitoring"]), 1)
+        results["monitoring.at_ms.max"] = round(max(ends["monitoring"]), 1)
+    results["budget_ms"] = STARTUP_BUDGET_MS
+    return results
+
+
+def profile(quick=False):
+    return phases(5 if quick else 20)
+
+
+def scenarios(quick=False):
+    n = 5 if quick else 20
+    return [
+        Scenario("python -c pass", launch_scenario([sys.executable, "-c", "pass"], n)),
+        Scenario("import main", launch_scenario([sys.executable, "-c", "import main"], n)),
+        Scenario("import main + agents", launch_scenario([sys.executable, "-c", EAGER], n)),
+        Scenario("headless launch", launch_scenario(HEADLESS, n)),
+    ]
+
+
+if __name__ == "__main__":
+    sys.exit(main(SUITE, scenarios, extra=profile))
@@ -0,0 +1,136 @@
+"""
+Agent stats hand-off: a dict per publish through the engine's old stats queue (a
+BoundedQueue keeping the latest item per source) versus overwriting a StatsBoard slot.
+
+Latency rows time one agent publish, and one front-end read of everything that changed after
+three agents published, for the queue and for a private and a shared-memory board. The
+extra numbers give the bytes allocated during one publish (tracemalloc peak, mean of 10k
+publishes), and a consistency check: a writer thread publishes records whose fields are all
+equal while the reader polls. Every record read back must have equal fields. Torn reads are
+skipped and counted.
+
+    python benchmarks/bench_stats.py [--quick] [--save] [--compare]
+"""
+
+import functools
+import sys
+import threading
+import tracemalloc
+
+from harness import Scenario, main
+
+from agents.stats_board import StatsBoard, publish_stats
+from wakeup import BoundedQueue, Wakeup
+
+SUITE = "stats"
+SOURCES = ("Movement", "Typing", "AppUsage")
+
+
+def make_target(kind):
+    if kind == "queue":
+        return BoundedQueue(Wakeup(), 64, policy="latest")
+    return StatsBoard(SOURCES, shared=kind == "shared")
+
+
+def close(target):
+    if isinstance(target, StatsBoard):
+        target.close(unlink=True)
+    else:
+        target.wakeup.close()
+
+
+def publish_scenario(kind, n):
+    def setup():
+        target = make_target(kind)
+        try:
+            for i in range(n):
+                yield functools.partial(publish_stats, target, SOURCES[i % 3], 0.5 + i, 0.1, 1.2,
+                                        "Stable", t=float(i))
+        finally:
+            close(target)
+    return setup
+
+
+def drain(target):
+    if isinstance(target, StatsBoard):
+        return list(target.changed())
+    items = []
+    while not target.empty():
+        items.append(target.get_nowait())
+    return items
+
+
+def read_scenario(kind, n):
+    def setup():
+        target = make_target(kind)
+        try:
+            for i in range(n):
+                for source in SOURCES:
+                    publish_stats(target, source, 0.5 + i, 0.1, 1.2, "Stable", t=float(i))
+                yield functools.partial(drain, target)
+        finally:
+            close(target)
+    return setup
+
+
+def bytes_per_publish(kind, n=10000):
+    """Mean bytes allocated during one publish, freed or not"""
+    target = make_target(kind)
+    total = 0
+    tracemalloc.start()
+    for i in range(n):
+        tracemalloc.reset_peak()
+        before = tracemalloc.get_traced_memory()[0]
+        publish_stats(target, SOURCES[i % 3], 0.5 + i, 0.1, 1.2, "Stable", t=float(i))
+        total += tracemalloc.get_traced_memory()[1] - before
+    tracemalloc.stop()
+    close(target)
+    return round(total / n, 1)
+
+
+def consistency(n):
+    """(records read, inconsistent records, torn reads) with a concurrent writer"""
+    board = StatsBoard(SOURCES)
+    done = threading.Event()
+
+    def writer():
+        for i in range(1, n + 1):
+            v = float(i)
+            board.publish("Typing", v, v, v, "Stable", wpm=v, t=v)
+        done.set()
+
+    thread = threading.Thread(target=writer)
+    reads = bad = 0
+    thread.start()
+    while not done.is_set():
+        stats = board.read("Typing")
+        if stats is None:
+            continue
+        reads += 1
+        bad += not (stats["mean"] == stats["std"] == stats["z"] == stats["wpm"] == stats["t"])
+    thread.join()
+    return reads, bad, board.torn
+
+
+def allocations(quick=False):
+    results = {f"{kind}.bytes_per_publish": bytes_per_publish(kind)
+               for kind in ("queue", "board", "shared")}
+    reads, bad, torn = consistency(200000 if quick else 1000000)
+    results.update({"seqlock.reads": reads, "seqlock.inconsistent": bad, "seqlock.torn": torn})
+    return results
+
+
+def scenarios(quick=False):
+    n = 20000 if quick else 200000
+    return [
+        Scenario("queue.publish", publish_scenario("queue", n)),
+        Scenario("board.publish", publish_scenario("board", n)),
+        Scenario("board[shared].publish", publish_scenario("shared", n)),
+        Scenario("queue.read[3 agents]", read_scenario("queue", n // 3)),
+        Scenario("board.read[3 agents]", read_scenario("board", n // 3)),
+        Scenario("board[shared].read[3 agents]", read_scenario("shared", n // 3)),
+    ]
+
+
+if __name__ == "__main__":
+    sys.exit(main(SUITE, scenarios, extra=allocations))
@@ -0,0 +1,153 @@
+"""
+Mouse trajectory features: the cost of the incremental feature pipeline per sample and per
+micro-batch, and what the extra features detect.
+
+Latency rows time TrajectoryFeatures.step() alone, and MovementAgent._ingest (per sample) and
+process_batch (64 samples, vectorized) with speed only (the default) and with all features
+(opt-in, --movement-features all). The extra numbers check that the vectorized path matches
+the per-sample one (same alerts, profile means within rounding), and count the samples
+flagged at sigma=3, without cooldown, in one minute of human-like movement and in one minute
+of a scripted pointer: constant speed, straight legs, instant right-angle turns. Both come after the same human-like warm-up.
+
+    python benchmarks/bench_trajectory.py [--quick] [--save] [--compare]
+"""
+
+import functools
+import math
+import queue
+import sys
+
+from harness import Scenario, VirtualClock, main
+from bench_agents import mouse_stream
+
+from agents.movement_agent import MovementAgent
+from agents.trajectory import FEATURES, TrajectoryFeatures
+
+SUITE = "trajectory"
+RATE = 125  # Hz, a common USB mouse report rate
+MINUTE = 60 * RATE
+
+
+def scripted(n, x=500.0, y=500.0, speed=600.0, leg=100.0):
+    """Pointer driven by a script: speed px/s along straight legs, turning 90 degrees"""
+    dt = 1.0 / RATE
+    heading = travelled = 0.0
+    for _ in range(n):
+        step = speed * dt
+        x += math.cos(heading) * step
+        y += math.sin(heading) * step
+        travelled += step
+        if travelled >= leg:
+            heading += math.pi / 2
+            travelled = 0.0
+        yield int(x), int(y), dt
+
+
+def agent_with_clock(features, cooldown=3.0):
+    kwargs = {} if features is None else {"features": features}
+    agent = MovementAgent(queue.Queue(), queue.Queue(), cooldown=cooldown, **kwargs)
+    clock = VirtualClock()
+    agent._now = clock
+    return agent, clock
+
+
+def step_scenario(n):
+    def setup():
+        features = TrajectoryFeatures()
+        t = 0.0
+        for x, y, dt in mouse_stream(1000, n):
+            t += dt
+            yield functools.partial(features.step, x, y, t)
+    return setup
+
+
+def ingest_scenario(features, n):
+    def setup():
+        agent, clock = agent_with_clock(features)
+        for i, (x, y, dt) in enumerate(mouse_stream(1000, n)):
+            clock.advance(dt)
+            if i % 1000 == 0:
+                agent.anomaly_queue.queue.clear()
+                agent.stats_queue.queue.clear()
+            yield functools.partial(agent._ingest, x, y, clock())
+    return setup
+
+
+def batch_scenario(features, n, size=64):
+    def setup():
+        agent, clock = agent_with_clock(features)
+        batch = []
+        for x, y, dt in mouse_stream(1000, n):
+            clock.advance(dt)
+            batch.append((x, y, clock()))
+            if len(batch) == size:
+                agent.anomaly_queue.queue.clear()
+                agent.stats_queue.queue.clear()
+                yield functools.partial(agent.process_batch, batch)
+                batch = []
+    return setup
+
+
+def alerts_of(agent):
+    messages = []
+    while not agent.anomaly_queue.empty():
+        messages.append(agent.anomaly_queue.get()["message"])
+    return messages
+
+
+def batch_matches(n, size=64):
+    """Same alerts and profiles from per-sample and vectorized ingestion"""
+    agents = []
+    for batch_min in (10 ** 9, 32):
+        agent, clock = agent_with_clock(FEATURES)
+        agent.vector_batch_min = batch_min
+        batch = []
+        for x, y, dt in mouse_stream(1000, n - n % size):
+            clock.advance(dt)
+            batch.append((x, y, clock()))
+            if len(batch) == size:
+                agent.process_batch(batch)
+                batch = []
+        agents.append(agent)
+    scalar, vector = agents
+    error = max(abs(scalar.profiles[f].mean - vector.profiles[f].mean) / abs(scalar.profiles[f].mean)
+                for f in scalar.features)
+    return alerts_of(scalar) == alerts_of(vector), float(f"{error:.3g}")
+
+
+def flagged(features, warmup):
+    """Samples flagged in a minute of human-like and a minute of scripted movement"""
+    agent, clock = agent_with_clock(features, cooldown=0.0)
+    counts = []
+    for stream in (mouse_stream(RATE, warmup), mouse_stream(RATE, MINUTE, seed=9), scripted(MINUTE)):
+        for x, y, dt in stream:
+            clock.advance(dt)
+            agent._ingest(x, y, clock())
+        counts.append(len(alerts_of(agent)))
+    return counts[1], counts[2]
+
+
+def detection(quick=False):
+    same, error = batch_matches(20000 if quick else 100000)
+    results = {"batch.same_alerts": same, "batch.max_rel_error": error}
+    warmup = 10000 if quick else 40000
+    for name, features in (("speed_only", None), ("all_features", FEATURES)):
+        human, script = flagged(features, warmup)
+        results[f"{name}.human_flagged_per_min"] = human
+        results[f"{name}.scripted_flagged_per_min"] = script
+    return results
+
+
+def scenarios(quick=False):
+    n = 20000 if quick else 200000
+    return [
+        Scenario("trajectory.step@1000Hz", step_scenario(n)),
+        Scenario("movement._ingest[speed]", ingest_scenario(None, n)),
+        Scenario("movement._ingest[all]", ingest_scenario(FEATURES, n)),
+        Scenario("movement.process_batch[64][speed]", batch_scenario(None, n)),
+        Scenario("movement.process_batch[64][all]", batch_scenario(FEATURES, n)),
+    ]
+
+
+if __name__ == "__main__":
+    sys.exit(main(SUITE, scenarios, extra=detection))
@@ -0,0 +1,110 @@
+"""
+Agent-to-UI notification: the old fixed 100 ms after() poll versus the engine's Wakeup channel
+registered as a Tcl file handler (what GuardioApp does when Tk supports it).
+
+A Tcl event loop (tkinter.Tcl(), no display needed) runs on a consumer thread. Each timed
+event puts one alert on a NotifyingQueue and waits until the loop has handled it, so the
+latency is put-to-handler, i.e. alert-to-screen minus drawing. Alerts are spaced at random
+so they do not phase-lock with the poll. Extra numbers: loop wakeups per second while idle.
+
+    python benchmarks/bench_wakeup.py [--quick] [--save] [--compare]
+"""
+
+import random
+import sys
+import threading
+import time
+
+from harness import Scenario, main
+
+from wakeup import Wakeup, NotifyingQueue
+
+SUITE = "wakeup"
+POLL_MS = 100
+
+
+class LoopConsumer:
+    """Tcl event loop on its own thread, draining a queue by polling or on wakeup"""
+    def __init__(self, push):
+        self.push = push
+        self.wakeup = Wakeup()
+        self.queue = NotifyingQueue(self.wakeup)
+        self.wakeups = 0
+        self._stop = threading.Event()
+        self._ready = threading.Event()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+
+    def __enter__(self):
+        self._thread.start()
+        self._ready.wait()
+        return self
+
+    def __exit__(self, *exc):
+        self._stop.set()
+        self.wakeup.notify()  # let the push loop notice the stop
+        self._thread.join(timeout=2.0)
+        self.wakeup.close()
+
+    def _drain(self):
+        self.wakeups += 1
+        while not self.queue.empty():
+            self.queue.get_nowait().set()
+
+    def _run(self):
+        import tkinter
+
+        tcl = tkinter.Tcl()
+        if self.push:
+            def on_wakeup(fileno, mask):
+                self.wakeup.clear()
+                self._drain()
+            tcl.tk.createfilehandler(self.wakeup.fileno(), tkinter.READABLE, on_wakeup)
+        else:
+            def poll():
+                self._drain()
+                tcl.after(POLL_MS, poll)
+            tcl.after(POLL_MS, poll)
+
+        self._ready.set()
+        while not self._stop.is_set():
+            tcl.tk.dooneevent()
+        if self.push:
+            tcl.tk.deletefilehandler(self.wakeup.fileno())
+
+
+def latency_scenario(n, push):
+    def setup():
+        rng = random.Random(10)
+        with LoopConsumer(push) as consumer:
+            for _ in range(n):
+                time.sleep(rng.uniform(0.0, POLL_MS / 1000))
+                handled = threading.Event()
+
+                def step(handled=handled):
+                    consumer.queue.put(handled)
+                    handled.wait(2.0)
+                yield step
+    return setup
+
+
+def idle_wakeups(quick=False):
+    seconds = 1.0 if quick else 3.0
+    results = {}
+    for push in (False, True):
+        with LoopConsumer(push) as consumer:
+            time.sleep(seconds)
+            rate = consumer.wakeups / seconds
+        results[f"{'push' if push else 'poll'}.idle_wakeups_per_sec"] = round(rate, 2)
+    return results
+
+
+def scenarios(quick=False):
+    n = 30 if quick else 200
+    return [
+        Scenario(f"alert_to_handler[poll {POLL_MS}ms]", latency_scenario(n, push=False)),
+        Scenario("alert_to_handler[push]", latency_scenario(n, push=True)),
+    ]
+
+
+if __name__ == "__main__":
+    sys.exit(main(SUITE, scenarios, extra=idle_wakeups))
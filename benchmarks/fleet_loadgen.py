@@ -0,0 +1,173 @@
+"""
+Load generator for the fleet ingest server (src/fleet.py).
+
+Opens --sessions connections, one user each, and every --interval seconds sends each of
+them a frame holding that interval's mouse samples (--mouse-hz), keystrokes (--keys-hz) and
+now and then a focus switch. Frames are encoded up front for --traces distinct synthetic
+users, so the generator spends its time on sockets rather than encoding. Session starts are
+spread over one interval.
+
+    python src/main.py --serve unix:/tmp/guardio.sock --metrics
+    python benchmarks/fleet_loadgen.py unix:/tmp/guardio.sock --sessions 1000 --duration 30
+"""
+
+import argparse
+import asyncio
+import math
+import os
+import random
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+SRC = os.path.join(ROOT, "src")
+if SRC not in sys.path:
+    sys.path.insert(0, SRC)
+
+from fleet import encode_hello, frame  # noqa: E402
+
+APPS = ("code:main.py - Visual Studio Code", "firefox:Inbox - Mail", "slack:general",
+        "terminal:bash", "libreoffice:Q3 report.odt")
+
+
+def user_events(count, interval, mouse_hz, keys_hz, t0, seed):
+    """(moves, keys, focus) for each of `count` intervals of one synthetic user"""
+    rng = random.Random(seed)
+    x, y, heading = 800.0, 450.0, 0.0
+    t_mouse = t_key = t0
+    app = rng.choice(APPS)
+    intervals = []
+    for i in range(count):
+        end = t0 + (i + 1) * interval
+        moves = []
+        while mouse_hz and t_mouse < end:
+            t_mouse += 1 / mouse_hz * rng.uniform(0.9, 1.1)
+            if rng.random() < 0.01:
+                heading = rng.uniform(0, 2 * math.pi)
+            speed = 600 + 400 * math.sin(t_mouse)
+            x += math.cos(heading) * speed / mouse_hz
+            y += math.sin(heading) * speed / mouse_hz
+            moves.append((int(x), int(y), t_mouse))
+        keys = []
+        while keys_hz and t_key < end:
+            t_key += rng.expovariate(keys_hz)
+            keys.append((t_key, rng.random() < 0.85))
+        focus = None
+        if rng.random() < interval / 30:
+            app = rng.choice(APPS)
+            focus = (end, app)
+        intervals.append((moves, keys, focus))
+    return intervals
+
+
+def encode_trace(count, interval, mouse_hz, keys_hz, t0, seed):
+    """[(framed bytes, event count)] for one synthetic user"""
+    _, encoder = encode_hello("trace", t=t0)
+    frames = []
+    for moves, keys, focus in user_events(count, interval, mouse_hz, keys_hz, t0, seed):
+        body = bytearray()
+        if moves:
+            encoder.moves(body, moves)
+        if keys:
+            encoder.keys(body, keys)
+        if focus:
+            encoder.focus(body, *focus)
+        frames.append((frame(bytes(body)), len(moves) + len(keys) + (focus is not None)))
+    return frames
+
+
+class Totals:
+    def __init__(self):
+        self.connected = 0
+        self.failed = 0
+        self.frames = 0
+        self.events = 0
+        self.bytes = 0
+        self.late = 0
+
+
+async def _connect(address):
+    if address.startswith("unix:"):
+        return await asyncio.open_unix_connection(address[len("unix:"):])
+    host, _, port = address.rpartition(":")
+    return await asyncio.open_connection(host or "127.0.0.1", int(port))
+
+
+async def run_session(address, user, t0, frames, interval, delay, totals):
+    loop = asyncio.get_running_loop()
+    await asyncio.sleep(delay)
+    try:
+        _, writer = await _connect(address)
+    except OSError:
+        totals.failed += 1
+        return
+    totals.connected += 1
+    hello, _ = encode_hello(user, t=t0)
+    writer.write(frame(hello))
+    due = loop.time()
+    try:
+        for data, count in frames:
+            writer.write(data)
+            await writer.drain()
+            totals.frames += 1
+            totals.events += count
+            totals.bytes += len(data)
+            due += interval
+            wait = due - loop.time()
+            if wait > 0:
+                await asyncio.sleep(wait)
+            else:
+                totals.late += 1
+    except OSError:
+        totals.failed += 1
+    finally:
+        writer.close()
+
+
+async def generate(address, sessions, duration, interval=1.0, mouse_hz=100.0, keys_hz=3.0,
+                   traces=8):
+    """Run the load; returns a dict of totals"""
+    t0 = time.time()
+    count = max(1, int(duration / interval))
+    encoded = [encode_trace(count, interval, mouse_hz, keys_hz, t0, seed)
+               for seed in range(traces)]
+    totals = Totals()
+    start = time.perf_counter()
+    await asyncio.gather(*(
+        run_session(address, f"user-{i:05d}", t0, encoded[i % traces], interval,
+                    interval * i / sessions, totals)
+        for i in range(sessions)))
+    elapsed = time.perf_counter() - start
+    return {
+        "sessions": sessions,
+        "connected": totals.connected,
+        "failed": totals.failed,
+        "frames": totals.frames,
+        "events": totals.events,
+        "bytes": totals.bytes,
+        "late_frames": totals.late,
+        "elapsed_s": round(elapsed, 2),
+        "events_per_s": round(totals.events / elapsed),
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("address", help="unix:PATH or HOST:PORT of a running fleet server")
+    parser.add_argument("--sessions", type=int, default=1000)
+    parser.add_argument("--duration", type=float, default=30.0)
+    parser.add_argument("--interval", type=float, default=1.0, help="seconds between frames")
+    parser.add_argument("--mouse-hz", type=float, default=100.0,
+                        help="mouse samples per second per session (averaged over idle time)")
+    parser.add_argument("--keys-hz", type=float, default=3.0, help="keystrokes per second per session")
+    parser.add_argument("--traces", type=int, default=8, help="distinct synthetic users")
+    args = parser.parse_args(argv)
+    result = asyncio.run(generate(args.address, args.sessions, args.duration, args.interval,
+                                  args.mouse_hz, args.keys_hz, args.traces))
+    for key, value in result.items():
+        print(f"{key:<14}{value}")
+    return 0 if not result["failed"] else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,190 @@
+"""
+Shared helpers for the Guardio micro-benchmarks.
+
+A benchmark scenario is a function returning a Scenario: a zero-argument setup that builds
+the object under test and an iterable of per-event callables. Every event is timed
+individually with perf_counter_ns so we can report latency percentiles, not just means.
+"""
+
+import json
+import os
+import platform
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+SRC = os.path.join(ROOT, "src")
+BASELINE_DIR = os.path.join(ROOT, "benchmarks", "baselines")
+
+if SRC not in sys.path:
+    sys.path.insert(0, SRC)
+
+PERCENTILES = (50, 90, 99, 99.9)
+
+
+class VirtualClock:
+    """Deterministic clock patched over an agent's _now() so synthetic streams can run
+    at any simulated rate (e.g. a 1000 Hz mouse) as fast as the CPU allows."""
+    def __init__(self, start=1_000_000.0):
+        self.t = start
+
+    def __call__(self):
+        return self.t
+
+    def advance(self, dt):
+        self.t += dt
+
+
+class Scenario:
+    def __init__(self, name, setup, description=""):
+        self.name = name
+        self.setup = setup
+        self.description = description
+
+
+def percentile(sorted_values, p):
+    if not sorted_values:
+        return 0.0
+    k = (len(sorted_values) - 1) * (p / 100.0)
+    lo = int(k)
+    hi = min(lo + 1, len(sorted_values) - 1)
+    return sorted_values[lo] + (sorted_values[hi] - sorted_values[lo]) * (k - lo)
+
+
+def run_scenario(scenario, repeat=1):
+    """Run a scenario and return a result dict with latencies in microseconds"""
+    samples = []
+    total_ns = 0
+    events = 0
+    perf = time.perf_counter_ns
+    for _ in range(repeat):
+        steps = scenario.setup()
+        for step in steps:
+            t0 = perf()
+            step()
+            dt = perf() - t0
+            samples.append(dt)
+            total_ns += dt
+            events += 1
+
+    samples.sort()
+    result = {
+        "events": events,
+        "events_per_sec": events / (total_ns / 1e9) if total_ns else 0.0,
+        "mean_us": (total_ns / events) / 1e3 if events else 0.0,
+        "max_us": samples[-1] / 1e3 if samples else 0.0,
+    }
+    for p in PERCENTILES:
+        result[f"p{p:g}_us"] = percentile(samples, p) / 1e3
+    return result
+
+
+def machine_info():
+    return {
+        "python": platform.python_version(),
+        "implementation": platform.python_implementation(),
+        "machine": platform.machine(),
+        "system": platform.system(),
+    }
+
+
+def format_table(results):
+    header = f"{'scenario':<34}{'events/s':>12}{'p50 us':>10}{'p90 us':>10}{'p99 us':>10}{'p99.9 us':>10}{'max us':>10}"
+    lines = [header, "-" * len(header)]
+    for name, r in results.items():
+        lines.append(
+            f"{name:<34}{r['events_per_sec']:>12.0f}{r['p50_us']:>10.2f}{r['p90_us']:>10.2f}"
+            f"{r['p99_us']:>10.2f}{r['p99.9_us']:>10.2f}{r['max_us']:>10.1f}"
+        )
+    return "\n".join(lines)
+
+
+def baseline_path(suite):
+    return os.path.join(BASELINE_DIR, f"{suite}.json")
+
+
+def save_baseline(suite, results, extra=None):
+    os.makedirs(BASELINE_DIR, exist_ok=True)
+    data = {"machine": machine_info(), "results": results}
+    if extra:
+        data.update(extra)
+    with open(baseline_path(suite), "w") as f:
+        json.dump(data, f, indent=2, sort_keys=True)
+        f.write("\n")
+
+
+def load_baseline(suite):
+    path = baseline_path(suite)
+    if not os.path.exists(path):
+        return None
+    with open(path) as f:
+        return json.load(f)
+
+
+def compare(results, baseline, threshold=0.5, metric="p99_us"):
+    """Return (name, old, new, ratio) for every scenario whose metric got worse by more
+    than threshold relative to the baseline"""
+    regressions = []
+    old_results = (baseline or {}).get("results", {})
+    for name, r in results.items():
+        old = old_results.get(name)
+        if not old or not old.get(metric):
+            continue
+        ratio = r[metric] / old[metric]
+        if ratio > 1.0 + threshold:
+            regressions.append((name, old[metric], r[metric], ratio))
+    return regressions
+
+
+def main(suite, scenarios, argv=None, extra=None):
+    """Common command line for benchmark modules:
+        --quick            run fewer events
+        --only NAME        run scenarios whose name contains NAME
+        --save             write benchmarks/baselines/<suite>.json
+        --compare          fail (exit 1) if p99 regressed more than --threshold vs. the baseline
+    extra(quick) may return a dict of non-latency measurements (memory, sizes, ...) that is
+    printed and saved alongside the latency results.
+    """
+    import argparse
+
+    parser = argparse.ArgumentParser(description=f"Guardio {suite} benchmarks")
+    parser.add_argument("--quick", action="store_true", help="run a reduced number of events")
+    parser.add_argument("--only", default=None, help="substring filter on scenario names")
+    parser.add_argument("--repeat", type=int, default=1, help="repeat each scenario N times")
+    parser.add_argument("--save", action="store_true", help="save results as the new baseline")
+    parser.add_argument("--compare", action="store_true", help="compare against the saved baseline")
+    parser.add_argument("--threshold", type=float, default=0.5, help="allowed p99 regression ratio")
+    args = parser.parse_args(argv)
+
+    results = {}
+    for scenario in scenarios(quick=args.quick):
+        if args.only and args.only not in scenario.name:
+            continue
+        results[scenario.name] = run_scenario(scenario, repeat=args.repeat)
+
+    print(format_table(results))
+
+    extra_results = extra(quick=args.quick) if extra else None
+    if extra_results:
+        print()
+        for name, value in extra_results.items():
+            print(f"{name:<46}{value}")
+
+    status = 0
+    if args.compare:
+        baseline = load_baseline(suite)
+        if baseline is None:
+            print(f"\nNo baseline at {baseline_path(suite)}")
+        else:
+            regressions = compare(results, baseline, threshold=args.threshold)
+            for name, old, new, ratio in regressions:
+                print(f"REGRESSION {name}: p99 {old:.2f}us -> {new:.2f}us ({ratio:.2f}x)")
+            if regressions:
+                status = 1
+            else:
+                print("\nNo p99 regressions against baseline.")
+
+    if args.save:
+        save_baseline(suite, results, {"extra": extra_results} if extra_results else None)
+        print(f"\nSaved baseline to {baseline_path(suite)}")
+    return status
@@ -0,0 +1,125 @@
+from array import array
+from collections import deque
+from itertools import islice
+import json
+import tempfile
+import time
+
+class LogEntry:
+    """One activity log line: wall-clock timestamp plus message text"""
+    __slots__ = ("ts", "message")
+
+    def __init__(self, ts, message):
+        self.ts = ts
+        self.message = message
+
+    def format(self):
+        # One entry is always one text line, so the view can count entries by line
+        stamp = time.strftime("%H:%M:%S", time.localtime(self.ts))
+        return f"[{stamp}] {self.message}".replace("\n", " ")
+
+
+class ActivityLog:
+    """
+    Bounded store behind the dashboard's activity log.
+
+    The newest `capacity` entries live in memory. Older entries are spilled, one JSON line
+    each, to an anonymous temporary file that the OS deletes on close, so nothing outlives
+    the session. Every entry keeps its global index (0 = first entry since the last clear),
+    and get(start, stop) reads any range back, going to disk for spilled entries. A byte
+    offset is recorded every `page_size` spilled entries, so a disk read seeks to the right
+    page and scans at most page_size lines. append() costs the same after days of uptime.
+    """
+
+    def __init__(self, capacity=2000, page_size=256):
+        if capacity < 1 or page_size < 1:
+            raise ValueError("capacity and page_size must be >= 1")
+        self.capacity = capacity
+        self.page_size = page_size
+        self.entries = deque()
+        self._spill = None
+        self._spilled = 0
+        self._write_pos = 0
+        self._page_offsets = array('q')
+
+    def __len__(self):
+        return self._spilled + len(self.entries)
+
+    @property
+    def spilled(self):
+        """Number of entries that now live only on disk"""
+        return self._spilled
+
+    def append(self, message, ts=None):
+        entry = LogEntry(time.time() if ts is None else ts, message)
+        if len(self.entries) == self.capacity:
+            self._spill_entry(self.entries.popleft())
+        self.entries.append(entry)
+        return entry
+
+    def extend(self, messages, ts=None):
+        """Append several messages sharing one timestamp; returns the new entries"""
+        ts = time.time() if ts is None else ts
+        return [self.append(message, ts) for message in messages]
+
+    def get(self, start, stop):
+        """Entries with global index in [start, stop), clipped to what exists"""
+        start = max(0, start)
+        stop = min(stop, len(self))
+        if start >= stop:
+            return []
+        result = []
+        if start < self._spilled:
+            result.extend(self._read_spilled(start, min(stop, self._spilled)))
+            start = self._spilled
+        if start < stop:
+            offset = self._spilled
+            result.extend(islice(self.entries, start - offset, stop - offset))
+        return result
+
+    def tail(self, n):
+        return self.get(len(self) - n, len(self))
+
+    def clear(self):
+        self.entries.clear()
+        self._spilled = 0
+        self._write_pos = 0
+        self._page_offsets = array('q')
+        if self._spill is not None:
+            self._spill.seek(0)
+            self._spill.truncate()
+
+    def close(self):
+        if self._spill is not None:
+            self._spill.close()
+            self._spill = None
+        self.entries.clear()
+        self._spilled = 0
+        self._write_pos = 0
+        self._page_offsets = array('q')
+
+    # Disk spill
+    def _spill_entry(self, entry):
+        if self._spill is None:
+            self._spill = tempfile.TemporaryFile(mode="w+b", prefix="guardio-log-")
+        if self._spilled % self.page_size == 0:
+            self._page_offsets.append(self._write_pos)
+        line = (json.dumps([entry.ts, entry.message], ensure_ascii=False) + "\n").encode("utf-8")
+        self._spill.seek(self._write_pos)
+        self._spill.write(line)
+        self._write_pos += len(line)
+        self._spilled += 1
+
+    def _read_spilled(self, start, stop):
+        page = start // self.page_size
+        self._spill.seek(self._page_offsets[page])
+        index = page * self.page_size
+        entries = []
+        for line in self._spill:
+            if index >= stop:
+                break
+            if index >= start:
+                ts, message = json.loads(line)
+                entries.append(LogEntry(ts, message))
+            index += 1
+        return entries
@@ -0,0 +1,280 @@
+"""
+Agent process host: the agents in a supervised child process instead of on a thread of the
+UI process (GuardioEngine(agent_process=True), --agent-process). Listener callbacks and
+detection then never wait for the UI's GIL, and a heavy redraw never waits for detection.
+
+The child runs the same AgentRuntime with the same agents. What the engine would have read
+from in-process queues crosses over shared memory:
+  - anomalies and log lines: a SharedRing (agents/ring_buffer.py). A record is a kind byte
+    (b"A" anomaly, b"L" log line) followed by UTF-8: source, severity and message separated
+    by NUL for an anomaly, the text for a log line
+  - stats: the engine's StatsBoard, created shared and attached by the child
+After every record or stats publish the child sends one byte on the engine's Wakeup socket,
+so the UI still sleeps until there is work. Settings and stop go the other way over a Pipe.
+Learned baselines (warm start and checkpoints) and raw-input journaling happen in the child.
+
+A supervisor thread waits on the child. If it exits without being asked to, it is started
+again, with its baselines restored from the last checkpoint, after restart_delay seconds
+(doubling while restarts keep coming), at most max_restarts times within restart_window
+seconds. What happened is queued as log lines that poll() hands to the engine, so they are
+emitted on the engine's thread.
+"""
+
+import multiprocessing
+import threading
+import time
+from collections import deque
+
+from agents.ring_buffer import SharedRing
+from agents.stats_board import StatsBoard
+
+ANOMALY = b"A"
+LOG = b"L"
+_SEP = "\0"
+
+
+def encode_event(event):
+    text = _SEP.join(str(event.get(k, "")).replace(_SEP, " ") for k in ("source", "severity", "message"))
+    return ANOMALY + text.encode("utf-8")
+
+
+def decode_record(payload):
+    """("anomaly", event dict) or ("log", text)"""
+    text = payload[1:].decode("utf-8", "replace")
+    if payload[:1] == ANOMALY:
+        source, severity, message = (text.split(_SEP, 2) + ["", ""])[:3]
+        return "anomaly", {"source": source, "severity": severity, "message": message}
+    return "log", text
+
+
+class _RingSink:
+    """The child's anomaly queue: every event becomes a ring record"""
+    __slots__ = ("ring", "notify")
+
+    def __init__(self, ring, notify):
+        self.ring = ring
+        self.notify = notify
+
+    def put(self, event, block=True, timeout=None):
+        if self.ring.push(encode_event(event)):
+            self.notify()
+
+    def log(self, message):
+        if self.ring.push(LOG + message.encode("utf-8")):
+            self.notify()
+
+
+def _notifier(sock):
+    sock.setblocking(False)
+
+    def notify():
+        try:
+            sock.send(b"\0")
+        except (BlockingIOError, OSError):
+            pass  # a wakeup is already pending, or the UI process is gone
+    return notify
+
+
+def _run_child(config, board_name, ring_name, ring_capacity, conn, notify_sock):
+    """Child process entry point: build and run the agents until told to stop"""
+    from engine import make_agent
+    from agents.journal import Journal
+    from agents.metrics import get_registry
+    from agents.runtime import AgentRuntime
+    from agents.snapshot import BaselineCheckpointer, BaselineStore
+
+    get_registry().enabled = config["metrics"]
+    notify = _notifier(notify_sock)
+    board = StatsBoard.attach(board_name, config["sources"])
+    board.notify = notify
+    ring = SharedRing.attach(ring_name, ring_capacity)
+    sink = _RingSink(ring, notify)
+    agents = [make_agent(factory, sink, board, config["sigma"], config["cooldown"], config["detectors"],
+                         config["movement_features"])
+              for factory in config["factories"]]
+
+    journal = None
+    if config["journal_dir"]:
+        journal = Journal(config["journal_dir"])
+        for agent in agents:
+            if hasattr(agent, "journal"):
+                agent.journal = journal
+
+    hosted = list(agents)
+    checkpointer = None
+    if config["baseline_path"]:
+        store = BaselineStore(config["baseline_path"], details=config["baseline_details"])
+        restored = store.load_into(agents)
+        if restored:
+            names = [type(a).__name__ for a in agents if getattr(a, "state_tag", None) in restored]
+            sink.log(f"[System] Restored learned baselines: {', '.join(names)}")
+        checkpointer = BaselineCheckpointer(store, agents, interval=config["checkpoint_interval"])
+        hosted.append(checkpointer)
+
+    runtime = AgentRuntime()
+    runtime.start(hosted)
+    try:
+        while True:
+            try:
+                message = conn.recv()
+            except (EOFError, OSError):
+                break  # the UI process is gone
+            if message[0] == "stop":
+                break
+            if message[0] == "set":
+                _, name, value = message
+                for agent in agents:
+                    if hasattr(agent, name):
+                        setattr(agent, name, value)
+    finally:
+        runtime.stop()
+        if checkpointer is not None:
+            try:
+                checkpointer.checkpoint()
+            except OSError as e:
+                sink.log(f"[System] Could not save learned baselines: {e}")
+        if journal is not None:
+            journal.close()
+        board.close()
+        ring.close()
+
+
+class AgentHost:
+    """
+    Parent side: starts, supervises and stops the agent process. config is the picklable
+    dict _run_child() takes: factories, detectors, movement_features, sigma, cooldown,
+    sources (of the board), baseline_path, baseline_details, checkpoint_interval, journal_dir
+    and metrics (registry enabled).
+    """
+
+    def __init__(self, config, board, wakeup, ring_bytes=1 << 20, max_restarts=5,
+                 restart_window=60.0, restart_delay=0.5):
+        self.config = config
+        self.board = board
+        self.wakeup = wakeup
+        self.ring = SharedRing(ring_bytes, shared=True)
+        self.max_restarts = max_restarts
+        self.restart_window = restart_window
+        self.restart_delay = restart_delay
+        self.process = None
+        self.restarts = 0
+        self._conn = None
+        self._lock = threading.Lock()  # process/_conn swaps against set() and stop()
+        self._stopping = threading.Event()
+        self._supervisor = None
+        self._messages = deque()       # log lines from the supervisor thread
+        self._restart_times = deque()
+        self._dropped_reported = 0
+        self._ctx = multiprocessing.get_context("spawn")
+
+    @property
+    def pid(self):
+        return self.process.pid if self.process is not None else None
+
+    def start(self):
+        self._stopping.clear()
+        with self._lock:
+            self._spawn()
+        self._supervisor = threading.Thread(target=self._supervise, name="guardio-agent-supervisor",
+                                            daemon=True)
+        self._supervisor.start()
+
+    def _spawn(self):
+        conn, child_conn = self._ctx.Pipe()
+        process = self._ctx.Process(
+            target=_run_child, name="guardio-agents", daemon=True,
+            args=(self.config, self.board.name, self.ring.name, self.ring.capacity, child_conn,
+                  self.wakeup.sender()))
+        process.start()
+        child_conn.close()
+        self.process, self._conn = process, conn
+
+    def _message(self, text):
+        self._messages.append(text)
+        self.wakeup.notify()
+
+    def _supervise(self):
+        delay = self.restart_delay
+        while True:
+            process = self.process
+            process.join()
+            if self._stopping.is_set():
+                return
+            now = time.monotonic()
+            while self._restart_times and now - self._restart_times[0] > self.restart_window:
+                self._restart_times.popleft()
+            if not self._restart_times:
+                delay = self.restart_delay
+            if len(self._restart_times) >= self.max_restarts:
+                self._message(f"[System] Agent process exited with code {process.exitcode}; "
+                              f"not restarting after {self.max_restarts} restarts in "
+                              f"{self.restart_window:.0f}s")
+                return
+            self._message(f"[System] Agent process exited with code {process.exitcode}; "
+                          f"restarting in {delay:.1f}s")
+            if self._stopping.wait(delay):
+                return
+            with self._lock:
+                if self._stopping.is_set():
+                    return
+                self._conn.close()
+                self._spawn()
+            self._restart_times.append(time.monotonic())
+            self.restarts += 1
+            delay *= 2
+
+    def set(self, name, value):
+        """Set an attribute on every agent that has it (sigma, cooldown); a restarted child
+        gets it through config"""
+        with self._lock:
+            self.config[name] = value
+            try:
+                self._conn.send(("set", name, value))
+            except OSError:
+                pass  # the child is gone; the supervisor restarts it with the new config
+
+    def stop(self, timeout=1.5):
+        """Ask the child to stop (it checkpoints and closes its journal), terminate it if it
+        has not exited after timeout seconds"""
+        self._stopping.set()
+        with self._lock:
+            process, conn = self.process, self._conn
+        try:
+            conn.send(("stop",))
+        except OSError:
+            pass
+        process.join(timeout)
+        if process.is_alive():
+            process.terminate()
+            process.join(1.0)
+        conn.close()
+        if self._supervisor is not None:
+            self._supervisor.join(timeout=1.0)
+            self._supervisor = None
+
+    def close(self):
+        """Release the ring; call after stop() and a last poll()"""
+        self.ring.close(unlink=True)
+
+    # Consumer side, on the engine's thread
+    def pending(self):
+        return bool(self._messages) or len(self.ring) > 0
+
+    def poll(self):
+        """Everything the child and the supervisor produced since the last poll, as
+        ("anomaly", event) and ("log", text) tuples"""
+        records = []
+        while self._messages:
+            records.append(("log", self._messages.popleft()))
+        ring = self.ring
+        while True:
+            payload = ring.pop()
+            if payload is None:
+                break
+            records.append(decode_record(payload))
+        dropped = ring.dropped
+        if dropped != self._dropped_reported:
+            records.append(("log", f"[System] Agent process ring full, discarded "
+                                   f"{dropped - self._dropped_reported} events"))
+            self._dropped_reported = dropped
+        return records
@@ -1,10 +1,25 @@
-
 """
 Guardio Agents Package
+
+The agent classes are imported on first use (PEP 562 module __getattr__), so importing a
+helper such as agents.metrics does not pull in every agent and NumPy.
 """
 
-from .app_usage_agent import AppUsageAgent
-from .movement_agent import MovementAgent
-from .typing_agent import TypingAgent
+import importlib
+
+_AGENTS = {
+    'AppUsageAgent': '.app_usage_agent',
+    'MovementAgent': '.movement_agent',
+    'TypingAgent': '.typing_agent',
+}
 
 __all__ = ['MovementAgent', 'TypingAgent', 'AppUsageAgent']
+
+
+def __getattr__(name):
+    module = _AGENTS.get(name)
+    if module is None:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    value = getattr(importlib.import_module(module, __name__), name)
+    globals()[name] = value
+    return value
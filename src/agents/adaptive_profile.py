@@ -0,0 +1,153 @@
+import math
+import numpy as np
+
+class ProfileBatch:
+    """
+    Result of AdaptiveProfile.update_batch(). All arrays are per sample and describe the
+    profile as it was *before* that sample was folded in, i.e. what the sequential
+    zscore()-then-update() loop would have seen.
+      - values, mean, std: float arrays
+      - ready:             bool array, profile was trusted for this sample
+      - z:                 |value - mean| / std, NaN where not ready
+    """
+    __slots__ = ("values", "mean", "std", "ready", "z")
+
+    def __init__(self, values, mean, std, ready, z):
+        self.values = values
+        self.mean = mean
+        self.std = std
+        self.ready = ready
+        self.z = z
+
+    def __len__(self):
+        return len(self.values)
+
+    def alerts(self, sigma, side="both"):
+        """Boolean alert mask: 'both' is z > sigma, 'low' / 'high' flag only values below /
+        above the mean (mean -/+ sigma * std for a Gaussian profile)"""
+        with np.errstate(invalid="ignore"):
+            mask = self.z > sigma
+            if side == "low":
+                mask &= self.values < self.mean
+            elif side == "high":
+                mask &= self.values > self.mean
+        return mask & self.ready
+
+
+class AdaptiveProfile:
+    """
+    Exponentially weighted mean/variance of one behavioural signal, shared by all agents:
+        delta = x - mean
+        mean += alpha * delta
+        var   = (1 - alpha) * var + alpha * delta**2
+    The first sample seeds mean=x, var=0. A sample is scored against the profile only once
+    it is ready: more than min_count samples seen and std above 1e-6.
+
+    update()/observe() are the scalar per-sample path. update_batch() folds a whole NumPy
+    batch in at once by solving the two linear recurrences in closed form, in chunks short
+    enough that (1 - alpha)^-n stays small. It agrees with the scalar path to floating-point
+    rounding, not bit for bit: mean and variance within ~1e-12 relative.
+    """
+    __slots__ = ("alpha", "min_count", "mean", "var", "count")
+
+    MIN_STD = 1e-6
+
+    def __init__(self, alpha=0.01, min_count=10):
+        self.alpha = alpha
+        self.min_count = min_count
+        self.mean = None
+        self.var = None
+        self.count = 0
+
+    def reset(self):
+        self.mean = None
+        self.var = None
+        self.count = 0
+
+    @property
+    def std(self):
+        return (self.var ** 0.5) if self.var is not None else 0.0
+
+    @property
+    def ready(self):
+        return self.mean is not None and self.std > self.MIN_STD and self.count > self.min_count
+
+    def zscore(self, value):
+        """z of value against the current profile, or None while not ready"""
+        if not self.ready:
+            return None
+        std = self.std
+        return abs(value - self.mean) / max(std, self.MIN_STD)
+
+    def update(self, value):
+        if self.mean is None:
+            self.mean = value
+            self.var = 0.0
+            self.count = 1
+        else:
+            self.count += 1
+            delta = value - self.mean
+            self.mean += self.alpha * delta
+            self.var = (1 - self.alpha) * self.var + self.alpha * (delta ** 2)
+
+    def observe(self, value):
+        """Score value against the profile, then learn from it. Returns z or None."""
+        z = self.zscore(value)
+        self.update(value)
+        return z
+
+    # Vectorized path
+    def _chunk_len(self):
+        # Largest n with (1 - alpha)^-n <= 1e3 keeps the closed form well conditioned
+        if self.alpha <= 0:
+            return 4096
+        if self.alpha >= 1:
+            return 1
+        return int(max(1, min(4096, math.log(1e3) / -math.log1p(-self.alpha))))
+
+    def update_batch(self, values):
+        """Fold a batch of samples into the profile. Returns a ProfileBatch describing the
+        profile state each sample was scored against."""
+        values = np.asarray(values, dtype=np.float64)
+        n = len(values)
+        mean_before = np.empty(n)
+        var_before = np.empty(n)
+        count_before = self.count + np.arange(n)
+
+        start = 0
+        if n and self.mean is None:
+            # First sample only seeds the profile
+            mean_before[0] = np.nan
+            var_before[0] = np.nan
+            self.update(float(values[0]))
+            start = 1
+
+        a = self.alpha
+        c = 1.0 - a
+        step = self._chunk_len()
+        while start < n:
+            v = values[start:start + step]
+            pw = c ** np.arange(1, len(v) + 1)
+            m0, s0 = self.mean, self.var
+
+            mean_after = pw * (m0 + a * np.cumsum(v / pw))
+            mb = mean_before[start:start + len(v)]
+            mb[0] = m0
+            mb[1:] = mean_after[:-1]
+
+            delta = v - mb
+            var_after = pw * (s0 + a * np.cumsum(delta * delta / pw))
+            vb = var_before[start:start + len(v)]
+            vb[0] = s0
+            vb[1:] = var_after[:-1]
+
+            self.mean = float(mean_after[-1])
+            self.var = float(var_after[-1])
+            self.count += len(v)
+            start += len(v)
+
+        with np.errstate(invalid="ignore"):
+            std_before = np.sqrt(var_before)
+            ready = (std_before > self.MIN_STD) & (count_before > self.min_count)
+            z = np.where(ready, np.abs(values - mean_before) / np.maximum(std_before, self.MIN_STD), np.nan)
+        return ProfileBatch(values, mean_before, std_before, ready, z)
@@ -0,0 +1,138 @@
+"""
+Bounded, time-decayed usage counts for window identities (AppUsageAgent).
+
+Window identities include tab and document titles, so over weeks of uptime they are
+unbounded. AppSketch keeps a fixed number of slots (Space-Saving): each tracked identity is
+interned to a slot id, and the slot holds its decayed count, its decayed foreground seconds
+and the count it inherited when it took the slot over. When all slots are taken, a new
+identity replaces the slot with the smallest count, preferring apps that are not usual.
+Counts are then upper bounds. count() returns the guaranteed part (count - inherited), so an
+identity that was just let in still reads as rare.
+
+Decay is forward decay: an event at time t is added with weight 2^((t - t0) / half_life) and
+read back divided by the weight of the read time, so nothing is touched per tick. When the
+weights grow past 2^40 everything is rescaled to a new t0 (once per 40 half-lives).
+"""
+
+import numpy as np
+
+_RESCALE = 2.0 ** 40
+
+
+class AppSketch:
+    """capacity slots; half_life in seconds, None for plain (undecayed) counts"""
+
+    def __init__(self, capacity=256, half_life=7 * 86400.0, usual_seconds=300.0):
+        self.capacity = capacity
+        self.half_life = half_life
+        self.usual_seconds = usual_seconds
+        self.ids = {}                           # app -> slot
+        self.apps = []                          # slot -> app
+        self.counts = np.zeros(capacity)        # scaled by the weight at t0
+        self.errors = np.zeros(capacity)        # count inherited on takeover, same scale
+        self.seconds = np.zeros(capacity)       # foreground seconds, same scale
+        self.total = 0.0                        # sum of every count added, same scale
+        self.t0 = None
+
+    def __len__(self):
+        return len(self.apps)
+
+    def _weight(self, t):
+        if self.half_life is None:
+            return 1.0
+        if self.t0 is None:
+            self.t0 = t
+        w = 2.0 ** ((t - self.t0) / self.half_life)
+        if w > _RESCALE:
+            self._rescale(w, t)
+            w = 1.0
+        return w
+
+    def _rescale(self, w, t):
+        self.counts /= w
+        self.errors /= w
+        self.seconds /= w
+        self.total /= w
+        self.t0 = t
+
+    def _evict(self, usual_scaled):
+        """Slot to hand over: the smallest count among non-usual apps, else overall"""
+        key = np.where(self.seconds > usual_scaled, np.inf, self.counts)
+        slot = int(key.argmin())
+        return slot if key[slot] != np.inf else int(self.counts.argmin())
+
+    def intern(self, app, t):
+        """Slot id of app, taking a slot over if it is not tracked"""
+        slot = self.ids.get(app)
+        if slot is not None:
+            return slot
+        if len(self.apps) < self.capacity:
+            slot = len(self.apps)
+            self.apps.append(app)
+        else:
+            slot = self._evict(self.usual_seconds * self._weight(t))
+            del self.ids[self.apps[slot]]
+            self.apps[slot] = app
+            self.errors[slot] = self.counts[slot]
+            self.seconds[slot] = 0.0
+        self.ids[app] = slot
+        return slot
+
+    def add(self, app, t, count=0, seconds=0.0):
+        """Count and/or foreground seconds for app at time t; returns its slot"""
+        w = self._weight(t)
+        slot = self.intern(app, t)
+        if count:
+            self.counts[slot] += count * w
+            self.total += count * w
+        if seconds:
+            self.seconds[slot] += seconds * w
+        return slot
+
+    def count(self, app, t):
+        """Guaranteed (lower bound) decayed count of app; 0 if untracked"""
+        slot = self.ids.get(app)
+        if slot is None:
+            return 0.0
+        return (self.counts[slot] - self.errors[slot]) / self._weight(t)
+
+    def seconds_of(self, app, t):
+        slot = self.ids.get(app)
+        return 0.0 if slot is None else self.seconds[slot] / self._weight(t)
+
+    def usual(self, app, t):
+        """App has been in the foreground for more than usual_seconds (decayed)"""
+        return self.seconds_of(app, t) > self.usual_seconds
+
+    def total_count(self, t):
+        return self.total / self._weight(t)
+
+    # Baseline snapshots: written by the owning agent's write_state/read_state
+    def write(self, writer):
+        writer.f64(self.t0)
+        writer.f64(self.total)
+        writer.u32(len(self.apps))
+        n = len(self.apps)
+        for app, c, e, s in zip(self.apps, self.counts[:n].tolist(), self.errors[:n].tolist(),
+                                self.seconds[:n].tolist()):
+            writer.str(app)
+            writer.f64(c)
+            writer.f64(e)
+            writer.f64(s)
+
+    def read(self, reader):
+        """Replace the contents with a written sketch. Returns self; raises like the reader
+        on damaged data, leaving the sketch as it was."""
+        t0 = reader.f64()
+        total = reader.f64()
+        rows = [(reader.str(), reader.f64(), reader.f64(), reader.f64()) for _ in range(reader.u32())]
+        if len(rows) > self.capacity:
+            rows = sorted(rows, key=lambda r: r[1], reverse=True)[:self.capacity]
+        self.t0 = t0
+        self.total = total
+        self.apps = [r[0] for r in rows]
+        for column, i in ((self.counts, 1), (self.errors, 2), (self.seconds, 3)):
+            column[:] = 0.0
+            column[:len(rows)] = [r[i] for r in rows]
+        self.ids = {app: slot for slot, app in enumerate(self.apps)}
+        return self
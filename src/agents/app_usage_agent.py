@@ -1,28 +1,43 @@
 import time
-import subprocess
+import threading
+from .focus_sources import default_focus_source
+from .quantile_profile import detector_tag, make_profile
+from .app_sketch import AppSketch
+from .metrics import get_registry
+from .stats_board import publish_stats
 
 class AppUsageAgent:
     """
     Adaptive app-usage anomaly detector with rarity detection and rapid-switch timing profile.
-    On Linux, requires xdotool + xprop; otherwise falls back gracefully and reports 'Error' status.
+    The active app comes from a pluggable FocusSource (see focus_sources.py). By default that is a
+    persistent X connection that reports focus switches as they happen, falling back to polling
+    xdotool + xprop; without either it falls back gracefully and reports 'Error' status.
+    Counts and foreground time per app are kept in a bounded AppSketch (app_slots
+    identities, decaying with app_half_life seconds), so memory and per-poll cost stay flat
+    however many window titles go by.
     """
-    def __init__(self, anomaly_queue, stats_queue, sigma=3.0, cooldown=3.0):
+    metrics_name = "appusage"
+    stats_source = "AppUsage"  # its StatsBoard slot
+    # Baseline snapshots (see snapshot.py)
+    state_tag = b"APPS"
+    state_version = 3
+
+    def __init__(self, anomaly_queue, stats_queue, sigma=3.0, cooldown=3.0, focus_source=None,
+                 app_slots=256, app_half_life=7 * 86400.0, detector="ema"):
         self.anomaly_queue = anomaly_queue
         self.stats_queue = stats_queue
 
         self.sigma = sigma
         self.cooldown = cooldown
         self.poll_interval = 2.0
-        self.alpha = 0.01
 
-        self.app_counts = {}
         self.history = []
-        self.app_durations = {}  # Track how long each app is used
-        self.usual_apps = set()  # Track commonly used apps
+        # Counts and usage time per app; "usual" apps have 5 minutes total usage
+        self.apps = AppSketch(app_slots, half_life=app_half_life, usual_seconds=300.0)
 
-        self.mean_gap = None
-        self.var_gap = None
-        self.count = 0
+        self.detector = detector
+        self.gap_profile = self._make_gap_profile()
+        self.state_tag = detector_tag(self.state_tag, detector)
         
         self.min_app_time = 5.0  # Minimum time to consider an app as "used"
         self.history_size = 100  # Increased history size for better pattern detection
@@ -30,77 +45,105 @@ class AppUsageAgent:
         self._last_alert_ts = 0.0
         self._last_stat_ts = 0.0
 
-        self._usable = self._check_tools()
+        # The default source is opened when the agent first runs, on the agent runtime: it
+        # imports python-xlib and connects to X, which engine.start() should not wait for
+        self.focus_source = focus_source
+        self._usable = focus_source is not None and focus_source.usable
+        # With run(), _detect runs on the agent thread (poll tick) and on the source thread
+        # (focus events); with run_async() both happen on the runtime loop
+        self._lock = threading.Lock()
+        # Optional Journal (see journal.py) recording focus switches
+        self.journal = None
+
+        self.metrics = get_registry()
+        self._m_active_app = self.metrics.histogram(f"{self.metrics_name}.active_app")
+        self._m_focus_events = self.metrics.counter(f"{self.metrics_name}.focus_events")
+        self._m_stats_throttled = self.metrics.counter(f"{self.metrics_name}.stats_throttled")
+        self._m_cooldown = self.metrics.counter(f"{self.metrics_name}.alerts_in_cooldown")
 
-    def _check_tools(self):
-        def have(cmd):
-            try:
-                subprocess.check_output(["which", cmd], stderr=subprocess.DEVNULL)
-                return True
-            except Exception:
-                return False
-        return have("xdotool") and have("xprop")
+    def _make_gap_profile(self):
+        return make_profile(self.detector, alpha=0.01, min_count=5)
 
     def _now(self):
         return time.time()
 
+    def _open_focus_source(self):
+        if self.focus_source is None:
+            self.focus_source = default_focus_source()
+            self._usable = self.focus_source.usable
+
     def _active_app(self):
         if not self._usable:
             return None
-        try:
-            # Get window ID
-            win_id = subprocess.check_output(["xdotool", "getactivewindow"]).decode().strip()
-            
-            # Get both window class and title
-            cls = subprocess.check_output(["xprop", "-id", win_id, "WM_CLASS"]).decode("utf-8", "ignore").strip()
-            title = subprocess.check_output(["xprop", "-id", win_id, "_NET_WM_NAME"]).decode("utf-8", "ignore").strip()
-            
-            # Extract the class name
-            class_name = cls.split(",")[-1].strip().strip('"') if "," in cls else None
-            
-            # Extract the window title
-            window_title = title.split("=")[-1].strip().strip('"') if "=" in title else None
-            
-            if class_name and window_title:
-                # Combine class and a truncated version of title for better identification
-                return f"{class_name}:{window_title[:50]}"
-            elif class_name:
-                return class_name
-            
-        except Exception as e:
-            return None
-        return None
+        # For polling sources this is the xdotool/xprop round trip
+        t0 = time.perf_counter_ns()
+        app = self.focus_source.current()
+        self._m_active_app.observe_ns(time.perf_counter_ns() - t0)
+        return app
 
-    def _std_gap(self):
-        return (self.var_gap ** 0.5) if self.var_gap is not None else 0.0
+    def write_state(self, writer):
+        with self._lock:
+            writer.profile(self.gap_profile)
+            # The sketch is keyed by window title: only when asked for (see snapshot.py)
+            writer.u32(writer.details)
+            if writer.details:
+                self.apps.write(writer)
 
-    def _update_gap_profile(self, gap):
-        if self.mean_gap is None:
-            self.mean_gap = gap
-            self.var_gap = 0.0
-            self.count = 1
-        else:
-            self.count += 1
-            delta = gap - self.mean_gap
-            self.mean_gap += self.alpha * delta
-            self.var_gap = (1 - self.alpha) * self.var_gap + self.alpha * (delta ** 2)
+    def read_state(self, reader):
+        # Read everything first so a damaged section leaves the agent untouched
+        profile = self._make_gap_profile()
+        reader.profile(profile)
+        apps = None
+        if reader.u32():
+            apps = AppSketch(self.apps.capacity, half_life=self.apps.half_life,
+                             usual_seconds=self.apps.usual_seconds).read(reader)
+        with self._lock:
+            self.gap_profile = profile
+            if apps is not None:
+                self.apps = apps
+
+    @property
+    def mean_gap(self):
+        return self.gap_profile.mean
+
+    @property
+    def var_gap(self):
+        return self.gap_profile.var
+
+    @property
+    def count(self):
+        return self.gap_profile.count
 
     def _publish_stats(self, z=None, note=None):
         now = self._now()
         if now - self._last_stat_ts >= 1.0:
             self._last_stat_ts = now
-            mean = self.mean_gap if self.mean_gap is not None else None
-            std = self._std_gap() if self.mean_gap is not None else None
-            self.stats_queue.put({
-                "source": "AppUsage",
-                "mean": mean,
-                "std": std,
-                "z": z,
-                "note": note or ("Adapting" if self.count < 15 else "Stable")
-            })
-
-    def _detect(self):
-        app = self._active_app()
+            mean = self.gap_profile.mean
+            std = self.gap_profile.std if self.gap_profile.mean is not None else None
+            publish_stats(self.stats_queue, self.stats_source, mean, std, z,
+                          note or ("Adapting" if self.count < max(15, self.gap_profile.min_count) else "Stable"),
+                          t=now)
+        else:
+            self._m_stats_throttled.inc()
+
+    def _on_focus(self, app):
+        """Focus-change callback from event-driven sources: detect immediately"""
+        self._m_focus_events.inc()
+        with self._lock:
+            self._detect(app)
+
+    def _tick(self):
+        with self._lock:
+            self._detect()
+
+    def observe_focus(self, app, now):
+        """Focus switch reported with its own timestamp (a remote endpoint in fleet.py)"""
+        with self._lock:
+            self._detect(app, now)
+
+    def _detect(self, app=None, now=None):
+        if app is None:
+            app = self._active_app()
         if not self._usable:
             self._publish_stats(note="Error")
             return
@@ -108,27 +151,22 @@ class AppUsageAgent:
             self._publish_stats(note="NoSignal")
             return
 
-        now = self._now()
+        if now is None:
+            now = self._now()
 
+        apps = self.apps
         # Update app usage duration
         if self.history:
-            last_app = self.history[-1][1]
-            duration = now - self.history[-1][0]
-            self.app_durations[last_app] = self.app_durations.get(last_app, 0) + duration
-            
-            # Add to usual apps if used for significant time
-            if self.app_durations[last_app] > 300:  # 5 minutes total usage
-                self.usual_apps.add(last_app)
+            apps.add(self.history[-1][1], now, seconds=now - self.history[-1][0])
 
         # Update app counts only if the app was used for minimum time
         if self.history and (now - self.history[-1][0]) >= self.min_app_time:
-            self.app_counts[app] = self.app_counts.get(app, 0) + 1
+            apps.add(app, now, count=1)
 
-        total = sum(self.app_counts.values())
-        # Detect rare app usage, but only if it's not in usual_apps
-        if (total > 30 and 
-            self.app_counts.get(app, 0) <= 2 and 
-            app not in self.usual_apps):
+        # Detect rare app usage, but only if it's not a usual app
+        if (apps.total_count(now) > 30 and
+            apps.count(app, now) <= 2 and
+            not apps.usual(app, now)):
             if now - self._last_alert_ts >= self.cooldown:
                 self._last_alert_ts = now
                 self.anomaly_queue.put({
@@ -136,22 +174,28 @@ class AppUsageAgent:
                     "severity": "High", 
                     "message": f"Rare app focused: '{app}'"
                 })
+            else:
+                self._m_cooldown.inc()
 
         if self.history and app != self.history[-1][1]:
             gap = now - self.history[-1][0]
-            z = None
-            if self.mean_gap is not None and self._std_gap() > 1e-6 and self.count > 5:
-                z = abs(gap - self.mean_gap) / max(self._std_gap(), 1e-6)
-                if gap < (self.mean_gap - self.sigma * self._std_gap()):
-                    if now - self._last_alert_ts >= self.cooldown:
-                        self._last_alert_ts = now
-                        self.anomaly_queue.put({"source": "AppUsage", "severity": "Medium", "message": f"Rapid switching (gap={gap:.2f}s)"})
-            self._update_gap_profile(gap)
+            profile = self.gap_profile
+            z = profile.zscore(gap)
+            # Only short gaps count: below the mean by more than sigma
+            if z is not None and z > self.sigma and gap < profile.mean:
+                if now - self._last_alert_ts >= self.cooldown:
+                    self._last_alert_ts = now
+                    self.anomaly_queue.put({"source": "AppUsage", "severity": "Medium", "message": f"Rapid switching (gap={gap:.2f}s)"})
+                else:
+                    self._m_cooldown.inc()
+            profile.update(gap)
             self._publish_stats(z=z)
         else:
             self._publish_stats()
         # Update history with better management
         if not self.history or app != self.history[-1][1]:
+            if self.journal is not None:
+                self.journal.focus(now, app)
             self.history.append((now, app))
             if len(self.history) > self.history_size:
                 # Clean up old history entries
@@ -160,12 +204,63 @@ class AppUsageAgent:
                     self.history.pop(0)
 
     def run(self, stop_event):
+        self._open_focus_source()
         if not self._usable:
             self._publish_stats(note="Error")
         else:
             self._publish_stats(note="Adapting")
 
-        while not stop_event.is_set():
-            self._detect()
-            if stop_event.wait(self.poll_interval):
-                break
+        if self._usable and self.focus_source.event_driven:
+            self.focus_source.start(self._on_focus)
+
+        # The tick keeps usage durations and counts advancing while focus stays put;
+        # with an event-driven source it only reads the cached app, never forks
+        try:
+            while not stop_event.is_set():
+                self._tick()
+                if stop_event.wait(self.poll_interval):
+                    break
+        finally:
+            self.focus_source.stop()
+
+    async def run_async(self, runtime):
+        """AgentRuntime variant of run(). An X focus source is watched by the runtime loop
+        itself (no reader thread); forking sources are polled off the loop."""
+        await runtime.run_blocking(self._open_focus_source)
+        if not self._usable:
+            self._publish_stats(note="Error")
+        else:
+            self._publish_stats(note="Adapting")
+
+        source = self.focus_source
+        watched_fd = None
+        if self._usable and source.event_driven:
+            fd = source.fileno()
+            if fd is not None:
+                try:
+                    runtime.loop.add_reader(fd, source.dispatch)
+                    source.start(self._on_focus, own_thread=False)
+                    watched_fd = fd
+                except NotImplementedError:
+                    pass  # loop without add_reader (Windows proactor)
+            if watched_fd is None:
+                source.start(runtime.threadsafe(self._on_focus))
+        blocking = self._usable and not source.event_driven
+
+        try:
+            while not runtime.stopping:
+                if blocking:
+                    app = await runtime.run_blocking(self._active_app)
+                    with self._lock:
+                        if app:
+                            self._detect(app)
+                        else:
+                            self._publish_stats(note="NoSignal")
+                else:
+                    self._tick()
+                if await runtime.wait_stopped(self.poll_interval):
+                    break
+        finally:
+            if watched_fd is not None:
+                runtime.loop.remove_reader(watched_fd)
+            source.stop()
@@ -0,0 +1,152 @@
+"""
+Per-digraph keystroke timing for TypingAgent: one EMA mean/variance of the flight time
+(previous key -> current key) for every key pair, instead of one for all keystrokes.
+
+Key codes below `keys` index a preallocated keys x keys matrix. mean, var and count are
+stored in flat array('d') buffers with NumPy (keys, keys) views over them, so observe() is a
+handful of scalar reads and writes with no allocation and no dict access.
+Pairs involving any other key (non-ASCII characters, function and modifier keys) go to a
+sparse fallback: a dict of [mean, var, count] cells, capped at sparse_limit pairs.
+
+Each cell follows the AdaptiveProfile recurrences, except that a cell's first 1/alpha samples
+are averaged cumulatively (alpha_n = max(alpha, 1/n)): a digraph sees a small share of all
+keystrokes, and with alpha alone its variance would still be well below the truth when it
+starts scoring, flagging ordinary delays. A cell scores once count > min_count and std >
+MIN_STD.
+"""
+
+from array import array
+
+import numpy as np
+
+from .adaptive_profile import AdaptiveProfile
+from .snapshot import SnapshotError
+
+# Codes of keys without a character, past the Unicode range so they never collide with ord()
+SPECIAL = 0x110000
+_NAMED = {"space": 32, "enter": 13, "tab": 9, "backspace": 8, "esc": 27, "delete": 127}
+
+
+def key_code(key):
+    """Integer code of a pynput key: ord() of its (lower-cased) character, the ASCII control
+    code of enter/tab/backspace/esc/delete, SPECIAL + virtual key code for other keys, or -1"""
+    char = getattr(key, "char", None)
+    if char is not None:
+        return ord(char.lower()) if len(char) == 1 else -1
+    name = getattr(key, "name", None)
+    if name in _NAMED:
+        return _NAMED[name]
+    vk = getattr(key, "vk", None)
+    if vk is None:
+        vk = getattr(getattr(key, "value", None), "vk", None)
+    return SPECIAL + vk if vk is not None else -1
+
+
+class DigraphMatrix:
+    """EMA flight-time profiles per (previous, current) key code"""
+
+    MIN_STD = AdaptiveProfile.MIN_STD
+
+    def __init__(self, keys=128, alpha=0.01, min_count=10, sparse_limit=1024):
+        self.keys = keys
+        self.alpha = alpha
+        self.min_count = min_count
+        self.sparse_limit = sparse_limit
+        cells = keys * keys
+        self._mean = array('d', bytes(8 * cells))
+        self._var = array('d', bytes(8 * cells))
+        self._count = array('d', bytes(8 * cells))
+        self.mean, self.var, self.count = (np.frombuffer(a, dtype=np.float64).reshape(keys, keys)
+                                           for a in (self._mean, self._var, self._count))
+        self.sparse = {}   # (prev, cur) -> [mean, var, count], for codes outside the matrix
+
+    def __len__(self):
+        """Number of digraphs with at least one sample"""
+        return int(np.count_nonzero(self.count)) + len(self.sparse)
+
+    def profile(self, prev, cur):
+        """(mean, std, count) of one digraph; mean is None before its first sample"""
+        k = self.keys
+        if 0 <= prev < k and 0 <= cur < k:
+            i = prev * k + cur
+            mean, var, n = self._mean[i], self._var[i], self._count[i]
+        else:
+            mean, var, n = self.sparse.get((prev, cur), (0.0, 0.0, 0))
+        return (mean if n else None), var ** 0.5, int(n)
+
+    def _step(self, mean, var, n, value):
+        """(z, mean, var) after one sample on a cell that has seen n"""
+        if not n:
+            return None, value, 0.0
+        std = var ** 0.5
+        z = abs(value - mean) / std if n > self.min_count and std > self.MIN_STD else None
+        a = max(self.alpha, 1.0 / (n + 1))
+        delta = value - mean
+        return z, mean + a * delta, (1 - a) * var + a * delta * delta
+
+    def observe(self, prev, cur, value):
+        """Score value against the prev -> cur digraph, then learn from it. Returns z, or
+        None while that digraph is not ready (or cannot be tracked)."""
+        k = self.keys
+        if 0 <= prev < k and 0 <= cur < k:
+            i = prev * k + cur
+            n = self._count[i]
+            z, self._mean[i], self._var[i] = self._step(self._mean[i], self._var[i], n, value)
+            self._count[i] = n + 1
+            return z
+        if prev < 0 or cur < 0:
+            return None
+        cell = self.sparse.get((prev, cur))
+        if cell is None:
+            if len(self.sparse) >= self.sparse_limit:
+                return None
+            cell = self.sparse[prev, cur] = [0.0, 0.0, 0]
+        z, cell[0], cell[1] = self._step(cell[0], cell[1], cell[2], value)
+        cell[2] += 1
+        return z
+
+    # Baseline snapshots: written by the owning agent's write_state/read_state
+    def write(self, writer):
+        cells = np.flatnonzero(self.count).tolist()
+        writer.u32(self.keys)
+        writer.u32(len(cells))
+        for i in cells:
+            writer.u32(i)
+            writer.f64(self._mean[i])
+            writer.f64(self._var[i])
+            writer.u64(int(self._count[i]))
+        writer.u32(len(self.sparse))
+        for (prev, cur), (mean, var, count) in self.sparse.items():
+            writer.u64(prev)
+            writer.u64(cur)
+            writer.f64(mean)
+            writer.f64(var)
+            writer.u64(count)
+
+    def read(self, reader):
+        """Replace the contents with a written matrix of any size (each pair goes to the matrix
+        if it fits, else to the sparse fallback). Returns self; raises like the reader on
+        damaged data, leaving the matrix as it was."""
+        keys = reader.u32()
+        rows = []
+        cells = reader.u32()
+        if cells and not keys:
+            raise SnapshotError("digraph cells without a matrix size")
+        for _ in range(cells):
+            prev, cur = divmod(reader.u32(), keys)
+            rows.append((prev, cur, reader.f64(), reader.f64(), reader.u64()))
+        for _ in range(reader.u32()):
+            prev, cur = reader.u64(), reader.u64()
+            rows.append((prev, cur, reader.f64(), reader.f64(), reader.u64()))
+        k = self.keys
+        for column in (self.mean, self.var, self.count):
+            column[:] = 0.0
+        self.sparse = {}
+        for prev, cur, mean, var, count in rows:
+            if mean is None or not count:
+                continue
+            if prev < k and cur < k:
+                self.mean[prev, cur], self.var[prev, cur], self.count[prev, cur] = mean, var or 0.0, count
+            elif len(self.sparse) < self.sparse_limit:
+                self.sparse[prev, cur] = [mean, var or 0.0, count]
+        return self
@@ -0,0 +1,259 @@
+import os
+import select
+import shutil
+import subprocess
+import threading
+
+def format_app(class_name, window_title):
+    """App identity used by AppUsageAgent: 'class:title' with the title truncated to 50 chars"""
+    if class_name and window_title:
+        return f"{class_name}:{window_title[:50]}"
+    elif class_name:
+        return class_name
+    return None
+
+
+class FocusSource:
+    """
+    Where AppUsageAgent gets the active application from.
+      - usable:        False if the backend can't run on this machine (agent reports 'Error')
+      - event_driven:  True if start() delivers focus changes to the callback as they happen;
+                       otherwise the agent polls current()
+      - current():     latest app identity (see format_app) or None
+      - fileno():      fd an event loop can watch instead of the source's own thread; when it
+                       is readable, call dispatch(). None if the source has no such fd
+    """
+    usable = False
+    event_driven = False
+
+    def current(self):
+        return None
+
+    def fileno(self):
+        return None
+
+    def dispatch(self):
+        pass
+
+    def start(self, callback, own_thread=True):
+        pass
+
+    def stop(self):
+        pass
+
+
+class XlibFocusSource(FocusSource):
+    """
+    Persistent X connection listening for _NET_ACTIVE_WINDOW changes on the root window and
+    title changes on the focused window. Events are read on a background thread that sleeps in
+    select() until the X server sends something (or, with start(own_thread=False), by whoever
+    watches fileno()), so there is no polling and no subprocess.
+    Requires python-xlib and an EWMH window manager; usable is False otherwise.
+    """
+    event_driven = True
+
+    def __init__(self, display_name=None):
+        self._display_name = display_name
+        self._display = None
+        self._window = None
+        self._current = None
+        self._callback = None
+        self._thread = None
+        self._wake_r = self._wake_w = None
+        self.usable = self._connect()
+
+    def _connect(self):
+        try:
+            from Xlib import X, display
+            self._display = display.Display(self._display_name)
+        except Exception:
+            return False
+
+        d = self._display
+        self._X = X
+        try:
+            self._root = d.screen().root
+            self._NET_ACTIVE_WINDOW = d.intern_atom('_NET_ACTIVE_WINDOW')
+            self._NET_WM_NAME = d.intern_atom('_NET_WM_NAME')
+            self._WM_NAME = d.intern_atom('WM_NAME')
+            self._UTF8_STRING = d.intern_atom('UTF8_STRING')
+            self._root.change_attributes(event_mask=X.PropertyChangeMask)
+            if self._root.get_full_property(self._NET_ACTIVE_WINDOW, X.AnyPropertyType) is None:
+                # No EWMH window manager, nothing will ever tell us about focus changes
+                self._close_display()
+                return False
+            self._refresh()
+        except Exception:
+            self._close_display()
+            return False
+        return True
+
+    def _close_display(self):
+        if self._display is not None:
+            try:
+                self._display.close()
+            except Exception:
+                pass
+            self._display = None
+
+    def current(self):
+        return self._current
+
+    def _active_window(self):
+        prop = self._root.get_full_property(self._NET_ACTIVE_WINDOW, self._X.AnyPropertyType)
+        if not prop or not len(prop.value) or not prop.value[0]:
+            return None
+        return self._display.create_resource_object('window', prop.value[0])
+
+    def _describe(self, window):
+        cls = window.get_wm_class()
+        class_name = cls[1] if cls else None
+        name = window.get_full_property(self._NET_WM_NAME, self._UTF8_STRING)
+        title = name.value if name else window.get_wm_name()
+        if isinstance(title, bytes):
+            title = title.decode("utf-8", "ignore")
+        return format_app(class_name, title or None)
+
+    def _refresh(self):
+        """Re-read the focused window; returns True if the app identity changed"""
+        from Xlib import error
+        try:
+            window = self._active_window()
+            if window is not None and (self._window is None or window.id != self._window.id):
+                # Follow title changes (e.g. browser tabs) on the newly focused window
+                window.change_attributes(event_mask=self._X.PropertyChangeMask, onerror=error.CatchError())
+            self._window = window
+            app = self._describe(window) if window is not None else None
+        except error.XError:
+            # Window vanished between the event and our query
+            self._window = None
+            app = None
+        changed = app != self._current
+        self._current = app
+        return changed
+
+    def _is_focus_event(self, event):
+        if event.type != self._X.PropertyNotify:
+            return False
+        if event.atom == self._NET_ACTIVE_WINDOW:
+            return True
+        return (event.atom in (self._NET_WM_NAME, self._WM_NAME)
+                and self._window is not None and event.window.id == self._window.id)
+
+    def fileno(self):
+        return self._display.fileno() if self.usable and self._display is not None else None
+
+    def dispatch(self):
+        """Handle whatever the X server has sent; notifies the callback on a focus change"""
+        before = self._current
+        while True:
+            focus = False
+            while self._display.pending_events():
+                if self._is_focus_event(self._display.next_event()):
+                    focus = True
+            if not focus:
+                break
+            # The round trips of _refresh() read any events that arrived meanwhile into the
+            # queue, where select() on fileno() no longer sees them: check again
+            self._refresh()
+        if self._current != before and self._callback:
+            try:
+                self._callback(self._current)
+            except Exception as e:
+                print(f"Error in focus callback: {e}")
+
+    def _loop(self):
+        fd = self._display.fileno()
+        while True:
+            readable, _, _ = select.select([fd, self._wake_r], [], [])
+            if self._wake_r in readable:
+                break
+            self.dispatch()
+
+    def start(self, callback, own_thread=True):
+        """own_thread=False skips the reader thread; the caller watches fileno() instead"""
+        if not self.usable or self._thread:
+            return
+        self._callback = callback
+        if not own_thread:
+            return
+        self._wake_r, self._wake_w = os.pipe()
+        self._thread = threading.Thread(target=self._loop, daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        if self._thread:
+            os.write(self._wake_w, b"x")
+            self._thread.join(timeout=1.0)
+            self._thread = None
+            os.close(self._wake_r)
+            os.close(self._wake_w)
+            self._wake_r = self._wake_w = None
+        self._close_display()
+        self._callback = None
+
+
+class XToolsFocusSource(FocusSource):
+    """
+    Legacy polling backend: forks xdotool and xprop on every current() call.
+    Used when python-xlib isn't installed. Tool discovery uses shutil.which (no subprocess).
+    """
+    def __init__(self):
+        self.usable = bool(shutil.which("xdotool") and shutil.which("xprop"))
+
+    def current(self):
+        if not self.usable:
+            return None
+        try:
+            # Get window ID
+            win_id = subprocess.check_output(["xdotool", "getactivewindow"]).decode().strip()
+
+            # Get both window class and title
+            cls = subprocess.check_output(["xprop", "-id", win_id, "WM_CLASS"]).decode("utf-8", "ignore").strip()
+            title = subprocess.check_output(["xprop", "-id", win_id, "_NET_WM_NAME"]).decode("utf-8", "ignore").strip()
+
+            # Extract the class name
+            class_name = cls.split(",")[-1].strip().strip('"') if "," in cls else None
+
+            # Extract the window title
+            window_title = title.split("=")[-1].strip().strip('"') if "=" in title else None
+
+            return format_app(class_name, window_title)
+        except Exception:
+            return None
+
+
+class FakeFocusSource(FocusSource):
+    """
+    In-process source for tests, benchmarks and machines without a display.
+    focus(app) changes the active app and, once started, notifies the callback synchronously.
+    """
+    usable = True
+    event_driven = True
+
+    def __init__(self, app=None):
+        self._current = app
+        self._callback = None
+
+    def current(self):
+        return self._current
+
+    def focus(self, app):
+        self._current = app
+        if self._callback:
+            self._callback(app)
+
+    def start(self, callback, own_thread=True):
+        self._callback = callback
+
+    def stop(self):
+        self._callback = None
+
+
+def default_focus_source():
+    """Event-driven X source when python-xlib and a display are available, else xdotool/xprop"""
+    if os.environ.get("DISPLAY"):
+        source = XlibFocusSource()
+        if source.usable:
+            return source
+    return XToolsFocusSource()
@@ -0,0 +1,411 @@
+"""
+Optional append-only journal of the raw signals the agents see.
+
+Records are appended to memory-mapped segment files, from the agents' drain path (runtime
+loop) and the engine's queue processing, never from the input-listener callbacks.
+
+Segment layout: 16-byte header b"GDJ1" | u16 version | u16 tick_us | u64 base time in ticks
+(since the epoch), followed by records and a 0 byte (or the end of the file). Times are
+stored in ticks of tick_us microseconds as zigzag-varint deltas from the previous record's
+time. Delta state starts over in every segment, so each segment decodes on its own.
+
+    kind 1  MOVES    varint n, then n samples (below)
+    kind 2  KEYS     varint n, then n x (dt, u8 is_char)   key identities are never recorded
+    kind 3  FOCUS    dt, str app
+    kind 4  ANOMALY  dt, str source, str severity, str message
+    kind 5  STATS    dt, str source, f64 mean, f64 std, f64 z   (None stored as NaN)
+
+Mouse samples are second-order deltas: dt, dx and dy minus the previous sample's. Smooth
+motion keeps those within a pixel or a tick, so a sample is usually one byte,
+1ttt xxyy (zigzag values ddt < 8, ddx < 4, ddy < 4); anything else is a 0 byte followed by
+three zigzag varints. str is varint length + UTF-8. Segments rotate at segment_bytes or
+segment_age seconds, and the oldest are deleted once the directory holds more than max_bytes.
+"""
+
+import math
+import mmap
+import os
+import struct
+import threading
+import time
+
+from .metrics import get_registry
+
+MAGIC = b"GDJ1"
+VERSION = 1
+_HEADER = struct.Struct("<4sHHQ")
+_F64 = struct.Struct("<d")
+
+HEADER_SIZE = _HEADER.size
+
+MOVES, KEYS, FOCUS, ANOMALY, STATS = 1, 2, 3, 4, 5
+_NAMES = {FOCUS: "focus", ANOMALY: "anomaly", STATS: "stats"}
+
+
+def _varint(out, n):
+    while n > 0x7F:
+        out.append((n & 0x7F) | 0x80)
+        n >>= 7
+    out.append(n)
+
+
+def _zz(n):
+    return (n << 1) if n >= 0 else ((-n << 1) - 1)
+
+
+def _zigzag(out, n):
+    _varint(out, _zz(n))
+
+
+def _str(out, s):
+    data = s.encode("utf-8")
+    _varint(out, len(data))
+    out += data
+
+
+def _f64(out, value):
+    out += _F64.pack(math.nan if value is None else value)
+
+
+class RecordEncoder:
+    """
+    Delta state of one record stream: a journal segment or a fleet connection (fleet.py).
+    Each method appends one record to the bytearray `out`.
+    """
+
+    def __init__(self, tick_us=100, t=0.0):
+        self.tick_us = tick_us
+        self._per_second = 1_000_000 // tick_us
+        self.reset(t)
+
+    def reset(self, t):
+        """Start a new stream whose base time is t (seconds)"""
+        self.base = int(t * self._per_second)
+        self._last_t = self.base
+        self._last_move = (0, 0, 0, 0, 0)  # x, y and the previous dt, dx, dy
+
+    def header(self, magic=MAGIC):
+        return _HEADER.pack(magic, VERSION, self.tick_us, self.base)
+
+    def state(self):
+        return self._last_t, self._last_move
+
+    def restore(self, state):
+        self._last_t, self._last_move = state
+
+    def _dt(self, out, t):
+        ticks = int(t * self._per_second)
+        _zigzag(out, ticks - self._last_t)
+        self._last_t = ticks
+
+    def moves(self, out, batch):
+        """batch: [(x, y, t), ...]"""
+        out.append(MOVES)
+        _varint(out, len(batch))
+        per_second = self._per_second
+        last_t = self._last_t
+        px, py, pdt, pdx, pdy = self._last_move
+        for x, y, t in batch:
+            ticks = int(t * per_second)
+            x, y = int(x), int(y)
+            dt, dx, dy = ticks - last_t, x - px, y - py
+            zt, zx, zy = _zz(dt - pdt), _zz(dx - pdx), _zz(dy - pdy)
+            if zt < 8 and zx < 4 and zy < 4:
+                out.append(0x80 | (zt << 4) | (zx << 2) | zy)
+            else:
+                out.append(0)
+                _varint(out, zt)
+                _varint(out, zx)
+                _varint(out, zy)
+            last_t, px, py, pdt, pdx, pdy = ticks, x, y, dt, dx, dy
+        self._last_t = last_t
+        self._last_move = (px, py, pdt, pdx, pdy)
+
+    def keys(self, out, batch):
+        """batch: [(t, is_char), ...], optionally with a key code (not recorded) after is_char"""
+        out.append(KEYS)
+        _varint(out, len(batch))
+        for sample in batch:
+            self._dt(out, sample[0])
+            out.append(1 if sample[1] else 0)
+
+    def focus(self, out, t, app):
+        out.append(FOCUS)
+        self._dt(out, t)
+        _str(out, app or "")
+
+    def anomaly(self, out, t, event):
+        out.append(ANOMALY)
+        self._dt(out, t)
+        _str(out, str(event.get("source", "")))
+        _str(out, str(event.get("severity", "")))
+        _str(out, str(event.get("message", "")))
+
+    def stats(self, out, t, stats):
+        out.append(STATS)
+        self._dt(out, t)
+        _str(out, str(stats.get("source", "")))
+        _f64(out, stats.get("mean"))
+        _f64(out, stats.get("std"))
+        _f64(out, stats.get("z"))
+
+
+class RecordDecoder:
+    """
+    Inverse of RecordEncoder. decode() yields (kind, payload) per record, with times in
+    seconds since the epoch:
+        MOVES  [(x, y, t), ...]     KEYS   [(t, is_char), ...]     FOCUS  (t, app)
+        ANOMALY (t, source, severity, message)     STATS (t, source, mean, std, z)
+    Delta state carries over between calls, as it does between the frames of a connection.
+    A 0 or unknown kind byte ends decoding; a truncated record raises IndexError.
+    """
+
+    def __init__(self, tick_us, base):
+        self.scale = tick_us / 1_000_000
+        self._state = (base, 0, 0, 0, 0, 0)  # t, x, y, dt, dx, dy
+
+    @classmethod
+    def from_header(cls, data, magic=MAGIC):
+        """Decoder for a stream that starts with RecordEncoder.header(); None if foreign"""
+        if len(data) < HEADER_SIZE:
+            return None
+        found, version, tick_us, base = _HEADER.unpack_from(data, 0)
+        if found != magic or version != VERSION or not tick_us:
+            return None
+        return cls(tick_us, base)
+
+    def decode(self, data, pos=0, end=None):
+        end = len(data) if end is None else end
+        scale = self.scale
+        t, x, y, dt, dx, dy = self._state
+
+        def varint():
+            nonlocal pos
+            shift = result = 0
+            while True:
+                b = data[pos]
+                pos += 1
+                result |= (b & 0x7F) << shift
+                if b < 0x80:
+                    return result
+                shift += 7
+
+        def zigzag():
+            n = varint()
+            return (n >> 1) ^ -(n & 1)
+
+        def string():
+            nonlocal pos
+            n = varint()
+            if pos + n > end:
+                raise IndexError("truncated string")
+            s = bytes(data[pos:pos + n]).decode("utf-8")
+            pos += n
+            return s
+
+        def f64():
+            nonlocal pos
+            if pos + 8 > end:
+                raise IndexError("truncated record")
+            value = _F64.unpack_from(data, pos)[0]
+            pos += 8
+            return None if math.isnan(value) else value
+
+        while pos < end:
+            kind = data[pos]
+            pos += 1
+            if kind == MOVES:
+                batch = []
+                for _ in range(varint()):
+                    b = data[pos]
+                    pos += 1
+                    if b & 0x80:
+                        zt, zx, zy = (b >> 4) & 7, (b >> 2) & 3, b & 3
+                    elif data[pos] < 0x80 and data[pos + 1] < 0x80 and data[pos + 2] < 0x80:
+                        zt, zx, zy = data[pos], data[pos + 1], data[pos + 2]
+                        pos += 3
+                    else:
+                        zt, zx, zy = varint(), varint(), varint()
+                    dt += (zt >> 1) ^ -(zt & 1)
+                    dx += (zx >> 1) ^ -(zx & 1)
+                    dy += (zy >> 1) ^ -(zy & 1)
+                    t += dt
+                    x += dx
+                    y += dy
+                    batch.append((x, y, t * scale))
+                payload = batch
+            elif kind == KEYS:
+                batch = []
+                for _ in range(varint()):
+                    t += zigzag()
+                    batch.append((t * scale, bool(data[pos])))
+                    pos += 1
+                payload = batch
+            elif kind == FOCUS:
+                t += zigzag()
+                payload = (t * scale, string())
+            elif kind == ANOMALY:
+                t += zigzag()
+                payload = (t * scale, string(), string(), string())
+            elif kind == STATS:
+                t += zigzag()
+                payload = (t * scale, string(), f64(), f64(), f64())
+            else:
+                return  # 0 padding after a crash, or an unknown kind
+            if pos > end:
+                raise IndexError("truncated record")
+            self._state = (t, x, y, dt, dx, dy)
+            yield kind, payload
+
+
+class Journal:
+    """Thread-safe writer; see the module docstring for the format"""
+
+    def __init__(self, directory, segment_bytes=4 << 20, segment_age=3600.0,
+                 max_bytes=256 << 20, tick_us=100):
+        self.directory = directory
+        self.segment_bytes = segment_bytes
+        self.segment_age = segment_age
+        self.max_bytes = max_bytes
+        self._encoder = RecordEncoder(tick_us)
+        self._lock = threading.Lock()
+        self._file = None
+        self._map = None
+        self._pos = 0
+        self._opened = 0.0
+        self._seq = 0
+
+        self.metrics = get_registry()
+        self._m_bytes = self.metrics.counter("journal.bytes")
+        self._m_records = self.metrics.counter("journal.records")
+        self._m_dropped = self.metrics.counter("journal.dropped")
+        os.makedirs(directory, exist_ok=True)
+
+    # Record writers
+    def moves(self, batch):
+        """batch: [(x, y, t), ...] as drained from MovementAgent.samples"""
+        if batch:
+            self._append(len(batch), self._encoder.moves, batch)
+
+    def keys(self, batch):
+        """batch: [(t, is_char, key_code), ...] as drained from TypingAgent.samples"""
+        if batch:
+            self._append(len(batch), self._encoder.keys, batch)
+
+    def focus(self, t, app):
+        self._append(1, self._encoder.focus, t, app)
+
+    def anomaly(self, t, event):
+        self._append(1, self._encoder.anomaly, t, event)
+
+    def stats(self, t, stats):
+        self._append(1, self._encoder.stats, t, stats)
+
+    def _append(self, count, encode, *args):
+        with self._lock:
+            if self._map is None or time.time() - self._opened >= self.segment_age:
+                self._rotate()
+            state = self._encoder.state()
+            out = bytearray()
+            encode(out, *args)
+            if self._pos + len(out) >= self.segment_bytes:
+                # Deltas were taken against this segment; redo them against the next one
+                self._encoder.restore(state)
+                self._rotate()
+                out = bytearray()
+                encode(out, *args)
+                if self._pos + len(out) >= self.segment_bytes:
+                    self._m_dropped.inc(count)
+                    return
+            end = self._pos + len(out)
+            self._map[self._pos:end] = out
+            self._pos = end
+        self._m_bytes.inc(len(out))
+        self._m_records.inc(count)
+
+    # Segments
+    def _rotate(self):
+        self._close_segment()
+        now = time.time()
+        self._seq += 1
+        # The pid keeps segments apart when two processes journal to one directory
+        # (the UI and the agent process, see agent_host.py)
+        path = os.path.join(self.directory, f"{int(now * 1000):013d}-{os.getpid()}-{self._seq:04d}.gdj")
+        self._file = open(path, "w+b")
+        self._file.truncate(self.segment_bytes)
+        self._map = mmap.mmap(self._file.fileno(), self.segment_bytes)
+        self._encoder.reset(now)
+        self._map[:HEADER_SIZE] = self._encoder.header()
+        self._pos = HEADER_SIZE
+        self._opened = now
+        self._enforce_retention()
+
+    def _close_segment(self):
+        if self._map is None:
+            return
+        self._map.flush()
+        self._map.close()
+        self._file.truncate(self._pos)
+        self._file.close()
+        self._map = self._file = None
+
+    def _enforce_retention(self):
+        paths = segment_paths(self.directory)
+        sizes = [os.path.getsize(p) for p in paths]
+        total = sum(sizes)
+        # Never delete the segment that was just opened (the last one)
+        for path, size in zip(paths[:-1], sizes[:-1]):
+            if total <= self.max_bytes:
+                break
+            os.remove(path)
+            total -= size
+
+    def flush(self):
+        with self._lock:
+            if self._map is not None:
+                self._map.flush()
+
+    def close(self):
+        with self._lock:
+            self._close_segment()
+
+
+def segment_paths(directory):
+    return sorted(os.path.join(directory, name) for name in os.listdir(directory)
+                  if name.endswith(".gdj"))
+
+
+class JournalReader:
+    """
+    Sequential reader over every segment in a directory, oldest first. records() yields flat
+    tuples with times in seconds since the epoch:
+        ("move", t, x, y)   ("key", t, is_char)   ("focus", t, app)
+        ("anomaly", t, source, severity, message)   ("stats", t, source, mean, std, z)
+    """
+
+    def __init__(self, directory):
+        self.directory = directory
+
+    def records(self):
+        for path in segment_paths(self.directory):
+            yield from self.read_segment(path)
+
+    @staticmethod
+    def read_segment(path):
+        with open(path, "rb") as f:
+            data = f.read()
+        decoder = RecordDecoder.from_header(data)
+        if decoder is None:
+            return
+        try:
+            for kind, payload in decoder.decode(data, HEADER_SIZE):
+                if kind == MOVES:
+                    for x, y, t in payload:
+                        yield ("move", t, x, y)
+                elif kind == KEYS:
+                    for t, is_char in payload:
+                        yield ("key", t, is_char)
+                else:
+                    yield (_NAMES[kind],) + payload
+        except IndexError:
+            return  # truncated final record
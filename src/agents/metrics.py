@@ -0,0 +1,187 @@
+import os
+import threading
+import time
+
+class Counter:
+    """Monotonic count (events, drops, ...)"""
+    __slots__ = ("name", "registry", "value")
+
+    def __init__(self, name, registry):
+        self.name = name
+        self.registry = registry
+        self.value = 0
+
+    def inc(self, n=1):
+        if self.registry.enabled:
+            self.value += n
+
+    def snapshot(self):
+        return self.value
+
+    def reset(self):
+        self.value = 0
+
+
+class Gauge:
+    """Last-set value (queue depth, buffer fill, ...)"""
+    __slots__ = ("name", "registry", "value")
+
+    def __init__(self, name, registry):
+        self.name = name
+        self.registry = registry
+        self.value = None
+
+    def set(self, value):
+        if self.registry.enabled:
+            self.value = value
+
+    def snapshot(self):
+        return self.value
+
+    def reset(self):
+        self.value = None
+
+
+class Histogram:
+    """
+    Fixed log2-bucket histogram. observe() is O(1) and allocation-free: bucket i holds values
+    in [2^(i-1), 2^i) units (bucket 0 holds values below 1). Percentiles in snapshot() are
+    bucket upper bounds, so they are accurate to a factor of two, which is enough to tell
+    "10 us" from "10 ms". Latencies are recorded in microseconds.
+    """
+    __slots__ = ("name", "registry", "unit", "buckets", "count", "total", "max")
+
+    BUCKETS = 40
+
+    def __init__(self, name, registry, unit="us"):
+        self.name = name
+        self.registry = registry
+        self.unit = unit
+        self.reset()
+
+    def reset(self):
+        self.buckets = [0] * self.BUCKETS
+        self.count = 0
+        self.total = 0
+        self.max = 0
+
+    def observe(self, value):
+        if not self.registry.enabled:
+            return
+        i = int(value).bit_length()
+        self.buckets[i if i < self.BUCKETS else self.BUCKETS - 1] += 1
+        self.count += 1
+        self.total += value
+        if value > self.max:
+            self.max = value
+
+    def observe_ns(self, ns):
+        """Record a perf_counter_ns() duration in microseconds"""
+        self.observe(ns / 1000)
+
+    def percentile(self, p):
+        if not self.count:
+            return 0
+        rank = self.count * p / 100.0
+        seen = 0
+        for i, n in enumerate(self.buckets):
+            seen += n
+            if seen >= rank:
+                return min(1 << i, self.max) if i else min(1, self.max)
+        return self.max
+
+    def snapshot(self):
+        u = self.unit
+        return {
+            "count": self.count,
+            f"mean_{u}": round(self.total / self.count, 2) if self.count else 0,
+            f"p50_{u}": round(self.percentile(50), 2),
+            f"p90_{u}": round(self.percentile(90), 2),
+            f"p99_{u}": round(self.percentile(99), 2),
+            f"max_{u}": round(self.max, 2),
+        }
+
+
+class MetricsRegistry:
+    """
+    Named counters, gauges and histograms shared by the agents, the engine and the UI.
+
+    Instruments are created once (get-or-create by name) and kept by the code that updates
+    them, so the hot path is an attribute check and an add. Set enabled = False to stop
+    recording; timed() then returns callbacks unwrapped, so a disabled registry costs the
+    listener callbacks nothing. Collectors are functions run by snapshot() to sample state
+    that is cheaper to read on demand than to track (queue depths, buffer counters).
+    Updates from several threads are not locked; values are diagnostics, not accounting.
+    """
+
+    def __init__(self, enabled=True):
+        self.enabled = enabled
+        self._instruments = {}
+        self._collectors = []
+        self._lock = threading.Lock()
+
+    def _get(self, cls, name, **kwargs):
+        instrument = self._instruments.get(name)
+        if instrument is None:
+            with self._lock:
+                instrument = self._instruments.get(name)
+                if instrument is None:
+                    instrument = cls(name, self, **kwargs)
+                    self._instruments[name] = instrument
+        return instrument
+
+    def counter(self, name):
+        return self._get(Counter, name)
+
+    def gauge(self, name):
+        return self._get(Gauge, name)
+
+    def histogram(self, name, unit="us"):
+        return self._get(Histogram, name, unit=unit)
+
+    def timed(self, name, func):
+        """Wrap func so each call's duration lands in histogram `name`; func itself when
+        the registry is disabled"""
+        if not self.enabled:
+            return func
+        histogram = self.histogram(name)
+        perf = time.perf_counter_ns
+
+        def wrapper(*args, **kwargs):
+            t0 = perf()
+            try:
+                return func(*args, **kwargs)
+            finally:
+                histogram.observe_ns(perf() - t0)
+        return wrapper
+
+    def add_collector(self, func):
+        """func() is called on every snapshot(); it should set gauges"""
+        if func not in self._collectors:
+            self._collectors.append(func)
+
+    def remove_collector(self, func):
+        if func in self._collectors:
+            self._collectors.remove(func)
+
+    def snapshot(self):
+        """{name: value} for counters and gauges, {name: {count, mean, p50, ...}} for histograms"""
+        if self.enabled:
+            for collector in list(self._collectors):
+                try:
+                    collector()
+                except Exception as e:
+                    print(f"Error in metrics collector: {e}")
+        return {name: inst.snapshot() for name, inst in sorted(self._instruments.items())}
+
+    def reset(self):
+        for instrument in list(self._instruments.values()):
+            instrument.reset()
+
+
+_registry = MetricsRegistry(enabled=os.environ.get("GUARDIO_METRICS", "1") != "0")
+
+
+def get_registry():
+    """Process-wide registry; GUARDIO_METRICS=0 starts it disabled"""
+    return _registry
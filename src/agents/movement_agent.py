@@ -1,108 +1,266 @@
 import time
-import math
-from pynput import mouse
+import numpy as np
+from .quantile_profile import detector_tag, make_profile
+from .trajectory import FEATURES, SHAPE, TrajectoryFeatures
+from .metrics import get_registry
+from .stats_board import publish_stats
+from .ring_buffer import SampleBuffer
+
+_EMPTY = (np.empty(0, dtype=np.intp), np.empty(0))
+_LABELS = {
+    "speed": "Speed {:.1f}",
+    "acceleration": "Acceleration {:.0f} px/s²",
+    "jerk": "Jerk {:.3g} px/s³",
+    "curvature": "Curvature {:.3f} rad/px",
+    "angle": "Turn {:.2f} rad",
+    "pause": "Pause {:.2f}s",
+}
+
 
 class MovementAgent:
     """
-    Adaptive movement anomaly detector with exponential moving averages and cooldown.
+    Adaptive movement anomaly detector with exponential moving averages and cooldown
+    (detector="ema"), or with learned tail quantiles (detector="quantile"). Every sample
+    goes through an incremental TrajectoryFeatures pipeline; each enabled feature has its
+    own profile, and a sample alerts on the feature with the largest z over sigma. Speed is
+    the default; acceleration, jerk, curvature, angle change and pause length (see
+    trajectory.py) are opt-in through `features`, since they also flag more ordinary
+    movement.
     Publishes:
       - anomalies to anomaly_queue as dicts: {"source","severity","message"}
-      - stats to stats_queue: {"source","mean","std","z","note"}
+      - stats of the speed profile to stats_queue: written in place when it is a StatsBoard,
+        else put as {"source","mean","std","z","note"} (see stats_board.publish_stats)
     """
-    def __init__(self, anomaly_queue, stats_queue, sigma=3.0, cooldown=3.0):
+    metrics_name = "movement"
+    stats_source = "Movement"  # its StatsBoard slot
+    # Baseline snapshots (see snapshot.py)
+    state_tag = b"MOVE"
+    state_version = 2
+
+    def __init__(self, anomaly_queue, stats_queue, sigma=3.0, cooldown=3.0, detector="ema",
+                 features=("speed",)):
         self.anomaly_queue = anomaly_queue
         self.stats_queue = stats_queue
         self.sigma = sigma
         self.cooldown = cooldown
 
-        self.positions = []
-        self.listener = mouse.Listener(on_move=self._on_move)
+        self.listener = None
+        # Raw samples from the listener thread, drained in micro-batches by run() / run_async()
+        self.samples = SampleBuffer(4096)
+        self.max_batch = 256
+        # Drained batches at least this large go through the vectorized path, and within it
+        # feature columns at least this long through the vectorized profile update
+        self.vector_batch_min = 32
+        # Optional Journal (see journal.py); written on the drain path, never by the listener
+        self.journal = None
 
-        self.mean_speed = None
-        self.var_speed = None
-        self.count = 0
+        self.detector = detector
+        # Speed is always profiled: it drives the stats and the columnar fleet table
+        unknown = set(features) - set(FEATURES)
+        if unknown:
+            raise ValueError(f"unknown movement features: {', '.join(sorted(unknown))}")
+        self.features = tuple(f for f in FEATURES if f == "speed" or f in features)
+        self.trajectory = TrajectoryFeatures(shape=any(f in SHAPE for f in self.features))
+        self.profiles = {f: self._make_profile() for f in self.features}
+        self.profile = self.profiles["speed"]
+        self.state_tag = detector_tag(self.state_tag, detector)
 
-        self.alpha = 0.01
         self.sigma = sigma
         self.cooldown = cooldown
         self._last_alert_ts = 0.0
         self._last_stat_ts = 0.0
 
+        self.metrics = get_registry()
+        self._m_drain = self.metrics.histogram(f"{self.metrics_name}.drain")
+        self._m_batch = self.metrics.histogram(f"{self.metrics_name}.batch_size", unit="samples")
+        self._m_stats_throttled = self.metrics.counter(f"{self.metrics_name}.stats_throttled")
+        self._m_cooldown = self.metrics.counter(f"{self.metrics_name}.alerts_in_cooldown")
+
+    @property
+    def mean_speed(self):
+        return self.profile.mean
+
+    @property
+    def var_speed(self):
+        return self.profile.var
+
+    @property
+    def count(self):
+        return self.profile.count
+
     def _now(self):
         return time.time()
 
+    def _make_profile(self):
+        return make_profile(self.detector, alpha=0.01, min_count=10)
+
+    def write_state(self, writer):
+        writer.profile(self.profile)
+        others = [f for f in self.features if f != "speed"]
+        writer.u32(len(others))
+        for f in others:
+            writer.str(f)
+            writer.profile(self.profiles[f])
+
+    def read_state(self, reader):
+        # Read everything first so a damaged section leaves the agent untouched
+        profiles = {"speed": self._make_profile()}
+        reader.profile(profiles["speed"])
+        for _ in range(reader.u32()):
+            f = reader.str()
+            profile = self._make_profile()
+            reader.profile(profile)
+            if f in self.profiles:
+                profiles[f] = profile
+        for f in self.features:
+            profiles.setdefault(f, self._make_profile())
+        self.profiles = profiles
+        self.profile = profiles["speed"]
+
     def _on_move(self, x, y):
-        t = self._now()
-        self.positions.append({'x': x, 'y': y, 'time': t})
-        if len(self.positions) > 200:
-            self.positions.pop(0)
-        self._step()
-
-    def _speed(self):
-        if len(self.positions) < 2:
-            return None
-        p1, p2 = self.positions[-2], self.positions[-1]
-        dt = p2['time'] - p1['time']
-        if dt <= 0:
-            return None
-        dx, dy = p2['x'] - p1['x'], p2['y'] - p1['y']
-        dist = math.hypot(dx, dy)
-        return dist / dt
-
-    def _update_profile(self, value):
-        if self.mean_speed is None:
-            self.mean_speed = value
-            self.var_speed = 0.0
-            self.count = 1
+        # Listener callback: ingest only, detection happens on the agent thread / runtime loop
+        self.samples.push((x, y, self._now()))
+
+    def _ingest(self, x, y, t):
+        self._step(x, y, t)
+
+    def _drain_samples(self):
+        t0 = time.perf_counter_ns()
+        drained = False
+        while True:
+            batch = self.samples.pop_batch(self.max_batch)
+            if not batch:
+                break
+            drained = True
+            self.process_batch(batch)
+        if drained:
+            self._m_drain.observe_ns(time.perf_counter_ns() - t0)
+
+    def process_batch(self, batch):
+        """Run detection over [(x, y, t), ...] samples, whatever their source (the listener
+        buffer here, a remote endpoint in fleet.py)"""
+        self._m_batch.observe(len(batch))
+        if self.journal is not None:
+            self.journal.moves(batch)
+        if len(batch) >= self.vector_batch_min:
+            self._ingest_batch(batch)
+        else:
+            for x, y, t in batch:
+                self._ingest(x, y, t)
+
+    def _ingest_batch(self, batch):
+        """Vectorized equivalent of calling _ingest for every sample in batch"""
+        pts = np.array(batch, dtype=np.float64)
+        xs, ys, ts = pts[:, 0], pts[:, 1], pts[:, 2]
+        columns = self.trajectory.batch(xs, ys, ts)
+
+        # Per sample, the feature with the largest z over sigma (the first one on ties)
+        best_z = np.full(len(ts), -np.inf)
+        best_f = np.zeros(len(ts), dtype=np.intp)
+        best_v = np.zeros(len(ts))
+        speed_z = None
+        for k, f in enumerate(self.features):
+            rows, values = columns.get(f, _EMPTY)
+            if not len(rows):
+                continue
+            z = self._score_column(self.profiles[f], values)
+            if f == "speed":
+                speed_z = z[-1]
+            with np.errstate(invalid="ignore"):
+                hit = z > self.sigma
+            hit[hit] = z[hit] > best_z[rows[hit]]
+            rows = rows[hit]
+            best_z[rows] = z[hit]
+            best_f[rows] = k
+            best_v[rows] = values[hit]
+        for i in np.flatnonzero(best_z > -np.inf):
+            self._alert(self.features[best_f[i]], float(best_v[i]), float(best_z[i]), float(ts[i]))
+
+        if speed_z is None:
+            self._publish_stats(z=None, note="NoSignal")
         else:
-            self.count += 1
-            delta = value - self.mean_speed
-            self.mean_speed += self.alpha * delta
-            self.var_speed = (1 - self.alpha) * self.var_speed + self.alpha * (delta ** 2)
+            self._publish_stats(z=None if np.isnan(speed_z) else float(speed_z))
 
-    def _std(self):
-        return (self.var_speed ** 0.5) if self.var_speed is not None else 0.0
+    def _score_column(self, profile, values):
+        """z of each value in turn (NaN while not ready), folding them into profile"""
+        if len(values) >= self.vector_batch_min:
+            return profile.update_batch(values).z
+        return np.array([np.nan if z is None else z for z in map(profile.observe, values.tolist())])
 
     def _publish_stats(self, z=None, note=None):
         now = self._now()
         if now - self._last_stat_ts >= 0.5:
             self._last_stat_ts = now
-            mean = self.mean_speed if self.mean_speed is not None else None
-            std = self._std() if self.mean_speed is not None else None
-            self.stats_queue.put({
+            mean = self.profile.mean
+            std = self.profile.std if self.profile.mean is not None else None
+            publish_stats(self.stats_queue, self.stats_source, mean, std, z,
+                          note or ("Adapting" if self.count < max(30, self.profile.min_count) else "Stable"),
+                          t=now)
+        else:
+            self._m_stats_throttled.inc()
+
+    def _step(self, x, y, now):
+        """Score one sample: O(1) from the trajectory's carried state, nothing is rescanned"""
+        values = self.trajectory.step(x, y, now)
+        profiles = self.profiles
+        best = None
+        speed_z = None
+        for f, value in zip(FEATURES, values):
+            if value is None:
+                continue
+            profile = profiles.get(f)
+            if profile is None:
+                continue
+            z = profile.observe(value)
+            if f == "speed":
+                speed_z = z
+            if z is not None and z > self.sigma and (best is None or z > best[2]):
+                best = (f, value, z)
+        if best is not None:
+            self._alert(*best, now)
+        if values[0] is None:
+            self._publish_stats(z=None, note="NoSignal")
+        else:
+            self._publish_stats(z=speed_z)
+
+    def _alert(self, feature, value, z, now):
+        # Cooldown runs on sample time so batched and per-sample detection agree
+        if now - self._last_alert_ts >= self.cooldown:
+            self._last_alert_ts = now
+            sev = "High" if z > (self.sigma + 2.0) else "Medium"
+            self.anomaly_queue.put({
                 "source": "Movement",
-                "mean": mean,
-                "std": std,
-                "z": z,
-                "note": note or ("Adapting" if self.count < 30 else "Stable")
+                "severity": sev,
+                "message": f"{_LABELS[feature].format(value)}, z={z:.2f}"
             })
+        else:
+            self._m_cooldown.inc()
 
-    def _step(self):
-        spd = self._speed()
-        if spd is None or spd < 0.1:
-            self._publish_stats(z=None, note="NoSignal")
-            return
-
-        z = None
-        if self.mean_speed is not None and self._std() > 1e-6 and self.count > 10:
-            z = abs(spd - self.mean_speed) / max(self._std(), 1e-6)
-            if z > self.sigma:
-                now = self._now()
-                if now - self._last_alert_ts >= self.cooldown:
-                    self._last_alert_ts = now
-                    sev = "High" if z > (self.sigma + 2.0) else "Medium"
-                    self.anomaly_queue.put({
-                        "source": "Movement",
-                        "severity": sev,
-                        "message": f"Speed {spd:.1f}, z={z:.2f}"
-                    })
-
-        self._update_profile(spd)
-        self._publish_stats(z=z)
+    def _make_listener(self):
+        # Imported lazily so the detector can be driven without a display (benchmarks, headless)
+        from pynput import mouse
+        return mouse.Listener(on_move=self.metrics.timed(f"{self.metrics_name}.callback", self._on_move))
 
     def run(self, stop_event):
+        self.listener = self._make_listener()
         self.listener.start()
         self._publish_stats(z=None, note="Adapting")
         while not stop_event.is_set():
-            time.sleep(0.05)
+            self.samples.wait(0.05)
+            self._drain_samples()
         self.listener.stop()
+
+    async def run_async(self, runtime):
+        """AgentRuntime variant of run(): no thread of its own, the listener wakes the
+        runtime loop only when a batch of samples is waiting"""
+        self.samples.notify = runtime.threadsafe(self._drain_samples)
+        # Samples pushed before notify was installed left the buffer signalled; drain them
+        self._drain_samples()
+        self.listener = self._make_listener()
+        self.listener.start()
+        self._publish_stats(z=None, note="Adapting")
+        try:
+            await runtime.wait_stopped()
+        finally:
+            self.listener.stop()
+            self.samples.notify = None
@@ -0,0 +1,341 @@
+"""
+Columnar (struct-of-arrays) profiles for many sessions, scored a whole batch at a time.
+
+ProfileTable keeps one row per session and one float64 column per piece of detection state,
+in a single block that can live in shared memory:
+    move.mean  move.var  move.count  move.alert  move.x  move.y  move.t
+    key.mean   key.var   key.count   key.alert   key.t
+The .mean/.var/.count columns are an AdaptiveProfile per row (mouse speed, key delay), .alert
+the last alert time (cooldown) and the rest the previous sample each signal is derived from.
+A row costs 96 bytes, where a MovementAgent and a TypingAgent cost several KB. That is the
+Movement and Typing state only; ColumnarFleetServer adds its own per-user cost (fleet.py).
+
+score_moves()/score_keys() take samples from any number of sessions, mixed: (row, ...)
+arrays, each session's samples in time order. They compute the signal, fold it into every
+row's profile with the closed form AdaptiveProfile.update_batch() uses (per row, in rounds
+of at most ROUND samples) and return the alerts, with the same values, z-scores, cooldowns
+and messages as MovementAgent / TypingAgent. The WPM threshold alert is not evaluated here,
+nor movement features other than speed (the fleet's MovementAgents are speed only too).
+
+ShardedScorer spreads that work over a process pool: the table is in shared memory and a
+batch is split into `workers` shards by row (r % workers), so concurrent tasks never write
+the same row.
+"""
+
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import shared_memory
+
+import numpy as np
+
+from .adaptive_profile import AdaptiveProfile
+
+COLUMNS = ("move.mean", "move.var", "move.count", "move.alert", "move.x", "move.y", "move.t",
+           "key.mean", "key.var", "key.count", "key.alert", "key.t")
+ROUND = 64
+
+
+class ProfileTable:
+    """One row per session; columns are NumPy views into one (shared) block"""
+
+    def __init__(self, capacity, alpha=0.01, min_count=10, shared=False, name=None):
+        self.capacity = capacity
+        self.alpha = alpha
+        self.min_count = min_count
+        size = len(COLUMNS) * capacity * 8
+        self._shm = None
+        if name is not None:
+            self._shm = shared_memory.SharedMemory(name=name)
+            buffer = self._shm.buf
+        elif shared:
+            self._shm = shared_memory.SharedMemory(create=True, size=size)
+            buffer = self._shm.buf
+        else:
+            buffer = bytearray(size)
+        self.data = np.ndarray((len(COLUMNS), capacity), dtype=np.float64, buffer=buffer)
+        self.columns = {c: self.data[i] for i, c in enumerate(COLUMNS)}
+        self.rows = 0
+        self._free = []  # rows released by free_row(), reused first
+        if name is None:
+            self._init_rows(0, capacity)
+
+    @property
+    def name(self):
+        """Shared memory block name, for attach(); None for a private table"""
+        return self._shm.name if self._shm is not None else None
+
+    @classmethod
+    def attach(cls, name, capacity, alpha=0.01, min_count=10):
+        """Open a table created with shared=True in another process"""
+        return cls(capacity, alpha=alpha, min_count=min_count, name=name)
+
+    @property
+    def nbytes(self):
+        return self.data.nbytes
+
+    def _init_rows(self, start, stop):
+        c = self.columns
+        for sig in ("move", "key"):
+            c[f"{sig}.mean"][start:stop] = np.nan
+            c[f"{sig}.var"][start:stop] = np.nan
+            c[f"{sig}.count"][start:stop] = 0
+            c[f"{sig}.alert"][start:stop] = -np.inf
+            c[f"{sig}.t"][start:stop] = np.nan
+        c["move.x"][start:stop] = np.nan
+        c["move.y"][start:stop] = np.nan
+
+    def add_row(self, t=None):
+        """Next free row; `t` starts its keystroke clock, as TypingAgent.last_ts does"""
+        if self._free:
+            row = self._free.pop()
+        elif self.rows < self.capacity:
+            row = self.rows
+            self.rows += 1
+        else:
+            raise MemoryError(f"profile table full ({self.capacity} rows)")
+        if t is not None:
+            self.columns["key.t"][row] = t
+        return row
+
+    def free_row(self, row):
+        """Reset a row to an empty profile and make it available to add_row()"""
+        self._init_rows(row, row + 1)
+        self._free.append(row)
+
+    def profile(self, row, sig="move"):
+        """AdaptiveProfile copy of one row's state (for stats and tests)"""
+        p = AdaptiveProfile(alpha=self.alpha, min_count=self.min_count)
+        count = int(self.columns[f"{sig}.count"][row])
+        if count:
+            p.mean = float(self.columns[f"{sig}.mean"][row])
+            p.var = float(self.columns[f"{sig}.var"][row])
+            p.count = count
+        return p
+
+    def close(self, unlink=False):
+        if self._shm is not None:
+            self.columns = self.data = None
+            self._shm.close()
+            if unlink:
+                self._shm.unlink()
+            self._shm = None
+
+    # Batch scoring
+    def _update(self, sig, rows, values):
+        """
+        Fold values into the rows' profiles. rows must be grouped (each row's samples
+        contiguous and in order). Returns (mean, std, count) before each sample, the state it
+        is scored against; mean is NaN for a sample that seeds an empty profile.
+        """
+        mean, var, count = (self.columns[f"{sig}.{c}"] for c in ("mean", "var", "count"))
+        n = len(values)
+        mean_before = np.full(n, np.nan)
+        var_before = np.full(n, np.nan)
+        count_before = np.zeros(n)
+        if not n:
+            return mean_before, np.sqrt(var_before), count_before
+
+        starts = np.flatnonzero(np.r_[True, rows[1:] != rows[:-1]])
+        sizes = np.diff(np.r_[starts, n])
+        k = np.arange(n) - np.repeat(starts, sizes)
+
+        # The first sample of an empty profile only seeds it
+        seed = starts[count[rows[starts]] == 0]
+        seeded = rows[seed]
+        mean[seeded] = values[seed]
+        var[seeded] = 0.0
+        count[seeded] = 1
+        keep = np.ones(n, dtype=bool)
+        keep[seed] = False
+        k = k - np.isin(rows, seeded)  # the rest of a seeded row starts one later
+        count_before[keep] = count[rows[keep]] + k[keep]
+
+        a = self.alpha
+        c = 1.0 - a
+        idx_all = np.flatnonzero(keep)
+        k_all = k[keep]
+        r = 0
+        while True:
+            sel = (k_all >= r * ROUND) & (k_all < (r + 1) * ROUND)
+            if not sel.any():
+                break
+            idx = idx_all[sel]
+            kk = k_all[sel] - r * ROUND
+            group = np.cumsum(kk == 0) - 1
+            group_rows = rows[idx[kk == 0]]
+            width = int(kk.max()) + 1
+            lens = np.bincount(group)
+
+            v = np.zeros((len(group_rows), width))
+            v[group, kk] = values[idx]
+            pw = c ** np.arange(1, width + 1)
+            m0 = mean[group_rows][:, None]
+            s0 = var[group_rows][:, None]
+
+            mean_after = pw * (m0 + a * np.cumsum(v / pw, axis=1))
+            mb = np.concatenate((m0, mean_after[:, :-1]), axis=1)
+            delta = v - mb
+            var_after = pw * (s0 + a * np.cumsum(delta * delta / pw, axis=1))
+            vb = np.concatenate((s0, var_after[:, :-1]), axis=1)
+
+            mean_before[idx] = mb[group, kk]
+            var_before[idx] = vb[group, kk]
+            last = lens - 1
+            g = np.arange(len(group_rows))
+            mean[group_rows] = mean_after[g, last]
+            var[group_rows] = var_after[g, last]
+            count[group_rows] += lens
+            r += 1
+        return mean_before, np.sqrt(var_before), count_before
+
+    def _z(self, values, mean, std, count):
+        ready = (std > AdaptiveProfile.MIN_STD) & (count > self.min_count)
+        with np.errstate(invalid="ignore"):
+            z = np.abs(values - mean) / np.maximum(std, AdaptiveProfile.MIN_STD)
+        return np.where(ready, z, np.nan)
+
+    def _alerts(self, sig, rows, z, ts, sigma, cooldown):
+        """Rows whose z passed sigma, filtered by each row's cooldown (sequential per row)"""
+        with np.errstate(invalid="ignore"):
+            candidates = np.flatnonzero(z > sigma)
+        last_alert = self.columns[f"{sig}.alert"]
+        fired = []
+        for i in candidates:
+            row, t = rows[i], ts[i]
+            if t - last_alert[row] >= cooldown:
+                last_alert[row] = t
+                fired.append(i)
+        return fired
+
+    def score_moves(self, rows, xs, ys, ts, sigma=3.0, cooldown=3.0):
+        """Mouse samples of many sessions. Returns [(row, event)] alerts."""
+        order = np.argsort(rows, kind="stable")
+        rows, xs, ys, ts = rows[order], xs[order], ys[order], ts[order]
+        c = self.columns
+        n = len(rows)
+        first = np.r_[True, rows[1:] != rows[:-1]] if n else np.zeros(0, dtype=bool)
+        px = np.where(first, c["move.x"][rows], np.r_[np.nan, xs[:-1]])
+        py = np.where(first, c["move.y"][rows], np.r_[np.nan, ys[:-1]])
+        pt = np.where(first, c["move.t"][rows], np.r_[np.nan, ts[:-1]])
+        dt = ts - pt
+        with np.errstate(divide="ignore", invalid="ignore"):
+            spd = np.hypot(xs - px, ys - py) / dt
+            valid = (dt > 0) & (spd >= 0.1)
+
+        last = np.r_[first[1:], True] if n else first
+        c["move.x"][rows[last]] = xs[last]
+        c["move.y"][rows[last]] = ys[last]
+        c["move.t"][rows[last]] = ts[last]
+
+        vr, vs, vt = rows[valid], spd[valid], ts[valid]
+        z = self._z(vs, *self._update("move", vr, vs))
+        alerts = []
+        for i in self._alerts("move", vr, z, vt, sigma, cooldown):
+            sev = "High" if z[i] > (sigma + 2.0) else "Medium"
+            alerts.append((int(vr[i]), {"source": "Movement", "severity": sev,
+                                        "message": f"Speed {vs[i]:.1f}, z={z[i]:.2f}"}))
+        return alerts
+
+    def score_keys(self, rows, ts, sigma=3.0, cooldown=3.0):
+        """Keystroke times of many sessions. Returns [(row, event)] alerts."""
+        order = np.argsort(rows, kind="stable")
+        rows, ts = rows[order], ts[order]
+        c = self.columns
+        n = len(rows)
+        first = np.r_[True, rows[1:] != rows[:-1]] if n else np.zeros(0, dtype=bool)
+        delay = ts - np.where(first, c["key.t"][rows], np.r_[np.nan, ts[:-1]])
+        with np.errstate(invalid="ignore"):
+            valid = (delay > 0.01) & (delay < 2.0)
+        last = np.r_[first[1:], True] if n else first
+        c["key.t"][rows[last]] = ts[last]
+
+        vr, vd, vt = rows[valid], delay[valid], ts[valid]
+        z = self._z(vd, *self._update("key", vr, vd))
+        alerts = []
+        for i in self._alerts("key", vr, z, vt, sigma, cooldown):
+            sev = "High" if z[i] > (sigma + 2.0) else "Medium"
+            alerts.append((int(vr[i]), {"source": "Typing", "severity": sev,
+                                        "message": f"Delay {vd[i]*1000:.0f}ms, z={z[i]:.2f}"}))
+        return alerts
+
+
+# Process pool
+_worker_table = None
+
+
+def _attach_worker(name, capacity, alpha, min_count):
+    global _worker_table
+    _worker_table = ProfileTable.attach(name, capacity, alpha=alpha, min_count=min_count)
+
+
+def _score_local(table, moves, keys, sigma, cooldown):
+    alerts = []
+    if moves is not None:
+        alerts += table.score_moves(*moves, sigma=sigma, cooldown=cooldown)
+    if keys is not None:
+        alerts += table.score_keys(*keys, sigma=sigma, cooldown=cooldown)
+    return alerts
+
+
+def _score_shard(moves, keys, sigma, cooldown):
+    return _score_local(_worker_table, moves, keys, sigma, cooldown)
+
+
+class ShardedScorer:
+    """
+    Scores batches against a shared ProfileTable in `workers` processes (in the calling
+    process when workers is 0). Each batch is split into shards by row % workers, so the
+    shards' tasks write disjoint rows and need no locking; batches must not overlap in time
+    (submit the next one after the previous result is in).
+    """
+
+    def __init__(self, table, workers=0, sigma=3.0, cooldown=3.0):
+        if workers and table.name is None:
+            raise ValueError("a process pool needs a table created with shared=True")
+        self.table = table
+        self.workers = workers
+        self.sigma = sigma
+        self.cooldown = cooldown
+        self.pool = None
+        if workers:
+            # spawn: the parent may already run an event loop and helper threads
+            self.pool = ProcessPoolExecutor(
+                max_workers=workers, mp_context=multiprocessing.get_context("spawn"),
+                initializer=_attach_worker,
+                initargs=(table.name, table.capacity, table.alpha, table.min_count))
+
+    def _shards(self, moves, keys):
+        if self.workers <= 1:
+            return [(moves, keys)]
+        shards = []
+        for w in range(self.workers):
+            m = k = None
+            if moves is not None:
+                mask = moves[0] % self.workers == w
+                m = tuple(col[mask] for col in moves) if mask.any() else None
+            if keys is not None:
+                mask = keys[0] % self.workers == w
+                k = tuple(col[mask] for col in keys) if mask.any() else None
+            if m is not None or k is not None:
+                shards.append((m, k))
+        return shards
+
+    def submit(self, moves=None, keys=None):
+        """moves = (rows, xs, ys, ts), keys = (rows, ts) NumPy arrays. Returns a list of
+        futures (pool) or the alerts themselves (workers=0)."""
+        if not self.workers:
+            return _score_local(self.table, moves, keys, self.sigma, self.cooldown)
+        return [self.pool.submit(_score_shard, m, k, self.sigma, self.cooldown)
+                for m, k in self._shards(moves, keys)]
+
+    def score(self, moves=None, keys=None):
+        """Synchronous submit(); returns [(row, event)]"""
+        result = self.submit(moves, keys)
+        if not self.workers:
+            return result
+        return [alert for future in result for alert in future.result()]
+
+    def close(self):
+        if self.pool is not None:
+            self.pool.shutdown()
+            self.pool = None
@@ -0,0 +1,222 @@
+"""
+Distribution-free detector mode: a streaming quantile sketch per signal instead of a
+Gaussian mean/variance.
+
+QuantileProfile tracks QUANTILES of everything it has seen with the extended P² algorithm
+(Jain & Chlamtac; Raatikainen): 2m + 3 = 17 markers whose heights follow the quantiles and
+their midpoints, adjusted by piecewise-parabolic interpolation. Memory is fixed and an update
+is O(markers), with no stored samples.
+
+A sample is scored by where it falls in the learned distribution, expressed as the z-score a
+Gaussian sample at that tail probability would have: z = |Φ⁻¹(F(x))|, F interpolated
+between markers and extrapolated linearly (in z) beyond the outermost ones. For normal data
+this is the usual z; for heavy-tailed signals (mouse speed, key delays) `z > sigma` fires
+at the tail probability sigma stands for instead of far more often. The agents keep their
+thresholds, severities and messages unchanged.
+
+make_profile(detector, ...) builds either kind, for the agents' `detector=` argument.
+"""
+
+from bisect import bisect_right
+from statistics import NormalDist
+
+import numpy as np
+
+from .adaptive_profile import AdaptiveProfile, ProfileBatch
+
+DETECTORS = ("ema", "quantile")
+QUANTILES = (0.001, 0.01, 0.1, 0.5, 0.9, 0.99, 0.999)
+
+
+def _marker_probabilities(quantiles):
+    dp = [0.0]
+    prev = 0.0
+    for p in quantiles:
+        dp += [(prev + p) / 2, p]
+        prev = p
+    return tuple(dp + [(prev + 1.0) / 2, 1.0])
+
+
+_DP = _marker_probabilities(QUANTILES)
+_M = len(_DP)
+_MEDIAN = _DP.index(0.5)
+_P10, _P90 = _DP.index(0.1), _DP.index(0.9)
+_IQ80 = 2 * NormalDist().inv_cdf(0.9)  # q90 - q10 of a unit normal
+_inv_cdf = NormalDist().inv_cdf
+
+
+class QuantileProfile:
+    """
+    Streaming quantiles of one signal, with the AdaptiveProfile interface the agents use:
+    update(), zscore(), observe(), update_batch(), and mean/std/var/count for stats (median
+    and a robust spread from the 10%/90% quantiles). It learns the long-run distribution;
+    there is no alpha to forget old samples. Scores start after min_count samples.
+    """
+    __slots__ = ("min_count", "count", "heights", "positions")
+
+    MIN_STD = AdaptiveProfile.MIN_STD
+
+    def __init__(self, min_count=200):
+        self.min_count = min_count
+        self.reset()
+
+    def reset(self):
+        self.count = 0
+        self.heights = []       # sorted samples until there are _M, then marker heights
+        self.positions = None   # marker positions (1-based ranks) once initialized
+
+    @property
+    def mean(self):
+        """Median, the center the score is measured from (None before any sample)"""
+        if not self.heights:
+            return None
+        if self.positions is None:
+            return self.heights[len(self.heights) // 2]
+        return self.heights[_MEDIAN]
+
+    @property
+    def std(self):
+        """Spread a normal distribution with the same 10%/90% quantiles would have"""
+        if self.positions is None:
+            return 0.0
+        return (self.heights[_P90] - self.heights[_P10]) / _IQ80
+
+    @property
+    def var(self):
+        return self.std ** 2 if self.heights else None
+
+    @property
+    def ready(self):
+        return self.count > self.min_count and self.std > self.MIN_STD
+
+    def quantile(self, p):
+        """Current estimate of one of QUANTILES"""
+        return self.heights[_DP.index(p)] if self.positions is not None else None
+
+    def _cdf_z(self, i):
+        return _inv_cdf((self.positions[i] - 1) / (self.count - 1))
+
+    def zscore(self, value):
+        """Gaussian-equivalent tail score of value, or None while not ready"""
+        if not self.ready:
+            return None
+        h = self.heights
+        # Inner markers only: the outer two are the running min and max
+        if value >= h[-2]:
+            i, j = _M - 3, _M - 2
+        elif value <= h[1]:
+            i, j = 1, 2
+        else:
+            k = bisect_right(h, value, 1, _M - 1) - 1
+            span = h[k + 1] - h[k]
+            n = self.positions
+            frac = (value - h[k]) / span if span > 0 else 0.5
+            rank = n[k] + frac * (n[k + 1] - n[k])
+            return abs(_inv_cdf(min(max((rank - 1) / (self.count - 1), 1e-12), 1 - 1e-12)))
+        zi, zj = self._cdf_z(i), self._cdf_z(j)
+        span = h[j] - h[i]
+        if span <= 0:
+            return abs(zj if value >= h[j] else zi)
+        return abs(zi + (value - h[i]) * (zj - zi) / span)
+
+    def update(self, value):
+        self.count += 1
+        h = self.heights
+        if self.positions is None:
+            h.insert(bisect_right(h, value), value)
+            if len(h) == _M:
+                self.positions = [float(i + 1) for i in range(_M)]
+            return
+
+        n = self.positions
+        if value < h[0]:
+            h[0] = value
+            k = 0
+        elif value >= h[-1]:
+            h[-1] = value
+            k = _M - 2
+        else:
+            k = bisect_right(h, value) - 1
+        for i in range(k + 1, _M):
+            n[i] += 1
+
+        last = self.count - 1
+        for i in range(1, _M - 1):
+            ni = n[i]
+            d = 1 + last * _DP[i] - ni
+            if d >= 1:
+                if n[i + 1] - ni <= 1:
+                    continue
+                s = 1.0
+            elif d <= -1:
+                if n[i - 1] - ni >= -1:
+                    continue
+                s = -1.0
+            else:
+                continue
+            hp, hi, hn = h[i - 1], h[i], h[i + 1]
+            np_, nn = n[i - 1], n[i + 1]
+            q = hi + s / (nn - np_) * ((ni - np_ + s) * (hn - hi) / (nn - ni)
+                                       + (nn - ni - s) * (hi - hp) / (ni - np_))
+            if not hp < q < hn:
+                # Parabola left the neighbours' bracket: move linearly instead
+                q = hi + s * ((hn - hi) / (nn - ni) if s > 0 else (hp - hi) / (np_ - ni))
+            h[i] = q
+            n[i] = ni + s
+
+    def observe(self, value):
+        """Score value against the profile, then learn from it. Returns z or None."""
+        z = self.zscore(value)
+        self.update(value)
+        return z
+
+    def update_batch(self, values):
+        """Sequential observe() over a batch, reported as a ProfileBatch like AdaptiveProfile's
+        (there is no closed form for the marker updates)"""
+        values = np.asarray(values, dtype=np.float64)
+        n = len(values)
+        mean = np.full(n, np.nan)
+        std = np.full(n, np.nan)
+        ready = np.zeros(n, dtype=bool)
+        z = np.full(n, np.nan)
+        for i, v in enumerate(values.tolist()):
+            if self.heights:
+                mean[i] = self.mean
+                std[i] = self.std
+            score = self.observe(v)
+            if score is not None:
+                ready[i] = True
+                z[i] = score
+        return ProfileBatch(values, mean, std, ready, z)
+
+    # Baseline snapshots (StateWriter.profile / StateReader.profile)
+    def write(self, writer):
+        writer.u64(self.count)
+        writer.u32(len(self.heights))
+        for v in self.heights:
+            writer.f64(v)
+        if self.positions is not None:
+            for v in self.positions:
+                writer.f64(v)
+
+    def read(self, reader):
+        count = reader.u64()
+        heights = [reader.f64() for _ in range(reader.u32())]
+        positions = [reader.f64() for _ in range(_M)] if len(heights) == _M else None
+        self.count, self.heights, self.positions = count, heights, positions
+
+
+def make_profile(detector="ema", alpha=0.01, min_count=10):
+    """Signal profile for an agent's `detector` setting: "ema" (AdaptiveProfile with alpha
+    and min_count) or "quantile" (QuantileProfile with its own warm-up)"""
+    if detector == "ema":
+        return AdaptiveProfile(alpha=alpha, min_count=min_count)
+    if detector == "quantile":
+        return QuantileProfile()
+    raise ValueError(f"unknown detector {detector!r} (expected one of {', '.join(DETECTORS)})")
+
+
+def detector_tag(tag, detector):
+    """Snapshot tag for an agent's baseline: quantile baselines are different state, so they
+    get a section of their own and switching detectors never misreads one as the other"""
+    return tag if detector == "ema" else tag[:3] + b"Q"
@@ -0,0 +1,168 @@
+from collections import deque
+from multiprocessing import shared_memory
+import struct
+import threading
+import zlib
+
+class SampleBuffer:
+    """
+    Bounded hand-off from an input-listener callback to the agent's detection worker.
+    push() is an append on a deque(maxlen) - atomic under the GIL, no lock taken - and only
+    signals the worker when it has not been signalled since its last drain, so a burst of
+    events costs one Event.set(). When full, the oldest samples are dropped and counted.
+    notify, if set, is called alongside that Event.set() (e.g. to wake an asyncio loop).
+    """
+    def __init__(self, capacity=4096):
+        self.capacity = capacity
+        self._items = deque(maxlen=capacity)
+        self._wakeup = threading.Event()
+        self._signalled = False
+        self.notify = None
+        self.pushed = 0
+        self.popped = 0
+
+    def __len__(self):
+        return len(self._items)
+
+    @property
+    def dropped(self):
+        return max(0, self.pushed - self.popped - len(self._items))
+
+    def push(self, sample):
+        self._items.append(sample)
+        self.pushed += 1
+        if not self._signalled:
+            self._signalled = True
+            self._wakeup.set()
+            notify = self.notify
+            if notify is not None:
+                notify()
+
+    def wait(self, timeout=None):
+        """Block until samples may be available; returns False on timeout"""
+        return self._wakeup.wait(timeout)
+
+    def pop_batch(self, max_items=256):
+        # Re-arm the signal before draining so pushes racing with the drain wake us again
+        self._wakeup.clear()
+        self._signalled = False
+        items = self._items
+        batch = []
+        while items and len(batch) < max_items:
+            batch.append(items.popleft())
+        self.popped += len(batch)
+        return batch
+
+
+class SharedRing:
+    """
+    Single-producer, single-consumer ring of byte records in one (optionally shared) memory
+    block, for handing events from an agent process to the UI process (agent_host.py).
+    The block starts with three u64 words: head (bytes ever written, advanced by the
+    producer after the record is in place), tail (bytes ever consumed, advanced by the
+    consumer) and dropped (records that did not fit). Records are a u32 length and the
+    payload's u32 crc32 followed by the payload, wrapping around the end of the data area.
+    push() never waits: a record that does not fit is dropped and counted.
+
+    Neither side locks or fences. Where stores may become visible out of program order (ARM,
+    POWER), the consumer can see head move before the record it covers; pop() then finds a
+    length or checksum that does not match, counts the read in torn and leaves the record
+    for the next pop(). tail only moves after a record checked out, so the producer never
+    reuses bytes the consumer has not finished reading.
+    """
+    HEADER = 64
+    _RECORD = struct.Struct("<II")  # payload length, crc32 of the payload
+
+    def __init__(self, capacity=1 << 20, shared=False, name=None):
+        if capacity < 64:
+            raise ValueError("capacity must be >= 64")
+        self.capacity = capacity
+        self._shm = None
+        if name is not None:
+            self._shm = shared_memory.SharedMemory(name=name)
+            buffer = self._shm.buf
+        elif shared:
+            self._shm = shared_memory.SharedMemory(create=True, size=self.HEADER + capacity)
+            buffer = self._shm.buf
+        else:
+            buffer = bytearray(self.HEADER + capacity)
+        self._buf = memoryview(buffer)
+        self._words = self._buf[:24].cast("Q")  # head, tail, dropped
+        self._data = self._buf[self.HEADER:self.HEADER + capacity]
+        self.torn = 0  # pops that found a record not fully visible yet (consumer side)
+
+    @property
+    def name(self):
+        """Shared memory block name, for attach(); None for a private ring"""
+        return self._shm.name if self._shm is not None else None
+
+    @classmethod
+    def attach(cls, name, capacity):
+        """Open a ring created with shared=True in another process"""
+        return cls(capacity, name=name)
+
+    def close(self, unlink=False):
+        if self._shm is not None:
+            for view in (self._words, self._data, self._buf):
+                view.release()
+            self._shm.close()
+            if unlink:
+                self._shm.unlink()
+            self._shm = None
+
+    def __len__(self):
+        """Bytes waiting to be consumed"""
+        return self._words[0] - self._words[1]
+
+    @property
+    def dropped(self):
+        return self._words[2]
+
+    def _write(self, pos, data):
+        i = pos % self.capacity
+        first = min(len(data), self.capacity - i)
+        self._data[i:i + first] = data[:first]
+        if first < len(data):
+            self._data[:len(data) - first] = data[first:]
+
+    def _read(self, pos, n):
+        i = pos % self.capacity
+        first = min(n, self.capacity - i)
+        if first == n:
+            return bytes(self._data[i:i + n])
+        return bytes(self._data[i:]) + bytes(self._data[:n - first])
+
+    # Producer side
+    def push(self, payload):
+        """Append one record; returns False (and counts it) when it does not fit"""
+        words = self._words
+        head = words[0]
+        size = self._RECORD.size + len(payload)
+        if size > self.capacity - (head - words[1]):
+            words[2] += 1
+            return False
+        self._write(head, self._RECORD.pack(len(payload), zlib.crc32(payload)))
+        self._write(head + self._RECORD.size, payload)
+        words[0] = head + size  # publish after the record is in place
+        return True
+
+    # Consumer side
+    def pop(self):
+        """Oldest record, or None when the ring is empty or the oldest record is not fully
+        visible yet"""
+        words = self._words
+        tail = words[1]
+        available = words[0] - tail
+        if not available:
+            return None
+        n, crc = self._RECORD.unpack(self._read(tail, self._RECORD.size))
+        size = self._RECORD.size + n
+        if size > available:
+            self.torn += 1
+            return None
+        payload = self._read(tail + self._RECORD.size, n)
+        if zlib.crc32(payload) != crc:
+            self.torn += 1
+            return None
+        words[1] = tail + size
+        return payload
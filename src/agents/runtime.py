@@ -0,0 +1,100 @@
+import asyncio
+import threading
+
+class AgentRuntime:
+    """
+    One asyncio event loop, on one thread, hosting every agent.
+
+    Agents that implement `async run_async(runtime)` are coroutines on this loop: they hook
+    their wakeups into it (listener callbacks via threadsafe(), file descriptors via
+    loop.add_reader, periodic work via wait_stopped(timeout)) and return once the runtime
+    stops. An idle agent costs no thread and no timer. Agents that only have the thread-style
+    run(stop_event) still work; they are run in the loop's default executor.
+    """
+
+    def __init__(self, stop_event=None):
+        self.stop_event = stop_event or threading.Event()
+        self.loop = None
+        self._thread = None
+        self._stopping = None
+        self._ready = threading.Event()
+
+    @property
+    def stopping(self):
+        return self.stop_event.is_set()
+
+    # Lifecycle
+    def start(self, agents):
+        """Start the loop thread and schedule every agent on it"""
+        if self._thread is not None:
+            return
+        self.loop = asyncio.new_event_loop()
+        self._thread = threading.Thread(target=self._run, args=(list(agents),),
+                                        name="guardio-agents", daemon=True)
+        self._thread.start()
+        self._ready.wait()
+
+    def stop(self, timeout=1.5):
+        """Ask every agent to finish and wait for the loop thread"""
+        self.stop_event.set()
+        if self._thread is None:
+            return
+        try:
+            self.loop.call_soon_threadsafe(self._stopping.set)
+        except RuntimeError:
+            pass  # loop already closed
+        self._thread.join(timeout=timeout)
+        self._thread = None
+
+    def _run(self, agents):
+        asyncio.set_event_loop(self.loop)
+        try:
+            self.loop.run_until_complete(self._main(agents))
+            self.loop.run_until_complete(self.loop.shutdown_default_executor())
+        finally:
+            self.loop.close()
+
+    async def _main(self, agents):
+        self._stopping = asyncio.Event()
+        if self.stop_event.is_set():
+            self._stopping.set()
+        tasks = [asyncio.ensure_future(self._host(agent)) for agent in agents]
+        self._ready.set()
+        await self._stopping.wait()
+        await asyncio.gather(*tasks, return_exceptions=True)
+
+    async def _host(self, agent):
+        try:
+            if hasattr(agent, "run_async"):
+                await agent.run_async(self)
+            else:
+                await self.loop.run_in_executor(None, agent.run, self.stop_event)
+        except Exception as e:
+            print(f"Error in {type(agent).__name__}: {e}")
+
+    # Helpers for agents
+    async def wait_stopped(self, timeout=None):
+        """Sleep until the runtime stops or timeout elapses; returns True if stopped"""
+        if timeout is None:
+            await self._stopping.wait()
+            return True
+        try:
+            await asyncio.wait_for(self._stopping.wait(), timeout)
+            return True
+        except asyncio.TimeoutError:
+            return self._stopping.is_set()
+
+    def threadsafe(self, callback):
+        """Wrap callback so calling it from any thread runs it on the loop"""
+        loop = self.loop
+
+        def schedule(*args):
+            try:
+                loop.call_soon_threadsafe(callback, *args)
+            except RuntimeError:
+                pass  # loop closed during shutdown
+        return schedule
+
+    async def run_blocking(self, func, *args):
+        """Run a blocking call (e.g. a subprocess) off the loop so other agents keep going"""
+        return await self.loop.run_in_executor(None, func, *args)
@@ -0,0 +1,270 @@
+"""
+Versioned binary snapshots of what the agents have learned.
+
+File layout (little endian):
+    header   b"GDSN" | u16 format version | u16 section count
+    section  4-byte agent tag | u16 state version | u32 payload length | u32 crc32 | payload
+
+Each agent that can be warm started has a `state_tag`, a `state_version`, and
+write_state(writer) / read_state(reader) methods. A section whose tag is unknown, whose
+version differs from the agent's or whose checksum fails is skipped and that agent starts
+cold, so changing one agent's state layout only costs that agent its baseline.
+
+By default a snapshot holds aggregate profiles only (delay, speed and switch-gap statistics).
+The per-application sketch, whose keys are window titles, and the per-digraph timing matrix
+are written only with details=True (--baseline-details): they say which windows were open
+and how particular key pairs are typed, which the file should not reveal unless asked to.
+An agent reads whichever parts a section has and keeps the rest as it is.
+"""
+
+import math
+import os
+import struct
+import time
+import zlib
+
+from .metrics import get_registry
+
+MAGIC = b"GDSN"
+FORMAT_VERSION = 1
+_HEADER = struct.Struct("<4sHH")
+_SECTION = struct.Struct("<4sHII")
+
+
+class SnapshotError(ValueError):
+    pass
+
+
+class StateWriter:
+    """Appends primitive fields to a payload. details: whether agents include per-app and
+    per-digraph state (see the module docstring)"""
+    __slots__ = ("_parts", "details")
+
+    def __init__(self, details=False):
+        self._parts = []
+        self.details = details
+
+    def u32(self, value):
+        self._parts.append(struct.pack("<I", value))
+
+    def u64(self, value):
+        self._parts.append(struct.pack("<Q", value))
+
+    def f64(self, value):
+        # None is stored as NaN
+        self._parts.append(struct.pack("<d", math.nan if value is None else value))
+
+    def str(self, value):
+        data = value.encode("utf-8")
+        self.u32(len(data))
+        self._parts.append(data)
+
+    def profile(self, profile):
+        """AdaptiveProfile learned state (alpha and min_count are configuration, not state);
+        other profile kinds (QuantileProfile) write themselves"""
+        if hasattr(profile, "write"):
+            profile.write(self)
+            return
+        self.f64(profile.mean)
+        self.f64(profile.var)
+        self.u64(profile.count)
+
+    def getvalue(self):
+        return b"".join(self._parts)
+
+
+class StateReader:
+    """Reads fields back in the order StateWriter wrote them"""
+    __slots__ = ("_data", "_pos")
+
+    def __init__(self, data):
+        self._data = data
+        self._pos = 0
+
+    def _unpack(self, fmt, size):
+        if self._pos + size > len(self._data):
+            raise SnapshotError("truncated section")
+        value = struct.unpack_from(fmt, self._data, self._pos)[0]
+        self._pos += size
+        return value
+
+    def u32(self):
+        return self._unpack("<I", 4)
+
+    def u64(self):
+        return self._unpack("<Q", 8)
+
+    def f64(self):
+        value = self._unpack("<d", 8)
+        return None if math.isnan(value) else value
+
+    def str(self):
+        n = self.u32()
+        if self._pos + n > len(self._data):
+            raise SnapshotError("truncated section")
+        value = self._data[self._pos:self._pos + n].decode("utf-8")
+        self._pos += n
+        return value
+
+    def profile(self, profile):
+        if hasattr(profile, "read"):
+            profile.read(self)
+            return
+        mean, var, count = self.f64(), self.f64(), self.u64()
+        profile.mean = mean
+        profile.var = var if mean is not None else None
+        profile.count = count if mean is not None else 0
+
+
+def _stateful(agents):
+    return [a for a in agents if getattr(a, "state_tag", None) and hasattr(a, "write_state")]
+
+
+def encode_sections(agents, details=False):
+    """{tag: (version, payload)} for every agent that supports snapshots"""
+    sections = {}
+    for agent in _stateful(agents):
+        writer = StateWriter(details)
+        agent.write_state(writer)
+        sections[agent.state_tag] = (agent.state_version, writer.getvalue())
+    return sections
+
+
+def encode_snapshot(sections):
+    parts = [_HEADER.pack(MAGIC, FORMAT_VERSION, len(sections))]
+    for tag, (version, payload) in sections.items():
+        parts.append(_SECTION.pack(tag, version, len(payload), zlib.crc32(payload)))
+        parts.append(payload)
+    return b"".join(parts)
+
+
+def decode_snapshot(data):
+    """{tag: (version, payload)}; raises SnapshotError on a foreign or damaged header"""
+    if len(data) < _HEADER.size:
+        raise SnapshotError("file too short")
+    magic, version, count = _HEADER.unpack_from(data, 0)
+    if magic != MAGIC:
+        raise SnapshotError("not a Guardio snapshot")
+    if version != FORMAT_VERSION:
+        raise SnapshotError(f"unsupported snapshot format {version}")
+    sections = {}
+    pos = _HEADER.size
+    for _ in range(count):
+        if pos + _SECTION.size > len(data):
+            raise SnapshotError("truncated snapshot")
+        tag, state_version, length, crc = _SECTION.unpack_from(data, pos)
+        pos += _SECTION.size
+        payload = data[pos:pos + length]
+        pos += length
+        if len(payload) != length or zlib.crc32(payload) != crc:
+            continue  # damaged section: that agent starts cold
+        sections[tag] = (state_version, payload)
+    return sections
+
+
+class BaselineStore:
+    """
+    Snapshot file of the agents' learned baselines. save() writes atomically (temp file +
+    os.replace), so a crash mid-write leaves the previous snapshot intact. details is what
+    checkpoints pass to encode_sections().
+    """
+
+    def __init__(self, path, details=False):
+        self.path = path
+        self.details = details
+        self.metrics = get_registry()
+        self._m_save = self.metrics.histogram("snapshot.save")
+        self._m_load = self.metrics.histogram("snapshot.load")
+        self._m_bytes = self.metrics.gauge("snapshot.bytes")
+
+    def save(self, sections):
+        t0 = time.perf_counter_ns()
+        data = encode_snapshot(sections)
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        tmp = self.path + ".tmp"
+        with open(tmp, "wb") as f:
+            f.write(data)
+        os.replace(tmp, self.path)
+        self._m_save.observe_ns(time.perf_counter_ns() - t0)
+        self._m_bytes.set(len(data))
+        return len(data)
+
+    def load_into(self, agents):
+        """Restore every agent found in the snapshot; returns the tags restored"""
+        try:
+            with open(self.path, "rb") as f:
+                data = f.read()
+        except FileNotFoundError:
+            return []
+        t0 = time.perf_counter_ns()
+        try:
+            sections = decode_snapshot(data)
+        except SnapshotError as e:
+            print(f"Warning: ignoring baseline snapshot {self.path}: {e}")
+            return []
+
+        restored = []
+        for agent in _stateful(agents):
+            section = sections.get(agent.state_tag)
+            if section is None or section[0] != agent.state_version:
+                continue
+            try:
+                agent.read_state(StateReader(section[1]))
+                restored.append(agent.state_tag)
+            except Exception as e:
+                # A section that passed its CRC can still hold values the agent rejects (a
+                # file written by other code, a reader bug): that agent starts cold
+                print(f"Warning: could not restore {agent.state_tag.decode()} baseline: {e}")
+        self._m_load.observe_ns(time.perf_counter_ns() - t0)
+        return restored
+
+
+class BaselineCheckpointer:
+    """
+    Runs on the AgentRuntime next to the agents. Every `interval` seconds it serializes the
+    agents on the runtime loop (the thread their detection state lives on, so no locking)
+    and hands the file write to the loop's executor. A snapshot identical to the last one
+    written is skipped, so an idle session does not touch the disk.
+
+    Checkpoints are not incremental: every agent is serialized each interval and a changed
+    snapshot rewrites the whole file (a few hundred bytes of aggregates by default, tens of
+    KB with details), which keeps the write atomic.
+    """
+
+    def __init__(self, store, agents, interval=60.0):
+        self.store = store
+        self.agents = agents
+        self.interval = interval
+        self._written = None
+
+    def _changed_sections(self):
+        sections = encode_sections(self.agents, self.store.details)
+        if sections == self._written:
+            return None
+        return sections
+
+    def checkpoint(self):
+        """Synchronous checkpoint, for when the agents are stopped"""
+        sections = self._changed_sections()
+        if sections is not None:
+            self.store.save(sections)
+            self._written = sections
+
+    async def run_async(self, runtime):
+        while not await runtime.wait_stopped(self.interval):
+            sections = self._changed_sections()
+            if sections is None:
+                continue
+            try:
+                await runtime.run_blocking(self.store.save, sections)
+                self._written = sections
+            except OSError as e:
+                print(f"Warning: baseline checkpoint failed: {e}")
+
+
+def default_baseline_path():
+    """~/.guardio/baseline.snap, or $GUARDIO_HOME/baseline.snap"""
+    home = os.environ.get("GUARDIO_HOME") or os.path.join(os.path.expanduser("~"), ".guardio")
+    return os.path.join(home, "baseline.snap")
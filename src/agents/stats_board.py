@@ -0,0 +1,194 @@
+"""
+Latest-value stats slots: one fixed slot per agent, overwritten in place.
+
+Front-ends only ever draw an agent's newest stats, so instead of a dict per publish travelling
+through a queue, each agent writes its numbers into a preallocated slot of float64 words:
+    seq  mean  std  z  wpm  note  t  check
+None is stored as NaN and note as its index in NOTES. All slots live in one block, a
+bytearray or a multiprocessing.shared_memory segment (shared=True, opened elsewhere with
+attach()), so the same board works for agents in this process and in another one.
+
+Each slot is a seqlock. The writer makes seq odd, writes the fields and makes it even again;
+a reader copies the fields between two reads of seq and keeps the copy only if seq was even
+and did not change. Nobody takes a lock: a writer never waits, and a reader that catches a
+write in progress skips that slot until the next read (the write will notify again). Each
+slot has a single writer. A writer that finds seq odd (its predecessor, an agent process that
+was restarted, died mid-write) rounds it up to even first, so the slot recovers on the next
+publish.
+
+The seq checks alone rely on stores becoming visible in program order, which holds on x86-64
+but not on ARM or POWER, where a reader can see the final seq next to older fields. So the
+writer also stores check, the crc32 of the fields seeded with the final seq, and a reader
+keeps a copy only if it matches; a mismatch is a torn read like any other.
+
+A board has one reader, which tracks the seq it last returned per slot: changed() yields only
+slots written since.
+"""
+
+import math
+import struct
+import zlib
+from multiprocessing import shared_memory
+
+FIELDS = ("mean", "std", "z", "wpm", "note", "t")
+SLOT_WORDS = 2 + len(FIELDS)   # seq, the fields, check
+_FIELDS = struct.Struct(f"<{len(FIELDS)}d")
+NOTES = (None, "Adapting", "Stable", "NoSignal", "Error")
+_NOTE_CODES = {note: float(i) for i, note in enumerate(NOTES)}
+_NAN = math.nan
+
+
+def _seed(seq):
+    # crc32 start value: ties check to the seq it was written for
+    return int(seq) & 0xFFFFFFFF
+
+
+def publish_stats(target, source, mean, std, z, note, wpm=None, t=None):
+    """Hand one stats record to target: written in place when it is a StatsBoard, else put()
+    as a {"source","mean","std","z","note"[,"wpm"]} dict (plain queues, fleet sinks)"""
+    if isinstance(target, StatsBoard):
+        target.publish(source, mean, std, z, note, wpm, t)
+        return
+    stats = {"source": source, "mean": mean, "std": std, "z": z, "note": note}
+    if wpm is not None:
+        stats["wpm"] = wpm
+    target.put(stats)
+
+
+class StatsBoard:
+    """Seqlock stats slots for `sources`; a private board grows to `capacity` sources, a
+    shared one has exactly the slots it was created with"""
+
+    def __init__(self, sources, capacity=None, shared=False, name=None):
+        self.sources = list(sources)
+        self.capacity = max(capacity or 0, len(self.sources))
+        size = self.capacity * SLOT_WORDS * 8
+        self._shm = None
+        if name is not None:
+            self._shm = shared_memory.SharedMemory(name=name)
+            buffer = self._shm.buf
+        elif shared:
+            self._shm = shared_memory.SharedMemory(create=True, size=size)
+            buffer = self._shm.buf
+        else:
+            buffer = bytearray(size)
+        self._words = memoryview(buffer).cast("d")
+        # Each slot's fields as bytes, what check covers
+        starts = [(i * SLOT_WORDS + 1) * 8 for i in range(self.capacity)]
+        self._fields = [memoryview(buffer)[start:start + _FIELDS.size] for start in starts]
+        self._index = {source: i for i, source in enumerate(self.sources)}
+        self._seen = [0.0] * self.capacity   # seq last returned by changed(), per slot
+        self.notify = None   # called after every publish (e.g. Wakeup.notify)
+        self.dropped = 0     # publishes for a source without a slot
+        self.torn = 0        # reads that caught a write in progress
+
+    @property
+    def name(self):
+        """Shared memory block name, for attach(); None for a private board"""
+        return self._shm.name if self._shm is not None else None
+
+    @classmethod
+    def attach(cls, name, sources):
+        """Open a board created with shared=True in another process"""
+        return cls(sources, name=name)
+
+    def close(self, unlink=False):
+        if self._shm is not None:
+            for view in self._fields:
+                view.release()
+            self._words.release()
+            self._words = self._fields = None
+            self._shm.close()
+            if unlink:
+                self._shm.unlink()
+            self._shm = None
+
+    def _slot(self, source):
+        i = self._index.get(source)
+        if i is None and self._shm is None and len(self.sources) < self.capacity:
+            i = self._index[source] = len(self.sources)
+            self.sources.append(source)
+        return i
+
+    # Writer side: one writer per slot
+    def publish(self, source, mean, std, z, note, wpm=None, t=None):
+        """Overwrite source's slot"""
+        i = self._slot(source)
+        if i is None:
+            self.dropped += 1
+            return
+        w = self._words
+        base = i * SLOT_WORDS
+        seq = w[base]
+        if seq % 2:
+            seq += 1  # the previous writer died mid-write (a restarted agent process)
+        w[base] = seq + 1  # odd: write in progress
+        w[base + 1] = _NAN if mean is None else mean
+        w[base + 2] = _NAN if std is None else std
+        w[base + 3] = _NAN if z is None else z
+        w[base + 4] = _NAN if wpm is None else wpm
+        w[base + 5] = _NOTE_CODES.get(note, 0.0)
+        w[base + 6] = _NAN if t is None else t
+        w[base + 7] = zlib.crc32(self._fields[i], _seed(seq + 2))
+        w[base] = seq + 2
+        notify = self.notify
+        if notify is not None:
+            notify()
+
+    def put(self, stats):
+        """publish() a {"source","mean","std","z","note"[,"wpm"][,"t"]} dict, for agents that
+        hand their stats to a queue (the inverse of publish_stats())"""
+        self.publish(stats.get("source"), stats.get("mean"), stats.get("std"), stats.get("z"),
+                     stats.get("note"), stats.get("wpm"), stats.get("t"))
+
+    # Reader side
+    def read(self, source):
+        """Latest stats dict of source, or None if it never published (or a write is in
+        progress)"""
+        i = self._index.get(source)
+        if i is None:
+            return None
+        read = self._read(i)
+        return read[1] if read is not None else None
+
+    def _read(self, i):
+        """(seq, stats dict) of slot i, or None when empty or torn"""
+        w = self._words
+        base = i * SLOT_WORDS
+        seq = w[base]
+        if not seq:
+            return None
+        fields = bytes(self._fields[i])
+        check = w[base + 7]
+        if seq % 2 or w[base] != seq or zlib.crc32(fields, _seed(seq)) != check:
+            self.torn += 1
+            return None
+        mean, std, z, wpm, note, t = _FIELDS.unpack(fields)
+        stats = {"source": self.sources[i],
+                 "mean": None if mean != mean else mean,
+                 "std": None if std != std else std,
+                 "z": None if z != z else z,
+                 "note": NOTES[int(note)] if 0 <= note < len(NOTES) else None}
+        if wpm == wpm:
+            stats["wpm"] = wpm
+        if t == t:
+            stats["t"] = t
+        return seq, stats
+
+    def pending(self):
+        """True if some slot was written since changed() last returned it"""
+        w = self._words
+        seen = self._seen
+        return any(w[i * SLOT_WORDS] != seen[i] for i in range(len(self.sources)))
+
+    def changed(self):
+        """Yield the stats dict of every slot written since it was last yielded"""
+        w = self._words
+        seen = self._seen
+        for i in range(len(self.sources)):
+            if w[i * SLOT_WORDS] == seen[i]:
+                continue
+            read = self._read(i)
+            if read is not None:
+                seen[i] = read[0]
+                yield read[1]
@@ -0,0 +1,189 @@
+"""
+Incremental mouse trajectory features for MovementAgent.
+
+Per raw sample (x, y, t), against the previous sample:
+    speed          distance / dt (px/s), None when dt <= 0 or below 0.1 px/s
+    pause          dt, when the pointer was still for pause_gap < dt <= max_pause seconds
+Per segment: integer pixels sampled at up to 1000 Hz make derivatives between consecutive
+samples mostly quantization noise, so the shape features are taken over segments between
+anchors, the samples where the travelled path length crosses a multiple of step_px:
+    acceleration   change of segment speed / segment dt (px/s^2, signed)
+    jerk           change of acceleration / segment dt (px/s^3, signed)
+    angle          absolute change of heading between segments (radians)
+    curvature      angle / segment length (radians per px)
+A pause ends the chain: the sample after it is an anchor that starts a new stroke, so no
+segment, acceleration or jerk spans a pause. A segment shorter than step_px / 2 (the first one
+after a stroke starts off the grid, or a reversal) has no usable heading and ends it too.
+
+TrajectoryFeatures.step() is O(1) per sample from a few carried values (previous sample,
+last anchor, last segment speed/heading, last acceleration). batch() computes the same
+values for a whole micro-batch with NumPy and leaves the same state behind.
+"""
+
+import math
+
+import numpy as np
+
+FEATURES = ("speed", "acceleration", "jerk", "curvature", "angle", "pause")
+SHAPE = ("acceleration", "jerk", "curvature", "angle")
+_NONE = (None,) * len(FEATURES)
+_TAU = 2 * math.pi
+
+
+class TrajectoryFeatures:
+    """Carried state between samples. step() returns values in FEATURES order; batch()
+    returns them per feature. With shape=False only speed and pause are computed."""
+    __slots__ = ("step_px", "pause_gap", "max_pause", "shape", "x", "y", "t", "arc",
+                 "ax", "ay", "at", "speed", "heading", "accel")
+
+    def __init__(self, step_px=8.0, pause_gap=0.25, max_pause=5.0, shape=True):
+        self.step_px = step_px
+        self.shape = shape  # False: speed and pause only, no segments
+        self.pause_gap = pause_gap
+        self.max_pause = max_pause
+        self.reset()
+
+    def reset(self):
+        self.x = self.y = self.t = None     # previous sample
+        self.arc = 0.0                      # path length travelled
+        self.ax = self.ay = self.at = None  # last anchor
+        self.speed = self.heading = None    # last segment (None: chain has no segment yet)
+        self.accel = None                   # last acceleration
+
+    def step(self, x, y, t):
+        """Feature values of one new sample (None where a feature has no value)"""
+        px, py, pt = self.x, self.y, self.t
+        self.x, self.y, self.t = x, y, t
+        if px is None:
+            self._anchor(x, y, t)
+            return _NONE
+
+        dt = t - pt
+        dist = math.hypot(x - px, y - py)
+        speed = dist / dt if dt > 0 else None
+        if speed is not None and speed < 0.1:
+            speed = None
+        paused = dt > self.pause_gap
+        pause = dt if paused and dt <= self.max_pause else None
+
+        if not self.shape:
+            return speed, None, None, None, None, pause
+        arc = self.arc
+        self.arc = arc + dist
+        step_px = self.step_px
+        if paused:
+            self._anchor(x, y, t)
+            return speed, None, None, None, None, pause
+        if self.arc // step_px <= arc // step_px:
+            return speed, None, None, None, None, pause
+
+        # Anchor: one segment from the last anchor
+        seg_dt = t - self.at
+        dx, dy = x - self.ax, y - self.ay
+        seg_len = math.hypot(dx, dy)
+        self.ax, self.ay, self.at = x, y, t
+        if seg_dt <= 0 or seg_len < step_px / 2:
+            self.speed = self.heading = self.accel = None
+            return speed, None, None, None, None, pause
+        seg_speed = seg_len / seg_dt
+        heading = math.atan2(dy, dx)
+        accel = jerk = angle = curvature = None
+        if self.speed is not None:
+            accel = (seg_speed - self.speed) / seg_dt
+            angle = abs((heading - self.heading + math.pi) % _TAU - math.pi)
+            curvature = angle / seg_len
+            if self.accel is not None:
+                jerk = (accel - self.accel) / seg_dt
+        self.speed, self.heading, self.accel = seg_speed, heading, accel
+        return speed, accel, jerk, curvature, angle, pause
+
+    def _anchor(self, x, y, t):
+        """Start a new chain at (x, y, t)"""
+        self.ax, self.ay, self.at = x, y, t
+        self.speed = self.heading = self.accel = None
+
+    def batch(self, xs, ys, ts):
+        """step() over sample columns at once. Returns {feature: (rows, values)}: the indices
+        of the samples step() would have returned a value for, and those values (shape
+        features are missing when the batch has no anchor)."""
+        n = len(ts)
+        first = self.x is None
+        # Prepend the previous sample (or repeat the first one: dt = 0, distance 0)
+        X, Y, T = np.empty(n + 1), np.empty(n + 1), np.empty(n + 1)
+        X[1:], Y[1:], T[1:] = xs, ys, ts
+        X[0], Y[0], T[0] = (X[1], Y[1], T[1]) if first else (self.x, self.y, self.t)
+        dt = T[1:] - T[:-1]
+        dist = np.hypot(X[1:] - X[:-1], Y[1:] - Y[:-1])
+        with np.errstate(divide="ignore", invalid="ignore"):
+            speed = dist / dt
+        speed_rows = np.flatnonzero((dt > 0) & (speed >= 0.1))
+        paused = dt > self.pause_gap
+        pause_rows = np.flatnonzero(paused & (dt <= self.max_pause))
+        out = {"speed": (speed_rows, speed[speed_rows]), "pause": (pause_rows, dt[pause_rows])}
+
+        if self.shape:
+            # Sequential sums, so the path length matches step() bit for bit
+            arc = np.empty(n + 1)
+            arc[0] = self.arc
+            arc[1:] = dist
+            np.add.accumulate(arc, out=arc)
+            cells = arc // self.step_px
+            start = paused
+            if first:
+                start = start.copy()
+                start[0] = True
+            idx = np.flatnonzero(start | (cells[1:] > cells[:-1]))
+            self.arc = float(arc[-1])
+            if len(idx):
+                out.update(self._segments(X[1:][idx], Y[1:][idx], T[1:][idx], start[idx], idx))
+        self.x, self.y, self.t = float(X[-1]), float(Y[-1]), float(T[-1])
+        return out
+
+    def _segments(self, ax, ay, at, start, idx):
+        """Shape features at the anchors of a batch, carrying the last anchor/segment"""
+        k = len(ax)
+        # Previous anchor of each anchor (the carried one for the first)
+        PX, PY, PT = np.empty(k), np.empty(k), np.empty(k)
+        PX[1:], PY[1:], PT[1:] = ax[:-1], ay[:-1], at[:-1]
+        if self.ax is None:
+            PX[0], PY[0], PT[0] = ax[0], ay[0], at[0]
+        else:
+            PX[0], PY[0], PT[0] = self.ax, self.ay, self.at
+        seg_dt = at - PT
+        dx, dy = ax - PX, ay - PY
+        seg_len = np.hypot(dx, dy)
+        seg_ok = ~start & (seg_dt > 0) & (seg_len >= self.step_px / 2)
+        heading = np.arctan2(dy, dx)
+
+        # Shifted by one anchor: the segment (and acceleration) before each anchor
+        seg_speed, prev_speed, prev_heading = np.empty(k), np.empty(k), np.empty(k)
+        prev_ok = np.empty(k, dtype=bool)
+        with np.errstate(divide="ignore", invalid="ignore"):
+            np.divide(seg_len, seg_dt, out=seg_speed)
+            prev_speed[1:], prev_heading[1:], prev_ok[1:] = seg_speed[:-1], heading[:-1], seg_ok[:-1]
+            prev_ok[0] = self.speed is not None
+            prev_speed[0] = self.speed if prev_ok[0] else np.nan
+            prev_heading[0] = self.heading if prev_ok[0] else np.nan
+            accel_ok = seg_ok & prev_ok
+            accel = (seg_speed - prev_speed) / seg_dt
+            angle = np.abs((heading - prev_heading + np.pi) % _TAU - np.pi)
+            curvature = angle / seg_len
+            prev_accel = np.empty(k)
+            prev_accel_ok = np.empty(k, dtype=bool)
+            prev_accel[1:], prev_accel_ok[1:] = accel[:-1], accel_ok[:-1]
+            prev_accel_ok[0] = self.accel is not None
+            prev_accel[0] = self.accel if prev_accel_ok[0] else np.nan
+            jerk = (accel - prev_accel) / seg_dt
+
+        self.ax, self.ay, self.at = float(ax[-1]), float(ay[-1]), float(at[-1])
+        if seg_ok[-1]:
+            self.speed, self.heading = float(seg_speed[-1]), float(heading[-1])
+            self.accel = float(accel[-1]) if accel_ok[-1] else None
+        else:
+            self.speed = self.heading = self.accel = None
+
+        sel = np.flatnonzero(accel_ok)
+        jerk_sel = np.flatnonzero(accel_ok & prev_accel_ok)
+        rows = idx[sel]
+        return {"acceleration": (rows, accel[sel]), "jerk": (idx[jerk_sel], jerk[jerk_sel]),
+                "curvature": (rows, curvature[sel]), "angle": (rows, angle[sel])}
@@ -1,98 +1,155 @@
 import time
-from pynput import keyboard
+from .wpm_counter import WpmCounter, WeightedSmoother
+from .ring_buffer import SampleBuffer
+from .quantile_profile import detector_tag, make_profile
+from .digraph_matrix import DigraphMatrix, key_code
+from .metrics import get_registry
+from .stats_board import publish_stats
 
 class TypingAgent:
-    def __init__(self, anomaly_queue, stats_queue, alpha=0.01, sigma=3.0, cooldown=3.0):
+    """
+    Keystroke dynamics: one profile of the delay between keystrokes, plus (by default with
+    the EMA detector) a DigraphMatrix of the same delay per (previous key, current key) pair.
+    A delay is scored against its digraph once that digraph is ready, else against the
+    overall profile. Key identities only ever reach the matrix; alerts, stats and the journal
+    carry timings alone.
+    """
+    metrics_name = "typing"
+    stats_source = "Typing"  # its StatsBoard slot
+    # Baseline snapshots (see snapshot.py)
+    state_tag = b"TYPE"
+    state_version = 2
+
+    def __init__(self, anomaly_queue, stats_queue, alpha=0.01, sigma=3.0, cooldown=3.0, detector="ema",
+                 digraphs=None, digraph_keys=128):
         self.anomaly_queue = anomaly_queue
         self.stats_queue = stats_queue
         self.last_ts = time.time()
         self.alpha = alpha
+        self.detector = detector
+        self.profile = self._make_profile()
+        self.state_tag = detector_tag(self.state_tag, detector)
+        if digraphs is None:
+            digraphs = detector == "ema"
+        self.digraph_keys = digraph_keys
+        self.digraphs = self._make_digraphs() if digraphs else None
+        self._prev_code = -1
         self.sigma = sigma
         self.cooldown = cooldown
-        self.mean_delay = None
-        self.var_delay = None
-        self.count = 0
         self._last_alert_ts = 0.0
         self._last_stat_ts = 0.0
         self.total_chars = 0
         self.start_time = time.time()
         self.last_activity_time = time.time()
-        self.wpm_samples = []
         self.typing_speed_wpm = 0
         self.window_size = 60
-        self.char_timestamps = []
-        self.listener = keyboard.Listener(on_press=self._on_press)
-
-    def _calculate_wpm(self):
-        now = time.time()
-        
-        while self.char_timestamps and (now - self.char_timestamps[0]) > self.window_size:
-            self.char_timestamps.pop(0)
-        
-        if not self.char_timestamps or (now - self.char_timestamps[-1]) > 5:
-            return 0
-            
-        chars_in_window = len(self.char_timestamps)
-        window_duration = min(self.window_size, now - self.char_timestamps[0]) / 60
-        
-        if window_duration > 0:
-            wpm = (chars_in_window / 5) / window_duration
-            return wpm
-        return 0
-
-    def _update_wpm(self):
-        current_wpm = self._calculate_wpm()
-        self.wpm_samples.append(current_wpm)
-        
-        if len(self.wpm_samples) > 5:
-            self.wpm_samples.pop(0)
-        
-        weights = [0.1, 0.15, 0.2, 0.25, 0.3][:len(self.wpm_samples)]
-        total_weight = sum(weights)
-        
-        self.typing_speed_wpm = sum(w * s for w, s in zip(weights, self.wpm_samples)) / total_weight
+        self.wpm_window = WpmCounter(self.window_size)
+        self.wpm_smoother = WeightedSmoother((0.1, 0.15, 0.2, 0.25, 0.3))
+        self.listener = None
+        # Raw keystrokes from the listener thread, drained in micro-batches by run() / run_async()
+        self.samples = SampleBuffer(4096)
+        self.max_batch = 256
+        # Optional Journal (see journal.py); written on the drain path, never by the listener
+        self.journal = None
+
+        self.metrics = get_registry()
+        self._m_drain = self.metrics.histogram(f"{self.metrics_name}.drain")
+        self._m_batch = self.metrics.histogram(f"{self.metrics_name}.batch_size", unit="samples")
+        self._m_stats_throttled = self.metrics.counter(f"{self.metrics_name}.stats_throttled")
+        self._m_cooldown = self.metrics.counter(f"{self.metrics_name}.alerts_in_cooldown")
+
+    def _calculate_wpm(self, now=None):
+        # The window holds sample timestamps, so it is read at the sample's time: fleet
+        # samples carry the endpoint's clock, and batches are drained after the fact
+        return self.wpm_window.rate(self._now() if now is None else now)
+
+    def _update_wpm(self, now=None):
+        self.typing_speed_wpm = self.wpm_smoother.update(self._calculate_wpm(now))
 
     def _now(self):
         return time.time()
 
-    def _std(self):
-        return (self.var_delay ** 0.5) if self.var_delay is not None else 0.0
+    def _make_profile(self):
+        return make_profile(self.detector, alpha=self.alpha, min_count=10)
 
-    def _update_profile(self, value):
-        if self.mean_delay is None:
-            self.mean_delay = value
-            self.var_delay = 0.0
-            self.count = 1
-        else:
-            self.count += 1
-            delta = value - self.mean_delay
-            self.mean_delay += self.alpha * delta
-            self.var_delay = (1 - self.alpha) * self.var_delay + self.alpha * (delta ** 2)
+    def _make_digraphs(self):
+        return DigraphMatrix(self.digraph_keys, alpha=self.alpha, min_count=10)
+
+    def write_state(self, writer):
+        writer.profile(self.profile)
+        # Per-digraph timings only when asked for (see snapshot.py)
+        digraphs = self.digraphs if writer.details else None
+        writer.u32(digraphs is not None)
+        if digraphs is not None:
+            digraphs.write(writer)
+
+    def read_state(self, reader):
+        # Read everything first so a damaged section leaves the agent untouched
+        profile = self._make_profile()
+        reader.profile(profile)
+        digraphs = self._make_digraphs().read(reader) if reader.u32() else None
+        self.profile = profile
+        if self.digraphs is not None and digraphs is not None:
+            self.digraphs = digraphs
+
+    @property
+    def mean_delay(self):
+        return self.profile.mean
+
+    @property
+    def var_delay(self):
+        return self.profile.var
+
+    @property
+    def count(self):
+        return self.profile.count
 
     def _publish_stats(self, z=None, note=None):
         now = self._now()
         if now - self._last_stat_ts >= 0.5:
             self._last_stat_ts = now
-            mean = self.mean_delay if self.mean_delay is not None else None
-            std = self._std() if self.mean_delay is not None else None
-            self.stats_queue.put({
-                "source": "Typing",
-                "mean": mean,
-                "std": std,
-                "z": z,
-                "note": note or ("Adapting" if self.count < 30 else "Stable"),
-                "wpm": self.typing_speed_wpm
-            })
+            mean = self.profile.mean
+            std = self.profile.std if self.profile.mean is not None else None
+            publish_stats(self.stats_queue, self.stats_source, mean, std, z,
+                          note or ("Adapting" if self.count < max(30, self.profile.min_count) else "Stable"),
+                          wpm=self.typing_speed_wpm, t=now)
+        else:
+            self._m_stats_throttled.inc()
 
     def _on_press(self, key):
-        now = self._now()
+        # Listener callback: ingest only, detection happens on the agent thread / runtime loop
+        self.samples.push((self._now(), getattr(key, 'char', None) is not None, key_code(key)))
+
+    def _drain_samples(self):
+        t0 = time.perf_counter_ns()
+        drained = False
+        while True:
+            batch = self.samples.pop_batch(self.max_batch)
+            if not batch:
+                break
+            drained = True
+            self.process_batch(batch)
+        if drained:
+            self._m_drain.observe_ns(time.perf_counter_ns() - t0)
+
+    def process_batch(self, batch):
+        """Run detection over [(t, is_char), ...] or [(t, is_char, key_code), ...] keystrokes,
+        whatever their source. Without key codes only the overall profile is used."""
+        self._m_batch.observe(len(batch))
+        if self.journal is not None:
+            self.journal.keys(batch)
+        for sample in batch:
+            self._process_key(*sample)
+
+    def _process_key(self, now, is_char, code=-1):
         delay = now - self.last_ts
         self.last_ts = now
+        prev, self._prev_code = self._prev_code, code
 
-        if hasattr(key, 'char') and key.char is not None:
+        if is_char:
             self.total_chars += 1
-            self.char_timestamps.append(now)
-            self._update_wpm()
+            self.wpm_window.add(now)
+            self._update_wpm(now)
 
         if self.typing_speed_wpm > 80:
             if now - self._last_alert_ts >= self.cooldown:
@@ -102,29 +159,58 @@ class TypingAgent:
                     "severity": "High",
                     "message": f"Unusual Speed Detected: {self.typing_speed_wpm:.0f} WPM"
                 })
+            else:
+                self._m_cooldown.inc()
 
         if 0.01 < delay < 2.0:
-            z = None
-            if self.mean_delay is not None and self._std() > 1e-6 and self.count > 10:
-                z = abs(delay - self.mean_delay) / max(self._std(), 1e-6)
-                if z > self.sigma:
-                    if now - self._last_alert_ts >= self.cooldown:
-                        self._last_alert_ts = now
-                        sev = "High" if z > (self.sigma + 2.0) else "Medium"
-                        self.anomaly_queue.put({
-                            "source": "Typing",
-                            "severity": sev,
-                            "message": f"Delay {delay*1000:.0f}ms, z={z:.2f}"
-                        })
-
-            self._update_profile(delay)
+            z = self.profile.observe(delay)
+            # The digraph's z decides the alert; stats keep the overall z, which goes with
+            # the overall mean/std published next to it
+            alert_z = z
+            if self.digraphs is not None:
+                zd = self.digraphs.observe(prev, code, delay)
+                if zd is not None:
+                    alert_z = zd
+            if alert_z is not None and alert_z > self.sigma:
+                if now - self._last_alert_ts >= self.cooldown:
+                    self._last_alert_ts = now
+                    sev = "High" if alert_z > (self.sigma + 2.0) else "Medium"
+                    self.anomaly_queue.put({
+                        "source": "Typing",
+                        "severity": sev,
+                        "message": f"Delay {delay*1000:.0f}ms, z={alert_z:.2f}"
+                    })
+                else:
+                    self._m_cooldown.inc()
             self._publish_stats(z=z)
         else:
             self._publish_stats(z=None, note="NoSignal")
 
+    def _make_listener(self):
+        # Imported lazily so the detector can be driven without a display (benchmarks, headless)
+        from pynput import keyboard
+        return keyboard.Listener(on_press=self.metrics.timed(f"{self.metrics_name}.callback", self._on_press))
+
     def run(self, stop_event):
+        self.listener = self._make_listener()
         self.listener.start()
         self._publish_stats(z=None, note="Adapting")
         while not stop_event.is_set():
-            time.sleep(0.05)
-        self.listener.stop()
\ No newline at end of file
+            self.samples.wait(0.05)
+            self._drain_samples()
+        self.listener.stop()
+
+    async def run_async(self, runtime):
+        """AgentRuntime variant of run(): no thread of its own, the listener wakes the
+        runtime loop only when a batch of samples is waiting"""
+        self.samples.notify = runtime.threadsafe(self._drain_samples)
+        # Samples pushed before notify was installed left the buffer signalled; drain them
+        self._drain_samples()
+        self.listener = self._make_listener()
+        self.listener.start()
+        self._publish_stats(z=None, note="Adapting")
+        try:
+            await runtime.wait_stopped()
+        finally:
+            self.listener.stop()
+            self.samples.notify = None
\ No newline at end of file
@@ -0,0 +1,76 @@
+from collections import deque
+
+class WpmCounter:
+    """
+    Sliding-window typing rate. Character timestamps live in a deque that is trimmed from
+    the left as the window slides, so add() and rate() are amortized O(1) regardless of
+    how many characters the window holds.
+    Matches the original list-based calculation: chars in the last `window_size` seconds,
+    5 chars per word, 0 when idle for more than `idle_timeout` seconds.
+    """
+    __slots__ = ("window_size", "idle_timeout", "timestamps")
+
+    def __init__(self, window_size=60, idle_timeout=5):
+        self.window_size = window_size
+        self.idle_timeout = idle_timeout
+        self.timestamps = deque()
+
+    def __len__(self):
+        return len(self.timestamps)
+
+    def clear(self):
+        self.timestamps.clear()
+
+    def add(self, ts):
+        self.timestamps.append(ts)
+
+    def rate(self, now):
+        ts = self.timestamps
+        while ts and (now - ts[0]) > self.window_size:
+            ts.popleft()
+
+        if not ts or (now - ts[-1]) > self.idle_timeout:
+            return 0
+
+        window_duration = min(self.window_size, now - ts[0]) / 60
+        if window_duration > 0:
+            return (len(ts) / 5) / window_duration
+        return 0
+
+
+class WeightedSmoother:
+    """
+    Weighted moving average over the last len(weights) samples, oldest sample first.
+    While filling up, the first k weights are used for k samples. Samples sit in a fixed
+    ring and prefix weight totals are precomputed, so update() is constant cost.
+    """
+    __slots__ = ("weights", "_prefix_totals", "_samples", "_head", "_size", "value")
+
+    def __init__(self, weights=(0.1, 0.15, 0.2, 0.25, 0.3)):
+        self.weights = tuple(weights)
+        self._prefix_totals = tuple(sum(self.weights[:k]) for k in range(len(self.weights) + 1))
+        self._samples = [0.0] * len(self.weights)
+        self._head = 0
+        self._size = 0
+        self.value = 0
+
+    def clear(self):
+        self._head = 0
+        self._size = 0
+        self.value = 0
+
+    def update(self, sample):
+        n = len(self.weights)
+        self._samples[self._head] = sample
+        self._head = (self._head + 1) % n
+        if self._size < n:
+            self._size += 1
+
+        # Walk the ring oldest -> newest
+        start = (self._head - self._size) % n
+        samples, weights = self._samples, self.weights
+        acc = 0
+        for k in range(self._size):
+            acc += weights[k] * samples[(start + k) % n]
+        self.value = acc / self._prefix_totals[self._size]
+        return self.value
@@ -1,4 +1,5 @@
 import customtkinter as ctk
+from activity_log import ActivityLog
 
 class GuardioDashboard(ctk.CTk):
     def __init__(self):
@@ -53,6 +54,25 @@ class GuardioDashboard(ctk.CTk):
             "monospace": ("Courier New", 11, "normal")
         }
         
+        # Activity log: entries live in an ActivityLog; the textbox only renders a window of
+        # at most log_view_lines of them, [_log_view_start, _log_view_stop)
+        self.activity_log = ActivityLog()
+        self.log_view_lines = 500
+        self.log_page_lines = 100
+        self._log_view_start = 0
+        self._log_view_stop = 0
+        self._log_following = True
+        # The log panel's contents are built by build_deferred(), after the first frame;
+        # entries logged before then wait in activity_log
+        self.log_status = None
+        self.log_display = None
+
+        # Diagnostics window: diagnostics_source is a callable returning a metrics snapshot
+        # dict, set by the app; the window is only built when opened
+        self.diagnostics_source = None
+        self.diagnostics_window = None
+        self.diagnostics_interval = 1000
+
         self.current_colors = self.colors[self.appearance_mode]
         self._build_ui()
         self._apply_theme()
@@ -98,6 +118,16 @@ class GuardioDashboard(ctk.CTk):
         self.theme_toggle.pack(side="right", anchor="e", pady=16)
         self.theme_toggle.select()
 
+        self.diagnostics_button = ctk.CTkButton(
+            header_content,
+            text="Diagnostics",
+            command=self.show_diagnostics,
+            font=self.typography["button"],
+            width=120,
+            height=32
+        )
+        self.diagnostics_button.pack(side="right", anchor="e", padx=(0, 16), pady=16)
+
         # Control panel
         self.control_panel = ctk.CTkFrame(self, corner_radius=16)
         self.control_panel.pack(fill="x", padx=24, pady=(0, 24))
@@ -376,10 +406,16 @@ class GuardioDashboard(ctk.CTk):
                 "stats": stats_label
             }
 
-        # Right panel - log
+        # Right panel - log; only the frame is built here, so the layout is final
         self.activity_panel = ctk.CTkFrame(self.main_content, corner_radius=16)
         self.activity_panel.pack(fill="both", expand=True)
 
+    def build_deferred(self):
+        """Build what the first frame was drawn without: the activity log's header and textbox
+        (the heaviest widget), showing the entries logged so far"""
+        if self.log_display is not None:
+            return
+
         # Log header
         log_header = ctk.CTkFrame(self.activity_panel, fg_color="transparent")
         log_header.pack(fill="x", padx=28, pady=(28, 0))
@@ -390,12 +426,12 @@ class GuardioDashboard(ctk.CTk):
             font=self.typography["title"]
         ).pack(side="left")
 
-        log_status = ctk.CTkLabel(
+        self.log_status = ctk.CTkLabel(
             log_header,
             text="Real-time monitoring",
             font=self.typography["caption"]
         )
-        log_status.pack(side="right", pady=4)
+        self.log_status.pack(side="right", pady=4)
 
         # Log display
         self.log_display = ctk.CTkTextbox(
@@ -408,6 +444,16 @@ class GuardioDashboard(ctk.CTk):
         self.log_display.pack(fill="both", expand=True, padx=28, pady=(16, 28))
         self.log_display.configure(state="disabled")
 
+        # Page older/newer entries in when the view is scrolled to either edge
+        for sequence in ("<MouseWheel>", "<Button-4>", "<Button-5>", "<Prior>", "<Next>",
+                         "<Control-Home>", "<Control-End>"):
+            self.log_display.bind(sequence, self._on_log_scroll, add="+")
+
+        c = self.current_colors
+        self.log_display.configure(fg_color=c["surface"], text_color=c["text"], border_color=c["border"])
+        total = len(self.activity_log)
+        self._render_log_window(max(0, total - self.log_view_lines), total)
+
     def _update_sensitivity_display(self, value):
         """Update sensitivity value display"""
         self.sens_value.configure(text=f"{float(value):.1f}σ")
@@ -479,7 +525,9 @@ class GuardioDashboard(ctk.CTk):
         self.risk_progress.configure(progress_color=c["success"], fg_color=c["surface"])
         
         # Log display
-        self.log_display.configure(fg_color=c["surface"], text_color=c["text"], border_color=c["border"])
+        if self.log_display is not None:
+            self.log_display.configure(fg_color=c["surface"], text_color=c["text"], border_color=c["border"])
+        self.diagnostics_button.configure(fg_color=c["accent"], hover_color=c["accent"], text_color="white")
 
     # Public API methods
     def set_state(self, state):
@@ -531,10 +579,10 @@ class GuardioDashboard(ctk.CTk):
             self.set_agent_status(agent_name, stats["note"])
 
     def update_risk_score(self, risk_score):
-        """Update risk assessment"""
+        """Update risk assessment (the engine's score decays, so it arrives as a float)"""
         c = self.current_colors
         
-        self.risk_score_label.configure(text=str(risk_score))
+        self.risk_score_label.configure(text=str(int(risk_score)))
         progress = min(risk_score / 15.0, 1.0)
         self.risk_progress.set(progress)
         
@@ -573,18 +621,134 @@ class GuardioDashboard(ctk.CTk):
 
     def add_log_message(self, message):
         """Add timestamped message to log"""
-        import datetime
-        timestamp = datetime.datetime.now().strftime("%H:%M:%S")
-        formatted_message = f"[{timestamp}] {message}"
-        
+        self.add_log_messages([message])
+
+    def add_log_messages(self, messages):
+        """Add several timestamped messages with a single insert"""
+        if not messages:
+            return
+        entries = self.activity_log.extend(messages)
+        if self.log_display is None:
+            return  # build_deferred() renders them
+        if not self._log_following:
+            # The user is reading older entries; keep their view still
+            self._update_log_status()
+            return
+
+        text = "".join(entry.format() + "\n" for entry in entries)
         self.log_display.configure(state="normal")
-        self.log_display.insert("end", formatted_message + "\n")
+        self.log_display.insert("end", text)
+        self._log_view_stop = len(self.activity_log)
+        excess = (self._log_view_stop - self._log_view_start) - self.log_view_lines
+        if excess > 0:
+            self.log_display.delete("1.0", f"{excess + 1}.0")
+            self._log_view_start += excess
         self.log_display.see("end")
         self.log_display.configure(state="disabled")
 
-    def _clear_log(self):
-        """Clear activity log"""
+    def _render_log_window(self, start, stop, anchor_index=None):
+        """Replace the textbox contents with entries [start, stop) and scroll so that
+        anchor_index (default: the last entry) is in view"""
+        entries = self.activity_log.get(start, stop)
+        self._log_view_start = start
+        self._log_view_stop = start + len(entries)
+
         self.log_display.configure(state="normal")
         self.log_display.delete("1.0", "end")
+        self.log_display.insert("end", "".join(entry.format() + "\n" for entry in entries))
+        if anchor_index is None:
+            self.log_display.see("end")
+        else:
+            self.log_display.see(f"{anchor_index - start + 1}.0")
         self.log_display.configure(state="disabled")
+
+    def _on_log_scroll(self, event=None):
+        # Let Tk apply the scroll first, then look at where the view ended up
+        self.after_idle(self._check_log_paging)
+
+    def _check_log_paging(self):
+        top, bottom = self.log_display.yview()
+        total = len(self.activity_log)
+        start, stop = self._log_view_start, self._log_view_stop
+
+        if top <= 0.0 and start > 0:
+            new_start = max(0, start - self.log_page_lines)
+            new_stop = min(total, new_start + self.log_view_lines)
+            self._log_following = False
+            self._render_log_window(new_start, new_stop, anchor_index=start)
+        elif bottom >= 1.0 and stop < total:
+            new_stop = min(total, stop + self.log_page_lines)
+            new_start = max(0, new_stop - self.log_view_lines)
+            self._log_following = new_stop == total
+            self._render_log_window(new_start, new_stop,
+                                    anchor_index=None if self._log_following else stop - 1)
+        elif bottom >= 1.0:
+            self._log_following = True
+        self._update_log_status()
+
+    def _update_log_status(self):
+        if self.log_status is None:
+            return
+        if self._log_following:
+            text = "Real-time monitoring"
+        else:
+            text = f"Paused · {len(self.activity_log) - self._log_view_stop} newer entries"
+        self.log_status.configure(text=text)
+
+    def _clear_log(self):
+        """Clear activity log"""
+        self.activity_log.clear()
+        self._log_view_start = 0
+        self._log_view_stop = 0
+        self._log_following = True
+        if self.log_display is not None:
+            self.log_display.configure(state="normal")
+            self.log_display.delete("1.0", "end")
+            self.log_display.configure(state="disabled")
+            self._update_log_status()
         self.add_log_message("[System] Activity log cleared")
+
+    def show_diagnostics(self):
+        """Open (or raise) the performance diagnostics window"""
+        if self.diagnostics_window is not None and self.diagnostics_window.winfo_exists():
+            self.diagnostics_window.focus()
+            return
+
+        window = ctk.CTkToplevel(self)
+        window.title("Guardio — Diagnostics")
+        window.geometry("640x560")
+        self.diagnostics_text = ctk.CTkTextbox(
+            window,
+            corner_radius=12,
+            font=self.typography["monospace"],
+            border_width=1,
+            wrap="none"
+        )
+        self.diagnostics_text.pack(fill="both", expand=True, padx=16, pady=16)
+        self.diagnostics_window = window
+        self._refresh_diagnostics()
+
+    def _refresh_diagnostics(self):
+        window = self.diagnostics_window
+        if window is None or not window.winfo_exists():
+            self.diagnostics_window = None
+            return
+        snapshot = self.diagnostics_source() if self.diagnostics_source else {}
+        self.diagnostics_text.configure(state="normal")
+        self.diagnostics_text.delete("1.0", "end")
+        self.diagnostics_text.insert("end", self._format_diagnostics(snapshot))
+        self.diagnostics_text.configure(state="disabled")
+        self.after(self.diagnostics_interval, self._refresh_diagnostics)
+
+    @staticmethod
+    def _format_diagnostics(snapshot):
+        if not snapshot:
+            return "Metrics are disabled or nothing has been recorded yet."
+        lines = []
+        for name, value in snapshot.items():
+            if isinstance(value, dict):
+                parts = "  ".join(f"{k}={v}" for k, v in value.items())
+                lines.append(f"{name:<32} {parts}")
+            else:
+                lines.append(f"{name:<32} {'--' if value is None else value}")
+        return "\n".join(lines)
@@ -0,0 +1,459 @@
+import queue
+import threading
+import time
+from agents.metrics import get_registry
+from agents.snapshot import BaselineStore, BaselineCheckpointer
+from agents.journal import Journal
+from agents.stats_board import StatsBoard
+from wakeup import BoundedQueue, Wakeup
+from risk import RiskScore
+
+AGENT_NAMES = ("Movement", "Typing", "AppUsage")
+
+# Agent modules, AgentRuntime (asyncio) and AgentHost (NumPy, multiprocessing) are imported
+# when monitoring starts, so that a front-end can be up before they are loaded
+
+
+def default_agent_factories():
+    """The built-in agents. Importing them brings in NumPy and the input backends, so the
+    engine only does it when agents are about to be built (see GuardioEngine.load_agents)"""
+    from agents.movement_agent import MovementAgent
+    from agents.typing_agent import TypingAgent
+    from agents.app_usage_agent import AppUsageAgent
+    return [MovementAgent, TypingAgent, AppUsageAgent]
+
+
+def make_agent(factory, anomaly_queue, stats_queue, sigma, cooldown, detectors,
+               movement_features=None):
+    """Build one agent; detectors maps an agent's metrics_name to its detector ("ema" or
+    "quantile"), movement_features (if given) is the MovementAgent's `features`"""
+    kwargs = {}
+    name = getattr(factory, "metrics_name", None)
+    detector = detectors.get(name)
+    if detector:
+        kwargs["detector"] = detector
+    if movement_features and name == "movement":
+        kwargs["features"] = tuple(movement_features)
+    return factory(anomaly_queue, stats_queue, sigma=sigma, cooldown=cooldown, **kwargs)
+
+
+class GuardioEngine:
+    """
+    UI-free detection engine.
+    Owns the agents, their queues and runtime, risk scoring and the start/stop lifecycle.
+    All agents share one AgentRuntime (a single asyncio loop thread), whatever their number.
+    Front-ends (the dashboard, the headless console) subscribe to it and are notified through:
+      - on_state(state)                      "Monitoring" / "Stopped"
+      - on_agent_status(agent_name, status)  "Running" / "Idle"
+      - on_anomaly(event, risk_score)        every anomaly dict from an agent
+      - on_critical(risk_score)              risk passed CRITICAL_RISK (once, until it decays
+                                             below half of it)
+      - on_risk(risk_score)                  risk score decayed past a whole point, or was reset
+      - on_stats(stats)                      every stats dict from an agent
+      - on_log(message)                      system messages
+    Subscribers only need to implement the hooks they care about. Risk scores are floats
+    rounded to 0.1; the score decays with risk_half_life seconds (see risk.py).
+
+    Every anomaly put() and stats publish notifies `wakeup`, so a front-end can sleep until
+    there is work instead of polling: register wakeup.fileno() with its event loop, call
+    wakeup.clear() and then process_pending().
+
+    The anomaly queue is bounded (wakeup.BoundedQueue), so a stalled front-end cannot make
+    it grow without limit. When anomaly_capacity alerts are waiting it discards the oldest.
+    That is the only policy accepted: "block" would stall every agent on the runtime loop,
+    and "latest" would keep one pending alert per agent out of a burst. Alerts it had to discard are counted per source, reported through on_log
+    by the next process_pending() and exported as metrics, as is whether it is saturated.
+    Stats are not queued: each agent overwrites its slot of `stats_board` (a StatsBoard,
+    passed to the agents as their stats queue) and process_pending() reads the slots that
+    changed.
+
+    With agent_process=True the agents run in a supervised child process instead
+    (agent_host.AgentHost): anomalies and log lines arrive over a shared-memory ring, which
+    process_pending() moves into the anomaly queue, and the stats board is shared memory.
+    Baselines and the raw-input journal are then handled by the child; `agents` stays empty.
+    """
+    def __init__(self, sigma=3.0, cooldown=3.0, agent_factories=None, baseline_path=None,
+                 checkpoint_interval=60.0, journal_dir=None, detectors=None, risk_half_life=60.0,
+                 correlation_window=10.0, anomaly_policy="drop_oldest", anomaly_capacity=1024,
+                 agent_process=False, baseline_details=False, movement_features=None):
+        if anomaly_policy != "drop_oldest":
+            # "block" would stall the agent runtime loop, "latest" would collapse a burst of
+            # distinct alerts from one agent into its last one
+            raise ValueError(f"anomaly_policy {anomaly_policy!r} is not supported for the "
+                             f"anomaly queue; only 'drop_oldest' keeps every alert it can "
+                             f"without stalling the agents")
+        self.wakeup = Wakeup()
+        self.anomaly_queue = BoundedQueue(self.wakeup, anomaly_capacity, policy=anomaly_policy)
+        self._drops_reported = {}  # alert drop counts already logged, per source
+        self.stats_board = self._make_stats_board()
+        self.risk = RiskScore(half_life=risk_half_life, window=correlation_window)
+        self._risk_shown = 0  # whole points of the last score sent to subscribers
+        self.runtime = None
+        self.agents = []
+        self.stop_event = None
+        self.agent_process = agent_process
+        self.host = None
+
+        self.sensitivity_sigma = sigma
+        self.cooldown_seconds = cooldown
+
+        # None until load_agents(): the built-in agents are imported on first use
+        self.agent_factories = agent_factories or None
+        # {agent metrics_name: "ema" | "quantile"}; agents not listed keep their default
+        self.detectors = dict(detectors or {})
+        # MovementAgent trajectory features; None keeps its default (speed only)
+        self.movement_features = movement_features
+        self.subscribers = []
+
+        # Learned baselines survive Stop/Reset/restart when a snapshot path is given
+        # Aggregate profiles only, unless baseline_details (window titles, digraph timings)
+        self.baseline_path = baseline_path
+        self.baseline_details = baseline_details
+        self.baseline = BaselineStore(baseline_path, details=baseline_details) if baseline_path else None
+        self.checkpoint_interval = checkpoint_interval
+        self.checkpointer = None
+
+        # Opt-in raw signal journal (agents/journal.py), one set of segments per start()
+        self.journal_dir = journal_dir
+        self.journal = None
+
+        self.metrics = get_registry()
+        self._m_process = self.metrics.histogram("engine.process_pending")
+        self._m_anomalies = self.metrics.counter("engine.anomalies")
+        self._m_stats = self.metrics.counter("engine.stats")
+        self._m_critical = self.metrics.counter("engine.critical")
+
+    # Subscribers
+    def subscribe(self, subscriber):
+        """Register a front-end to be notified of engine events"""
+        if subscriber not in self.subscribers:
+            self.subscribers.append(subscriber)
+
+    def unsubscribe(self, subscriber):
+        """Remove a previously registered front-end"""
+        if subscriber in self.subscribers:
+            self.subscribers.remove(subscriber)
+
+    def _emit(self, hook, *args):
+        for subscriber in list(self.subscribers):
+            handler = getattr(subscriber, hook, None)
+            if handler is None:
+                continue
+            try:
+                handler(*args)
+            except Exception as e:
+                print(f"Error in subscriber {hook}: {e}")
+
+    def log(self, message):
+        self._emit("on_log", message)
+
+    # Settings
+    def set_sensitivity(self, sigma):
+        """Update sensitivity for future and running agents"""
+        self.sensitivity_sigma = float(sigma)
+        for agent in self.agents:
+            if hasattr(agent, 'sigma'):
+                agent.sigma = self.sensitivity_sigma
+        if self.host is not None:
+            self.host.set("sigma", self.sensitivity_sigma)
+
+    def set_cooldown(self, cooldown):
+        """Update alert cooldown for future and running agents"""
+        self.cooldown_seconds = float(cooldown)
+        for agent in self.agents:
+            if hasattr(agent, 'cooldown'):
+                agent.cooldown = self.cooldown_seconds
+        if self.host is not None:
+            self.host.set("cooldown", self.cooldown_seconds)
+
+    # Lifecycle
+    @property
+    def is_running(self):
+        return self.stop_event is not None and not self.stop_event.is_set()
+
+    def load_agents(self):
+        """Import the built-in agent modules now instead of in the first start(); front-ends
+        call it once they are up so that Start does not wait for the imports"""
+        if self.agent_factories is None:
+            self.agent_factories = default_agent_factories()
+        return self.agent_factories
+
+    def _make_agent(self, factory):
+        return make_agent(factory, self.anomaly_queue, self.stats_board,
+                          self.sensitivity_sigma, self.cooldown_seconds, self.detectors,
+                          self.movement_features)
+
+    def _make_stats_board(self, shared=False):
+        if shared:
+            # A shared board cannot grow: a slot for every source the factories declare
+            board = StatsBoard(self._stats_sources(), shared=True)
+        else:
+            # Room for agents from custom factories next to the built-in ones
+            board = StatsBoard(AGENT_NAMES, capacity=8)
+        board.notify = self.wakeup.notify
+        return board
+
+    def _stats_sources(self):
+        """Built-in sources plus the stats_source of every factory; logs the factories that
+        do not declare one, whose stats an agent process could not publish"""
+        sources = list(AGENT_NAMES)
+        for factory in self.agent_factories:
+            if not hasattr(factory, "stats_source"):
+                name = getattr(factory, "__name__", repr(factory))
+                self.log(f"[System] {name} declares no stats_source; its stats are not shown "
+                         f"while the agents run in a separate process")
+                continue
+            source = factory.stats_source
+            if source and source not in sources:
+                sources.append(source)
+        return sources
+
+    def _host_config(self):
+        return {"factories": list(self.agent_factories), "detectors": self.detectors,
+                "movement_features": self.movement_features,
+                "sigma": self.sensitivity_sigma, "cooldown": self.cooldown_seconds,
+                "sources": self.stats_board.sources, "baseline_path": self.baseline_path,
+                "baseline_details": self.baseline_details,
+                "checkpoint_interval": self.checkpoint_interval, "journal_dir": self.journal_dir,
+                "metrics": self.metrics.enabled}
+
+    def start(self):
+        """Create and start all agents"""
+        if self.is_running:
+            return
+        self._emit("on_state", "Monitoring")
+        self.log("[System] Starting adaptive monitoring agents...")
+
+        self.load_agents()
+        self.stop_event = threading.Event()
+        if self.journal_dir:
+            self.journal = Journal(self.journal_dir)
+        if self.agent_process:
+            from agent_host import AgentHost
+            self.stats_board = self._make_stats_board(shared=True)
+            self.host = AgentHost(self._host_config(), self.stats_board, self.wakeup)
+            self.host.start()
+        else:
+            self._start_agents()
+        self.metrics.add_collector(self._collect_metrics)
+
+        for name in AGENT_NAMES:
+            self._emit("on_agent_status", name, "Running")
+
+    def _start_agents(self):
+        self.agents = [self._make_agent(factory) for factory in self.agent_factories]
+        if self.journal is not None:
+            for agent in self.agents:
+                if hasattr(agent, "journal"):
+                    agent.journal = self.journal
+
+        hosted = list(self.agents)
+        if self.baseline is not None:
+            self._warm_start()
+            self.checkpointer = BaselineCheckpointer(self.baseline, self.agents,
+                                                     interval=self.checkpoint_interval)
+            hosted.append(self.checkpointer)
+
+        from agents.runtime import AgentRuntime
+        self.runtime = AgentRuntime(self.stop_event)
+        self.runtime.start(hosted)
+
+    def stop(self, timeout=1.5):
+        """Stop all agents and wait for the runtime thread"""
+        if not self.stop_event:
+            return
+        self.log("[System] Stopping all agents...")
+        if self.host is not None:
+            self._stop_host(timeout)
+        else:
+            self.runtime.stop(timeout=timeout)
+        self.metrics.remove_collector(self._collect_metrics)
+        if self.checkpointer is not None:
+            try:
+                self.checkpointer.checkpoint()
+            except OSError as e:
+                self.log(f"[System] Could not save learned baselines: {e}")
+            self.checkpointer = None
+        if self.journal is not None:
+            self.journal.close()
+            self.journal = None
+
+        self.runtime = None
+        self.agents = []
+        self.stop_event = None
+
+        self._emit("on_state", "Stopped")
+        for name in AGENT_NAMES:
+            self._emit("on_agent_status", name, "Idle")
+        self.log("[System] All agents stopped.")
+
+    def _stop_host(self, timeout):
+        self.stop_event.set()
+        self.host.stop(timeout=timeout)
+        # What the child sent before exiting is queued for the next process_pending();
+        # its last stats go with the shared board
+        self._poll_host()
+        self.host.close()
+        self.host = None
+        self.stats_board.close(unlink=True)
+        self.stats_board = self._make_stats_board()
+
+    def _warm_start(self):
+        restored = self.baseline.load_into(self.agents)
+        if restored:
+            names = [type(a).__name__ for a in self.agents if getattr(a, "state_tag", None) in restored]
+            self.log(f"[System] Restored learned baselines: {', '.join(names)}")
+
+    # Risk
+    @property
+    def risk_score(self):
+        return round(self.risk.value(time.time()), 1)
+
+    def reset_risk(self):
+        self.risk.reset()
+        self._risk_shown = 0
+        self._emit("on_risk", 0.0)
+
+    def refresh_risk(self):
+        """Notify on_risk when the score has decayed past a whole point since it was last
+        sent. Called by process_pending(); front-ends that sleep between events call it on
+        a timer while the score is above zero."""
+        score = self.risk_score
+        if int(score) != self._risk_shown:
+            self._risk_shown = int(score)
+            self._emit("on_risk", score)
+        return score
+
+    # Queue processing
+
+    def has_pending(self):
+        return (not self.anomaly_queue.empty() or self.stats_board.pending()
+                or (self.host is not None and self.host.pending()))
+
+    def _poll_host(self):
+        """Move the agent process's anomalies into the anomaly queue and log its messages"""
+        for kind, value in self.host.poll():
+            if kind == "anomaly":
+                self.anomaly_queue.put(value, block=False)
+            else:
+                self.log(value)
+
+    def _report_drops(self):
+        """Log the alerts the anomaly queue discarded since the last report"""
+        if self.anomaly_queue.drops == sum(self._drops_reported.values()):
+            return
+        counts = self.anomaly_queue.drop_counts()[0]
+        reported = self._drops_reported
+        lost = [f"{n - reported.get(source, 0)} {source or 'Unknown'}"
+                for source, n in counts.items() if n > reported.get(source, 0)]
+        self._drops_reported = counts
+        if lost:
+            self.log(f"[System] Anomaly queue full, discarded alerts: {', '.join(lost)}")
+
+    def _collect_metrics(self):
+        m = self.metrics
+        m.gauge("engine.anomaly_queue_depth").set(self.anomaly_queue.qsize())
+        m.gauge("engine.anomaly_queue_saturated").set(int(self.anomaly_queue.saturated))
+        m.gauge("engine.stats_torn_reads").set(self.stats_board.torn)
+        if self.host is not None:
+            m.gauge("engine.agent_restarts").set(self.host.restarts)
+            m.gauge("engine.agent_ring_dropped").set(self.host.ring.dropped)
+            m.gauge("engine.agent_ring_torn_reads").set(self.host.ring.torn)
+        for source, n in self.anomaly_queue.drop_counts()[0].items():
+            m.gauge(f"{(source or 'unknown').lower()}.alerts_dropped").set(n)
+        for agent in self.agents:
+            samples = getattr(agent, "samples", None)
+            if samples is None:
+                continue
+            name = getattr(agent, "metrics_name", type(agent).__name__)
+            m.gauge(f"{name}.samples_pending").set(len(samples))
+            m.gauge(f"{name}.samples_dropped").set(samples.dropped)
+
+    def process_pending(self, budget=None):
+        """Drain the anomaly queue and read the changed stats slots once, update the risk
+        score and notify subscribers. With a budget (seconds), stop early once it is spent
+        and leave the rest queued; anomalies are handled before stats. Returns the number of
+        events handled."""
+        t0 = time.perf_counter_ns()
+        deadline = time.perf_counter() + budget if budget is not None else None
+        handled = self._drain_queues(deadline)
+        self.refresh_risk()
+        self._report_drops()
+        if handled:
+            self._m_process.observe_ns(time.perf_counter_ns() - t0)
+        return handled
+
+    def _drain_queues(self, deadline):
+        handled = 0
+        if self.host is not None:
+            self._poll_host()
+        while True:
+            if deadline is not None and time.perf_counter() >= deadline:
+                return handled
+            try:
+                event = self.anomaly_queue.get_nowait()
+            except queue.Empty:
+                break
+            handled += 1
+            self._m_anomalies.inc()
+            if self.journal is not None:
+                self.journal.anomaly(time.time(), event)
+            score, critical = self.risk.add(event.get("source", "Unknown"),
+                                            event.get("severity", "Low"), time.time())
+            score = round(score, 1)
+            self._risk_shown = int(score)
+            self._emit("on_anomaly", event, score)
+
+            if critical:
+                self._m_critical.inc()
+                self._emit("on_critical", score)
+
+        if deadline is not None and time.perf_counter() >= deadline:
+            return handled
+        # The newest stats of every agent that published since the last read
+        for stats in self.stats_board.changed():
+            handled += 1
+            self._m_stats.inc()
+            if self.journal is not None:
+                self.journal.stats(time.time(), stats)
+            self._emit("on_stats", stats)
+
+        return handled
+
+    def run_headless(self, stop_event=None, idle_wait=0.25, duration=None):
+        """Run agents and process their queues on the calling thread until stop_event
+        is set or duration elapses. Sleeps on the wakeup channel while the queues are empty;
+        idle_wait caps each sleep so stop_event and duration are still noticed."""
+        stop_event = stop_event or threading.Event()
+        deadline = time.time() + duration if duration is not None else None
+        self.start()
+        try:
+            while not stop_event.is_set():
+                if deadline is not None and time.time() >= deadline:
+                    break
+                self.wakeup.clear()
+                if not self.process_pending():
+                    self.wakeup.wait(idle_wait)
+        finally:
+            self.stop()
+            self.process_pending()
+
+
+class ConsoleSubscriber:
+    """Prints engine events to stdout for headless runs"""
+    def __init__(self, show_stats=False):
+        self.show_stats = show_stats
+
+    def on_log(self, message):
+        print(message, flush=True)
+
+    def on_anomaly(self, event, risk_score):
+        print(f"[ALERT] {event.get('source', 'Unknown')} Anomaly ({event.get('severity', 'Low')}): "
+              f"{event.get('message', '')} [risk={risk_score}]", flush=True)
+
+    def on_critical(self, risk_score):
+        print("!!! CRITICAL RISK LEVEL - POTENTIAL SECURITY BREACH !!!", flush=True)
+
+    def on_stats(self, stats):
+        if self.show_stats:
+            print(f"[Stats] {stats}", flush=True)
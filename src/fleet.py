@@ -0,0 +1,517 @@
+"""
+Fleet ingest server: one process running detection for many workstations.
+
+Endpoints stream their raw behavioural events over TCP or a Unix socket. Each connection is
+a sequence of frames, a u32 little-endian body length followed by the body:
+  - the first frame is the hello, RecordEncoder.header(FLEET_MAGIC) followed by the user id
+    (u16 length + UTF-8)
+  - every later frame is a batch of journal records (MOVES, KEYS, FOCUS; see
+    agents/journal.py) continuing the delta state of the previous frame
+Every user gets one UserProfile (the Movement, Typing and AppUsage detectors) shared by all
+of that user's connections. At most max_users profiles are kept: a new user evicts the one
+that said hello least recently among those without an open connection, or is refused.
+Anomalies go to a per-user RiskScore (risk.py, the same scoring GuardioEngine does) and to
+subscribers. ColumnarFleetServer keeps the Movement and Typing profiles in a ProfileTable
+instead and scores all sessions' samples together, optionally in a process pool.
+
+    python src/main.py --serve unix:/tmp/guardio.sock
+    python benchmarks/fleet_loadgen.py unix:/tmp/guardio.sock --sessions 1000
+"""
+
+import asyncio
+import os
+import struct
+import time
+
+import numpy as np
+
+from agents.app_usage_agent import AppUsageAgent
+from agents.focus_sources import FakeFocusSource
+from agents.journal import FOCUS, HEADER_SIZE, KEYS, MOVES, RecordDecoder, RecordEncoder
+from agents.metrics import get_registry
+from agents.movement_agent import MovementAgent
+from agents.profile_table import ProfileTable, ShardedScorer
+from agents.typing_agent import TypingAgent
+from risk import RiskScore
+
+FLEET_MAGIC = b"GDF1"
+MAX_FRAME = 1 << 20
+_LENGTH = struct.Struct("<I")
+_USER = struct.Struct("<H")
+
+
+class _AnomalySink:
+    """Stands in for an agent's anomaly queue: events go straight to the server"""
+    __slots__ = ("server", "profile")
+
+    def __init__(self, server, profile):
+        self.server = server
+        self.profile = profile
+
+    def put(self, event):
+        self.server._on_anomaly(self.profile, event)
+
+
+class _StatsSink:
+    """Stands in for an agent's stats queue: keeps the latest stats per source"""
+    __slots__ = ("latest",)
+
+    def __init__(self):
+        self.latest = {}
+
+    def put(self, stats):
+        self.latest[stats.get("source")] = stats
+
+
+class UserProfile:
+    """The detectors of one user, fed by any number of that user's connections"""
+
+    def __init__(self, server, user, sigma=3.0, cooldown=3.0):
+        self.user = user
+        self.risk = server.make_risk()
+        self.sessions = 0
+        self.events = 0
+        anomalies = _AnomalySink(server, self)
+        self.stats = _StatsSink()
+        # Speed only (the default), like the columnar ProfileTable
+        self.movement = MovementAgent(anomalies, self.stats, sigma=sigma, cooldown=cooldown)
+        # Endpoints send key timings without key identities: no digraph matrix
+        self.typing = TypingAgent(anomalies, self.stats, sigma=sigma, cooldown=cooldown, digraphs=False)
+        # Focus switches arrive in the stream; the source only has to be usable
+        self.app_usage = AppUsageAgent(anomalies, self.stats, sigma=sigma, cooldown=cooldown,
+                                       focus_source=FakeFocusSource())
+
+    @property
+    def agents(self):
+        return [self.movement, self.typing, self.app_usage]
+
+
+def encode_hello(user, t=None, tick_us=100):
+    """Hello frame body for `user`, and the RecordEncoder for the frames that follow"""
+    encoder = RecordEncoder(tick_us, time.time() if t is None else t)
+    data = user.encode("utf-8")
+    return encoder.header(FLEET_MAGIC) + _USER.pack(len(data)) + data, encoder
+
+
+def frame(body):
+    return _LENGTH.pack(len(body)) + body
+
+
+class ProtocolError(ValueError):
+    pass
+
+
+class _Session:
+    """Server side of one connection"""
+    __slots__ = ("profile", "decoder")
+
+    def __init__(self):
+        self.profile = None
+        self.decoder = None
+
+
+class FleetServer:
+    """
+    Subscribers may implement any of:
+      - on_session(user, connected)      a connection said hello / went away
+      - on_anomaly(user, event, risk)    every anomaly, with the user's risk score
+      - on_critical(user, risk)          the user's risk passed CRITICAL_RISK (once, until it
+                                         decays below half of it)
+    """
+
+    def __init__(self, sigma=3.0, cooldown=3.0, max_frame=MAX_FRAME, max_users=16384,
+                 risk_half_life=60.0, correlation_window=10.0):
+        self.sigma = sigma
+        self.cooldown = cooldown
+        self.risk_half_life = risk_half_life
+        self.correlation_window = correlation_window
+        self.max_frame = max_frame
+        self.max_users = max_users
+        self.profiles = {}  # least recent hello first
+        self.subscribers = []
+        self.sessions = 0
+        self._server = None
+
+        self.metrics = get_registry()
+        self._m_sessions = self.metrics.gauge("fleet.sessions")
+        self._m_profiles = self.metrics.gauge("fleet.profiles")
+        self._m_evicted = self.metrics.counter("fleet.profiles_evicted")
+        self._m_frames = self.metrics.counter("fleet.frames")
+        self._m_events = self.metrics.counter("fleet.events")
+        self._m_bytes = self.metrics.counter("fleet.bytes")
+        self._m_frame = self.metrics.histogram("fleet.frame")
+        self._m_anomalies = self.metrics.counter("fleet.anomalies")
+        self._m_critical = self.metrics.counter("fleet.critical")
+        self._m_errors = self.metrics.counter("fleet.protocol_errors")
+
+    # Subscribers
+    def subscribe(self, subscriber):
+        if subscriber not in self.subscribers:
+            self.subscribers.append(subscriber)
+
+    def _emit(self, hook, *args):
+        for subscriber in list(self.subscribers):
+            handler = getattr(subscriber, hook, None)
+            if handler is None:
+                continue
+            try:
+                handler(*args)
+            except Exception as e:
+                print(f"Error in subscriber {hook}: {e}")
+
+    def make_risk(self):
+        return RiskScore(half_life=self.risk_half_life, window=self.correlation_window)
+
+    def _on_anomaly(self, profile, event):
+        self._m_anomalies.inc()
+        score, critical = profile.risk.add(event.get("source", "Unknown"),
+                                           event.get("severity", "Low"), time.time())
+        score = round(score, 1)
+        self._emit("on_anomaly", profile.user, event, score)
+        if critical:
+            self._m_critical.inc()
+            self._emit("on_critical", profile.user, score)
+
+    # Profiles and frames
+    def profile(self, user):
+        profile = self.profiles.pop(user, None)
+        if profile is None:
+            if len(self.profiles) >= self.max_users:
+                self._evict()
+            profile = self._new_profile(user)
+        self.profiles[user] = profile
+        self._m_profiles.set(len(self.profiles))
+        return profile
+
+    def _new_profile(self, user):
+        return UserProfile(self, user, sigma=self.sigma, cooldown=self.cooldown)
+
+    def _evict(self):
+        """Drop the least recently connected profile without an open connection"""
+        for user, profile in self.profiles.items():
+            if not profile.sessions:
+                del self.profiles[user]
+                self._m_evicted.inc()
+                self._released(profile)
+                return
+        raise ProtocolError(f"too many users ({self.max_users} connected)")
+
+    def _released(self, profile):
+        pass
+
+    def _hello(self, session, body):
+        decoder = RecordDecoder.from_header(body, FLEET_MAGIC)
+        if decoder is None:
+            raise ProtocolError("bad hello")
+        try:
+            n = _USER.unpack_from(body, HEADER_SIZE)[0]
+            user = body[HEADER_SIZE + _USER.size:HEADER_SIZE + _USER.size + n].decode("utf-8")
+        except (struct.error, UnicodeDecodeError):
+            raise ProtocolError("bad user id")
+        if not user or len(body) != HEADER_SIZE + _USER.size + n:
+            raise ProtocolError("bad user id")
+        session.decoder = decoder
+        session.profile = self.profile(user)
+        session.profile.sessions += 1
+        self._emit("on_session", user, True)
+
+    def handle_frame(self, session, body):
+        """Process one frame body for a connection; raises ProtocolError on bad input"""
+        if session.profile is None:
+            self._hello(session, body)
+            return 0
+        t0 = time.perf_counter_ns()
+        profile = session.profile
+        events = 0
+        try:
+            for kind, payload in session.decoder.decode(body):
+                if kind == MOVES:
+                    if payload:
+                        self._moves(profile, payload)
+                    events += len(payload)
+                elif kind == KEYS:
+                    if payload:
+                        self._keys(profile, payload)
+                    events += len(payload)
+                elif kind == FOCUS:
+                    t, app = payload
+                    self._focus(profile, app, t)
+                    events += 1
+                # Endpoint-side anomalies and stats are ignored; detection happens here
+        except (IndexError, UnicodeDecodeError, struct.error) as e:
+            raise ProtocolError(f"bad batch: {e}")
+        profile.events += events
+        self._m_frames.inc()
+        self._m_events.inc(events)
+        self._m_frame.observe_ns(time.perf_counter_ns() - t0)
+        return events
+
+    def _moves(self, profile, batch):
+        profile.movement.process_batch(batch)
+
+    def _keys(self, profile, batch):
+        profile.typing.process_batch(batch)
+
+    def _focus(self, profile, app, t):
+        profile.app_usage.observe_focus(app, t)
+
+    def _closed(self, session):
+        if session.profile is not None:
+            session.profile.sessions -= 1
+            self._emit("on_session", session.profile.user, False)
+
+    # Serving
+    async def start(self, address):
+        """Listen on "unix:PATH" or "HOST:PORT" (":PORT" for all interfaces)"""
+        loop = asyncio.get_running_loop()
+        if address.startswith("unix:"):
+            path = address[len("unix:"):]
+            if os.path.exists(path):
+                os.remove(path)
+            self._server = await loop.create_unix_server(lambda: _FleetProtocol(self), path,
+                                                         backlog=4096)
+        else:
+            host, _, port = address.rpartition(":")
+            self._server = await loop.create_server(lambda: _FleetProtocol(self),
+                                                    host or None, int(port), backlog=4096)
+        return self._server
+
+    async def serve(self, address, duration=None):
+        server = await self.start(address)
+        async with server:
+            if duration is None:
+                await server.serve_forever()
+            else:
+                await asyncio.sleep(duration)
+
+    def run(self, address, duration=None):
+        """Serve on the calling thread until interrupted or duration elapses"""
+        try:
+            asyncio.run(self.serve(address, duration))
+        except KeyboardInterrupt:
+            pass
+
+
+class _FleetProtocol(asyncio.Protocol):
+    """Splits the byte stream into frames; one instance per connection"""
+
+    def __init__(self, server):
+        self.server = server
+        self.session = _Session()
+        self.transport = None
+        self._buffer = bytearray()
+
+    def connection_made(self, transport):
+        self.transport = transport
+        self.server.sessions += 1
+        self.server._m_sessions.set(self.server.sessions)
+
+    def connection_lost(self, exc):
+        self.server.sessions -= 1
+        self.server._m_sessions.set(self.server.sessions)
+        self.server._closed(self.session)
+
+    def data_received(self, data):
+        server = self.server
+        server._m_bytes.inc(len(data))
+        buffer = self._buffer
+        buffer += data
+        pos = 0
+        try:
+            while len(buffer) - pos >= 4:
+                n = _LENGTH.unpack_from(buffer, pos)[0]
+                if n > server.max_frame:
+                    raise ProtocolError(f"frame of {n} bytes")
+                if len(buffer) - pos - 4 < n:
+                    break
+                server.handle_frame(self.session, bytes(buffer[pos + 4:pos + 4 + n]))
+                pos += 4 + n
+        except ProtocolError as e:
+            server._m_errors.inc()
+            user = self.session.profile.user if self.session.profile else "?"
+            print(f"Warning: closing fleet connection ({user}): {e}")
+            self.transport.close()
+            buffer.clear()
+            return
+        del buffer[:pos]
+
+
+class ColumnarProfile:
+    """A user of ColumnarFleetServer: a ProfileTable row, plus an AppUsageAgent once the
+    user has switched focus"""
+    __slots__ = ("server", "user", "row", "risk", "sessions", "events", "app_usage")
+
+    def __init__(self, server, user, row):
+        self.server = server
+        self.user = user
+        self.row = row
+        self.risk = server.make_risk()
+        self.sessions = 0
+        self.events = 0
+        self.app_usage = None
+
+
+class ColumnarFleetServer(FleetServer):
+    """
+    FleetServer for large fleets. Movement and Typing profiles are rows of a ProfileTable
+    (96 bytes per user instead of agent objects); samples from all connections are collected
+    for flush_interval seconds and scored in one vectorized pass, across `workers`
+    processes when workers > 0. Rarity and rapid-switch detection still use an
+    AppUsageAgent, created on a user's first focus switch. The WPM threshold is not
+    evaluated. Outside a running event loop call flush() to score what was collected.
+
+    Per user that is about 360 bytes (the row, a ColumnarProfile and its RiskScore) until
+    the first focus switch, and about 9.7 KB after it, most of it the agent's 256-slot
+    AppSketch, against about 16 KB per FleetServer user (benchmarks/bench_profile_table.py).
+    """
+
+    def __init__(self, sigma=3.0, cooldown=3.0, max_frame=MAX_FRAME, max_users=16384,
+                 workers=0, flush_interval=0.05, risk_half_life=60.0, correlation_window=10.0):
+        super().__init__(sigma=sigma, cooldown=cooldown, max_frame=max_frame, max_users=max_users,
+                         risk_half_life=risk_half_life, correlation_window=correlation_window)
+        self.table = ProfileTable(max_users, shared=workers > 0)
+        self.scorer = ShardedScorer(self.table, workers=workers, sigma=sigma, cooldown=cooldown)
+        self.flush_interval = flush_interval
+        self._rows = []         # row -> ColumnarProfile
+        self._released_rows = []  # rows of evicted users, freed once no batch refers to them
+        self._move_rows = []
+        self._move_samples = []
+        self._key_rows = []
+        self._key_samples = []
+        self._flush_handle = None
+        self._in_flight = None  # task scoring the previous batch in the pool
+        self._m_flush = self.metrics.histogram("fleet.flush")
+        self._m_flush_events = self.metrics.histogram("fleet.flush_events", unit="events")
+
+    def _new_profile(self, user):
+        try:
+            row = self.table.add_row(time.time())
+        except MemoryError as e:
+            raise ProtocolError(str(e))
+        profile = ColumnarProfile(self, user, row)
+        if row == len(self._rows):
+            self._rows.append(profile)
+        else:
+            self._rows[row] = profile
+        return profile
+
+    def _released(self, profile):
+        # Samples of the evicted user may still be waiting to be scored against its row
+        self._released_rows.append(profile.row)
+        if self._in_flight is None:
+            self.flush()
+
+    def _free_released(self):
+        for row in self._released_rows:
+            self.table.free_row(row)
+        self._released_rows = []
+
+    def _moves(self, profile, batch):
+        self._move_rows.append((profile.row, len(batch)))
+        self._move_samples += batch
+        self._schedule_flush()
+
+    def _keys(self, profile, batch):
+        self._key_rows.append((profile.row, len(batch)))
+        self._key_samples += [t for t, _ in batch]
+        self._schedule_flush()
+
+    def _focus(self, profile, app, t):
+        if profile.app_usage is None:
+            profile.app_usage = AppUsageAgent(_AnomalySink(self, profile), _StatsSink(),
+                                              sigma=self.sigma, cooldown=self.cooldown,
+                                              focus_source=FakeFocusSource())
+        profile.app_usage.observe_focus(app, t)
+
+    # Scoring
+    def _take_pending(self):
+        moves = keys = None
+        if self._move_samples:
+            rows, counts = zip(*self._move_rows)
+            pts = np.array(self._move_samples, dtype=np.float64)
+            moves = (np.repeat(np.array(rows), counts), pts[:, 0], pts[:, 1], pts[:, 2])
+        if self._key_samples:
+            rows, counts = zip(*self._key_rows)
+            keys = (np.repeat(np.array(rows), counts), np.array(self._key_samples))
+        n = len(self._move_samples) + len(self._key_samples)
+        self._move_rows, self._move_samples = [], []
+        self._key_rows, self._key_samples = [], []
+        return moves, keys, n
+
+    def _deliver(self, alerts):
+        for row, event in alerts:
+            self._on_anomaly(self._rows[row], event)
+
+    def flush(self):
+        """Score everything collected so far; returns the number of alerts"""
+        moves, keys, n = self._take_pending()
+        if not n:
+            self._free_released()
+            return 0
+        t0 = time.perf_counter_ns()
+        alerts = self.scorer.score(moves, keys)
+        self._m_flush.observe_ns(time.perf_counter_ns() - t0)
+        self._m_flush_events.observe(n)
+        self._deliver(alerts)
+        self._free_released()
+        return len(alerts)
+
+    def _schedule_flush(self):
+        if self._flush_handle is not None or self._in_flight:
+            return
+        try:
+            loop = asyncio.get_running_loop()
+        except RuntimeError:
+            return  # driven synchronously; the caller flushes
+        self._flush_handle = loop.call_later(self.flush_interval, self._on_flush_timer)
+
+    def _on_flush_timer(self):
+        self._flush_handle = None
+        if not self.scorer.workers:
+            self.flush()
+            return
+        moves, keys, n = self._take_pending()
+        if n:
+            # One batch in flight at a time: the next one may touch the same rows
+            self._in_flight = asyncio.ensure_future(self._score_in_pool(moves, keys, n))
+
+    async def _score_in_pool(self, moves, keys, n):
+        t0 = time.perf_counter_ns()
+        try:
+            futures = self.scorer.submit(moves, keys)
+            results = await asyncio.gather(*(asyncio.wrap_future(f) for f in futures))
+        finally:
+            self._in_flight = None
+        self._m_flush.observe_ns(time.perf_counter_ns() - t0)
+        self._m_flush_events.observe(n)
+        for alerts in results:
+            self._deliver(alerts)
+        if self._released_rows:
+            self.flush()  # samples collected meanwhile may belong to released rows
+        if self._move_samples or self._key_samples:
+            self._schedule_flush()
+
+    async def serve(self, address, duration=None):
+        try:
+            await super().serve(address, duration)
+        finally:
+            if self._flush_handle is not None:
+                self._flush_handle.cancel()
+                self._flush_handle = None
+            if self._in_flight is not None:
+                await self._in_flight
+            self.flush()
+            self.scorer.close()
+            self.table.close(unlink=True)
+
+
+class FleetConsoleSubscriber:
+    """Prints fleet anomalies to stdout for `main.py --serve`"""
+
+    def on_anomaly(self, user, event, risk_score):
+        print(f"[ALERT] {user}: {event.get('source', 'Unknown')} Anomaly "
+              f"({event.get('severity', 'Low')}): {event.get('message', '')} [risk={risk_score}]",
+              flush=True)
+
+    def on_critical(self, user, risk_score):
+        print(f"!!! CRITICAL RISK LEVEL FOR {user} !!!", flush=True)
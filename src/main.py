@@ -1,76 +1,180 @@
-import queue
-import threading
-import customtkinter as ctk
-from agents.movement_agent import MovementAgent
-from agents.typing_agent import TypingAgent
-from agents.app_usage_agent import AppUsageAgent
-from dashboard import GuardioDashboard
+import startup  # first, so that --profile-startup sees every import
+import argparse
+import json
+import time
+from engine import GuardioEngine, ConsoleSubscriber, AGENT_NAMES
+from agents.metrics import get_registry
+from agents.snapshot import default_baseline_path
 
 class GuardioApp:
-    def __init__(self):
+    def __init__(self, engine=None, profile=None, autostart=False):
+        # customtkinter and the agent modules are imported here and by the engine's
+        # load_agents(), not when main.py is imported
+        self.profile = profile
+        self.autostart = autostart
+        from dashboard import GuardioDashboard
+        self._mark("ui toolkit")
+
         self.root = GuardioDashboard()
-        
-        self.anomaly_queue = queue.Queue()
-        self.stats_queue = queue.Queue()
-        self.risk_score = 0
-        self.agent_threads = []
-        self.agents = []
-        self.stop_event = None
+        self._mark("dashboard")
+        self.engine = engine or GuardioEngine()
+        self.engine.subscribe(self)
+
+        # Queue processing cadence and per-tick budget; a tick that runs out of budget
+        # reschedules itself after catchup_interval instead of tick_interval. With push
+        # wakeups (engine.wakeup registered as a Tk file handler) tick_interval polling is
+        # not used at all and ticks are spaced at least catchup_interval apart.
+        self.tick_interval = 100
+        self.catchup_interval = 16
+        self.tick_budget = 0.008
+        self._push_wakeups = False
+        self._tick_after_id = None
+        self._last_tick = 0.0
+        self._tick_due = None  # perf_counter() time the pending tick should run at
+        # The risk score decays between alerts; redraw it this often (ms) while it is above zero
+        self.risk_interval = 1000
+        self._risk_after_id = None
 
-        self.sensitivity_sigma = 3.0
-        self.cooldown_seconds = 3.0
+        self.metrics = get_registry()
+        self._m_tick = self.metrics.histogram("ui.tick")
+        self._m_lateness = self.metrics.histogram("ui.tick_lateness")
+        self._m_events = self.metrics.histogram("ui.events_per_tick", unit="events")
+
+        # Work coalesced while a tick drains the engine, flushed to the widgets once per tick
+        self._in_tick = False
+        self._pending_logs = []
+        self._pending_stats = {}
+        self._pending_risk = None
 
         self._setup_ui_connections()
+        self.root.diagnostics_source = self.metrics.snapshot
         self.root.set_state("Stopped")
-        self.root.set_agent_status("Movement", "Idle")
-        self.root.set_agent_status("Typing", "Idle")
-        self.root.set_agent_status("AppUsage", "Idle")
+        for name in AGENT_NAMES:
+            self.root.set_agent_status(name, "Idle")
+        # Idle callbacks run once the first frame has been laid out and drawn
+        self.root.after_idle(self._after_first_frame)
+
+    def _mark(self, phase):
+        if self.profile is not None:
+            self.profile.mark(phase)
+
+    def _after_first_frame(self):
+        """What the first frame does not wait for: monitoring (with --start) or else the
+        panels the dashboard builds lazily come first, then the other"""
+        self._mark("first frame")
+        if self.autostart:
+            self.start_monitoring()
+            self._mark("monitoring")
+            self.root.build_deferred()
+            self._mark("deferred panels")
+        else:
+            self.root.build_deferred()
+            self._mark("deferred panels")
+            try:
+                self.engine.load_agents()
+            except Exception as e:
+                print(f"Warning: Error loading agents: {e}")
+            self._mark("agents loaded")
+        if self.profile is not None:
+            self.profile.report("monitoring" if self.autostart else "first frame")
+
+    @property
+    def risk_score(self):
+        return self.engine.risk_score
+
+    @property
+    def stop_event(self):
+        return self.engine.stop_event
 
     def _setup_ui_connections(self):
         try:
             if hasattr(self.root, 'start_button'):
                 self.root.start_button.configure(command=self.start_monitoring)
-            
+
             if hasattr(self.root, 'stop_button'):
                 self.root.stop_button.configure(command=self.stop_monitoring)
-            
+
             if hasattr(self.root, 'reset_button'):
                 self.root.reset_button.configure(command=self.reset_monitoring)
-            
+
             if hasattr(self.root, 'clear_button'):
                 self.root.clear_button.configure(command=self._clear_log)
-            
+
             # Connect sliders if they exist
             if hasattr(self.root, 'sensitivity_scale'):
                 self.root.sensitivity_scale.configure(command=self._on_sensitivity_changed)
-            
+
             if hasattr(self.root, 'cooldown_scale'):
                 self.root.cooldown_scale.configure(command=self._on_cooldown_changed)
-                
+
         except Exception as e:
             print(f"Warning: Error connecting UI elements: {e}")
 
+    # Engine subscriber hooks
+    def _log(self, message):
+        if self._in_tick:
+            self._pending_logs.append(message)
+        else:
+            self.root.add_log_message(message)
+
+    def on_log(self, message):
+        self._log(message)
+
+    def on_state(self, state):
+        self.root.set_state(state)
+
+    def on_agent_status(self, agent_name, status):
+        self.root.set_agent_status(agent_name, status)
+
+    def on_anomaly(self, event, risk_score):
+        source = event.get("source", "Unknown")
+        severity = event.get("severity", "Low")
+        message = event.get("message", "")
+        self._set_risk(risk_score)
+        self._log(f"[ALERT] {source} Anomaly ({severity}): {message}")
+
+    def on_critical(self, risk_score):
+        self._log("!!! CRITICAL RISK LEVEL - POTENTIAL SECURITY BREACH !!!")
+
+    def on_risk(self, risk_score):
+        self._set_risk(risk_score)
+
+    def _set_risk(self, risk_score):
+        if self._in_tick:
+            self._pending_risk = risk_score
+        else:
+            self.root.update_risk_score(risk_score)
+
+    def on_stats(self, stats):
+        if self._in_tick:
+            # Only the newest stats per agent are worth drawing
+            self._pending_stats[stats["source"]] = stats
+        else:
+            self._show_stats(stats)
+
+    def _show_stats(self, stats):
+        source = stats["source"]
+        self.root.update_agent_stats(source, stats)
+
+        # Update typing speed if available (FIXED TYPO)
+        if source == "Typing" and "wpm" in stats:
+            if hasattr(self.root, 'update_typing_speed'):
+                self.root.update_typing_speed(stats["wpm"])
+
+    # UI callbacks
     def _on_sensitivity_changed(self, val):
         """Update sensitivity setting"""
         try:
-            self.sensitivity_sigma = float(val)
-            self.root.add_log_message(f"[System] Sensitivity updated to {self.sensitivity_sigma:.1f}σ")
-            # Update running agents if they exist
-            for agent in self.agents:
-                if hasattr(agent, 'sigma'):
-                    agent.sigma = self.sensitivity_sigma
+            self.engine.set_sensitivity(val)
+            self.root.add_log_message(f"[System] Sensitivity updated to {self.engine.sensitivity_sigma:.1f}σ")
         except Exception as e:
             print(f"Error updating sensitivity: {e}")
 
     def _on_cooldown_changed(self, val):
         """Update cooldown setting"""
         try:
-            self.cooldown_seconds = float(val)
-            self.root.add_log_message(f"[System] Cooldown updated to {self.cooldown_seconds:.1f}s")
-            # Update running agents if they exist
-            for agent in self.agents:
-                if hasattr(agent, 'cooldown'):
-                    agent.cooldown = self.cooldown_seconds
+            self.engine.set_cooldown(val)
+            self.root.add_log_message(f"[System] Cooldown updated to {self.engine.cooldown_seconds:.1f}s")
         except Exception as e:
             print(f"Error updating cooldown: {e}")
 
@@ -84,40 +188,18 @@ class GuardioApp:
                 self.root.stop_button.configure(state="normal")
             if hasattr(self.root, 'reset_button'):
                 self.root.reset_button.configure(state="disabled")
-            
-            self.root.set_state("Monitoring")
-            self.root.add_log_message("[System] Starting adaptive monitoring agents...")
-            
-            # Create stop event and agents
-            self.stop_event = threading.Event()
-            self.agents = [
-                MovementAgent(self.anomaly_queue, self.stats_queue, 
-                             sigma=self.sensitivity_sigma, cooldown=self.cooldown_seconds),
-                TypingAgent(self.anomaly_queue, self.stats_queue, 
-                           sigma=self.sensitivity_sigma, cooldown=self.cooldown_seconds),
-                AppUsageAgent(self.anomaly_queue, self.stats_queue, 
-                             sigma=self.sensitivity_sigma, cooldown=self.cooldown_seconds)
-            ]
-
-            # Start agent threads
-            for agent in self.agents:
-                thread = threading.Thread(target=agent.run, args=(self.stop_event,), daemon=True)
-                thread.start()
-                self.agent_threads.append(thread)
-
-            # Update agent status
-            self.root.set_agent_status("Movement", "Running")
-            self.root.set_agent_status("Typing", "Running") 
-            self.root.set_agent_status("AppUsage", "Running")
-
-            # Start processing queues
+
+            self.engine.start()
+
+            # Start processing queues; fall back to polling where Tk has no file handlers
+            self._push_wakeups = self._attach_wakeup()
             self.process_queues()
 
             # Enable reset after startup
             if hasattr(self.root, 'reset_button'):
                 self.root.after(2000, lambda: self.root.reset_button.configure(state="normal")
-                               if self.stop_event and not self.stop_event.is_set() else None)
-                               
+                               if self.engine.is_running else None)
+
         except Exception as e:
             print(f"Error starting monitoring: {e}")
             self.root.add_log_message(f"[ERROR] Failed to start monitoring: {e}")
@@ -125,24 +207,15 @@ class GuardioApp:
     def stop_monitoring(self):
         """Stop all monitoring agents"""
         try:
-            if self.stop_event:
-                self.root.add_log_message("[System] Stopping all agents...")
-                self.stop_event.set()
-                
-                # Wait for threads to complete
-                for thread in self.agent_threads:
-                    thread.join(timeout=1.5)
-                
-                # Clean up
-                self.agent_threads = []
-                self.agents = []
-                self.stop_event = None
-
-                # Update UI state
-                self.root.set_state("Stopped")
-                self.root.set_agent_status("Movement", "Idle")
-                self.root.set_agent_status("Typing", "Idle")
-                self.root.set_agent_status("AppUsage", "Idle")
+            if self.engine.stop_event:
+                self.engine.stop()
+                self._detach_wakeup()
+                if self._tick_after_id is not None:
+                    self.root.after_cancel(self._tick_after_id)
+                    self._tick_after_id = None
+                if self._risk_after_id is not None:
+                    self.root.after_cancel(self._risk_after_id)
+                    self._risk_after_id = None
 
                 if hasattr(self.root, 'start_button'):
                     self.root.start_button.configure(state="normal")
@@ -150,12 +223,10 @@ class GuardioApp:
                     self.root.stop_button.configure(state="disabled")
                 if hasattr(self.root, 'reset_button'):
                     self.root.reset_button.configure(state="disabled")
-                
+
                 # Reset typing speed display
                 if hasattr(self.root, 'update_typing_speed'):
                     self.root.update_typing_speed(0)
-                
-                self.root.add_log_message("[System] All agents stopped.")
         except Exception as e:
             print(f"Error stopping monitoring: {e}")
 
@@ -165,12 +236,11 @@ class GuardioApp:
             if hasattr(self.root, 'reset_button'):
                 self.root.reset_button.configure(state="disabled")
             self.stop_monitoring()
-            
+
             # Reset risk score and clear log
-            self.risk_score = 0
-            self.root.update_risk_score(self.risk_score)
+            self.engine.reset_risk()
             self._clear_log()
-            
+
             # Restart monitoring
             self.root.add_log_message("[System] Resetting system...")
             self.root.after(500, self.start_monitoring)
@@ -184,66 +254,235 @@ class GuardioApp:
         except Exception as e:
             print(f"Error clearing log: {e}")
 
-    def process_queues(self):
-        """Process anomaly and stats queues from agents"""
+    def _attach_wakeup(self):
+        """Register the engine's wakeup channel with Tk. Returns False where Tk file handlers
+        are unavailable (Windows), in which case queues are polled every tick_interval."""
+        tk = self.root.tk
+        if not hasattr(tk, "createfilehandler"):
+            return False
         try:
-            # Process anomaly events
-            while True:
-                try:
-                    event = self.anomaly_queue.get_nowait()
-                    source = event.get("source", "Unknown")
-                    severity = event.get("severity", "Low")
-                    message = event.get("message", "")
-
-                    # Update risk score based on severity
-                    if severity == "High":
-                        self.risk_score += 3
-                    elif severity == "Medium":
-                        self.risk_score += 2
-                    else:
-                        self.risk_score += 1
-
-                    # Update UI
-                    self.root.update_risk_score(self.risk_score)
-                    self.root.add_log_message(f"[ALERT] {source} Anomaly ({severity}): {message}")
-
-                    # Check for critical risk level
-                    if self.risk_score > 15:
-                        self.root.add_log_message("!!! CRITICAL RISK LEVEL - POTENTIAL SECURITY BREACH !!!")
-                        self.risk_score = 0
-                        self.root.update_risk_score(self.risk_score)
-
-                except queue.Empty:
-                    break
-                    
-            # Process agent statistics
-            while True:
-                try:
-                    stats = self.stats_queue.get_nowait()
-                    source = stats.get("source", "")
-                    if source:
-                        self.root.update_agent_stats(source, stats)
-                        
-                        # Update typing speed if available (FIXED TYPO)
-                        if source == "Typing" and "wpm" in stats:
-                            if hasattr(self.root, 'update_typing_speed'):
-                                self.root.update_typing_speed(stats["wpm"])
-                                
-                except queue.Empty:
-                    break
+            import tkinter
+            tk.createfilehandler(self.engine.wakeup.fileno(), tkinter.READABLE, self._on_wakeup)
+        except Exception as e:
+            print(f"Warning: push wakeups unavailable, polling queues instead: {e}")
+            return False
+        return True
 
+    def _detach_wakeup(self):
+        if not self._push_wakeups:
+            return
+        self._push_wakeups = False
+        try:
+            self.root.tk.deletefilehandler(self.engine.wakeup.fileno())
+        except Exception as e:
+            print(f"Error removing wakeup handler: {e}")
+
+    def _on_wakeup(self, fileno, mask):
+        """Agents produced something; tick now, or once catchup_interval has passed"""
+        self.engine.wakeup.clear()
+        if self._tick_after_id is not None:
+            return
+        wait_ms = int(self.catchup_interval - (time.perf_counter() - self._last_tick) * 1000)
+        if wait_ms > 0:
+            self._schedule_tick(wait_ms)
+        else:
+            self._tick_due = time.perf_counter()
+            self.process_queues()
+
+    def _schedule_tick(self, delay_ms):
+        self._tick_due = time.perf_counter() + delay_ms / 1000
+        self._tick_after_id = self.root.after(delay_ms, self.process_queues)
+
+    def process_queues(self):
+        """Process anomaly and stats queues from agents.
+        Everything drained in one tick is drawn once: one log insert, one risk update and
+        the latest stats per agent. Draining stops after tick_budget seconds so the window
+        keeps redrawing during alert storms; the backlog is picked up on the next tick."""
+        self._tick_after_id = None
+        t0 = time.perf_counter()
+        self._last_tick = t0
+        if self._tick_due is not None:
+            # How late Tk ran us compared to when the tick was due
+            self._m_lateness.observe(max(0.0, t0 - self._tick_due) * 1e6)
+            self._tick_due = None
+        if self._push_wakeups:
+            self.engine.wakeup.clear()
+        handled = 0
+        self._in_tick = True
+        try:
+            handled = self.engine.process_pending(budget=self.tick_budget)
         except Exception as e:
             print(f"Error processing queues: {e}")
+        finally:
+            self._in_tick = False
+
+        try:
+            self._flush_tick()
+        except Exception as e:
+            print(f"Error updating dashboard: {e}")
+        self._m_events.observe(handled)
+        self._m_tick.observe((time.perf_counter() - t0) * 1e6)
+
+        # Continue if monitoring is active: push mode only reschedules to work off a backlog
+        if self.engine.is_running:
+            if self.engine.has_pending():
+                self._schedule_tick(self.catchup_interval)
+            elif not self._push_wakeups:
+                self._schedule_tick(self.tick_interval)
+            elif self._risk_after_id is None and self.engine.risk_score > 0:
+                self._risk_after_id = self.root.after(self.risk_interval, self._refresh_risk)
+
+    def _refresh_risk(self):
+        """Push mode sleeps until the agents produce something; keep the decaying score moving"""
+        self._risk_after_id = None
+        if self.engine.is_running and self.engine.refresh_risk() > 0:
+            self._risk_after_id = self.root.after(self.risk_interval, self._refresh_risk)
+
+    def _flush_tick(self):
+        logs, self._pending_logs = self._pending_logs, []
+        stats, self._pending_stats = self._pending_stats, {}
+        risk, self._pending_risk = self._pending_risk, None
 
-        # Continue polling if monitoring is active
-        if not self.stop_event or not self.stop_event.is_set():
-            self.root.after(100, self.process_queues)
+        if risk is not None:
+            self.root.update_risk_score(risk)
+        if logs:
+            self.root.add_log_messages(logs)
+        for source_stats in stats.values():
+            self._show_stats(source_stats)
 
     def run(self):
         """Run the application"""
         self.root.mainloop()
 
+def run_headless(args, profile=None):
+    """Run the detection engine without the dashboard"""
+    engine = GuardioEngine(sigma=args.sigma, cooldown=args.cooldown, baseline_path=baseline_path(args),
+                           baseline_details=args.baseline_details, journal_dir=args.journal,
+                           detectors=args.detector, movement_features=args.movement_features,
+                           risk_half_life=args.risk_half_life, agent_process=args.agent_process)
+    engine.subscribe(ConsoleSubscriber(show_stats=args.show_stats))
+    try:
+        if profile is not None:
+            profile.mark("engine")
+            engine.load_agents()
+            profile.mark("agents loaded")
+            engine.start()
+            profile.mark("monitoring")
+            profile.report()
+        engine.run_headless(duration=args.duration)
+    except KeyboardInterrupt:
+        pass
+    if args.metrics:
+        print(json.dumps(engine.metrics.snapshot(), indent=2))
+
+def run_server(args):
+    """Run the fleet ingest server (fleet.py) on args.serve"""
+    from fleet import ColumnarFleetServer, FleetServer, FleetConsoleSubscriber
+    if args.columnar:
+        server = ColumnarFleetServer(sigma=args.sigma, cooldown=args.cooldown,
+                                     max_users=args.max_users, workers=args.workers,
+                                     risk_half_life=args.risk_half_life)
+    else:
+        server = FleetServer(sigma=args.sigma, cooldown=args.cooldown, max_users=args.max_users,
+                             risk_half_life=args.risk_half_life)
+    server.subscribe(FleetConsoleSubscriber())
+    print(f"[System] Fleet server listening on {args.serve}", flush=True)
+    server.run(args.serve, duration=args.duration)
+    if args.metrics:
+        print(json.dumps(server.metrics.snapshot(), indent=2), flush=True)
+
+def baseline_path(args):
+    """Snapshot file for learned baselines, or None with --no-baseline"""
+    if args.no_baseline:
+        return None
+    return args.baseline or default_baseline_path()
+
+def parse_detectors(spec):
+    """--detector value: "quantile" for every agent, or "movement=quantile,typing=ema" """
+    from agents.quantile_profile import DETECTORS
+    agents = ("movement", "typing", "appusage")
+    detectors = {}
+    for part in spec.split(","):
+        name, _, detector = part.strip().rpartition("=")
+        if detector not in DETECTORS or (name and name not in agents):
+            raise argparse.ArgumentTypeError(
+                f"expected DETECTOR or AGENT=DETECTOR with AGENT in {', '.join(agents)} "
+                f"and DETECTOR in {', '.join(DETECTORS)}")
+        detectors.update({a: detector for a in ([name] if name else agents)})
+    return detectors
+
+def parse_movement_features(spec):
+    """--movement-features value: "all" or a comma list of agents.trajectory.FEATURES"""
+    from agents.trajectory import FEATURES
+    features = FEATURES if spec == "all" else tuple(f.strip() for f in spec.split(","))
+    if not features or set(features) - set(FEATURES):
+        raise argparse.ArgumentTypeError(f"expected all or a comma list of {', '.join(FEATURES)}")
+    return features
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Guardio - Adaptive Anomaly Detection")
+    parser.add_argument("--headless", action="store_true",
+                        help="run the detection engine without the dashboard")
+    parser.add_argument("--serve", default=None, metavar="ADDRESS",
+                        help="run the fleet ingest server on unix:PATH or HOST:PORT")
+    parser.add_argument("--columnar", action="store_true",
+                        help="keep fleet profiles in a columnar table scored in batches (serve)")
+    parser.add_argument("--workers", type=int, default=0,
+                        help="scoring processes for --columnar; 0 scores on the event loop (serve)")
+    parser.add_argument("--max-users", type=int, default=16384,
+                        help="users kept; the least recent one without a connection is evicted (serve)")
+    parser.add_argument("--sigma", type=float, default=3.0, help="detection sensitivity (headless/serve)")
+    parser.add_argument("--cooldown", type=float, default=3.0, help="alert cooldown in seconds (headless/serve)")
+    parser.add_argument("--duration", type=float, default=None, help="stop after N seconds (headless/serve)")
+    parser.add_argument("--show-stats", action="store_true", help="print agent stats (headless)")
+    parser.add_argument("--metrics", action="store_true", help="print a metrics snapshot on exit (headless/serve)")
+    parser.add_argument("--no-metrics", action="store_true", help="disable performance instrumentation")
+    parser.add_argument("--baseline", default=None,
+                        help="learned-baseline snapshot file (default: ~/.guardio/baseline.snap)")
+    parser.add_argument("--no-baseline", action="store_true",
+                        help="start cold and do not save learned baselines")
+    parser.add_argument("--baseline-details", action="store_true",
+                        help="also save per-app usage (window titles) and per-digraph typing "
+                             "timings in the baseline snapshot")
+    parser.add_argument("--detector", type=parse_detectors, default=None, metavar="SPEC",
+                        help="ema (default) or quantile tail detection, for all agents or per agent "
+                             "as movement=quantile,typing=quantile,appusage=ema")
+    parser.add_argument("--movement-features", type=parse_movement_features, default=None,
+                        metavar="SPEC", help="mouse features to profile next to speed: all, or "
+                                             "e.g. acceleration,jerk,curvature,angle,pause")
+    parser.add_argument("--risk-half-life", type=float, default=60.0, metavar="SECONDS",
+                        help="half-life of the decaying risk score")
+    parser.add_argument("--journal", default=None, metavar="DIR",
+                        help="record raw mouse/key timing, focus switches, anomalies and stats to DIR")
+    parser.add_argument("--agent-process", action="store_true",
+                        help="run the agents in a supervised child process instead of a thread")
+    parser.add_argument("--start", action="store_true",
+                        help="start monitoring as soon as the dashboard is up")
+    parser.add_argument("--profile-startup", action="store_true",
+                        help="print how long each startup phase took (dashboard/headless)")
+    return parser.parse_args(argv)
+
 if __name__ == "__main__":
-    # Create and run the application
-    app = GuardioApp()
-    app.run()
+    profile = startup.StartupProfile()
+    profile.mark("imports")
+    args = parse_args()
+    profile.mark("arguments")
+    if not args.profile_startup:
+        profile = None
+    if args.no_metrics:
+        get_registry().enabled = False
+    if args.serve:
+        run_server(args)
+    elif args.headless:
+        run_headless(args, profile)
+    else:
+        # Create and run the application
+        engine = GuardioEngine(baseline_path=baseline_path(args),
+                               baseline_details=args.baseline_details, journal_dir=args.journal,
+                               detectors=args.detector, movement_features=args.movement_features,
+                               risk_half_life=args.risk_half_life,
+                               agent_process=args.agent_process)
+        if profile is not None:
+            profile.mark("engine")
+        app = GuardioApp(engine, profile=profile, autostart=args.start)
+        app.run()
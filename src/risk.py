@@ -0,0 +1,73 @@
+"""
+Streaming risk score shared by GuardioEngine and the fleet server (one per user).
+
+Every anomaly adds severity points (SEVERITY_POINTS, 1 for Low) to a score that decays
+exponentially with half_life seconds. Only the score and the time it was last updated are
+stored: reading it at time t scales it by 2^(-(t - last) / half_life), so an alert costs O(1)
+and nothing is touched between alerts. A steady trickle of alerts settles at
+points / (1 - 2^(-interval / half_life)) instead of piling up forever, while a burst stays
+high until it has had time to fade.
+
+Correlation: the last alert time of every source is kept, and an alert's points are
+multiplied by 1 + correlation for each other source that alerted within the last `window`
+seconds. Movement, Typing and AppUsage anomalies at the same time (someone else at the
+keyboard) count up to twice as much as the same alerts spread out. The sources are the
+agents, so this is bounded by their number.
+
+Crossing CRITICAL_RISK reports critical once. The score is not reset; the report is re-armed
+when the score has decayed below half the threshold. The score is capped at twice the
+threshold, so however long an attack went on, it is back under the threshold one half-life
+after the alerts stop.
+"""
+
+SEVERITY_POINTS = {"High": 3, "Medium": 2}
+CRITICAL_RISK = 15
+
+
+class RiskScore:
+    """Time-decayed, correlation-weighted risk score; times are in seconds"""
+    __slots__ = ("half_life", "window", "correlation", "threshold", "score", "t", "last", "armed")
+
+    def __init__(self, half_life=60.0, window=10.0, correlation=0.5, threshold=CRITICAL_RISK):
+        self.half_life = half_life
+        self.window = window
+        self.correlation = correlation
+        self.threshold = threshold
+        self.reset()
+
+    def reset(self):
+        self.score = 0.0    # as of time t
+        self.t = 0.0
+        self.last = {}      # source -> time of its last alert
+        self.armed = True   # critical not reported since the score was last below threshold / 2
+
+    def value(self, now):
+        """The score decayed to now"""
+        if not self.score:
+            return 0.0
+        return self.score * 2.0 ** ((self.t - now) / self.half_life)
+
+    def weight(self, source, now):
+        """Multiplier for an alert from source at now: 1 + correlation per other source that
+        alerted within window"""
+        window = self.window
+        others = 0
+        for other, t in self.last.items():
+            if other != source and now - t <= window:
+                others += 1
+        return 1.0 + self.correlation * others
+
+    def add(self, source, severity, now):
+        """Fold one alert in. Returns (score, critical), critical being True when this alert
+        took the score past the threshold"""
+        score = self.value(now)
+        if score < self.threshold / 2:
+            self.armed = True
+        score += SEVERITY_POINTS.get(severity, 1) * self.weight(source, now)
+        score = min(score, 2.0 * self.threshold)
+        self.last[source] = now
+        self.score, self.t = score, now
+        critical = self.armed and score > self.threshold
+        if critical:
+            self.armed = False
+        return score, critical
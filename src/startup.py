@@ -0,0 +1,76 @@
+"""
+Startup phase timing for --profile-startup.
+
+main.py imports this module before anything else and marks each phase as it completes
+(imports, engine, dashboard, first frame, monitoring, ...). report() prints how long each
+phase took and when it ended, counted from the launch of the process, next to the budget
+for having monitoring up (STARTUP_BUDGET_MS). Where /proc is available, launch is the
+process start time (10 ms resolution), so interpreter startup is included. Elsewhere it is
+the moment this module was imported.
+"""
+
+import os
+import sys
+import time
+
+STARTUP_BUDGET_MS = 300.0
+
+_IMPORTED = time.perf_counter()
+
+
+def _interpreter_seconds():
+    """Seconds between process start and the import of this module, or None"""
+    try:
+        with open("/proc/self/stat", "rb") as f:
+            # Fields after the command name (which may contain spaces); starttime is field 22
+            fields = f.read().rsplit(b")", 1)[1].split()
+        started = int(fields[19]) / os.sysconf("SC_CLK_TCK")
+        return max(0.0, time.clock_gettime(time.CLOCK_BOOTTIME) - started
+                   - (time.perf_counter() - _IMPORTED))
+    except (OSError, ValueError, IndexError, AttributeError):
+        return None
+
+
+class StartupProfile:
+    """Phase timestamps of one launch; mark() costs a perf_counter() call"""
+
+    def __init__(self, budget_ms=STARTUP_BUDGET_MS, out=None):
+        self.budget_ms = budget_ms
+        self.out = out or sys.stdout
+        self.phases = []   # (name, perf_counter() at its end)
+        self.reported = False
+        interpreter = _interpreter_seconds()
+        self.launch = _IMPORTED - (interpreter or 0.0)
+        if interpreter is not None:
+            self.phases.append(("interpreter", _IMPORTED))
+
+    def mark(self, phase):
+        self.phases.append((phase, time.perf_counter()))
+
+    def elapsed_ms(self, phase=None):
+        """ms from launch to the end of phase (default: the last one marked)"""
+        for name, t in reversed(self.phases):
+            if phase is None or name == phase:
+                return (t - self.launch) * 1000.0
+        return None
+
+    def report(self, ready="monitoring"):
+        """Print the phases and whether `ready` ended within the budget"""
+        if self.reported:
+            return
+        self.reported = True
+        lines = []
+        previous = self.launch
+        for name, t in self.phases:
+            lines.append(f"[Startup] {name:<18} {(t - previous) * 1000.0:8.1f} ms"
+                         f"   at {(t - self.launch) * 1000.0:8.1f} ms")
+            previous = t
+        at = self.elapsed_ms(ready)
+        if at is None:
+            lines.append(f"[Startup] {ready} did not start")
+        else:
+            verdict = "within" if at <= self.budget_ms else "OVER"
+            lines.append(f"[Startup] {ready} after {at:.1f} ms, {verdict} the "
+                         f"{self.budget_ms:.0f} ms budget")
+        # One write, so that agent threads printing meanwhile do not split the table
+        print("\n".join(lines), file=self.out, flush=True)
@@ -0,0 +1,178 @@
+import queue
+import select
+import socket
+from collections import deque
+
+# BoundedQueue policies for a full queue
+POLICIES = ("drop_oldest", "latest", "block")
+
+class Wakeup:
+    """
+    Coalesced cross-thread wakeup built on a socket pair (a self-pipe that also works with
+    select() on Windows). Producers call notify(); the consumer either registers fileno()
+    with its event loop (e.g. a Tk file handler) or blocks in wait().
+
+    At most one byte is in flight: notify() only writes while the channel is disarmed, and
+    the consumer calls clear() *before* draining its queues, so a notify racing with the
+    drain re-arms it instead of being lost.
+    """
+
+    def __init__(self):
+        self._reader, self._writer = socket.socketpair()
+        self._reader.setblocking(False)
+        self._writer.setblocking(False)
+        self._armed = False
+        self.notifications = 0  # wakeups actually sent, for diagnostics and benchmarks
+
+    def fileno(self):
+        return self._reader.fileno()
+
+    def notify(self):
+        if self._armed:
+            return
+        self._armed = True
+        self.notifications += 1
+        try:
+            self._writer.send(b"\0")
+        except (BlockingIOError, OSError):
+            pass  # buffer full or closed: a wakeup is already pending or nobody is listening
+
+    def sender(self):
+        """The writing end, for a child process to notify through (one byte per send();
+        clear() drains them all). See agent_host.py."""
+        return self._writer
+
+    def clear(self):
+        """Consume pending wakeups; call before draining the queues"""
+        self._armed = False
+        try:
+            while self._reader.recv(4096):
+                pass
+        except (BlockingIOError, OSError):
+            pass
+
+    def wait(self, timeout=None):
+        """Block until notified or timeout; returns True if notified"""
+        try:
+            readable, _, _ = select.select([self._reader], [], [], timeout)
+        except (OSError, ValueError):
+            return False
+        return bool(readable)
+
+    def close(self):
+        self._reader.close()
+        self._writer.close()
+
+
+class NotifyingQueue(queue.Queue):
+    """queue.Queue that signals a Wakeup after every put()"""
+
+    def __init__(self, wakeup, maxsize=0):
+        super().__init__(maxsize)
+        self.wakeup = wakeup
+
+    def put(self, item, block=True, timeout=None):
+        super().put(item, block, timeout)
+        self.wakeup.notify()
+
+
+class BoundedQueue(NotifyingQueue):
+    """
+    NotifyingQueue holding at most maxsize items, with a policy for when it is full:
+      - "drop_oldest"  the oldest item is discarded to make room
+      - "latest"       one item per source (item["source"]): a new one replaces the queued
+                       one in place (counted in `replaced`, nothing is lost but a stale
+                       value); a new source arriving when maxsize sources are queued
+                       discards the oldest
+      - "block"        put() waits up to timeout seconds for room, then discards the new
+                       item. After a timeout the queue is saturated: puts discard at once
+                       until get() makes room, so a stalled consumer costs a producer one
+                       timeout, not one per item.
+    Every discarded item is counted under its source in `dropped`; `drops` is the total.
+    `saturated` is True, whatever the policy, from a put() that found the queue full until
+    the next get().
+
+    "block" is for producers on threads of their own (an agent's threaded run()). On the
+    AgentRuntime all agents share one asyncio loop, which a waiting put() would stall.
+    """
+
+    def __init__(self, wakeup, maxsize=1024, policy="drop_oldest", timeout=0.1):
+        if policy not in POLICIES:
+            raise ValueError(f"unknown queue policy {policy!r}, expected one of {', '.join(POLICIES)}")
+        if maxsize < 1:
+            raise ValueError("maxsize must be >= 1")
+        self.policy = policy
+        self.timeout = timeout
+        self.dropped = {}   # source -> items discarded
+        self.drops = 0
+        self.replaced = {}  # source -> items superseded by a newer one ("latest")
+        self._saturated = False
+        super().__init__(wakeup, maxsize)
+
+    # queue.Queue storage hooks, called with self.mutex held
+    def _init(self, maxsize):
+        self.queue = {} if self.policy == "latest" else deque()
+
+    def _qsize(self):
+        return len(self.queue)
+
+    def _put(self, item):
+        if self.policy != "latest":
+            self.queue.append(item)
+            return
+        source = _source(item)
+        if source in self.queue:
+            self.replaced[source] = self.replaced.get(source, 0) + 1
+        self.queue[source] = item
+
+    def _get(self):
+        self._saturated = False
+        if self.policy != "latest":
+            return self.queue.popleft()
+        return self.queue.pop(next(iter(self.queue)))
+
+    @property
+    def saturated(self):
+        return self._saturated
+
+    def _drop(self, item):
+        source = _source(item)
+        self.dropped[source] = self.dropped.get(source, 0) + 1
+        self.drops += 1
+
+    def drop_counts(self):
+        """Copies of `dropped` and `replaced`"""
+        with self.mutex:
+            return dict(self.dropped), dict(self.replaced)
+
+    def put(self, item, block=True, timeout=None):
+        if self.policy == "block":
+            self._put_blocking(item, block, self.timeout if timeout is None else timeout)
+            return
+        with self.not_full:
+            if len(self.queue) >= self.maxsize and not (
+                    self.policy == "latest" and _source(item) in self.queue):
+                self._drop(self._get())
+                self._saturated = True
+            self._put(item)
+            self.unfinished_tasks += 1
+            self.not_empty.notify()
+        self.wakeup.notify()
+
+    def _put_blocking(self, item, block, timeout):
+        with self.not_full:
+            if self._saturated and len(self.queue) >= self.maxsize:
+                self._drop(item)
+                return
+        try:
+            queue.Queue.put(self, item, block, timeout)
+        except queue.Full:
+            with self.mutex:
+                self._saturated = True
+                self._drop(item)
+            return
+        self.wakeup.notify()
+
+
+def _source(item):
+    return item.get("source") if isinstance(item, dict) else None
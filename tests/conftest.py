@@ -0,0 +1,8 @@
+import os
+import sys
+
+# The application runs from src/ (python src/main.py), so its modules import each other as
+# top-level modules (`from agents.metrics import ...`); tests import them the same way
+SRC = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "src")
+if SRC not in sys.path:
+    sys.path.insert(0, SRC)
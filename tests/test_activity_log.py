@@ -0,0 +1,49 @@
+import pytest
+
+from activity_log import ActivityLog, LogEntry
+
+
+class TestActivityLog:
+    def setup_method(self):
+        self.log = ActivityLog(capacity=10, page_size=4)
+
+    def teardown_method(self):
+        self.log.close()
+
+    def fill(self, n):
+        for i in range(n):
+            self.log.append(f"entry {i}", ts=1000.0 + i)
+
+    def test_spills_beyond_capacity(self):
+        self.fill(25)
+        assert len(self.log) == 25
+        assert self.log.spilled == 15 and len(self.log.entries) == 10
+
+    @pytest.mark.parametrize("start, stop", [(0, 3), (5, 18), (13, 15), (14, 25), (20, 40)])
+    def test_get_across_the_spill_boundary(self, start, stop):
+        self.fill(25)
+        got = [entry.message for entry in self.log.get(start, stop)]
+        assert got == [f"entry {i}" for i in range(start, min(stop, 25))]
+
+    def test_spilled_entries_keep_their_time(self):
+        self.fill(12)
+        assert self.log.get(1, 2)[0].ts == 1001.0
+
+    def test_tail_and_extend(self):
+        self.fill(11)
+        self.log.extend(["a", "b"], ts=5.0)
+        assert [e.message for e in self.log.tail(3)] == ["entry 10", "a", "b"]
+
+    def test_clear_restarts_indices(self):
+        self.fill(25)
+        self.log.clear()
+        assert len(self.log) == 0 and self.log.get(0, 5) == []
+        self.fill(12)
+        assert [e.message for e in self.log.get(0, 2)] == ["entry 0", "entry 1"]
+
+    def test_entry_is_one_line(self):
+        assert "\n" not in LogEntry(0.0, "two\nlines").format()
+
+    def test_bad_arguments(self):
+        with pytest.raises(ValueError):
+            ActivityLog(capacity=0)
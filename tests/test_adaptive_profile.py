@@ -0,0 +1,48 @@
+import numpy as np
+import pytest
+
+from agents.adaptive_profile import AdaptiveProfile
+
+
+class TestUpdateBatch:
+    def setup_method(self):
+        rng = np.random.default_rng(7)
+        self.values = rng.lognormal(5.0, 1.0, 3000)
+
+    def sequential(self, values, profile=None):
+        profile = profile or AdaptiveProfile()
+        z = [profile.observe(float(v)) for v in values]
+        return profile, np.array([np.nan if v is None else v for v in z])
+
+    def test_matches_observe(self):
+        scalar, z = self.sequential(self.values)
+        vector = AdaptiveProfile()
+        batch = vector.update_batch(self.values)
+        # Closed form vs recurrence: equal to rounding, not bit for bit
+        assert vector.mean == pytest.approx(scalar.mean, rel=1e-12)
+        assert vector.var == pytest.approx(scalar.var, rel=1e-12)
+        assert vector.count == scalar.count
+        np.testing.assert_array_equal(batch.ready, ~np.isnan(z))
+        np.testing.assert_allclose(batch.z[batch.ready], z[batch.ready], rtol=0, atol=1e-9)
+
+    def test_split_batches_carry_state(self):
+        scalar, _ = self.sequential(self.values)
+        vector = AdaptiveProfile()
+        for chunk in np.array_split(self.values, 7):
+            vector.update_batch(chunk)
+        assert vector.mean == pytest.approx(scalar.mean, rel=1e-12)
+        assert vector.var == pytest.approx(scalar.var, rel=1e-12)
+
+    def test_first_sample_seeds(self):
+        batch = AdaptiveProfile().update_batch([5.0, 6.0])
+        assert np.isnan(batch.mean[0])
+        assert batch.mean[1] == 5.0
+        assert not batch.ready.any()
+
+    def test_alert_sides(self):
+        profile = AdaptiveProfile(min_count=2)
+        profile.update_batch([10.0, 11.0, 9.0, 10.0, 11.0, 9.0])
+        batch = profile.update_batch([100.0, -100.0])
+        assert batch.alerts(3.0).tolist() == [True, True]
+        assert batch.alerts(3.0, side="high").tolist() == [True, False]
+        assert batch.alerts(3.0, side="low").tolist() == [False, True]
@@ -0,0 +1,95 @@
+import os
+import signal
+import time
+
+from agent_host import ANOMALY, LOG, decode_record, encode_event
+from engine import GuardioEngine
+
+
+class HostedAgent:
+    """Runs in the agent process: one alert and one stats publish, then waits for a setting"""
+    metrics_name = "hosted"
+    stats_source = "Hosted"
+
+    def __init__(self, anomaly_queue, stats_queue, sigma=3.0, cooldown=3.0):
+        self.anomaly_queue = anomaly_queue
+        self.stats_queue = stats_queue
+        self.sigma = sigma
+
+    async def run_async(self, runtime):
+        self.anomaly_queue.put({"source": "Hosted", "severity": "High", "message": f"pid {os.getpid()}"})
+        self.stats_queue.publish("Hosted", 1.0, 0.5, None, "Stable")
+        while not await runtime.wait_stopped(0.01):
+            if self.sigma == 5.0:
+                self.anomaly_queue.put({"source": "Hosted", "severity": "Low", "message": "sigma 5"})
+                self.sigma = None
+
+
+class _Front:
+    def __init__(self):
+        self.anomalies = []
+        self.stats = []
+        self.logs = []
+
+    def on_anomaly(self, event, risk_score):
+        self.anomalies.append(event["message"])
+
+    def on_stats(self, stats):
+        self.stats.append(stats["source"])
+
+    def on_log(self, message):
+        self.logs.append(message)
+
+
+def pump(engine, done, timeout=10.0):
+    deadline = time.monotonic() + timeout
+    while not done() and time.monotonic() < deadline:
+        engine.wakeup.wait(0.05)
+        engine.wakeup.clear()
+        engine.process_pending()
+    return done()
+
+
+class TestRecordCodec:
+    def test_anomaly_round_trip(self):
+        event = {"source": "Typing", "severity": "High", "message": "Delay 900ms, z=5.1 ✓"}
+        payload = encode_event(event)
+        assert payload[:1] == ANOMALY
+        assert decode_record(payload) == ("anomaly", event)
+
+    def test_separator_in_a_field_is_replaced(self):
+        kind, event = decode_record(encode_event({"source": "App\0Usage", "message": "a\0b"}))
+        assert event == {"source": "App Usage", "severity": "", "message": "a b"}
+
+    def test_log_line(self):
+        assert decode_record(LOG + "[System] hello".encode("utf-8")) == ("log", "[System] hello")
+
+
+class TestAgentProcess:
+    def setup_method(self):
+        self.engine = GuardioEngine(agent_factories=[HostedAgent], agent_process=True)
+        self.front = _Front()
+        self.engine.subscribe(self.front)
+
+    def teardown_method(self):
+        self.engine.stop()
+
+    def test_events_settings_and_restart(self):
+        self.engine.start()
+        pid = self.engine.host.pid
+        assert pid != os.getpid()
+        assert pump(self.engine, lambda: self.front.anomalies and self.front.stats)
+        assert self.front.anomalies == [f"pid {pid}"] and self.front.stats[0] == "Hosted"
+
+        self.engine.set_sensitivity(5)
+        assert pump(self.engine, lambda: "sigma 5" in self.front.anomalies)
+
+        host = self.engine.host
+        host.restart_delay = 0.0
+        os.kill(pid, signal.SIGKILL)
+        assert pump(self.engine, lambda: host.restarts and f"pid {host.pid}" in self.front.anomalies)
+        assert host.restarts == 1 and host.pid != pid
+        assert any("Agent process exited" in line for line in self.front.logs)
+
+        self.engine.stop()
+        assert self.engine.host is None and not self.engine.is_running
@@ -0,0 +1,71 @@
+import pytest
+
+from agents.app_sketch import AppSketch
+from agents.snapshot import StateReader, StateWriter
+
+
+class TestSpaceSaving:
+    def setup_method(self):
+        self.sketch = AppSketch(capacity=3, half_life=None, usual_seconds=300.0)
+        self.sketch.add("a", 0.0, count=5)
+        self.sketch.add("b", 0.0, count=3)
+        self.sketch.add("c", 0.0, count=1)
+
+    def test_bounded_and_heavy_hitter_kept(self):
+        self.sketch.add("a", 0.0, count=95)
+        for i in range(50):  # one-off tabs take over each other's slots
+            self.sketch.add(f"tab {i}", 1.0, count=1)
+        assert len(self.sketch) == 3 and len(self.sketch.ids) == 3
+        assert self.sketch.count("a", 1.0) == 100 and self.sketch.count("c", 1.0) == 0.0
+
+    def test_new_identity_reads_as_rare(self):
+        self.sketch.add("d", 1.0, count=1)
+        assert "c" not in self.sketch.ids
+        # d inherited c's count: only its own event is guaranteed
+        assert self.sketch.count("d", 1.0) == 1.0
+        assert self.sketch.counts[self.sketch.ids["d"]] == 2.0
+
+    def test_usual_apps_are_kept(self):
+        self.sketch.add("c", 0.0, seconds=400.0)
+        assert self.sketch.usual("c", 0.0)
+        self.sketch.add("d", 1.0, count=1)
+        assert "c" in self.sketch.ids and "b" not in self.sketch.ids
+        assert self.sketch.count("d", 1.0) == 1.0
+
+    def test_all_usual_falls_back_to_smallest(self):
+        for app in ("a", "b", "c"):
+            self.sketch.add(app, 0.0, seconds=400.0)
+        self.sketch.add("d", 1.0, count=1)
+        assert "c" not in self.sketch.ids
+
+
+class TestDecay:
+    def test_half_life(self):
+        sketch = AppSketch(half_life=10.0)
+        sketch.add("a", 100.0, count=8, seconds=40.0)
+        assert sketch.count("a", 110.0) == pytest.approx(4.0)
+        assert sketch.count("a", 120.0) == pytest.approx(2.0)
+        assert sketch.seconds_of("a", 120.0) == pytest.approx(10.0)
+        assert sketch.total_count(120.0) == pytest.approx(2.0)
+
+    def test_rescale_keeps_counts(self):
+        sketch = AppSketch(half_life=1.0)
+        sketch.add("a", 0.0, count=1)
+        sketch.add("b", 41.0, count=1)  # weight past 2^40: rescaled to t0 = 41
+        assert sketch.t0 == 41.0
+        assert sketch.count("b", 41.0) == pytest.approx(1.0)
+        assert sketch.count("a", 42.0) == pytest.approx(2.0 ** -42)
+
+
+class TestSketchSnapshot:
+    def test_round_trip_into_a_smaller_sketch(self):
+        sketch = AppSketch(capacity=4, half_life=60.0)
+        for i, n in enumerate((5, 1, 3, 2)):
+            sketch.add(f"app {i}", 10.0, count=n, seconds=n * 10.0)
+        writer = StateWriter()
+        sketch.write(writer)
+        restored = AppSketch(capacity=2, half_life=60.0).read(StateReader(writer.getvalue()))
+        assert restored.apps == ["app 0", "app 2"]
+        assert restored.count("app 2", 70.0) == pytest.approx(1.5)
+        assert restored.seconds_of("app 0", 10.0) == pytest.approx(50.0)
+        assert restored.total_count(10.0) == pytest.approx(11.0)
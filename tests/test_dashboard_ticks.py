@@ -0,0 +1,76 @@
+import sys
+import types
+
+import pytest
+
+
+class _FakeDashboard:
+    """Stands in for dashboard.GuardioDashboard (customtkinter): records what is drawn"""
+
+    def __init__(self):
+        self.calls = []
+        self.tk = object()  # no createfilehandler: the app polls
+
+    def __getattr__(self, name):
+        if name.startswith(("set_", "update_", "add_", "build_")):
+            return lambda *args: self.calls.append((name,) + args)
+        raise AttributeError(name)
+
+    def add_log_message(self, message):
+        self.add_log_messages([message])
+
+    def after(self, delay_ms, callback):
+        return None
+
+    def after_idle(self, callback):
+        pass
+
+    def drawn(self, name):
+        return [call[1:] for call in self.calls if call[0] == name]
+
+
+@pytest.fixture
+def app(monkeypatch):
+    monkeypatch.setitem(sys.modules, "dashboard",
+                        types.SimpleNamespace(GuardioDashboard=_FakeDashboard))
+    from engine import GuardioEngine
+    from main import GuardioApp
+    app = GuardioApp(GuardioEngine())
+    app.root.calls.clear()
+    return app
+
+
+def alert(n, severity="Low"):
+    return {"source": "Movement", "severity": severity, "message": f"alert {n}"}
+
+
+class TestTickCoalescing:
+    def test_one_draw_per_tick(self, app):
+        for i in range(12):  # 12 points: below the critical threshold
+            app.engine.anomaly_queue.put(alert(i))
+        for mean in (1.0, 2.0, 3.0):
+            app.engine.stats_board.publish("Typing", mean, 0.1, None, "Stable", wpm=40.0)
+        app.process_queues()
+        logs, = app.root.drawn("add_log_messages")
+        assert len(logs[0]) == 12 and logs[0][-1].endswith("alert 11")
+        assert len(app.root.drawn("update_risk_score")) == 1
+        (source, stats), = app.root.drawn("update_agent_stats")
+        assert source == "Typing" and stats["mean"] == 3.0
+        assert app.root.drawn("update_typing_speed") == [(40.0,)]
+
+    def test_budget_leaves_the_backlog_queued(self, app):
+        app.tick_budget = 0.0
+        for i in range(10):
+            app.engine.anomaly_queue.put(alert(i))
+        app.process_queues()
+        assert app.root.drawn("add_log_messages") == []
+        assert app.engine.anomaly_queue.qsize() == 10
+        app.tick_budget = 1.0
+        app.process_queues()
+        assert app.engine.anomaly_queue.empty()
+
+    def test_outside_a_tick_draws_at_once(self, app):
+        app.on_log("[System] hello")
+        app.on_risk(2.5)
+        assert app.root.drawn("add_log_messages") == [(["[System] hello"],)]
+        assert app.root.drawn("update_risk_score") == [(2.5,)]
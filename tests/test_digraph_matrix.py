@@ -0,0 +1,56 @@
+import types
+
+import pytest
+
+from agents.digraph_matrix import SPECIAL, DigraphMatrix, key_code
+from agents.snapshot import StateReader, StateWriter
+
+
+class TestDigraphMatrix:
+    def setup_method(self):
+        self.matrix = DigraphMatrix(keys=128, min_count=10, sparse_limit=2)
+
+    def test_scores_after_min_count(self):
+        th = (ord("t"), ord("h"))
+        z = [self.matrix.observe(*th, 0.1 + 0.01 * (i % 3)) for i in range(12)]
+        assert z[:11] == [None] * 11 and z[11] is not None
+        assert self.matrix.observe(*th, 0.5) > 3.0
+        assert self.matrix.observe(ord("h"), ord("e"), 0.5) is None  # other digraph: new
+        mean, std, count = self.matrix.profile(*th)
+        assert count == 13 and 0.1 < mean < 0.2 and std > 0
+        assert self.matrix.profile(ord("x"), ord("y")) == (None, 0.0, 0)
+
+    def test_first_samples_are_averaged(self):
+        for value in (0.1, 0.2, 0.3):
+            self.matrix.observe(1, 2, value)
+        mean, std, _ = self.matrix.profile(1, 2)
+        assert mean == pytest.approx(0.2)
+        assert std ** 2 == pytest.approx(2 / 3 * 0.005 + 1 / 3 * 0.15 ** 2)  # alpha_n = 1/2, 1/3
+
+    def test_sparse_fallback_is_capped(self):
+        for cur in (200, 201, 202):
+            self.matrix.observe(ord("a"), cur, 0.1)
+        assert sorted(self.matrix.sparse) == [(97, 200), (97, 201)]
+        assert self.matrix.observe(-1, ord("a"), 0.1) is None
+        assert len(self.matrix) == 2
+
+    def test_snapshot_into_a_smaller_matrix(self):
+        self.matrix.observe(ord("a"), ord("b"), 0.1)
+        self.matrix.observe(ord("a"), ord("b"), 0.3)
+        self.matrix.observe(ord("a"), 300, 0.2)
+        writer = StateWriter()
+        self.matrix.write(writer)
+        small = DigraphMatrix(keys=64).read(StateReader(writer.getvalue()))
+        # 'b' (98) no longer fits the matrix: it moves to the sparse fallback
+        assert small.profile(ord("a"), ord("b"))[::2] == (pytest.approx(0.2), 2)
+        assert small.profile(ord("a"), 300)[::2] == (0.2, 1)
+        assert len(small) == 2 and len(small.sparse) == 2
+
+
+class TestKeyCode:
+    def test_codes(self):
+        assert key_code(types.SimpleNamespace(char="A")) == ord("a")
+        assert key_code(types.SimpleNamespace(char=None, name="enter")) == 13
+        assert key_code(types.SimpleNamespace(char=None, name="f5", vk=116)) == SPECIAL + 116
+        assert key_code(types.SimpleNamespace(char="ab")) == -1
+        assert key_code(object()) == -1
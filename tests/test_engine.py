@@ -0,0 +1,139 @@
+import time
+
+from engine import AGENT_NAMES, GuardioEngine, make_agent
+from risk import CRITICAL_RISK
+
+
+class _Recorder:
+    """A front-end implementing every engine hook"""
+
+    def __init__(self):
+        self.calls = []
+
+    def __getattr__(self, hook):
+        if not hook.startswith("on_"):
+            raise AttributeError(hook)
+        return lambda *args: self.calls.append((hook,) + args)
+
+    def hooks(self, hook):
+        return [call[1:] for call in self.calls if call[0] == hook]
+
+
+class _AsyncAgent:
+    """A custom agent on the runtime loop: one alert and one stats publish, then idles"""
+    metrics_name = "custom"
+    stats_source = "Custom"
+
+    def __init__(self, anomaly_queue, stats_queue, sigma=3.0, cooldown=3.0, detector=None):
+        self.anomaly_queue = anomaly_queue
+        self.stats_queue = stats_queue
+        self.sigma = sigma
+        self.cooldown = cooldown
+        self.detector = detector
+
+    async def run_async(self, runtime):
+        self.anomaly_queue.put({"source": "Custom", "severity": "High", "message": "seen"})
+        self.stats_queue.publish("Custom", 1.0, 0.5, None, "Stable")
+        await runtime.wait_stopped()
+
+
+def pump(engine, done, timeout=2.0):
+    """process_pending() until done() or timeout, the way a front-end does"""
+    deadline = time.monotonic() + timeout
+    while not done() and time.monotonic() < deadline:
+        engine.wakeup.wait(0.05)
+        engine.wakeup.clear()
+        engine.process_pending()
+
+
+class TestEngineLifecycle:
+    def setup_method(self):
+        self.engine = GuardioEngine(agent_factories=[_AsyncAgent], sigma=2.5, cooldown=1.0)
+        self.front = _Recorder()
+        self.engine.subscribe(self.front)
+
+    def teardown_method(self):
+        self.engine.stop()
+
+    def test_custom_factory_reaches_subscribers(self):
+        self.engine.start()
+        assert self.engine.is_running
+        pump(self.engine, lambda: self.front.hooks("on_stats"))
+        assert self.front.hooks("on_state")[0] == ("Monitoring",)
+        assert [name for name, status in self.front.hooks("on_agent_status")] == list(AGENT_NAMES)
+        (event, score), = self.front.hooks("on_anomaly")
+        assert event["message"] == "seen" and score == 3.0
+        assert self.front.hooks("on_stats")[0][0]["source"] == "Custom"
+        self.engine.stop()
+        assert not self.engine.is_running
+        assert self.front.hooks("on_state")[-1] == ("Stopped",)
+
+    def test_settings_reach_running_agents(self):
+        self.engine.start()
+        agent, = self.engine.agents
+        assert (agent.sigma, agent.cooldown) == (2.5, 1.0)
+        self.engine.set_sensitivity(4)
+        self.engine.set_cooldown(0)
+        assert (agent.sigma, agent.cooldown) == (4.0, 0.0)
+
+    def test_run_headless_for_a_duration(self):
+        t0 = time.monotonic()
+        self.engine.run_headless(duration=0.2, idle_wait=0.05)
+        assert 0.2 <= time.monotonic() - t0 < 1.5
+        assert self.front.hooks("on_anomaly") and not self.engine.is_running
+
+
+class TestEngineSubscribers:
+    def setup_method(self):
+        self.engine = GuardioEngine()
+
+    def test_failing_subscriber_does_not_stop_the_others(self):
+        class Broken:
+            def on_log(self, message):
+                raise RuntimeError("broken front-end")
+        front = _Recorder()
+        self.engine.subscribe(Broken())
+        self.engine.subscribe(front)
+        self.engine.subscribe(object())  # implements no hooks
+        self.engine.log("hello")
+        assert front.hooks("on_log") == [("hello",)]
+        self.engine.unsubscribe(front)
+        self.engine.log("again")
+        assert front.hooks("on_log") == [("hello",)]
+
+    def test_critical_reported_once(self):
+        front = _Recorder()
+        self.engine.subscribe(front)
+        for _ in range(CRITICAL_RISK):
+            self.engine.anomaly_queue.put({"source": "Typing", "severity": "High", "message": ""})
+        assert self.engine.process_pending() == CRITICAL_RISK
+        assert len(front.hooks("on_critical")) == 1
+        assert front.hooks("on_risk") == []  # on_anomaly already carried each score
+        self.engine.reset_risk()
+        assert front.hooks("on_risk") == [(0.0,)] and self.engine.risk_score == 0.0
+
+
+class TestMakeAgent:
+    def test_detector_by_metrics_name(self):
+        agent = make_agent(_AsyncAgent, None, None, 3.0, 2.0, {"custom": "quantile"})
+        assert agent.detector == "quantile" and agent.cooldown == 2.0
+        agent = make_agent(_AsyncAgent, None, None, 3.0, 2.0, {"typing": "quantile"})
+        assert agent.detector is None
+
+
+class TestEngineRisk:
+    def test_correlated_alerts_then_decay(self, monkeypatch):
+        now = [1000.0]
+        monkeypatch.setattr(time, "time", lambda: now[0])
+        engine = GuardioEngine(risk_half_life=30.0, correlation_window=10.0)
+        front = _Recorder()
+        engine.subscribe(front)
+        for source in ("Movement", "Typing", "AppUsage"):
+            engine.anomaly_queue.put({"source": source, "severity": "Low", "message": ""})
+        engine.process_pending()
+        # Each alert counts 1.5x per other source that alerted within the window
+        assert [score for _, score in front.hooks("on_anomaly")] == [1.0, 2.5, 4.5]
+        now[0] += 30.0
+        engine.process_pending()
+        assert front.hooks("on_risk") == [(2.2,)]
+        assert engine.risk_score == 2.2
@@ -0,0 +1,162 @@
+import random
+import struct
+import time
+
+import pytest
+
+from agents.journal import STATS
+from fleet import ColumnarFleetServer, FleetServer, ProtocolError, _Session, encode_hello
+
+
+def hello(server, user):
+    session = _Session()
+    body, encoder = encode_hello(user, t=1000.0)
+    server.handle_frame(session, body)
+    return session, encoder
+
+
+class TestFleetProtocol:
+    def setup_method(self):
+        self.server = FleetServer()
+
+    def test_truncated_stats_record(self):
+        session, _ = hello(self.server, "alice")
+        with pytest.raises(ProtocolError):
+            self.server.handle_frame(session, bytes([STATS, 0, 1]) + b"M")
+
+    def test_truncated_stats_float(self):
+        session, _ = hello(self.server, "alice")
+        body = bytes([STATS, 0, 1]) + b"M" + struct.pack("<d", 1.0)[:5]
+        with pytest.raises(ProtocolError):
+            self.server.handle_frame(session, body)
+
+    def test_bad_hello(self):
+        with pytest.raises(ProtocolError):
+            self.server.handle_frame(_Session(), b"GDF1")
+
+
+class TestFleetProfileLimit:
+    def test_evicts_least_recent_idle_user(self):
+        server = FleetServer(max_users=2)
+        a, _ = hello(server, "a")
+        b, _ = hello(server, "b")
+        server._closed(a)
+        server._closed(b)
+        hello(server, "a")  # a is now the most recent
+        hello(server, "c")
+        assert list(server.profiles) == ["a", "c"]
+
+    def test_connected_users_are_kept(self):
+        server = FleetServer(max_users=2)
+        hello(server, "a")
+        hello(server, "b")
+        with pytest.raises(ProtocolError):
+            hello(server, "c")
+        assert list(server.profiles) == ["a", "b"]
+
+    def test_columnar_row_reused_after_scoring(self):
+        server = ColumnarFleetServer(max_users=1)
+        try:
+            a, encoder = hello(server, "a")
+            out = bytearray()
+            encoder.keys(out, [(1000.0 + i * 0.2, True) for i in range(20)])
+            server.handle_frame(a, bytes(out))
+            server._closed(a)
+            row = server.profiles["a"].row
+            assert server.table.profile(row, "key").count == 0  # not scored yet
+
+            hello(server, "b")
+            assert list(server.profiles) == ["b"]
+            assert server.profiles["b"].row == row
+            assert server._rows[row].user == "b"
+            assert server.table.profile(row, "key").count == 0
+        finally:
+            server.table.close(unlink=True)
+
+
+class _Alerts:
+    def __init__(self):
+        self.events = []
+
+    def on_anomaly(self, user, event, risk_score):
+        self.events.append((user, event["source"], event["severity"], event["message"]))
+
+    def on_critical(self, user, risk_score):
+        pass
+
+
+def user_frames(seed, t0, frames=20):
+    """Frame bodies of one synthetic user: steady mouse and typing with now and then a burst"""
+    rng = random.Random(seed)
+    x, y, t = 500.0, 400.0, t0
+    bodies = []
+    for i in range(frames):
+        moves, keys = [], []
+        for _ in range(25):
+            t += 0.01
+            step = 60.0 if rng.random() < 0.04 else 3.0
+            x += rng.uniform(-step, step)
+            y += rng.uniform(-step, step)
+            moves.append((x, y, t))
+        for _ in range(10):
+            t += rng.choice((1.5, 2.0)) if rng.random() < 0.05 else rng.uniform(0.12, 0.2)
+            keys.append((t, False))  # no characters: the WPM threshold is not columnar
+        bodies.append((moves, keys))
+    return bodies
+
+
+class TestColumnarEquivalence:
+    """ColumnarFleetServer (ProfileTable rows) against FleetServer (agent objects per user)"""
+
+    USERS = 6
+
+    def run(self, server, monkeypatch):
+        t0 = 1000.0
+        monkeypatch.setattr(time, "time", lambda: t0)  # both start their key clocks here
+        alerts = _Alerts()
+        server.subscribe(alerts)
+        users = [(hello(server, f"u{i}"), user_frames(i, t0)) for i in range(self.USERS)]
+        for k in range(20):
+            for (session, encoder), bodies in users:
+                out = bytearray()
+                moves, keys = bodies[k]
+                encoder.moves(out, moves)
+                encoder.keys(out, keys)
+                server.handle_frame(session, bytes(out))
+            if isinstance(server, ColumnarFleetServer):
+                server.flush()
+        return alerts.events
+
+    def test_same_alerts_and_profiles(self, monkeypatch):
+        objects, columnar = FleetServer(), ColumnarFleetServer(max_users=8)
+        try:
+            expected = self.run(objects, monkeypatch)
+            got = self.run(columnar, monkeypatch)
+            assert {source for _, source, _, _ in expected} == {"Movement", "Typing"}
+            assert sorted(got) == sorted(expected)
+            for user, profile in objects.profiles.items():
+                row = columnar.profiles[user].row
+                for agent, sig in ((profile.movement, "move"), (profile.typing, "key")):
+                    want, have = agent.profile, columnar.table.profile(row, sig)
+                    assert have.count == want.count
+                    assert have.mean == pytest.approx(want.mean, rel=1e-9)
+                    assert have.var == pytest.approx(want.var, rel=1e-9)
+        finally:
+            columnar.table.close(unlink=True)
+
+
+class TestFleetRisk:
+    def test_each_user_has_a_score(self, monkeypatch):
+        now = [1000.0]
+        monkeypatch.setattr(time, "time", lambda: now[0])
+        server = FleetServer(risk_half_life=30.0, correlation_window=10.0)
+        alerts = _Alerts()
+        alerts.on_anomaly = lambda user, event, score: alerts.events.append((user, score))
+        server.subscribe(alerts)
+        a, b = server.profile("a"), server.profile("b")
+        server._on_anomaly(a, {"source": "Movement", "severity": "High"})
+        server._on_anomaly(b, {"source": "Typing", "severity": "High"})  # other user: no boost
+        server._on_anomaly(a, {"source": "Typing", "severity": "High"})
+        now[0] += 30.0
+        server._on_anomaly(b, {"source": "Typing", "severity": "Low"})
+        assert alerts.events == [("a", 3.0), ("b", 3.0), ("a", 7.5), ("b", 2.5)]
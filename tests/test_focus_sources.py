@@ -0,0 +1,111 @@
+import sys
+import types
+
+from agents.focus_sources import XlibFocusSource
+
+PROPERTY_NOTIFY = 28
+ACTIVE, TITLE = 1, 2
+
+
+class FakeDisplay:
+    """The parts of Xlib.display.Display that XlibFocusSource uses"""
+
+    def __init__(self, fail_on=None):
+        self.fail_on = fail_on
+        self.closed = False
+        self.events = []
+
+    def screen(self):
+        return types.SimpleNamespace(root=FakeWindow(self, 0))
+
+    def intern_atom(self, name):
+        if name == self.fail_on:
+            raise RuntimeError("connection lost")
+        return {"_NET_ACTIVE_WINDOW": ACTIVE, "_NET_WM_NAME": TITLE}.get(name, 99)
+
+    def pending_events(self):
+        return len(self.events)
+
+    def next_event(self):
+        return self.events.pop(0)
+
+    def close(self):
+        self.closed = True
+
+
+class FakeWindow:
+    def __init__(self, display, wid):
+        self.display = display
+        self.id = wid
+
+    def change_attributes(self, **kwargs):
+        pass
+
+    def get_full_property(self, atom, kind):
+        return None
+
+
+def install_fake_xlib(monkeypatch, display):
+    xlib = types.ModuleType("Xlib")
+    xlib.X = types.SimpleNamespace(PropertyChangeMask=1, AnyPropertyType=0,
+                                   PropertyNotify=PROPERTY_NOTIFY)
+    xlib.display = types.SimpleNamespace(Display=lambda name=None: display)
+    xlib.error = types.SimpleNamespace(XError=Exception, CatchError=lambda: None)
+    monkeypatch.setitem(sys.modules, "Xlib", xlib)
+    monkeypatch.setitem(sys.modules, "Xlib.error", xlib.error)
+
+
+def focus_event(atom=ACTIVE):
+    return types.SimpleNamespace(type=PROPERTY_NOTIFY, atom=atom, window=None)
+
+
+class TestXlibConnect:
+    def test_display_closed_when_setup_fails(self, monkeypatch):
+        display = FakeDisplay(fail_on="UTF8_STRING")
+        install_fake_xlib(monkeypatch, display)
+        source = XlibFocusSource()
+        assert not source.usable
+        assert display.closed and source._display is None
+
+    def test_display_closed_without_ewmh(self, monkeypatch):
+        display = FakeDisplay()
+        install_fake_xlib(monkeypatch, display)
+        assert not XlibFocusSource().usable
+        assert display.closed
+
+
+class TestXlibDispatch:
+    def setup_method(self):
+        self.display = FakeDisplay()
+        self.source = XlibFocusSource.__new__(XlibFocusSource)
+        self.source._display = self.display
+        self.source._X = types.SimpleNamespace(PropertyNotify=PROPERTY_NOTIFY)
+        self.source._NET_ACTIVE_WINDOW = ACTIVE
+        self.source._NET_WM_NAME = TITLE
+        self.source._WM_NAME = 99
+        self.source._window = None
+        self.source._current = "editor"
+        self.apps = iter(["browser", "terminal"])
+        self.refreshes = 0
+        self.source._refresh = self.refresh
+        self.notified = []
+        self.source._callback = self.notified.append
+
+    def refresh(self):
+        self.refreshes += 1
+        if self.refreshes == 1:
+            # A focus change the X server sent while we were querying the window
+            self.display.events.append(focus_event())
+        self.source._current = next(self.apps)
+
+    def test_events_read_during_refresh_are_handled(self):
+        self.display.events.append(focus_event())
+        self.source.dispatch()
+        assert self.refreshes == 2
+        assert self.display.events == []
+        assert self.notified == ["terminal"]
+
+    def test_no_focus_event_no_refresh(self):
+        self.display.events.append(focus_event(atom=123))
+        self.source.dispatch()
+        assert self.refreshes == 0 and self.notified == []
@@ -0,0 +1,100 @@
+import os
+import time
+
+import pytest
+
+from agents.journal import (
+    ANOMALY, FOCUS, KEYS, MOVES, STATS, Journal, JournalReader, RecordDecoder, RecordEncoder,
+    segment_paths)
+
+
+class TestRecordRoundTrip:
+    def setup_method(self):
+        self.encoder = RecordEncoder(tick_us=100, t=1_700_000_000.0)
+        self.decoder = RecordDecoder.from_header(self.encoder.header())
+
+    def decode(self, out):
+        return list(self.decoder.decode(bytes(out)))
+
+    def test_moves(self):
+        t0 = 1_700_000_000.5
+        # Smooth motion (one-byte samples) and jumps (varint samples)
+        batch = [(100 + i, 200 - i, t0 + i * 0.001) for i in range(50)]
+        batch += [(5000, -3000, t0 + 10.0), (0, 0, t0 + 10.0)]
+        out = bytearray()
+        self.encoder.moves(out, batch)
+        [(kind, payload)] = self.decode(out)
+        assert kind == MOVES
+        assert [(x, y) for x, y, _ in payload] == [(x, y) for x, y, _ in batch]
+        for (_, _, t), (_, _, expected) in zip(payload, batch):
+            assert t == pytest.approx(expected, abs=1e-4)  # one tick
+        assert len(out) < 2 * len(batch)  # smooth samples take one byte
+
+    def test_mixed_records_keep_delta_state_across_frames(self):
+        t0 = 1_700_000_001.0
+        first, second = bytearray(), bytearray()
+        self.encoder.keys(first, [(t0, True), (t0 + 0.12, False, 65)])
+        self.encoder.focus(first, t0 + 0.5, "Terminal — ü")
+        self.encoder.anomaly(second, t0 + 1.0, {"source": "Typing", "severity": "High",
+                                                "message": "Unusual Speed: 120 WPM"})
+        self.encoder.stats(second, t0 + 2.0, {"source": "Movement", "mean": 12.5, "std": None,
+                                              "z": 0.25})
+        records = self.decode(first) + self.decode(second)
+        assert [kind for kind, _ in records] == [KEYS, FOCUS, ANOMALY, STATS]
+        keys = records[0][1]
+        assert [k for _, k in keys] == [True, False]
+        assert keys[1][0] == pytest.approx(t0 + 0.12, abs=1e-4)
+        assert records[1][1][1] == "Terminal — ü"
+        assert records[2][1][1:] == ("Typing", "High", "Unusual Speed: 120 WPM")
+        t, source, mean, std, z = records[3][1]
+        assert t == pytest.approx(t0 + 2.0, abs=1e-4)
+        assert (source, mean, std, z) == ("Movement", 12.5, None, 0.25)
+
+    @pytest.mark.parametrize("cut", [1, 3, 6, 12])
+    def test_truncated_record_raises(self, cut):
+        out = bytearray()
+        self.encoder.stats(out, 1_700_000_002.0, {"source": "Movement", "mean": 1.0,
+                                                  "std": 2.0, "z": 3.0})
+        with pytest.raises(IndexError):
+            self.decode(out[:-cut])
+
+    def test_foreign_header(self):
+        assert RecordDecoder.from_header(b"XXXX" + self.encoder.header()[4:]) is None
+        assert RecordDecoder.from_header(b"GDJ1") is None
+
+
+class TestJournal:
+    def setup_method(self):
+        self.t0 = time.time()
+
+    def test_round_trip_through_segments(self, tmp_path):
+        journal = Journal(str(tmp_path))
+        journal.moves([(10, 20, self.t0), (11, 22, self.t0 + 0.001)])
+        journal.keys([(self.t0 + 0.1, True, 84), (self.t0 + 0.2, False, 9)])
+        journal.focus(self.t0 + 0.3, "Editor")
+        journal.close()
+        records = list(JournalReader(str(tmp_path)).records())
+        assert [r[0] for r in records] == ["move", "move", "key", "key", "focus"]
+        assert records[2][2] is True and records[4][2] == "Editor"
+        assert all(len(r) == 3 for r in records if r[0] == "key")  # no key identities
+
+    def test_rotation_and_retention(self, tmp_path):
+        journal = Journal(str(tmp_path), segment_bytes=256, max_bytes=1024)
+        for i in range(200):
+            journal.focus(self.t0 + i, f"window {i}")
+        journal.close()
+        paths = segment_paths(str(tmp_path))
+        assert len(paths) > 1
+        assert sum(os.path.getsize(p) for p in paths) <= 1024 + 256
+        # The oldest segments went; what is left reads back, newest last
+        apps = [r[2] for r in JournalReader(str(tmp_path)).records()]
+        assert apps[-1] == "window 199" and "window 0" not in apps
+
+    def test_record_larger_than_a_segment_is_dropped(self, tmp_path):
+        journal = Journal(str(tmp_path), segment_bytes=128)
+        dropped = journal._m_dropped.value
+        journal.focus(self.t0, "x" * 500)
+        journal.focus(self.t0 + 1.0, "small")
+        journal.close()
+        assert journal._m_dropped.value == dropped + 1
+        assert [r[2] for r in JournalReader(str(tmp_path)).records()] == ["small"]
@@ -0,0 +1,58 @@
+from agents.metrics import MetricsRegistry
+
+
+class TestMetricsRegistry:
+    def setup_method(self):
+        self.metrics = MetricsRegistry()
+
+    def test_instruments_are_shared_by_name(self):
+        assert self.metrics.counter("a.events") is self.metrics.counter("a.events")
+        self.metrics.counter("a.events").inc()
+        self.metrics.counter("a.events").inc(2)
+        self.metrics.gauge("a.depth").set(7)
+        assert self.metrics.snapshot() == {"a.depth": 7, "a.events": 3}
+
+    def test_histogram_log2_buckets(self):
+        h = self.metrics.histogram("a.latency")
+        for value in (3, 5, 6, 7, 100):
+            h.observe(value)
+        snap = self.metrics.snapshot()["a.latency"]
+        assert snap["count"] == 5 and snap["mean_us"] == 24.2 and snap["max_us"] == 100
+        assert snap["p50_us"] == 8     # 5..7 share the [4, 8) bucket
+        assert snap["p99_us"] == 100   # capped at the largest value seen
+
+    def test_histogram_unit(self):
+        self.metrics.histogram("a.batch", unit="samples").observe(4)
+        assert "p50_samples" in self.metrics.snapshot()["a.batch"]
+
+    def test_timed(self):
+        func = self.metrics.timed("a.call", lambda x: x * 2)
+        assert func(21) == 42
+        assert self.metrics.histogram("a.call").count == 1
+
+    def test_disabled_records_nothing(self):
+        metrics = MetricsRegistry(enabled=False)
+        callback = lambda: None
+        assert metrics.timed("a.call", callback) is callback
+        metrics.counter("a.events").inc()
+        metrics.histogram("a.latency").observe(5)
+        assert metrics.counter("a.events").value == 0
+        assert metrics.histogram("a.latency").count == 0
+
+    def test_collectors_run_on_snapshot(self, capsys):
+        depth = [3]
+        collect = lambda: self.metrics.gauge("q.depth").set(depth[0])
+        self.metrics.add_collector(collect)
+        self.metrics.add_collector(lambda: 1 / 0)  # a failing collector is reported, not raised
+        assert self.metrics.snapshot()["q.depth"] == 3
+        depth[0] = 9
+        self.metrics.remove_collector(collect)
+        assert self.metrics.snapshot()["q.depth"] == 3
+        assert "Error in metrics collector" in capsys.readouterr().out
+
+    def test_reset(self):
+        self.metrics.counter("a.events").inc(5)
+        self.metrics.histogram("a.latency").observe(5)
+        self.metrics.reset()
+        assert self.metrics.snapshot() == {"a.events": 0, "a.latency": {
+            "count": 0, "mean_us": 0, "p50_us": 0, "p90_us": 0, "p99_us": 0, "max_us": 0}}
@@ -0,0 +1,82 @@
+import random
+from statistics import NormalDist
+
+import pytest
+
+from agents.adaptive_profile import AdaptiveProfile
+from agents.quantile_profile import QUANTILES, QuantileProfile, detector_tag, make_profile
+from agents.snapshot import StateReader, StateWriter
+
+
+def trained(samples, min_count=200):
+    profile = QuantileProfile(min_count=min_count)
+    for v in samples:
+        profile.update(v)
+    return profile
+
+
+class TestQuantileProfile:
+    def setup_method(self):
+        rng = random.Random(7)
+        self.normal = [rng.gauss(0.0, 1.0) for _ in range(20000)]
+        self.heavy = [rng.expovariate(1.0) for _ in range(20000)]
+
+    def test_quantiles_of_a_normal(self):
+        profile = trained(self.normal)
+        for p in QUANTILES[1:-1]:
+            assert profile.quantile(p) == pytest.approx(NormalDist().inv_cdf(p), abs=0.08)
+        assert profile.mean == pytest.approx(0.0, abs=0.05)
+        assert profile.std == pytest.approx(1.0, abs=0.05)
+
+    def test_fixed_memory(self):
+        profile = trained(self.normal)
+        assert len(profile.heights) == len(profile.positions) == 2 * len(QUANTILES) + 3
+        assert profile.count == len(self.normal)
+
+    def test_tail_z_on_a_heavy_tail(self):
+        quantile, ema = trained(self.heavy), AdaptiveProfile(alpha=0.001)
+        for v in self.heavy:
+            ema.update(v)
+        # The exponential's 0.1% tail is at ln(1000); it should read as z of about 3.09
+        assert quantile.zscore(6.9078) == pytest.approx(3.09, abs=0.25)
+        fresh = random.Random(8)
+        tail = [fresh.expovariate(1.0) for _ in range(5000)]
+        rate = sum(quantile.zscore(v) > 3.0 for v in tail) / len(tail)
+        ema_rate = sum(ema.zscore(v) > 3.0 for v in tail) / len(tail)
+        assert rate < 0.005 < ema_rate
+
+    def test_warm_up(self):
+        profile = QuantileProfile(min_count=50)
+        assert profile.mean is None and profile.var is None
+        # Scored once more than min_count samples are in
+        assert [profile.observe(v) for v in self.normal[:51]] == [None] * 51
+        assert profile.observe(self.normal[51]) is not None
+
+    def test_update_batch_matches_observe(self):
+        one, batch = QuantileProfile(min_count=20), QuantileProfile(min_count=20)
+        z = [one.observe(v) for v in self.heavy[:300]]
+        result = batch.update_batch(self.heavy[:300])
+        assert [None if not r else pytest.approx(v) for r, v in zip(result.ready, result.z)] == z
+        assert batch.heights == one.heights and batch.positions == one.positions
+
+    @pytest.mark.parametrize("n", [5, 1000])
+    def test_snapshot_round_trip(self, n):
+        profile = trained(self.heavy[:n])
+        writer = StateWriter()
+        writer.profile(profile)
+        restored = QuantileProfile()
+        StateReader(writer.getvalue()).profile(restored)
+        assert (restored.count, restored.heights, restored.positions) == (
+            profile.count, profile.heights, profile.positions)
+
+
+class TestMakeProfile:
+    def test_detectors(self):
+        assert isinstance(make_profile("ema", alpha=0.05), AdaptiveProfile)
+        assert isinstance(make_profile("quantile"), QuantileProfile)
+        with pytest.raises(ValueError):
+            make_profile("median")
+
+    def test_detector_tag(self):
+        assert detector_tag(b"MOVE", "ema") == b"MOVE"
+        assert detector_tag(b"MOVE", "quantile") == b"MOVQ"
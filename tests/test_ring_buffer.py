@@ -0,0 +1,38 @@
+from agents.ring_buffer import SharedRing
+
+
+class TestSharedRing:
+    def setup_method(self):
+        self.ring = SharedRing(64)
+
+    def test_records_in_order_across_the_wrap(self):
+        for i in range(20):
+            assert self.ring.push(b"record %d" % i)
+            assert self.ring.pop() == b"record %d" % i
+        assert self.ring.pop() is None and len(self.ring) == 0
+
+    def test_full_ring_drops(self):
+        assert self.ring.push(b"x" * 40)
+        assert not self.ring.push(b"y" * 40)
+        assert self.ring.dropped == 1
+        assert self.ring.pop() == b"x" * 40
+
+    def test_record_not_visible_yet_is_left_in_place(self):
+        # Weakly ordered memory: head moved before the payload bytes arrived
+        self.ring.push(b"payload")
+        saved = bytes(self.ring._data[8:15])
+        self.ring._data[8:15] = b"\0" * 7
+        assert self.ring.pop() is None
+        assert self.ring.torn == 1 and len(self.ring) == 15
+        self.ring._data[8:15] = saved
+        assert self.ring.pop() == b"payload"
+
+    def test_shared_attach(self):
+        ring = SharedRing(1024, shared=True)
+        try:
+            other = SharedRing.attach(ring.name, 1024)
+            other.push(b"from the child")
+            assert ring.pop() == b"from the child"
+            other.close()
+        finally:
+            ring.close(unlink=True)
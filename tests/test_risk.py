@@ -0,0 +1,36 @@
+import pytest
+
+from risk import CRITICAL_RISK, RiskScore
+
+
+class TestRiskScore:
+    def setup_method(self):
+        self.risk = RiskScore(half_life=60.0, window=10.0, correlation=0.5)
+
+    def test_decays_by_half_life(self):
+        score, _ = self.risk.add("Typing", "High", 100.0)
+        assert score == 3.0
+        assert self.risk.value(160.0) == pytest.approx(1.5)
+        assert self.risk.value(220.0) == pytest.approx(0.75)
+
+    def test_steady_trickle_settles(self):
+        for i in range(2000):
+            score, _ = self.risk.add("Typing", "Low", i * 30.0)
+        # points / (1 - 2^(-interval / half_life))
+        assert score == pytest.approx(1.0 / (1.0 - 2.0 ** -0.5))
+
+    def test_correlated_sources_weigh_more(self):
+        self.risk.add("Movement", "Low", 100.0)
+        self.risk.add("AppUsage", "Low", 105.0)
+        assert self.risk.weight("Typing", 109.0) == 2.0
+        assert self.risk.weight("Typing", 116.0) == 1.0  # both outside the window
+        assert self.risk.weight("Movement", 109.0) == 1.5  # a source does not count itself
+
+    def test_critical_once_until_rearmed(self):
+        reports = [self.risk.add("Typing", "High", 0.0)[1] for _ in range(20)]
+        assert reports.count(True) == 1
+        assert self.risk.value(0.0) == 2 * CRITICAL_RISK  # capped
+        # Back under half the threshold (two half-lives) re-arms the report
+        assert self.risk.add("Typing", "Low", 121.0)[1] is False
+        critical = [self.risk.add("Typing", "High", 121.0)[1] for _ in range(5)]
+        assert critical.count(True) == 1
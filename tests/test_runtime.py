@@ -0,0 +1,93 @@
+import threading
+import time
+
+from agents.runtime import AgentRuntime
+
+
+class _AsyncAgent:
+    def __init__(self):
+        self.started = threading.Event()
+        self.stopped = False
+        self.thread = None
+
+    async def run_async(self, runtime):
+        self.thread = threading.current_thread()
+        self.started.set()
+        await runtime.wait_stopped()
+        self.stopped = True
+
+
+class _ThreadAgent:
+    """Thread-style agent: run(stop_event) only"""
+
+    def __init__(self):
+        self.started = threading.Event()
+        self.stopped = False
+
+    def run(self, stop_event):
+        self.started.set()
+        stop_event.wait()
+        self.stopped = True
+
+
+class _FailingAgent:
+    async def run_async(self, runtime):
+        raise RuntimeError("agent failed")
+
+
+class TestAgentRuntime:
+    def setup_method(self):
+        self.runtime = AgentRuntime()
+
+    def teardown_method(self):
+        self.runtime.stop()
+
+    def test_one_loop_thread_hosts_every_agent(self):
+        agents = [_AsyncAgent() for _ in range(20)]
+        before = threading.active_count()
+        self.runtime.start(agents)
+        assert all(agent.started.wait(2.0) for agent in agents)
+        assert threading.active_count() == before + 1
+        assert len({agent.thread for agent in agents}) == 1
+        self.runtime.stop()
+        assert all(agent.stopped for agent in agents)
+
+    def test_thread_style_agent_and_a_failing_one(self, capsys):
+        threaded, hosted = _ThreadAgent(), _AsyncAgent()
+        self.runtime.start([_FailingAgent(), threaded, hosted])
+        assert threaded.started.wait(2.0) and hosted.started.wait(2.0)
+        self.runtime.stop()
+        assert threaded.stopped and hosted.stopped
+        assert "agent failed" in capsys.readouterr().out
+
+    def test_threadsafe_runs_on_the_loop(self):
+        agent = _AsyncAgent()
+        self.runtime.start([agent])
+        agent.started.wait(2.0)
+        ran = []
+        done = threading.Event()
+        schedule = self.runtime.threadsafe(lambda x: (ran.append((x, threading.current_thread())),
+                                                      done.set()))
+        schedule(7)
+        assert done.wait(2.0)
+        assert ran == [(7, agent.thread)]
+
+    def test_wait_stopped_timeout(self):
+        results = []
+        done = threading.Event()
+
+        class Ticker:
+            async def run_async(self, runtime):
+                t0 = time.perf_counter()
+                results.append(await runtime.wait_stopped(0.05))
+                results.append(time.perf_counter() - t0)
+                done.set()
+                await runtime.wait_stopped()
+
+        self.runtime.start([Ticker()])
+        assert done.wait(2.0)
+        assert results[0] is False and results[1] >= 0.04
+
+    def test_stop_before_start(self):
+        self.runtime.stop()
+        assert self.runtime.stopping
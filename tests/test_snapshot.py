@@ -0,0 +1,141 @@
+import struct
+
+import pytest
+
+from agents.adaptive_profile import AdaptiveProfile
+from agents.snapshot import (
+    BaselineStore, SnapshotError, StateReader, StateWriter, decode_snapshot, encode_sections,
+    encode_snapshot)
+
+
+class _Agent:
+    """The snapshot interface of an agent: a tag, a version and one profile"""
+
+    def __init__(self, tag, version=1):
+        self.state_tag = tag
+        self.state_version = version
+        self.profile = AdaptiveProfile()
+
+    def write_state(self, writer):
+        writer.profile(self.profile)
+
+    def read_state(self, reader):
+        reader.profile(self.profile)
+
+
+class TestSnapshotFormat:
+    def setup_method(self):
+        self.agent = _Agent(b"TEST")
+        for v in (1.0, 2.0, 4.0):
+            self.agent.profile.update(v)
+
+    def test_layout(self):
+        data = encode_snapshot(encode_sections([self.agent]))
+        assert data[:4] == b"GDSN"
+        assert struct.unpack_from("<HH", data, 4) == (1, 1)
+        tag, version, length, _ = struct.unpack_from("<4sHII", data, 8)
+        assert (tag, version, length) == (b"TEST", 1, 24)
+        assert len(data) == 8 + 14 + 24
+
+    def test_round_trip(self):
+        sections = decode_snapshot(encode_snapshot(encode_sections([self.agent])))
+        restored = _Agent(b"TEST")
+        restored.read_state(StateReader(sections[b"TEST"][1]))
+        assert (restored.profile.mean, restored.profile.var, restored.profile.count) == (
+            self.agent.profile.mean, self.agent.profile.var, 3)
+
+    def test_crc_mismatch_skips_section(self):
+        other = _Agent(b"OTHR")
+        data = bytearray(encode_snapshot(encode_sections([self.agent, other])))
+        data[8 + 14] ^= 0xFF  # first byte of TEST's payload
+        assert list(decode_snapshot(bytes(data))) == [b"OTHR"]
+
+    @pytest.mark.parametrize("data", [b"GD", b"XXXX\x01\x00\x00\x00", b"GDSN\x02\x00\x00\x00",
+                                      b"GDSN\x01\x00\x01\x00TEST"])
+    def test_damaged_header(self, data):
+        with pytest.raises(SnapshotError):
+            decode_snapshot(data)
+
+    def test_truncated_payload(self):
+        writer = StateWriter()
+        writer.str("window")
+        reader = StateReader(writer.getvalue()[:-1])
+        with pytest.raises(SnapshotError):
+            reader.str()
+
+
+class TestBaselineStore:
+    def test_version_mismatch_starts_cold(self, tmp_path):
+        store = BaselineStore(str(tmp_path / "baseline.snap"))
+        agent = _Agent(b"TEST", version=1)
+        agent.profile.update(3.0)
+        store.save(encode_sections([agent]))
+        newer = _Agent(b"TEST", version=2)
+        assert store.load_into([newer]) == []
+        assert newer.profile.mean is None
+
+    def test_missing_file(self, tmp_path):
+        assert BaselineStore(str(tmp_path / "none.snap")).load_into([_Agent(b"TEST")]) == []
+
+
+class _Broken(_Agent):
+    def read_state(self, reader):
+        raise struct.error("unpack requires a buffer of 8 bytes")
+
+
+class TestLoadInto:
+    def test_failing_section_is_skipped(self, tmp_path):
+        store = BaselineStore(str(tmp_path / "baseline.snap"))
+        good, bad = _Agent(b"GOOD"), _Agent(b"BAD!")
+        good.profile.update(1.0)
+        store.save(encode_sections([good, bad]))
+        fresh = _Agent(b"GOOD")
+        assert store.load_into([_Broken(b"BAD!"), fresh]) == [b"GOOD"]
+        assert fresh.profile.mean == 1.0
+
+
+class TestSnapshotDetails:
+    def setup_method(self):
+        from agents.app_usage_agent import AppUsageAgent
+        from agents.focus_sources import FakeFocusSource
+        from agents.typing_agent import TypingAgent
+        self.app_usage = AppUsageAgent(None, None, focus_source=FakeFocusSource())
+        self.app_usage.apps.add("Secret Project - Editor", 1000.0, seconds=400.0)
+        self.app_usage.gap_profile.update(2.0)
+        self.typing = TypingAgent(None, None, digraphs=True)
+        self.typing.digraphs.observe(ord("t"), ord("h"), 0.08)
+        self.agents = [self.app_usage, self.typing]
+
+    def restored(self, details):
+        from agents.app_usage_agent import AppUsageAgent
+        from agents.focus_sources import FakeFocusSource
+        from agents.typing_agent import TypingAgent
+        sections = decode_snapshot(encode_snapshot(encode_sections(self.agents, details)))
+        app_usage = AppUsageAgent(None, None, focus_source=FakeFocusSource())
+        typing = TypingAgent(None, None, digraphs=True)
+        app_usage.read_state(StateReader(sections[app_usage.state_tag][1]))
+        typing.read_state(StateReader(sections[typing.state_tag][1]))
+        return app_usage, typing
+
+    def test_aggregates_only_by_default(self):
+        data = encode_snapshot(encode_sections(self.agents))
+        assert b"Secret Project" not in data
+        app_usage, typing = self.restored(False)
+        assert app_usage.gap_profile.mean == 2.0
+        assert app_usage.apps.apps == []
+        assert len(typing.digraphs) == 0
+
+    def test_details_on_request(self):
+        assert b"Secret Project" in encode_snapshot(encode_sections(self.agents, details=True))
+        app_usage, typing = self.restored(True)
+        assert app_usage.apps.apps == ["Secret Project - Editor"]
+        assert len(typing.digraphs) == 1
+
+    def test_cli_switch(self, tmp_path):
+        from engine import GuardioEngine
+        from main import baseline_path, parse_args
+        assert not parse_args([]).baseline_details
+        args = parse_args(["--baseline", str(tmp_path / "b.snap"), "--baseline-details"])
+        engine = GuardioEngine(baseline_path=baseline_path(args),
+                               baseline_details=args.baseline_details)
+        assert engine.baseline.details
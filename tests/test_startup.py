@@ -0,0 +1,55 @@
+import io
+import os
+import subprocess
+import sys
+import time
+
+from startup import StartupProfile
+
+SRC = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "src")
+
+
+class TestStartupProfile:
+    def setup_method(self):
+        self.out = io.StringIO()
+        self.profile = StartupProfile(budget_ms=300.0, out=self.out)
+
+    def test_phases_in_order(self):
+        self.profile.mark("imports")
+        self.profile.mark("engine")
+        self.profile.mark("monitoring")
+        assert [name for name, _ in self.profile.phases][-3:] == ["imports", "engine", "monitoring"]
+        assert 0.0 <= self.profile.elapsed_ms("imports") <= self.profile.elapsed_ms()
+        assert self.profile.elapsed_ms("dashboard") is None
+
+    def test_report_once(self):
+        self.profile.launch = time.perf_counter()  # not the process start: other tests ran first
+        self.profile.mark("monitoring")
+        self.profile.report()
+        self.profile.report()
+        lines = self.out.getvalue().splitlines()
+        assert lines[-2].startswith("[Startup] monitoring")
+        assert "within the 300 ms budget" in lines[-1]
+        assert sum("budget" in line for line in lines) == 1
+
+    def test_over_budget_and_missing_phase(self):
+        self.profile.launch = time.perf_counter() - 1.0  # launched a second ago
+        self.profile.mark("monitoring")
+        self.profile.report()
+        assert "OVER the 300 ms budget" in self.out.getvalue()
+        profile = StartupProfile(out=self.out)
+        profile.report(ready="dashboard")
+        assert self.out.getvalue().endswith("[Startup] dashboard did not start\n")
+
+
+class TestLazyImports:
+    def test_main_defers_agents_and_numpy(self):
+        # A fresh interpreter: this one has imported everything already
+        code = ("import sys; import main; "
+                "print(sorted(m for m in ('numpy', 'asyncio', 'dashboard', 'agent_host', "
+                "'agents.runtime', 'agents.movement_agent', 'agents.typing_agent', "
+                "'agents.app_usage_agent') if m in sys.modules))")
+        result = subprocess.run([sys.executable, "-c", code], cwd=SRC, capture_output=True,
+                                text=True, timeout=60)
+        assert result.returncode == 0, result.stderr
+        assert result.stdout.strip() == "[]"
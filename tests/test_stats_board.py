@@ -0,0 +1,144 @@
+import time
+
+from agents.stats_board import SLOT_WORDS, StatsBoard, publish_stats
+
+
+class TestStatsBoard:
+    def setup_method(self):
+        self.board = StatsBoard(["Movement", "Typing"], capacity=3)
+
+    def test_latest_value_wins(self):
+        self.board.publish("Movement", 1.0, 0.5, None, "Adapting")
+        self.board.publish("Movement", 2.0, 0.5, 3.0, "Stable", t=10.0)
+        assert self.board.read("Movement") == {"source": "Movement", "mean": 2.0, "std": 0.5,
+                                               "z": 3.0, "note": "Stable", "t": 10.0}
+        assert self.board.read("Typing") is None
+
+    def test_changed_yields_each_write_once(self):
+        self.board.publish("Typing", 100.0, 10.0, 1.0, "Stable", wpm=60.0)
+        assert self.board.pending()
+        assert [s["wpm"] for s in self.board.changed()] == [60.0]
+        assert not self.board.pending()
+        assert list(self.board.changed()) == []
+
+    def test_write_in_progress_is_skipped(self):
+        self.board.publish("Movement", 1.0, 0.5, None, "Stable")
+        seq = self.board._words[0]
+        self.board._words[0] = seq + 1  # a writer between its two seq stores
+        assert self.board.read("Movement") is None
+        assert list(self.board.changed()) == []
+        assert self.board.torn == 2
+        self.board._words[0] = seq
+        assert self.board.read("Movement")["mean"] == 1.0
+
+    def test_fields_older_than_seq_are_skipped(self):
+        # Weakly ordered memory: the final seq is visible before the new fields are
+        self.board.publish("Movement", 1.0, 0.5, None, "Stable")
+        self.board._words[1] = 7.0
+        assert self.board.read("Movement") is None
+        assert self.board.torn == 1
+
+    def test_private_board_grows_to_capacity(self):
+        self.board.publish("AppUsage", 1.0, 1.0, None, "Stable")
+        self.board.publish("Extra", 1.0, 1.0, None, "Stable")
+        assert self.board.sources == ["Movement", "Typing", "AppUsage"]
+        assert self.board.dropped == 1
+
+    def test_shared_board_attach(self):
+        board = StatsBoard(["Movement"], shared=True)
+        try:
+            other = StatsBoard.attach(board.name, ["Movement"])
+            other.publish("Movement", 4.0, 1.0, 2.0, "Stable")
+            assert board.read("Movement")["mean"] == 4.0
+            assert len(board._words) == SLOT_WORDS
+            other.close()
+        finally:
+            board.close(unlink=True)
+
+    def test_publish_stats_to_queue(self):
+        class Sink(list):
+            put = list.append
+        sink = Sink()
+        publish_stats(sink, "Typing", 1.0, 2.0, None, "Stable", wpm=40.0)
+        assert sink == [{"source": "Typing", "mean": 1.0, "std": 2.0, "z": None,
+                         "note": "Stable", "wpm": 40.0}]
+
+    def test_writer_recovers_slot_left_mid_write(self):
+        self.board.publish("Movement", 1.0, 0.5, None, "Stable")
+        self.board._words[0] += 1  # the writing process died between its two seq stores
+        assert self.board.read("Movement") is None
+        self.board.publish("Movement", 2.0, 0.5, None, "Stable")
+        assert self.board._words[0] % 2 == 0
+        assert self.board.read("Movement")["mean"] == 2.0
+
+
+class _CustomAgent:
+    metrics_name = "custom"
+    stats_source = "Custom"
+
+
+class _QuietAgent:
+    metrics_name = "quiet"
+
+
+class TestEngineSharedBoard:
+    def setup_method(self):
+        from engine import GuardioEngine
+        self.engine = GuardioEngine(agent_factories=[_CustomAgent, _QuietAgent])
+        self.logged = []
+        self.engine.subscribe(type("Log", (), {"on_log": lambda _, m: self.logged.append(m)})())
+
+    def test_slots_for_declared_sources(self):
+        board = self.engine._make_stats_board(shared=True)
+        try:
+            assert board.sources == ["Movement", "Typing", "AppUsage", "Custom"]
+            board.publish("Custom", 1.0, 1.0, None, "Stable")
+            assert board.dropped == 0 and board.read("Custom")["mean"] == 1.0
+        finally:
+            board.close(unlink=True)
+        assert len(self.logged) == 1 and "_QuietAgent" in self.logged[0]
+
+
+class _DictAgent:
+    """An agent written against a stats queue: put()s one dict and one alert, then idles"""
+    metrics_name = "legacy"
+    stats_source = "Legacy"
+
+    def __init__(self, anomaly_queue, stats_queue, sigma=3.0, cooldown=3.0):
+        self.anomaly_queue = anomaly_queue
+        self.stats_queue = stats_queue
+
+    def run(self, stop_event):
+        self.stats_queue.put({"source": "Legacy", "mean": 5.0, "std": 1.0, "z": 2.5,
+                              "note": "Stable", "wpm": 42.0})
+        self.anomaly_queue.put({"source": "Legacy", "severity": "Medium", "message": "odd"})
+        stop_event.wait()
+
+
+class TestEngineDictAgent:
+    def test_put_stats_reach_subscribers(self):
+        from engine import GuardioEngine
+        engine = GuardioEngine(agent_factories=[_DictAgent])
+        seen = {"stats": [], "anomalies": []}
+        engine.subscribe(type("Sub", (), {
+            "on_stats": lambda _, s: seen["stats"].append(s),
+            "on_anomaly": lambda _, e, r: seen["anomalies"].append(e)})())
+        engine.start()
+        try:
+            deadline = time.monotonic() + 2.0
+            while (not seen["stats"] or not seen["anomalies"]) and time.monotonic() < deadline:
+                engine.wakeup.wait(0.1)
+                engine.wakeup.clear()
+                engine.process_pending()
+        finally:
+            engine.stop()
+        assert seen["stats"] == [{"source": "Legacy", "mean": 5.0, "std": 1.0, "z": 2.5,
+                                  "note": "Stable", "wpm": 42.0}]
+        assert seen["anomalies"][0]["message"] == "odd"
+
+    def test_board_put(self):
+        board = StatsBoard(["Typing"])
+        board.put({"source": "Typing", "mean": 0.2, "std": 0.05, "z": None, "note": "Adapting",
+                   "t": 3.0})
+        assert board.read("Typing") == {"source": "Typing", "mean": 0.2, "std": 0.05, "z": None,
+                                        "note": "Adapting", "t": 3.0}
@@ -0,0 +1,78 @@
+import numpy as np
+import pytest
+
+from agents.trajectory import FEATURES, TrajectoryFeatures
+
+
+def stroke(seed, n=2000):
+    """Integer pointer positions at ~1 kHz with turns and a few pauses"""
+    rng = np.random.default_rng(seed)
+    t = np.cumsum(rng.uniform(0.0008, 0.0012, n))
+    t[rng.choice(n, 5, replace=False)] += 0.6
+    heading = np.cumsum(rng.normal(0, 0.05, n))
+    x = np.round(np.cumsum(np.cos(heading) * 1.5))
+    y = np.round(np.cumsum(np.sin(heading) * 1.5))
+    return x, y, 1000.0 + t
+
+
+def stepped(features, xs, ys, ts):
+    out = {f: ([], []) for f in FEATURES}
+    for i, (x, y, t) in enumerate(zip(xs.tolist(), ys.tolist(), ts.tolist())):
+        for f, v in zip(FEATURES, features.step(x, y, t)):
+            if v is not None:
+                out[f][0].append(i)
+                out[f][1].append(v)
+    return out
+
+
+class TestTrajectoryBatch:
+    @pytest.mark.parametrize("shape", [True, False])
+    def test_batch_matches_step(self, shape):
+        xs, ys, ts = stroke(3)
+        expected = stepped(TrajectoryFeatures(shape=shape), xs, ys, ts)
+        got = TrajectoryFeatures(shape=shape).batch(xs, ys, ts)
+        for f in FEATURES:
+            rows, values = got.get(f, ([], []))
+            assert list(rows) == expected[f][0], f
+            np.testing.assert_allclose(values, expected[f][1], rtol=1e-9, atol=1e-12, err_msg=f)
+
+    def test_state_carries_across_batches(self):
+        xs, ys, ts = stroke(4)
+        scalar, vector = TrajectoryFeatures(), TrajectoryFeatures()
+        expected = stepped(scalar, xs, ys, ts)
+        got = {f: ([], []) for f in FEATURES}
+        for start in range(0, len(ts), 137):
+            part = vector.batch(xs[start:start + 137], ys[start:start + 137], ts[start:start + 137])
+            for f, (rows, values) in part.items():
+                got[f][0].extend((rows + start).tolist())
+                got[f][1].extend(values.tolist())
+        for f in FEATURES:
+            assert got[f][0] == expected[f][0], f
+            np.testing.assert_allclose(got[f][1], expected[f][1], rtol=1e-9, atol=1e-12)
+        for slot in TrajectoryFeatures.__slots__:
+            assert getattr(vector, slot) == pytest.approx(getattr(scalar, slot)), slot
+
+    def test_pause_ends_stroke(self):
+        features = TrajectoryFeatures()
+        for i in range(20):
+            features.step(i * 10.0, 0.0, i * 0.01)
+        assert features.speed is not None
+        speed, accel, jerk, curvature, angle, pause = features.step(400.0, 0.0, 1.19)
+        assert pause == pytest.approx(1.0)
+        assert accel is None and features.speed is None
+
+
+class TestMovementAgentFeatures:
+    def test_speed_only_by_default(self):
+        from agents.movement_agent import MovementAgent
+        agent = MovementAgent(None, None)
+        assert agent.features == ("speed",)
+        assert not agent.trajectory.shape
+
+    def test_opt_in_features(self):
+        from agents.movement_agent import MovementAgent
+        agent = MovementAgent(None, None, features=FEATURES)
+        assert agent.features == FEATURES
+        assert agent.trajectory.shape
+        with pytest.raises(ValueError):
+            MovementAgent(None, None, features=("speed", "wobble"))
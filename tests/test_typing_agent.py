@@ -0,0 +1,87 @@
+import queue
+
+from agents.typing_agent import TypingAgent
+
+
+def drain(q):
+    items = []
+    while not q.empty():
+        items.append(q.get_nowait())
+    return items
+
+
+class TestTypingAgentWpm:
+    def setup_method(self):
+        self.anomalies = queue.Queue()
+        self.agent = TypingAgent(self.anomalies, queue.Queue(), cooldown=0.0, digraphs=False)
+        self.wall = 1_000_000.0
+        self.agent._now = lambda: self.wall
+
+    def test_wpm_uses_sample_time(self):
+        # 10 chars/s is 120 WPM
+        for i in range(100):
+            self.wall += 0.1
+            self.agent._process_key(self.wall, True)
+        assert self.agent.typing_speed_wpm > 80
+
+    def test_skewed_endpoint_clock(self):
+        # The endpoint stamps its samples 30 s behind this host: still 120 WPM
+        for i in range(100):
+            self.wall += 0.1
+            self.agent._process_key(self.wall - 30.0, True)
+        assert self.agent.typing_speed_wpm > 80
+        speed = [e for e in drain(self.anomalies) if e["message"].startswith("Unusual Speed")]
+        assert speed and speed[0]["severity"] == "High"
+
+    def test_batch_drained_late(self):
+        # A batch typed at 120 WPM and drained a minute later is scored when it was typed
+        samples = [(self.wall + i * 0.1, True) for i in range(100)]
+        self.wall += 60.0
+        self.agent.process_batch(samples)
+        assert self.agent.typing_speed_wpm > 80
+
+    def test_idle_gap_resets_rate(self):
+        for i in range(50):
+            self.agent._process_key(self.wall + i * 0.1, True)
+        assert self.agent._calculate_wpm(self.wall + 4.9 + 10.0) == 0
+
+
+class TestTypingAgentDigraphs:
+    def setup_method(self):
+        self.anomalies = queue.Queue()
+        self.stats = queue.Queue()
+        self.agent = TypingAgent(self.anomalies, self.stats, cooldown=0.0, digraphs=True)
+        self.t = 1_000_000.0
+        self.agent._now = lambda: self.t
+        self.agent.last_ts = self.t
+        # t->h is fast, h->e slow, e->t in between; a little jitter so every digraph has a
+        # spread. Overall the delays average 0.2 s.
+        for i in range(300):
+            jitter = 0.004 * (i % 5 - 2)
+            for code, delay in ((ord("t"), 0.2), (ord("h"), 0.1), (ord("e"), 0.3)):
+                self.key(code, delay + jitter)
+        drain(self.anomalies)
+        drain(self.stats)
+
+    def key(self, code, delay):
+        # One stats publish per key: step past the 0.5 s stats throttle
+        self.t += delay
+        self.agent._last_stat_ts = 0.0
+        self.agent._process_key(self.t, True, code)
+
+    def test_alert_uses_digraph_stats_use_overall_profile(self):
+        # 0.3 s after "t" is ordinary overall, but three times the usual t->h delay
+        self.key(ord("t"), 0.2)
+        self.key(ord("h"), 0.3)
+        alerts = drain(self.anomalies)
+        stats = drain(self.stats)[-1]
+        profile = self.agent.profile
+        assert any(a["message"].startswith("Delay 300ms") for a in alerts)
+        assert stats["mean"] == profile.mean and stats["std"] == profile.std
+        assert stats["z"] < self.agent.sigma
+        assert abs(stats["z"] - abs(0.3 - stats["mean"]) / stats["std"]) < 0.5
+
+    def test_usual_digraph_no_alert(self):
+        self.key(ord("t"), 0.2)
+        self.key(ord("h"), 0.1)
+        assert not [a for a in drain(self.anomalies) if a["message"].startswith("Delay")]
@@ -0,0 +1,149 @@
+import queue
+import threading
+import time
+
+import pytest
+
+from wakeup import BoundedQueue, NotifyingQueue, Wakeup
+
+
+def drain(q):
+    items = []
+    while True:
+        try:
+            items.append(q.get_nowait())
+        except queue.Empty:
+            return items
+
+
+class TestWakeup:
+    def setup_method(self):
+        self.wakeup = Wakeup()
+
+    def teardown_method(self):
+        self.wakeup.close()
+
+    def test_notifies_coalesce_until_clear(self):
+        for _ in range(100):
+            self.wakeup.notify()
+        assert self.wakeup.notifications == 1
+        assert self.wakeup.wait(0)
+        self.wakeup.clear()
+        assert not self.wakeup.wait(0)
+        self.wakeup.notify()  # clear() re-armed the channel
+        assert self.wakeup.notifications == 2 and self.wakeup.wait(0)
+
+    def test_wait_times_out(self):
+        t0 = time.perf_counter()
+        assert not self.wakeup.wait(0.05)
+        assert time.perf_counter() - t0 >= 0.04
+
+    def test_notify_from_another_thread(self):
+        threading.Timer(0.02, self.wakeup.notify).start()
+        assert self.wakeup.wait(2.0)
+
+    def test_sender_bytes_are_drained_by_clear(self):
+        sender = self.wakeup.sender()
+        for _ in range(5):
+            sender.send(b"\0")  # what an agent process sends per record
+        assert self.wakeup.wait(0)
+        self.wakeup.clear()
+        assert not self.wakeup.wait(0)
+
+    def test_notifying_queue(self):
+        q = NotifyingQueue(self.wakeup)
+        q.put("item")
+        assert self.wakeup.wait(0) and q.get_nowait() == "item"
+
+
+class TestBoundedQueue:
+    def setup_method(self):
+        self.wakeup = Wakeup()
+
+    def teardown_method(self):
+        self.wakeup.close()
+
+    def test_drop_oldest(self):
+        q = BoundedQueue(self.wakeup, maxsize=3)
+        for i in range(5):
+            q.put({"source": "Typing", "n": i})
+        assert [item["n"] for item in drain(q)] == [2, 3, 4]
+        assert q.dropped == {"Typing": 2} and q.drops == 2
+
+    def test_drop_oldest_saturates_until_get(self):
+        q = BoundedQueue(self.wakeup, maxsize=1)
+        q.put({"source": "Typing", "n": 0})
+        assert not q.saturated
+        q.put({"source": "Typing", "n": 1})
+        assert q.saturated
+        assert q.get_nowait()["n"] == 1
+        assert not q.saturated
+
+    def test_latest_replaces_per_source(self):
+        q = BoundedQueue(self.wakeup, maxsize=2, policy="latest")
+        q.put({"source": "Movement", "n": 1})
+        q.put({"source": "Typing", "n": 2})
+        q.put({"source": "Movement", "n": 3})
+        assert q.replaced == {"Movement": 1} and q.drops == 0
+        q.put({"source": "AppUsage", "n": 4})  # a third source: the oldest goes
+        assert [item["n"] for item in drain(q)] == [2, 4]
+        assert q.dropped == {"Movement": 1}
+
+    def test_block_saturates_after_one_timeout(self):
+        q = BoundedQueue(self.wakeup, maxsize=1, policy="block", timeout=0.05)
+        q.put({"source": "Typing", "n": 0})
+        t0 = time.perf_counter()
+        q.put({"source": "Typing", "n": 1})
+        waited = time.perf_counter() - t0
+        t0 = time.perf_counter()
+        for i in range(10):
+            q.put({"source": "Typing", "n": i + 2})
+        assert waited >= 0.04
+        assert time.perf_counter() - t0 < 0.04  # saturated: no further waits
+        assert q.drops == 11
+        assert q.get_nowait()["n"] == 0
+        q.put({"source": "Typing", "n": 99})  # get() made room and cleared saturation
+        assert q.get_nowait()["n"] == 99
+
+    def test_put_notifies(self):
+        q = BoundedQueue(self.wakeup, maxsize=2)
+        self.wakeup.clear()
+        q.put({"source": "Typing"})
+        assert self.wakeup.wait(0)
+
+    @pytest.mark.parametrize("kwargs", [{"policy": "fifo"}, {"maxsize": 0}])
+    def test_bad_arguments(self, kwargs):
+        with pytest.raises(ValueError):
+            BoundedQueue(self.wakeup, **kwargs)
+
+
+class TestEngineAnomalyQueue:
+    def test_runtime_default_never_blocks(self):
+        from engine import GuardioEngine
+        engine = GuardioEngine(anomaly_capacity=2)
+        t0 = time.perf_counter()
+        for i in range(50):
+            engine.anomaly_queue.put({"source": "Movement", "n": i})
+        assert time.perf_counter() - t0 < 0.05
+        assert engine.anomaly_queue.policy == "drop_oldest"
+        assert engine.anomaly_queue.saturated and engine.anomaly_queue.drops == 48
+
+    @pytest.mark.parametrize("policy", ["block", "latest"])
+    def test_other_policies_refused(self, policy):
+        from engine import GuardioEngine
+        with pytest.raises(ValueError, match=policy):
+            GuardioEngine(anomaly_policy=policy)
+
+    def test_drops_reported_once_per_source(self):
+        from engine import GuardioEngine
+        engine = GuardioEngine(anomaly_capacity=2)
+        logs = []
+        engine.log = logs.append
+        for source in ("Movement", "Movement", "Typing", "Typing", "Typing"):
+            engine.anomaly_queue.put({"source": source})
+        engine.process_pending()
+        assert logs == ["[System] Anomaly queue full, discarded alerts: 2 Movement, 1 Typing"]
+        engine.process_pending()
+        engine.anomaly_queue.put({"source": "Typing"})
+        engine.process_pending()
+        assert len(logs) == 1  # nothing new was discarded